@@ -25,6 +25,8 @@ try:
     from core.alpha_score_engine import AlphaScoreEngine
     from utils.smart_data_manager import SmartDataManager
     from utils.logger import setup_logger
+    from utils.tracing import DEFAULT_TRACE_PATH, load_trace_summary
+    from utils.metrics import DEFAULT_METRICS_PORT, scrape
     
     # ייבוא כל הסוכנים
     from core.adx_score_agent import ADXScoreAgent
@@ -595,6 +597,80 @@ def create_summary_dashboard(symbol: str, df: pd.DataFrame):
         df_summary = df_summary.sort_values('ציון', ascending=False)
         st.dataframe(df_summary, use_container_width=True)
 
+# ביצועי סוכנים (מעקב spans של AlphaScoreEngine)
+def create_performance_dashboard(symbol: str, df: pd.DataFrame):
+    """השהיה וזיכרון לכל סוכן - מהייצוא של AlphaScoreEngine.export_traces"""
+    _, alpha_engine, _ = initialize_systems()
+    profile = st.selectbox("פרופיל ניתוח", ["technical", "full", "sentiment", "news"], index=0)
+
+    if alpha_engine and st.button("⏱️ הרץ הערכה עם מעקב"):
+        with st.spinner(f"מעריך {symbol}..."):
+            alpha_engine.evaluate(symbol, df, profile=profile)
+            alpha_engine.export_traces()
+
+    summary = load_trace_summary(DEFAULT_TRACE_PATH)
+    if not summary or not summary.get("agents"):
+        st.info(f"אין נתוני מעקב ב-{DEFAULT_TRACE_PATH} - הרץ הערכה עם מעקב")
+        return
+
+    evaluations = summary.get("evaluations", {})
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("הערכות", evaluations.get("count", 0))
+    with col2:
+        st.metric("הערכה p50 (ms)", f"{evaluations.get('p50_ms', 0):.0f}")
+    with col3:
+        st.metric("הערכה p95 (ms)", f"{evaluations.get('p95_ms', 0):.0f}")
+
+    rows = []
+    for agent_name, stats in summary["agents"].items():
+        phases = stats.get("phases", {})
+        rows.append({
+            "סוכן": agent_name,
+            "קריאות": stats.get("count", 0),
+            "p50 (ms)": stats.get("p50_ms", 0),
+            "p95 (ms)": stats.get("p95_ms", 0),
+            "p99 (ms)": stats.get("p99_ms", 0),
+            **{f"{phase} p50 (ms)": phases.get(phase, {}).get("p50_ms", 0)
+               for phase in ("fetch", "compute", "post_process")},
+            "RSS מקסימלי (MB)": stats.get("rss_delta_max_mb", 0),
+            "שגיאות": stats.get("errors", 0),
+        })
+    df_perf = pd.DataFrame(rows)
+
+    fig = px.bar(
+        df_perf.head(15),
+        x="סוכן",
+        y=["fetch p50 (ms)", "compute p50 (ms)", "post_process p50 (ms)"],
+        title="השהיה לפי שלב (p50) - הסוכנים האיטיים ביותר",
+        labels={'value': 'ms', 'variable': 'שלב'}
+    )
+    fig.update_layout(height=400, barmode="stack")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("📋 השהיה וזיכרון לכל סוכן")
+    st.dataframe(df_perf, use_container_width=True)
+
+    if summary.get("recent_traces"):
+        with st.expander("עץ ההערכה האחרונה"):
+            st.json(summary["recent_traces"][-1])
+
+    create_metrics_panel()
+
+# מדדי Prometheus מה-endpoint המקומי (main.py --metrics-port)
+def create_metrics_panel():
+    """קריאת endpoint המדדים והצגת המונים וה-gauges"""
+    with st.expander("📡 מדדי מערכת (Prometheus)"):
+        url = st.text_input("כתובת endpoint", f"http://127.0.0.1:{DEFAULT_METRICS_PORT}/metrics")
+        try:
+            samples = scrape(url)
+        except Exception as e:
+            st.info(f"ה-endpoint לא זמין ({e}) - הפעל עם main.py --metrics-port")
+            return
+        rows = [{"מדד": s["name"], "labels": ", ".join(f"{k}={v}" for k, v in s["labels"].items()), "ערך": s["value"]}
+                for s in samples if not s["name"].endswith("_bucket")]
+        st.dataframe(pd.DataFrame(rows), use_container_width=True)
+
 # פונקציה ראשית
 def main():
     # כותרת ראשית
@@ -635,10 +711,11 @@ def main():
         return
     
     # יצירת tabs ראשיים
-    tab1, tab2, tab3 = st.tabs([
+    tab1, tab2, tab3, tab4 = st.tabs([
         "📊 סיכום כללי", 
         "🤖 ניהול סוכנים", 
-        "📈 ניתוח מפורט"
+        "📈 ניתוח מפורט",
+        "⏱️ ביצועי סוכנים"
     ])
     
     # Tab 1: סיכום כללי
@@ -721,6 +798,11 @@ def main():
                         st.json(result['details'])
             else:
                 st.error(f"לא ניתן להריץ {config['name']}")
+    
+    # Tab 4: ביצועי סוכנים
+    with tab4:
+        st.header(f"⏱️ ביצועי סוכנים - {symbol}")
+        create_performance_dashboard(symbol, df)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -2,109 +2,130 @@
 Charles_FocusedSpec - Core Module
 מערכת חיזוי מניות פורצות - מודול ליבה
 
-מודול זה מכיל את כל הסוכנים והמנועים הראשיים של המערכת
+מודול זה מכיל את כל הסוכנים והמנועים הראשיים של המערכת.
+הסוכנים נטענים בעצלות (PEP 562): `from core import NLPAnalyzer` מייבא רק את
+core.nlp_analyzer, כך ש-`import core` אינו מושך transformers/sklearn/openai וכו'.
 """
 
-# Base Classes
-from .base.base_agent import BaseAgent
-from .base.live_executable_agent import LiveExecutableAgent
-
-# Main Engine
-from .alpha_score_engine import AlphaScoreEngine
-
-# Core Analysis Agents
-from .enhanced_advanced_analyzer import EnhancedAdvancedAnalyzer
-from .bullish_pattern_spotter import BullishPatternSpotter
-from .valuation_detector import ValuationDetector
-from .news_catalyst_agent import NewsCatalystAgent
-from .sentiment_scorer import SentimentScorer
-from .social_media_hype_scanner import SocialMediaHypeScanner
-from .nlp_analyzer import NLPAnalyzer
-from .macro_trend_scanner import MacroTrendScanner
-from .event_scanner import EventScanner
-
-# Technical Analysis Agents
-from .adx_score_agent import ADXScoreAgent
-from .golden_cross_detector import GoldenCrossDetector
-from .bollinger_squeeze import BollingerSqueeze
-from .moving_average_pressure_bot import MovingAveragePressureBot
-from .gap_detector_ultimate import GapDetectorUltimate
-from .breakout_retest_recognizer import BreakoutRetestRecognizer
-from .support_zone_strength_detector import SupportZoneStrengthDetector
-from .parabolic_agent import ParabolicAgent
-from .volume_tension_meter import VolumeTensionMeter
-
-# Advanced Analysis Agents
-from .advanced_pattern_analyzer import AdvancedPatternAnalyzer
-from .trend_shift_agent import TrendShiftAgent
-from .profitability_metrics import ProfitabilityMetrics
-from .financials_parser import FinancialsParserAgent
-from .pattern_detector import PatternDetector
-
-# Market Intelligence Agents
-from .geopolitical_risk_monitor import GeopoliticalRiskMonitor
-from .pump_and_dump_detector import PumpAndDumpDetector
-from .ipo_volume_spike_detector import IPOVolumeSpikeDetector
-from .earnings_surprise_tracker import EarningsSurpriseTracker
-from .early_reversal_anticipator import EarlyReversalAnticipator
-from .media_buzz_tracker import MediaBuzzTracker
-from .forum_monitor import ForumMonitor
-from .gpt_sentiment_model import GPTSentimentModel
-from .google_trends import GoogleTrendsTracker
-from .etf_flow_tracker import ETFFlowTracker
-from .market_data_connector import MarketDataConnector
-from .macro_event_sensitivity import MacroEventSensitivity
-
-# Options & Derivatives
-from .options_unusual_volume_agent import OptionsUnusualVolumeAgent
-
-# Sector Analysis
-from .sector_rotation_analyzer import SectorRotationAnalyzer
-from .sector_momentum_agent import SectorMomentumAgent
-from .relative_strength import RelativeStrengthAgent
-
-# Short Interest & Volume
-from .short_interest_spike_agent import ShortInterestSpikeAgent
-from .volume_spike_agent import VolumeSpikeAgent
-
-# Trend Analysis
-from .trend_detector import TrendDetector
-from .vwap_agent import VWAPAgent
-
-# Volatility & Risk
-from .volatility_score_agent import VolatilityScoreAgent
-from .atr_score_agent import ATRScoreAgent
-
-# Validation & Orchestration
-from .multi_agent_validator import MultiAgentValidator
-from .breakout_screener import BreakoutScreener
-from .v_reversal_agent import VReversalAgent
-from .midterm_momentum_agent import MidtermMomentumAgent
-from .macd_momentum_detector import MACDMomentumDetector
-from .high_conviction_orchestrator import HighConvictionOrchestrator
-
-# AI & ML Models
-from .anomaly_detector import AnomalyDetector
-from .ml_breakout_model import MLBreakoutModel
-from .ai_event_spotter import AIEventSpotter
-
-# Dark Pool & Institutional
-from .dark_pool_agent import DarkPoolAgent
-from .big_money_inflow_agent import BigMoneyInflowAgent
-from .liquidity_trap_agent import LiquidityTrapAgent
-from .float_pressure_evaluator import FloatPressureEvaluator
-
-# VCP Patterns
-from .vcp_super_pattern_agent import VCPSuperPatternAgent
-
-# Return Forecasting
-from .return_forecaster import ReturnForecaster
-
-# Meta Agent
-from .meta_agent import MetaAgent
-
-# Subagents
-from .subagents.macd_rsi_divergence_agent import MACDRSIDivergenceAgent
+import importlib
+
+# שם מיוצא -> תת-מודול שמגדיר אותו
+_LAZY_IMPORTS = {
+    # Base Classes
+    'BaseAgent': 'base.base_agent',
+    'LiveExecutableAgent': 'base.live_executable_agent',
+
+    # Main Engine
+    'AlphaScoreEngine': 'alpha_score_engine',
+
+    # Core Analysis Agents
+    'EnhancedAdvancedAnalyzer': 'enhanced_advanced_analyzer',
+    'BullishPatternSpotter': 'bullish_pattern_spotter',
+    'ValuationDetector': 'valuation_detector',
+    'NewsCatalystAgent': 'news_catalyst_agent',
+    'SentimentScorer': 'sentiment_scorer',
+    'SocialMediaHypeScanner': 'social_media_hype_scanner',
+    'NLPAnalyzer': 'nlp_analyzer',
+    'MacroTrendScanner': 'macro_trend_scanner',
+    'EventScanner': 'event_scanner',
+
+    # Technical Analysis Agents
+    'ADXScoreAgent': 'adx_score_agent',
+    'GoldenCrossDetector': 'golden_cross_detector',
+    'BollingerSqueeze': 'bollinger_squeeze',
+    'MovingAveragePressureBot': 'moving_average_pressure_bot',
+    'GapDetectorUltimate': 'gap_detector_ultimate',
+    'BreakoutRetestRecognizer': 'breakout_retest_recognizer',
+    'SupportZoneStrengthDetector': 'support_zone_strength_detector',
+    'ParabolicAgent': 'parabolic_agent',
+    'VolumeTensionMeter': 'volume_tension_meter',
+
+    # Advanced Analysis Agents
+    'AdvancedPatternAnalyzer': 'advanced_pattern_analyzer',
+    'TrendShiftAgent': 'trend_shift_agent',
+    'ProfitabilityMetrics': 'profitability_metrics',
+    'FinancialsParserAgent': 'financials_parser',
+    'PatternDetector': 'pattern_detector',
+
+    # Market Intelligence Agents
+    'GeopoliticalRiskMonitor': 'geopolitical_risk_monitor',
+    'PumpAndDumpDetector': 'pump_and_dump_detector',
+    'IPOVolumeSpikeDetector': 'ipo_volume_spike_detector',
+    'EarningsSurpriseTracker': 'earnings_surprise_tracker',
+    'EarlyReversalAnticipator': 'early_reversal_anticipator',
+    'MediaBuzzTracker': 'media_buzz_tracker',
+    'ForumMonitor': 'forum_monitor',
+    'GPTSentimentModel': 'gpt_sentiment_model',
+    'GoogleTrendsTracker': 'google_trends',
+    'ETFFlowTracker': 'etf_flow_tracker',
+    'MarketDataConnector': 'market_data_connector',
+    'MacroEventSensitivity': 'macro_event_sensitivity',
+
+    # Options & Derivatives
+    'OptionsUnusualVolumeAgent': 'options_unusual_volume_agent',
+
+    # Sector Analysis
+    'SectorRotationAnalyzer': 'sector_rotation_analyzer',
+    'SectorMomentumAgent': 'sector_momentum_agent',
+    'RelativeStrengthAgent': 'relative_strength',
+
+    # Short Interest & Volume
+    'ShortInterestSpikeAgent': 'short_interest_spike_agent',
+    'VolumeSpikeAgent': 'volume_spike_agent',
+
+    # Trend Analysis
+    'TrendDetector': 'trend_detector',
+    'VWAPAgent': 'vwap_agent',
+
+    # Volatility & Risk
+    'VolatilityScoreAgent': 'volatility_score_agent',
+    'ATRScoreAgent': 'atr_score_agent',
+
+    # Validation & Orchestration
+    'MultiAgentValidator': 'multi_agent_validator',
+    'BreakoutScreener': 'breakout_screener',
+    'VReversalAgent': 'v_reversal_agent',
+    'MidtermMomentumAgent': 'midterm_momentum_agent',
+    'MACDMomentumDetector': 'macd_momentum_detector',
+    'HighConvictionOrchestrator': 'high_conviction_orchestrator',
+
+    # AI & ML Models
+    'AnomalyDetector': 'anomaly_detector',
+    'MLBreakoutModel': 'ml_breakout_model',
+    'AIEventSpotter': 'ai_event_spotter',
+
+    # Dark Pool & Institutional
+    'DarkPoolAgent': 'dark_pool_agent',
+    'BigMoneyInflowAgent': 'big_money_inflow_agent',
+    'LiquidityTrapAgent': 'liquidity_trap_agent',
+    'FloatPressureEvaluator': 'float_pressure_evaluator',
+
+    # VCP Patterns
+    'VCPSuperPatternAgent': 'vcp_super_pattern_agent',
+
+    # Return Forecasting
+    'ReturnForecaster': 'return_forecaster',
+
+    # Meta Agent
+    'MetaAgent': 'meta_agent',
+
+    # Subagents
+    'MACDRSIDivergenceAgent': 'subagents.macd_rsi_divergence_agent',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 # Version
 __version__ = "1.0.0"
@@ -2,9 +2,8 @@
 
 import pandas as pd
 import numpy as np
-from ta.trend import ADXIndicator
 from datetime import datetime, timezone
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 # קבועים ברירת מחדל (אם לא יועברו ב-config)
 DEFAULTS = {
@@ -19,6 +18,8 @@ DEFAULTS = {
 }
 
 class ADXScoreAgent(BaseAgent):
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         # קונפיגורציה דינמית
@@ -35,7 +36,7 @@ class ADXScoreAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -81,6 +82,7 @@ class ADXScoreAgent(BaseAgent):
                 "explanation": f"אין מספיק נתונים לחישוב ADX (נדרשים לפחות {self.ADX_LOOKBACK_PERIOD}, יש {len(df)})",
                 "details": {"timeframe": timeframe}
             }
+        from ta.trend import ADXIndicator
         adx_indicator = ADXIndicator(
             high=df[self.HIGH_COL],
             low=df[self.LOW_COL],
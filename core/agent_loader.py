@@ -6,9 +6,10 @@ Agent Loader - טוען דינמי לסוכנים
 ולידציה וניהול תלויות.
 """
 
-import yaml
 import importlib
+import json
 import logging
+import threading
 from typing import Dict, List, Optional, Any, Type
 from pathlib import Path
 from dataclasses import dataclass
@@ -16,6 +17,68 @@ from core.base.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+# מטמון מופעי סוכנים ברמת התהליך: (מודול, מחלקה, קונפיגורציה) -> מופע
+_SHARED_AGENTS: Dict[tuple, Any] = {}
+_SHARED_AGENTS_LOCK = threading.Lock()
+# נעילה לכל מפתח - רק תהליכון אחד בונה סוכן מסוים, השאר ממתינים למופע שלו
+_BUILD_LOCKS: Dict[tuple, threading.Lock] = {}
+
+
+def _config_key(config: Optional[Dict[str, Any]]) -> str:
+    try:
+        return json.dumps(config or {}, sort_keys=True, default=str)
+    except Exception:
+        return repr(config)
+
+
+def get_shared_agent(module_path: str, class_name: str,
+                     config: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    יצירת סוכן פעם אחת לתהליך ושימוש חוזר בו (לפי מודול, מחלקה וקונפיגורציה)
+
+    Args:
+        module_path: נתיב המודול (למשל core.nlp_analyzer)
+        class_name: שם המחלקה
+        config: קונפיגורציה לסוכן
+
+    Returns:
+        מופע הסוכן או None אם הייבוא/היצירה נכשלו
+    """
+    key = (module_path, class_name, _config_key(config))
+    with _SHARED_AGENTS_LOCK:
+        if key in _SHARED_AGENTS:
+            return _SHARED_AGENTS[key]
+        build_lock = _BUILD_LOCKS.setdefault(key, threading.Lock())
+
+    with build_lock:
+        with _SHARED_AGENTS_LOCK:
+            # תהליכון אחר סיים לבנות את הסוכן בזמן שהמתנו
+            if key in _SHARED_AGENTS:
+                return _SHARED_AGENTS[key]
+        try:
+            module = importlib.import_module(module_path)
+            agent_instance = getattr(module, class_name)(config)
+        except Exception as e:
+            # כישלון לא נשמר במטמון - הקריאה הבאה תנסה שוב
+            logger.warning(f"לא ניתן לטעון {module_path}.{class_name}: {e}")
+            return None
+        with _SHARED_AGENTS_LOCK:
+            _SHARED_AGENTS[key] = agent_instance
+        return agent_instance
+
+
+def is_agent_loaded(module_path: str, class_name: str,
+                    config: Optional[Dict[str, Any]] = None) -> bool:
+    """האם הסוכן כבר נבנה בתהליך הזה"""
+    with _SHARED_AGENTS_LOCK:
+        return _SHARED_AGENTS.get((module_path, class_name, _config_key(config))) is not None
+
+
+def clear_shared_agents():
+    """ניקוי מטמון הסוכנים המשותף"""
+    with _SHARED_AGENTS_LOCK:
+        _SHARED_AGENTS.clear()
+
 @dataclass
 class AgentInfo:
     """מידע על סוכן"""
@@ -44,12 +107,14 @@ class AgentLoader:
         self.config_path = config_path
         self.config = self._load_config()
         self.agents: Dict[str, AgentInfo] = {}
+        self.disabled_agents: set = set()
         self.loaded_agents: Dict[str, BaseAgent] = {}
         self._parse_agents()
         
     def _load_config(self) -> Dict[str, Any]:
         """טעינת קובץ קונפיגורציה"""
         try:
+            import yaml  # ייבוא בעצלות - נדרש רק בטעינת הקונפיגורציה
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 config = yaml.safe_load(f)
             logger.info(f"קובץ קונפיגורציה נטען בהצלחה: {self.config_path}")
@@ -76,6 +141,8 @@ class AgentLoader:
                         category=category
                     )
                     self.agents[agent_name] = agent_info
+                else:
+                    self.disabled_agents.add(agent_name)
         
         logger.info(f"נטענו {len(self.agents)} סוכנים פעילים")
     
@@ -109,14 +176,11 @@ class AgentLoader:
         agent_info = self.agents[agent_name]
         
         try:
-            # טעינת המודול
-            module = importlib.import_module(agent_info.module_path)
-            
-            # קבלת המחלקה
-            agent_class = getattr(module, agent_info.class_name)
-            
-            # יצירת מופע עם קונפיגורציה
-            agent_instance = agent_class(agent_info.config)
+            # טעינת המודול ויצירת מופע (משותף לכל התהליך)
+            agent_instance = get_shared_agent(agent_info.module_path, agent_info.class_name,
+                                              agent_info.config)
+            if agent_instance is None:
+                return None
             
             # ולידציה
             if not self._validate_agent(agent_instance):
@@ -194,6 +258,10 @@ class AgentLoader:
             logger.error(f"שגיאה בולידציה: {e}")
             return False
     
+    def is_enabled(self, agent_name: str) -> bool:
+        """האם הסוכן פעיל - סוכן שלא מופיע בקונפיגורציה נחשב פעיל"""
+        return agent_name not in self.disabled_agents
+
     def get_agent_info(self, agent_name: str) -> Optional[AgentInfo]:
         """קבלת מידע על סוכן"""
         return self.agents.get(agent_name)
@@ -288,6 +356,7 @@ class AgentLoader:
         """טעינה מחדש של הקונפיגורציה"""
         self.config = self._load_config()
         self.agents.clear()
+        self.disabled_agents.clear()
         self.loaded_agents.clear()
         self._parse_agents()
         logger.info("קונפיגורציה נטענה מחדש")
@@ -1,18 +1,9 @@
+import inspect
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
-import yaml
 import os
-
-def try_import(module_name: str, class_name: str):
-    """ניסיון ייבוא דינמי של מודול"""
-    try:
-        module = __import__(module_name, fromlist=[class_name])
-        class_obj = getattr(module, class_name)
-        return lambda config=None: class_obj(config) if class_obj else None
-    except Exception as e:
-        logging.warning(f"לא ניתן לייבא {module_name}.{class_name}: {e}")
-        return lambda config=None: None
+from collections.abc import Mapping
 
 class AlphaScoreEngine:
     """
@@ -55,60 +46,161 @@ class AlphaScoreEngine:
         "BreakoutRetestRecognizer": 1,  # זיהוי פריצות
     }
 
+    # סוכן -> מודול בתוך core (נטען רק כשפרופיל צריך אותו)
+    AGENT_MODULES = {
+        "EnhancedAdvancedAnalyzer": "enhanced_advanced_analyzer",
+        "BullishPatternSpotter": "bullish_pattern_spotter",
+        "ADXScoreAgent": "adx_score_agent",
+        "MACDMomentumDetector": "macd_momentum_detector",
+        "ValuationDetector": "valuation_detector",
+        "FinancialStabilityAgent": "financial_stability_agent",
+        "NewsCatalystAgent": "news_catalyst_agent",
+        "SocialMediaHypeScanner": "social_media_hype_scanner",
+        "NLPAnalyzer": "nlp_analyzer",
+        "SentimentScorer": "sentiment_scorer",
+        "EarningsSurpriseTracker": "earnings_surprise_tracker",
+        "AnalystRatingAgent": "analyst_rating_agent",
+        "GeopoliticalRiskMonitor": "geopolitical_risk_monitor",
+        "EventScanner": "event_scanner",
+        "GapDetectorUltimate": "gap_detector_ultimate",
+        "CandlestickAgent": "candlestick_agent",
+        "VolumeSpikeAgent": "volume_spike_agent",
+        "GoldenCrossDetector": "golden_cross_detector",
+        "BollingerSqueeze": "bollinger_squeeze",
+        "SupportZoneStrengthDetector": "support_zone_strength_detector",
+        "TrendDetector": "trend_detector",
+        "TrendShiftAgent": "trend_shift_agent",
+        "VReversalAgent": "v_reversal_agent",
+        "ParabolicAgent": "parabolic_agent",
+        "ReturnForecaster": "return_forecaster",
+        "GrowthScanner": "growth_scanner",
+        "MidtermMomentumAgent": "midterm_momentum_agent",
+        "MovingAveragePressureBot": "moving_average_pressure_bot",
+        "ATRScoreAgent": "atr_score_agent",
+        "MultiAgentValidator": "multi_agent_validator",
+        "HighConvictionOrchestrator": "high_conviction_orchestrator",
+        "BreakoutRetestRecognizer": "breakout_retest_recognizer",
+    }
+
+    # פרופילי ניתוח (analysis_type ב-main.py) - פרופילים זולים לא בונים סוכני NLP/ML כבדים
+    PROFILES = {
+        "technical": [
+            "EnhancedAdvancedAnalyzer", "BullishPatternSpotter", "ADXScoreAgent",
+            "MACDMomentumDetector", "GapDetectorUltimate", "CandlestickAgent",
+            "VolumeSpikeAgent", "GoldenCrossDetector", "BollingerSqueeze",
+            "SupportZoneStrengthDetector", "TrendDetector", "TrendShiftAgent",
+            "VReversalAgent", "ParabolicAgent", "MidtermMomentumAgent",
+            "MovingAveragePressureBot", "ATRScoreAgent", "BreakoutRetestRecognizer",
+        ],
+        "sentiment": [
+            "SentimentScorer", "SocialMediaHypeScanner", "AnalystRatingAgent",
+        ],
+        "news": [
+            "NewsCatalystAgent", "EventScanner", "EarningsSurpriseTracker",
+            "GeopoliticalRiskMonitor",
+        ],
+    }
+
     def __init__(self, config=None):
-        """אתחול מנוע הציון"""
+        """אתחול מנוע הציון - הסוכנים עצמם נבנים רק בשימוש הראשון"""
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         
         # טעינת קונפיגורציה
-        self.cfg = self._load_config()
-        
-        # אתחול הסוכנים (מסונכרן לקבצים הקיימים)
-        self.agents = {
-            "EnhancedAdvancedAnalyzer": try_import('core.enhanced_advanced_analyzer', 'EnhancedAdvancedAnalyzer')(self.cfg.get("EnhancedAdvancedAnalyzer")),
-            "BullishPatternSpotter": try_import('core.bullish_pattern_spotter', 'BullishPatternSpotter')(self.cfg.get("BullishPatternSpotter")),
-            "ADXScoreAgent": try_import('core.adx_score_agent', 'ADXScoreAgent')(self.cfg.get("ADXScoreAgent")),
-            "MACDMomentumDetector": try_import('core.macd_momentum_detector', 'MACDMomentumDetector')(self.cfg.get("MACDMomentumDetector")),
-            "ValuationDetector": try_import('core.valuation_detector', 'ValuationDetector')(self.cfg.get("ValuationDetector")),
-            "FinancialStabilityAgent": try_import('core.financial_stability_agent', 'FinancialStabilityAgent')(self.cfg.get("FinancialStabilityAgent")),
-            "NewsCatalystAgent": try_import('core.news_catalyst_agent', 'NewsCatalystAgent')(self.cfg.get("NewsCatalystAgent")),
-            "SocialMediaHypeScanner": try_import('core.social_media_hype_scanner', 'SocialMediaHypeScanner')(self.cfg.get("SocialMediaHypeScanner")),
-            "NLPAnalyzer": try_import('core.nlp_analyzer', 'NLPAnalyzer')(self.cfg.get("NLPAnalyzer")),
-            "SentimentScorer": try_import('core.sentiment_scorer', 'SentimentScorer')(self.cfg.get("SentimentScorer")),
-            "EarningsSurpriseTracker": try_import('core.earnings_surprise_tracker', 'EarningsSurpriseTracker')(self.cfg.get("EarningsSurpriseTracker")),
-            "AnalystRatingAgent": try_import('core.analyst_rating_agent', 'AnalystRatingAgent')(self.cfg.get("AnalystRatingAgent")),
-            "GeopoliticalRiskMonitor": try_import('core.geopolitical_risk_monitor', 'GeopoliticalRiskMonitor')(self.cfg.get("GeopoliticalRiskMonitor")),
-            "EventScanner": try_import('core.event_scanner', 'EventScanner')(self.cfg.get("EventScanner")),
-            "GapDetectorUltimate": try_import('core.gap_detector_ultimate', 'GapDetectorUltimate')(self.cfg.get("GapDetectorUltimate")),
-            "CandlestickAgent": try_import('core.candlestick_agent', 'CandlestickAgent')(self.cfg.get("CandlestickAgent")),
-            "VolumeSpikeAgent": try_import('core.volume_spike_agent', 'VolumeSpikeAgent')(self.cfg.get("VolumeSpikeAgent")),
-            "GoldenCrossDetector": try_import('core.golden_cross_detector', 'GoldenCrossDetector')(self.cfg.get("GoldenCrossDetector")),
-            "BollingerSqueeze": try_import('core.bollinger_squeeze', 'BollingerSqueeze')(self.cfg.get("BollingerSqueeze")),
-            "SupportZoneStrengthDetector": try_import('core.support_zone_strength_detector', 'SupportZoneStrengthDetector')(self.cfg.get("SupportZoneStrengthDetector")),
-            "TrendDetector": try_import('core.trend_detector', 'TrendDetector')(self.cfg.get("TrendDetector")),
-            "TrendShiftAgent": try_import('core.trend_shift_agent', 'TrendShiftAgent')(self.cfg.get("TrendShiftAgent")),
-            "VReversalAgent": try_import('core.v_reversal_agent', 'VReversalAgent')(self.cfg.get("VReversalAgent")),
-            "ParabolicAgent": try_import('core.parabolic_agent', 'ParabolicAgent')(self.cfg.get("ParabolicAgent")),
-            "ReturnForecaster": try_import('core.return_forecaster', 'ReturnForecaster')(self.cfg.get("ReturnForecaster")),
-            "GrowthScanner": try_import('core.growth_scanner', 'GrowthScanner')(self.cfg.get("GrowthScanner")),
-            "MidtermMomentumAgent": try_import('core.midterm_momentum_agent', 'MidtermMomentumAgent')(self.cfg.get("MidtermMomentumAgent")),
-            "MovingAveragePressureBot": try_import('core.moving_average_pressure_bot', 'MovingAveragePressureBot')(self.cfg.get("MovingAveragePressureBot")),
-            "ATRScoreAgent": try_import('core.atr_score_agent', 'ATRScoreAgent')(self.cfg.get("ATRScoreAgent")),
-            "MultiAgentValidator": try_import('core.multi_agent_validator', 'MultiAgentValidator')(self.cfg.get("MultiAgentValidator")),
-            "HighConvictionOrchestrator": try_import('core.high_conviction_orchestrator', 'HighConvictionOrchestrator')(self.cfg.get("HighConvictionOrchestrator")),
-            "BreakoutRetestRecognizer": try_import('core.breakout_retest_recognizer', 'BreakoutRetestRecognizer')(self.cfg.get("BreakoutRetestRecognizer")),
-        }
-        
-        # הסרת סוכנים שלא נטענו
-        self.agents = {k: v for k, v in self.agents.items() if v is not None}
+        self.cfg = self._load_config() or {}
+        self.profiles = {**self.PROFILES, **self.config.get("profiles", {})}
+
+        # משקלים: ברירת המחדל של המחלקה, דרוסים ע"י קובץ משקלים מאופטמים (optimize_weights) ו-config
+        self.agent_weights = {**self.AGENT_WEIGHTS, **self._load_weights(),
+                              **self.config.get("agent_weights", {})}
+
+        # סוכנים פעילים לפי config/agent_config.yaml (סוכן שלא מופיע שם - פעיל)
+        self.agent_loader = self._create_agent_loader()
+        self.enabled_agents = [
+            name for name, module in self.AGENT_MODULES.items()
+            if self.agent_loader is None or self.agent_loader.is_enabled(module)
+        ]
+
+        # מיפוי עצל: גישה לסוכן בונה אותו (מופע משותף לכל התהליך)
+        self.agents = _LazyAgents(self)
+
+        # מעקב spans לכל הערכה וסטטיסטיקות השהיה/זיכרון לכל סוכן
+        from utils.tracing import AgentTracer
+        self.tracer = AgentTracer(self.config.get("tracing", {}))
+
+        # פרופיילינג לפי דרישה (main.py --profile או CHARLES_PROFILE) - כבוי כברירת מחדל
+        from utils.profiling import Profiler
+        self.profiler = Profiler.from_env(self.config.get("profiling"))
+
+        # בקשת מחיר מאוחדת: כשלא הועבר price_data המנוע טוען כל מניה פעם אחת
+        # באופק המקסימלי של סוכני הפרופיל ומחלק לכל סוכן את הימים שהוא צריך
+        self.shared_prices = self.config.get("shared_prices", True)
+        self.data_manager = self.config.get("data_manager")
         
-        self.logger.info(f"AlphaScoreEngine אותחל עם {len(self.agents)} סוכנים")
+        self.logger.info(f"AlphaScoreEngine אותחל עם {len(self.enabled_agents)} סוכנים פעילים")
+
+    def _create_agent_loader(self):
+        """טוען הסוכנים (None אם קובץ הקונפיגורציה חסר)"""
+        from core.agent_loader import AgentLoader
+        config_path = self.config.get("agent_config_path", os.path.join(
+            os.path.dirname(__file__), '..', 'config', 'agent_config.yaml'))
+        if not os.path.exists(config_path):
+            return None
+        try:
+            return AgentLoader(config_path)
+        except Exception as e:
+            self.logger.warning(f"לא ניתן לטעון את {config_path}: {e}")
+            return None
+
+    def _load_weights(self) -> Dict:
+        """משקלים מקובץ JSON (config: weights_path) - בדרך כלל תוצאת utils.signal_panel.optimize_weights"""
+        weights_path = self.config.get("weights_path")
+        if not weights_path:
+            return {}
+        try:
+            from utils.signal_panel import load_weights
+            return load_weights(weights_path)
+        except Exception as e:
+            self.logger.warning(f"לא ניתן לטעון משקלים מ-{weights_path}: {e}")
+            return {}
+
+    def get_agent(self, agent_name: str):
+        """
+        קבלת סוכן - נבנה בקריאה הראשונה ונשמר במטמון ברמת התהליך
+
+        Returns:
+            מופע הסוכן, או None אם אינו פעיל / נכשל בטעינה
+        """
+        if agent_name not in self.enabled_agents:
+            return None
+        from core.agent_loader import get_shared_agent
+        return get_shared_agent(f"core.{self.AGENT_MODULES[agent_name]}", agent_name,
+                                self.cfg.get(agent_name))
+
+    def get_profile_agents(self, profile: str = "full") -> List[str]:
+        """שמות הסוכנים הפעילים שפרופיל הניתוח צריך"""
+        if profile in (None, "full", "all"):
+            return list(self.enabled_agents)
+        if profile not in self.profiles:
+            self.logger.warning(f"פרופיל לא מוכר: {profile} - מריץ ניתוח מלא")
+            return list(self.enabled_agents)
+        return [name for name in self.profiles[profile] if name in self.enabled_agents]
+
+    def load_agents(self, profile: str = "full") -> Dict:
+        """בניית כל הסוכנים של פרופיל מראש (למשל לפני הרצה חיה)"""
+        agents = {}
+        for agent_name in self.get_profile_agents(profile):
+            agent = self.get_agent(agent_name)
+            if agent is not None:
+                agents[agent_name] = agent
+        return agents
 
     def _load_config(self) -> Dict:
         """טעינת קונפיגורציה מקובץ"""
         try:
             config_path = os.path.join(os.path.dirname(__file__), '..', 'config', 'config.yaml')
             if os.path.exists(config_path):
+                import yaml  # ייבוא בעצלות - נדרש רק בטעינת הקונפיגורציה
                 with open(config_path, 'r', encoding='utf-8') as f:
                     return yaml.safe_load(f)
         except Exception as e:
@@ -116,91 +208,78 @@ class AlphaScoreEngine:
         
         return {}
 
-    def evaluate(self, symbol: str, price_data=None) -> Dict:
+    def evaluate(self, symbol: str, price_data=None, profile: str = "full") -> Dict:
         """
-        הערכת מניה על ידי כל הסוכנים
+        הערכת מניה על ידי הסוכנים של פרופיל הניתוח (ברירת מחדל: כולם)
+
+        ההערכה נמדדת ב-span אחד ובתוכו span לכל סוכן עם השלבים fetch / compute /
+        post_process (ראו utils.tracing וגם get_trace_stats).
         """
         try:
-            self.logger.info(f"מתחיל הערכה של {symbol}")
+            self.logger.info("מתחיל הערכה של %s", symbol)
             
             agent_scores = {}
             agent_details = {}
             total_weight = 0
             weighted_sum = 0
             
-            # הרצת כל הסוכנים
-            for agent_name, agent in self.agents.items():
-                try:
-                    if agent is None:
-                        continue
-                        
-                    self.logger.info(f"מריץ {agent_name} עבור {symbol}")
-                    
-                    # הרצת הסוכן
-                    if hasattr(agent, 'analyze'):
-                        # בדיקה אם הסוכן מקבל 2 או 3 פרמטרים
-                        import inspect
-                        sig = inspect.signature(agent.analyze)
-                        
-                        try:
-                            if len(sig.parameters) == 2:
-                                result = agent.analyze(symbol)
-                            elif len(sig.parameters) == 3:
-                                # התאמה לסוכנים ספציפיים
-                                if agent_name == "TrendShiftAgent":
-                                    # TrendShiftAgent ייתכן ודורש symbol ב-__init__
-                                    try:
-                                        agent = type(agent)('TEST')  # יצירת instance חדש
-                                        result = agent.analyze(symbol, price_data)
-                                    except:
-                                        result = agent.analyze(symbol, price_data)
-                                elif agent_name == "ParabolicAgent":
-                                    # ParabolicAgent דורש price_df
-                                    result = agent.analyze(symbol, price_data)
-                                elif agent_name == "ADXScoreAgent":
-                                    # ADXScoreAgent צריך עמודות קטנות
-                                    if price_data is not None:
-                                        adapted_data = price_data.copy()
-                                        adapted_data.columns = [col.lower() for col in adapted_data.columns]
-                                        result = agent.analyze(symbol, adapted_data)
-                                    else:
-                                        result = agent.analyze(symbol)
+            with self.tracer.span("evaluate", symbol=symbol, profile=profile) as evaluation_span:
+                # הסוכנים נבנים כאן בפעם הראשונה; דרישות המחיר שלהם קובעות את הטעינה המשותפת
+                agents = {agent_name: self.get_agent(agent_name) for agent_name in self.get_profile_agents(profile)}
+                prices = self._price_request(symbol, agents) if price_data is None else None
+
+                # הרצת סוכני הפרופיל
+                for agent_name, agent in agents.items():
+                    try:
+                        with self.tracer.span(agent_name, symbol=symbol, agent=True) as agent_span:
+                            with self.tracer.span("fetch"):
+                                if agent is None or not hasattr(agent, 'analyze'):
+                                    self._mark_span(agent_span, status="skipped")
+                                    continue
+                                agent_data = self._agent_input(
+                                    agent_name, prices.slice_for(agent) if prices is not None else price_data)
+
+                            self.logger.info("מריץ %s עבור %s", agent_name, symbol)
+
+                            with self.tracer.span("compute"), self.profiler.profile(agent_name, symbol):
+                                try:
+                                    result = self._call_agent(agent_name, agent, symbol, agent_data)
+                                except Exception as e:
+                                    self.logger.error("שגיאה בהרצת %s: %s", agent_name, e)
+                                    self._mark_span(agent_span, status="error", error=str(e))
+                                    continue
+
+                            with self.tracer.span("post_process"):
+                                if isinstance(result, dict):
+                                    score = result.get('score', 50)
+                                    details = result.get('details', {})
+                                    explanation = result.get('explanation', '')
+
+                                    agent_scores[agent_name] = score
+                                    agent_details[agent_name] = {
+                                        'score': score,
+                                        'details': details,
+                                        'explanation': explanation
+                                    }
+
+                                    # חישוב משקל
+                                    weight = self.agent_weights.get(agent_name, 1)
+                                    total_weight += weight
+                                    weighted_sum += score * weight
+                                    self._mark_span(agent_span, score=score)
+
+                                    self.logger.info("%s: ציון %s, משקל %s", agent_name, score, weight)
                                 else:
-                                    result = agent.analyze(symbol, price_data)
-                            else:
-                                # יותר מ-3 פרמטרים - נסה עם 2
-                                result = agent.analyze(symbol)
-                        except Exception as e:
-                            self.logger.error(f"שגיאה בהרצת {agent_name}: {e}")
-                            continue
-                        
-                        if isinstance(result, dict):
-                            score = result.get('score', 50)
-                            details = result.get('details', {})
-                            explanation = result.get('explanation', '')
-                            
-                            agent_scores[agent_name] = score
-                            agent_details[agent_name] = {
-                                'score': score,
-                                'details': details,
-                                'explanation': explanation
-                            }
-                            
-                            # חישוב משקל
-                            weight = self.AGENT_WEIGHTS.get(agent_name, 1)
-                            total_weight += weight
-                            weighted_sum += score * weight
-                            
-                            self.logger.info(f"{agent_name}: ציון {score}, משקל {weight}")
-                        else:
-                            self.logger.warning(f"{agent_name} החזיר תוצאה לא תקינה")
-                    
-                except Exception as e:
-                    self.logger.error(f"שגיאה ב-{agent_name}: {e}")
-                    continue
-            
-            # חישוב ציון כולל
-            final_score = int(weighted_sum / total_weight) if total_weight > 0 else 50
+                                    self.logger.warning("%s החזיר תוצאה לא תקינה", agent_name)
+                                    self._mark_span(agent_span, status="invalid")
+
+                    except Exception as e:
+                        self.logger.error("שגיאה ב-%s: %s", agent_name, e)
+                        continue
+
+                # חישוב ציון כולל
+                final_score = int(weighted_sum / total_weight) if total_weight > 0 else 50
+                self._mark_span(evaluation_span, final_score=final_score, agents_count=len(agent_scores))
             
             # יצירת תוצאה
             result = {
@@ -210,14 +289,15 @@ class AlphaScoreEngine:
                 'agent_details': agent_details,
                 'total_weight': total_weight,
                 'agents_count': len(agent_scores),
+                'profile': profile,
                 'timestamp': datetime.now().isoformat()
             }
             
-            self.logger.info(f"הערכה הושלמה עבור {symbol}: ציון {final_score}")
+            self.logger.info("הערכה הושלמה עבור %s: ציון %s", symbol, final_score)
             return result
             
         except Exception as e:
-            self.logger.error(f"שגיאה בהערכה של {symbol}: {e}")
+            self.logger.error("שגיאה בהערכה של %s: %s", symbol, e)
             return {
                 'symbol': symbol,
                 'final_score': 50,
@@ -225,11 +305,180 @@ class AlphaScoreEngine:
                 'timestamp': datetime.now().isoformat()
             }
 
+    @staticmethod
+    def _mark_span(span, **attrs):
+        """הוספת מאפיינים ל-span (None כשהמעקב כבוי)"""
+        if span is not None:
+            span.attrs.update(attrs)
+
+    def _price_request(self, symbol: str, agents: Dict) -> Optional["PriceRequest"]:
+        """בקשת המחיר המאוחדת של הערכה אחת (None כשאף סוכן לא הצהיר על דרישה או שהמנגנון כבוי)"""
+        if not self.shared_prices:
+            return None
+        request = PriceRequest(symbol, self._get_data_manager)
+        for agent in agents.values():
+            request.add(getattr(agent, "price_requirement", None))
+        return request if request.horizons else None
+
+    def _get_data_manager(self):
+        """מנהל הנתונים של המנוע (נבנה רק כשיש מה לטעון)"""
+        if self.data_manager is None:
+            from utils.smart_data_manager import SmartDataManager
+            self.data_manager = SmartDataManager()
+        return self.data_manager
+
+    def _agent_input(self, agent_name: str, price_data):
+        """הכנת נתוני המחיר לסוכן (שלב ה-fetch)"""
+        if agent_name == "ADXScoreAgent" and price_data is not None and \
+                any(col != col.lower() for col in map(str, price_data.columns)):
+            # ADXScoreAgent צריך עמודות קטנות
+            adapted_data = price_data.copy()
+            adapted_data.columns = [col.lower() for col in adapted_data.columns]
+            return adapted_data
+        return price_data
+
+    @staticmethod
+    def _accepts_price_data(agent) -> bool:
+        """
+        האם analyze מקבל נתוני מחיר כפרמטר שני (price_df / price_data).
+        החתימה של מתודה קשורה לא כוללת את self - analyze(self, symbol, price_df=None)
+        הוא שני פרמטרים.
+        """
+        try:
+            parameters = list(inspect.signature(agent.analyze).parameters.values())
+        except (TypeError, ValueError):
+            return False
+        positional = [p for p in parameters if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+        return len(positional) >= 2 and positional[1].name in ("price_df", "price_data", "df")
+
+    def _call_agent(self, agent_name: str, agent, symbol: str, price_data):
+        """קריאה ל-analyze עם נתוני המחיר אם הסוכן מקבל אותם (שלב ה-compute)"""
+        if price_data is not None and self._accepts_price_data(agent):
+            return agent.analyze(symbol, price_data)
+        return agent.analyze(symbol)
+
+    def get_trace_stats(self) -> Dict:
+        """סיכום המעקב: השהיית הערכה, p50/p95/p99 ו-RSS לכל סוכן ועצי ההערכות האחרונות"""
+        return self.tracer.summary()
+
+    def export_traces(self, path: Optional[str] = None):
+        """ייצוא סיכום המעקב ל-JSON (ברירת מחדל log/agent_traces.json) עבור דשבורד הניטור"""
+        return self.tracer.export(path)
+
+    def analyze_stock(self, symbol: str, analysis_type: str = "full", price_data=None) -> Dict:
+        """ניתוח מניה לפי סוג ניתוח (full, technical, sentiment, news)"""
+        return self.evaluate(symbol, price_data, profile=analysis_type)
+
+    def score_panel(self, panel, weights: Optional[Dict] = None):
+        """
+        ציון משוקלל לכל היקום ממאגר ציונים היסטורי (utils.signal_panel.SignalPanel) -
+        מכפלת מטריצה-וקטור אחת, ללא הרצת סוכנים
+
+        Returns:
+            DataFrame תאריך x מניה
+        """
+        return panel.consolidate(weights if weights is not None else self.agent_weights)
+
     def get_agent_status(self) -> Dict:
-        """קבלת סטטוס הסוכנים"""
+        """קבלת סטטוס הסוכנים (ללא בניית סוכנים שטרם נטענו)"""
+        loaded = self.agents.loaded_names()
         return {
             'total_agents': len(self.AGENT_WEIGHTS),
-            'loaded_agents': len(self.agents),
-            'agent_weights': self.AGENT_WEIGHTS,
-            'loaded_agent_names': list(self.agents.keys())
+            'enabled_agents': len(self.enabled_agents),
+            'loaded_agents': len(loaded),
+            'agent_weights': self.agent_weights,
+            'loaded_agent_names': loaded
         }
+
+
+class PriceRequest:
+    """
+    בקשת מחיר מאוחדת למניה אחת: דרישות הסוכנים (PriceRequirement) מקובצות לפי
+    אינטרוול, כל אינטרוול נטען פעם אחת באופק המקסימלי (בפעם הראשונה שסוכן צריך
+    אותו), וכל סוכן מקבל פרוסה של הימים האחרונים שהוא ביקש - בלי העתקה ובלי
+    קריאה נוספת לדיסק / API.
+    """
+
+    # אינטרוולים שמנהל הנתונים מגיש (INTERVAL_BARS_PER_DAY ב-SmartDataManager)
+    SUPPORTED_INTERVALS = ("1min", "5min", "1h", "1day", "1wk", "1mo")
+
+    def __init__(self, symbol: str, data_manager_factory):
+        self.symbol = symbol
+        self._data_manager_factory = data_manager_factory
+        self.horizons: Dict[str, int] = {}
+        self.frames: Dict[str, object] = {}
+        self.loads = 0
+
+    def add(self, requirement):
+        """רישום דרישה של סוכן (דרישה ריקה או באינטרוול שלא נתמך - הסוכן טוען בעצמו)"""
+        if requirement is None or requirement.interval not in self.SUPPORTED_INTERVALS:
+            return
+        self.horizons[requirement.interval] = max(self.horizons.get(requirement.interval, 0), requirement.days)
+
+    def _load(self, interval: str):
+        if interval not in self.frames:
+            self.loads += 1
+            try:
+                data = self._data_manager_factory().get_stock_data(self.symbol, self.horizons[interval],
+                                                                   interval=interval)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"טעינת מחירים משותפת נכשלה עבור {self.symbol}: {e}")
+                data = None
+            self.frames[interval] = data if data is not None and not data.empty else None
+        return self.frames[interval]
+
+    def slice_for(self, agent):
+        """
+        הנרות שמכסים את הימים האחרונים שהסוכן ביקש, מתוך הטעינה המשותפת של האינטרוול.
+        None (הסוכן טוען בעצמו) כשאין לו דרישה, כשהטעינה נכשלה או כשחסרות עמודות.
+        """
+        from utils.smart_data_manager import bars_for
+
+        requirement = getattr(agent, "price_requirement", None)
+        if requirement is None or requirement.interval not in self.horizons:
+            return None
+        frame = self._load(requirement.interval)
+        if frame is None:
+            return None
+        columns = {str(col).lower() for col in frame.columns}
+        if not set(requirement.columns) <= columns:
+            return None
+        bars = bars_for(requirement.days, requirement.interval)
+        # הקבצים שמורים מהחדש לישן; בסדר כרונולוגי הנרות האחרונים הם הזנב
+        if frame.index.is_monotonic_increasing:
+            return frame.iloc[-bars:]
+        return frame.iloc[:bars]
+
+
+class _LazyAgents(Mapping):
+    """
+    תצוגת dict של סוכני המנוע - סוכן נבנה רק כשניגשים אליו.
+    איטרציה מלאה בונה את כל הסוכנים הפעילים (כמו ההתנהגות הקודמת).
+    """
+
+    def __init__(self, engine: AlphaScoreEngine):
+        self._engine = engine
+
+    def __getitem__(self, agent_name):
+        agent = self._engine.get_agent(agent_name)
+        if agent is None:
+            raise KeyError(agent_name)
+        return agent
+
+    def __iter__(self):
+        for agent_name in self._engine.enabled_agents:
+            if self._engine.get_agent(agent_name) is not None:
+                yield agent_name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, agent_name):
+        return self._engine.get_agent(agent_name) is not None
+
+    def loaded_names(self) -> List[str]:
+        """סוכנים שכבר נבנו (ללא בנייה נוספת)"""
+        from core.agent_loader import is_agent_loaded
+        return [name for name in self._engine.enabled_agents
+                if is_agent_loaded(f"core.{self._engine.AGENT_MODULES[name]}", name,
+                                   self._engine.cfg.get(name))]
@@ -11,14 +11,14 @@ import numpy as np
 from typing import Dict, List, Optional, Any, Tuple
 import logging
 from datetime import datetime, timedelta
-from scipy import stats
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
 from utils.logger import get_agent_logger
 from utils.validators import validate_symbol, validate_stock_data
+from core.streaming_anomaly_engine import (
+    StreamingAnomalyEngine, fit_isolation_model, get_isolation_model, trailing_robust_scores
+)
 
 logger = get_agent_logger("anomaly_detector")
 
@@ -41,6 +41,11 @@ class AnomalyDetector:
         self.iqr_multiplier = self.config.get("iqr_multiplier", 1.5)
         self.isolation_forest_contamination = self.config.get("contamination", 0.1)
         self.min_data_points = self.config.get("min_data_points", 30)
+        # מודל IsolationForest שמור - מאומן מחדש רק אחרי refit_every ברים חדשים
+        self.refit_every = self.config.get("refit_every", 50)
+
+        # מנוע אונליין למצב חי (מודלים במטמון לפי מניה / סקטור)
+        self.stream_engine = StreamingAnomalyEngine(self.config)
 
         # פרמטרים לניתוח
         self.price_window = 20  # חלון לניתוח מחיר
@@ -87,7 +92,7 @@ class AnomalyDetector:
             statistical_anomalies = self._detect_statistical_anomalies(price_df)
 
             # ניתוח אנומליות רב-ממדיות
-            multivariate_anomalies = self._detect_multivariate_anomalies(price_df)
+            multivariate_anomalies = self._detect_multivariate_anomalies(price_df, symbol)
 
             # ניתוח אנומליות זמן
             temporal_anomalies = self._detect_temporal_anomalies(price_df)
@@ -166,17 +171,13 @@ class AnomalyDetector:
             price_df['returns'] = price_df['close'].pct_change()
             price_df['log_returns'] = np.log(price_df['close'] / price_df['close'].shift(1))
 
-            # זיהוי אנומליות לפי Z-Score
-            z_scores = np.abs(stats.zscore(price_df['returns'].dropna()))
+            # זיהוי אנומליות לפי Z-Score ו-IQR מול החלון המתגלגל שלפני כל בר
+            trailing = trailing_robust_scores(
+                price_df['returns'].dropna(), self.stream_engine.window, self.iqr_multiplier
+            ).reindex(price_df.index)
+            z_scores = trailing['z_score'].abs().fillna(0.0)
             z_score_anomalies = z_scores > self.z_score_threshold
-
-            # זיהוי אנומליות לפי IQR
-            q1 = price_df['returns'].quantile(0.25)
-            q3 = price_df['returns'].quantile(0.75)
-            iqr = q3 - q1
-            lower_bound = q1 - self.iqr_multiplier * iqr
-            upper_bound = q3 + self.iqr_multiplier * iqr
-            iqr_anomalies = (price_df['returns'] < lower_bound) | (price_df['returns'] > upper_bound)
+            iqr_anomalies = trailing['iqr_outlier'].fillna(False).astype(bool)
 
             # זיהוי קפיצות מחיר קיצוניות
             extreme_moves = np.abs(price_df['returns']) > 0.1  # קפיצות של יותר מ-10%
@@ -317,6 +318,7 @@ class AnomalyDetector:
             returns = price_df['close'].pct_change().dropna()
             
             # בדיקת נורמליות
+            from scipy import stats
             normality_test = stats.normaltest(returns)
             is_normal = normality_test.pvalue > 0.05
 
@@ -333,23 +335,18 @@ class AnomalyDetector:
             if not is_normal:
                 distribution_anomalies.append("non_normal")
 
-            # זיהוי outliers לפי שיטות שונות
-            outliers_methods = {}
-            
-            # Z-Score method
-            z_scores = np.abs(stats.zscore(returns))
-            outliers_methods['z_score'] = sum(z_scores > self.z_score_threshold)
-            
-            # IQR method
-            q1, q3 = np.percentile(returns, [25, 75])
-            iqr = q3 - q1
-            outliers_methods['iqr'] = sum((returns < q1 - 1.5*iqr) | (returns > q3 + 1.5*iqr))
-            
-            # Modified Z-Score method
-            median = np.median(returns)
-            mad = np.median(np.abs(returns - median))
-            modified_z_scores = 0.6745 * (returns - median) / mad
-            outliers_methods['modified_z_score'] = sum(np.abs(modified_z_scores) > 3.5)
+            # זיהוי outliers לפי שיטות שונות - כל תשואה מול החלון המתגלגל שלפניה
+            # (אותה סמנטיקה כמו score_stream, בלי z-score על כל ההיסטוריה)
+            trailing = trailing_robust_scores(
+                returns, self.stream_engine.window, self.iqr_multiplier
+            )
+            outliers_methods = {
+                'z_score': int((trailing['z_score'].abs() > self.z_score_threshold).sum()),
+                'iqr': int(trailing['iqr_outlier'].sum()),
+                'modified_z_score': int(
+                    (trailing['modified_z_score'].abs() > self.stream_engine.modified_z_threshold).sum()
+                ),
+            }
 
             return {
                 "distribution_anomalies": distribution_anomalies,
@@ -370,9 +367,11 @@ class AnomalyDetector:
             logger.error(f"Error detecting statistical anomalies: {str(e)}")
             return self._create_empty_anomaly_analysis()
 
-    def _detect_multivariate_anomalies(self, price_df: pd.DataFrame) -> Dict[str, Any]:
+    def _detect_multivariate_anomalies(self, price_df: pd.DataFrame,
+                                       symbol: str = None) -> Dict[str, Any]:
         """
         זיהוי אנומליות רב-ממדיות
+        המודל נשמר במטמון לפי מניה/סקטור ומאומן מחדש רק כשהצטברו מספיק ברים חדשים
         """
         try:
             if len(price_df) < self.min_data_points:
@@ -399,16 +398,24 @@ class AnomalyDetector:
             if len(feature_data) < 10:
                 return self._create_empty_anomaly_analysis()
 
-            # נרמול נתונים
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(feature_data)
-
-            # Isolation Forest
-            iso_forest = IsolationForest(
-                contamination=self.isolation_forest_contamination,
-                random_state=42
-            )
-            iso_predictions = iso_forest.fit_predict(scaled_data)
+            # Isolation Forest מהמטמון (אימון מחדש רק בעת הצורך)
+            key = self.stream_engine.model_key(symbol) if symbol else None
+            entry = get_isolation_model(key) if key else None
+            if entry is not None and self._ends_before_model(entry, feature_data):
+                # חלון היסטורי שמסתיים לפני סוף האימון - מודל נפרד כדי לא להשתמש בברים עתידיים
+                entry = fit_isolation_model(
+                    key, feature_data, self.isolation_forest_contamination, cache=False
+                )
+                refitted = True
+            elif self._needs_isolation_refit(entry, feature_data, features):
+                entry = fit_isolation_model(
+                    key or "__adhoc__", feature_data, self.isolation_forest_contamination
+                )
+                refitted = True
+            else:
+                refitted = False
+            scaled_data = entry["scaler"].transform(feature_data.values)
+            iso_predictions = entry["model"].predict(scaled_data)
             iso_anomalies = sum(iso_predictions == -1)
 
             # Local Outlier Factor (LOF) - אם יש מספיק נתונים
@@ -435,6 +442,7 @@ class AnomalyDetector:
                 "features_used": features,
                 "data_points": len(scaled_data),
                 "contamination_rate": self.isolation_forest_contamination,
+                "model_refitted": refitted,
                 "anomaly_dates": feature_data.index[iso_predictions == -1].tolist()
             }
 
@@ -442,6 +450,66 @@ class AnomalyDetector:
             logger.error(f"Error detecting multivariate anomalies: {str(e)}")
             return self._create_empty_anomaly_analysis()
 
+    @staticmethod
+    def _ends_before_model(entry: Dict, feature_data: pd.DataFrame) -> bool:
+        """
+        האם החלון הנוכחי מסתיים לפני הבר האחרון שעליו אומן המודל השמור
+        """
+        last_index = entry.get("last_index")
+        if last_index is None or feature_data.empty:
+            return False
+        try:
+            return bool(feature_data.index[-1] < last_index)
+        except TypeError:
+            return True
+
+    def _needs_isolation_refit(self, entry: Optional[Dict], feature_data: pd.DataFrame,
+                               features: List[str]) -> bool:
+        """
+        האם נדרש אימון מחדש של המודל השמור
+        """
+        if entry is None or entry.get("features") != features:
+            return True
+        if entry.get("contamination") != self.isolation_forest_contamination:
+            return True
+        last_index = entry.get("last_index")
+        if last_index is None:
+            return True
+        try:
+            new_rows = int((feature_data.index > last_index).sum())
+        except TypeError:
+            return True
+        return new_rows >= self.refit_every
+
+    def score_stream(self, symbol: str, price_df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        ניקוד אונליין - מעבד רק ברים שלא נראו עדיין (O(ברים חדשים))
+
+        Args:
+            symbol: סמל המניה
+            price_df: נתוני מחיר (מלאים או רק הברים האחרונים)
+
+        Returns:
+            סיכום הברים החדשים והאנומליות שזוהו
+        """
+        try:
+            bars = self.stream_engine.update(symbol, price_df)
+            anomalies = [bar for bar in bars if bar["is_anomaly"]]
+            return {
+                "symbol": symbol,
+                "timestamp": datetime.now().isoformat(),
+                "agent": self.name,
+                "new_bars": len(bars),
+                "anomalies": len(anomalies),
+                "latest": bars[-1] if bars else None,
+                "anomaly_bars": anomalies,
+                "state": self.stream_engine.snapshot(symbol)
+            }
+        except Exception as e:
+            error_msg = f"Error scoring anomaly stream for {symbol}: {str(e)}"
+            logger.error(error_msg)
+            return self._create_error_result(error_msg)
+
     def _detect_temporal_anomalies(self, price_df: pd.DataFrame) -> Dict[str, Any]:
         """
         זיהוי אנומליות זמן
@@ -0,0 +1,327 @@
+"""
+Backtest Engine - בדיקה היסטורית וקטורית לציוני AlphaScoreEngine
+================================================================
+
+הרצת walk-forward: בכל תאריך הערכה הסוכן מקבל רק את הנרות עד אותו תאריך (ללא
+הצצה לעתיד). ציוני כל סוכן נשמרים כסדרה לכל מניה במטמון דיסק, כך ששינוי משקלים
+ב-AGENT_WEIGHTS הוא סכום משוקלל של סדרות קיימות - בלי להריץ את הסוכנים מחדש.
+תוויות התשואה העתידית מחושבות וקטורית על כל הנרות וכל המניות בבת אחת.
+"""
+
+import inspect
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.model_store import data_fingerprint
+from utils.price_labels import forward_returns, normalize_prices, price_panel
+from utils.signal_panel import SignalPanel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'backtest', 'signals')
+
+
+def combine_scores(signals: Dict[str, pd.DataFrame], weights: Dict[str, float]) -> pd.DataFrame:
+    """
+    ציון משוקלל כמו AlphaScoreEngine.evaluate: רק סוכנים שהחזירו ציון נכנסים למכנה
+
+    Args:
+        signals: סוכן -> טבלת ציונים תאריך x מניה
+        weights: סוכן -> משקל (סוכן חסר מקבל 1, כמו במנוע)
+
+    Returns:
+        טבלת ציונים (לפני העיגול ל-int שהמנוע מבצע), 50 כשאין אף ציון
+    """
+    if not signals:
+        return pd.DataFrame()
+    return SignalPanel.from_frames(signals).consolidate(weights)
+
+
+def score_metrics(scores: pd.DataFrame, returns: pd.DataFrame, threshold: float = 60) -> Dict:
+    """
+    איכות ציונים מול תשואה עתידית
+
+    Returns:
+        observations, ic (Spearman על כל הזוגות), ic_by_date (ממוצע חתכי לפי תאריך),
+        hit_rate ו-avg_return לציונים >= threshold, ו-avg_return_all
+    """
+    scores, returns = scores.align(returns, join='inner')
+    s = scores.to_numpy(dtype=float)
+    r = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(s) & ~np.isnan(r)
+    metrics = {'observations': int(valid.sum()), 'ic': np.nan, 'ic_by_date': np.nan,
+               'hit_rate': np.nan, 'avg_return': np.nan, 'avg_return_all': np.nan, 'signals': 0}
+    if metrics['observations'] < 2:
+        return metrics
+
+    pooled_s = pd.Series(s[valid]).rank().to_numpy()
+    pooled_r = pd.Series(r[valid]).rank().to_numpy()
+    if pooled_s.std() > 0 and pooled_r.std() > 0:
+        metrics['ic'] = float(np.corrcoef(pooled_s, pooled_r)[0, 1])
+
+    # IC חתכי: דירוג בתוך כל תאריך, קורלציה וקטורית לכל השורות יחד
+    rank_s = pd.DataFrame(np.where(valid, s, np.nan)).rank(axis=1).to_numpy()
+    rank_r = pd.DataFrame(np.where(valid, r, np.nan)).rank(axis=1).to_numpy()
+    counts = valid.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dev_s = np.where(valid, rank_s - (np.nansum(rank_s, axis=1) / counts)[:, None], 0.0)
+        dev_r = np.where(valid, rank_r - (np.nansum(rank_r, axis=1) / counts)[:, None], 0.0)
+    denominator = np.sqrt((dev_s ** 2).sum(axis=1) * (dev_r ** 2).sum(axis=1))
+    usable = (counts >= 3) & (denominator > 0)
+    if usable.any():
+        metrics['ic_by_date'] = float(((dev_s * dev_r).sum(axis=1)[usable] / denominator[usable]).mean())
+
+    signal = valid & (np.nan_to_num(s) >= threshold)
+    metrics['signals'] = int(signal.sum())
+    metrics['avg_return_all'] = float(r[valid].mean())
+    if signal.any():
+        metrics['hit_rate'] = float((r[signal] > 0).mean())
+        metrics['avg_return'] = float(r[signal].mean())
+    return metrics
+
+
+class SignalCache:
+    """
+    מטמון דיסק לסדרות ציונים של סוכן לכל מניה
+
+    מבנה: <cache_dir>/<agent>/<SYMBOL>.npz - תאריכים, ציונים ומפתח תקפות.
+    המפתח הוא טביעת האצבע של נתוני המחיר עד התאריך האחרון במטמון (ופרמטרי ההרצה),
+    כך שנרות חדשים בסוף הסדרה לא פוסלים את הציונים שכבר חושבו.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+
+    def path(self, agent_name: str, symbol: str) -> Path:
+        return self.cache_dir / agent_name / f"{symbol.upper()}.npz"
+
+    def load(self, agent_name: str, symbol: str):
+        """
+        Returns:
+            (סדרת ציונים, מפתח) או None אם אין מטמון
+        """
+        path = self.path(agent_name, symbol)
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                series = pd.Series(data['scores'], index=pd.DatetimeIndex(data['dates'], name='date'),
+                                   name=agent_name)
+                return series, str(data['key'])
+        except Exception as e:
+            logger.warning(f"מטמון ציונים פגום {path}: {e}")
+            return None
+
+    def save(self, agent_name: str, symbol: str, series: pd.Series, key: str):
+        path = self.path(agent_name, symbol)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp_path, dates=series.index.values.astype('datetime64[ns]'),
+                 scores=series.to_numpy(dtype=float), key=np.array(key))
+        os.replace(tmp_path, path)
+
+    def clear(self, agent_name: Optional[str] = None):
+        root = self.cache_dir / agent_name if agent_name else self.cache_dir
+        for path in root.rglob("*.npz") if root.exists() else []:
+            path.unlink()
+
+
+class BacktestEngine:
+    """
+    בדיקה היסטורית walk-forward לסוכני AlphaScoreEngine
+
+    run() מריץ כל סוכן על כל מניה בתאריכי הערכה (כל step נרות, אחרי warmup),
+    עם חלון של window נרות שמסתיים בתאריך ההערכה. הציונים נשמרים לכל סוכן,
+    ו-combine / evaluate_weights מחשבים ציון משוקלל ומדדי איכות ללא הרצת סוכנים.
+    """
+
+    def __init__(self, engine=None, config: Optional[Dict] = None):
+        """
+        Args:
+            engine: AlphaScoreEngine (נבנה בעצלות אם לא הועבר)
+            config: step, window, warmup, horizon, buy_threshold, days, cache_dir, use_cache
+        """
+        self.config = config or {}
+        self.step = self.config.get("step", 5)
+        self.window = self.config.get("window", 250)
+        self.warmup = self.config.get("warmup", 60)
+        self.horizon = self.config.get("horizon", 5)
+        self.buy_threshold = self.config.get("buy_threshold", 60)
+        self.days = self.config.get("days", 2500)
+        self.cache = SignalCache(self.config.get("cache_dir", DEFAULT_CACHE_DIR)) \
+            if self.config.get("use_cache", True) else None
+
+        self._engine = engine
+        self._lock = threading.Lock()
+        self.prices: Dict[str, pd.DataFrame] = {}
+        self.signals: Dict[str, Dict[str, pd.Series]] = {}
+        self.stats = {"agent_calls": 0, "cached_points": 0, "errors": 0, "unsupported": []}
+
+    @property
+    def engine(self):
+        with self._lock:
+            if self._engine is None:
+                from core.alpha_score_engine import AlphaScoreEngine
+                self._engine = AlphaScoreEngine()
+        return self._engine
+
+    # ---------- נתונים ----------
+
+    def load_prices(self, symbols: Iterable[str],
+                    prices: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, pd.DataFrame]:
+        """טעינת נתוני מחיר (מהמילון שהועבר או דרך SmartDataManager) ונרמולם"""
+        for symbol in symbols:
+            if symbol in self.prices:
+                continue
+            try:
+                if prices is not None and symbol in prices:
+                    raw = prices[symbol]
+                else:
+                    from utils.smart_data_manager import smart_data_manager
+                    raw = smart_data_manager.get_stock_data(symbol, days=self.days)
+                if raw is None or raw.empty:
+                    logger.warning(f"אין נתוני מחיר עבור {symbol}")
+                    continue
+                self.prices[symbol] = normalize_prices(raw)
+            except Exception as e:
+                logger.warning(f"לא ניתן לטעון נתוני מחיר עבור {symbol}: {e}")
+        return self.prices
+
+    def evaluation_positions(self, length: int) -> np.ndarray:
+        """מיקומי הנרות שבהם הסוכנים מוערכים"""
+        return np.arange(min(self.warmup, length) - 1, length, self.step) if length else np.array([], int)
+
+    # ---------- הרצת סוכנים ----------
+
+    @staticmethod
+    def supports_point_in_time(agent) -> bool:
+        """סוכן שמקבל נתוני מחיר ב-analyze - אחרת הוא שולף נתונים בעצמו ואי אפשר לשחזר נקודת זמן"""
+        analyze = getattr(agent, "analyze", None)
+        if analyze is None:
+            return False
+        try:
+            params = list(inspect.signature(analyze).parameters.values())
+        except (TypeError, ValueError):
+            return True
+        positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+        return len(positional) >= 2 or any(p.kind == p.VAR_POSITIONAL for p in params)
+
+    def _cache_key(self, prices: pd.DataFrame) -> str:
+        return f"{data_fingerprint(prices)}:{self.window}:{self.step}:{self.warmup}"
+
+    def _score_at(self, agent, symbol: str, prices: pd.DataFrame, position: int) -> float:
+        """ציון הסוכן בנקודת זמן - רק נרות עד position (כולל)"""
+        history = prices.iloc[max(0, position - self.window + 1):position + 1]
+        self.stats["agent_calls"] += 1
+        try:
+            result = agent.analyze(symbol, history)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.debug(f"{type(agent).__name__} נכשל עבור {symbol} ב-{prices.index[position]}: {e}")
+            return np.nan
+        score = result.get("score") if isinstance(result, dict) else None
+        return float(score) if isinstance(score, (int, float, np.number)) else np.nan
+
+    def agent_signal(self, agent_name: str, symbol: str, agent=None) -> pd.Series:
+        """
+        סדרת הציונים של סוכן למניה - מהמטמון, ורק תאריכים חסרים מחושבים
+
+        Returns:
+            סדרה לפי תאריך הערכה (ריקה אם אין נתונים או שהסוכן לא נתמך)
+        """
+        cached = self.signals.get(agent_name, {}).get(symbol)
+        if cached is not None:
+            return cached
+        prices = self.prices.get(symbol)
+        agent = agent if agent is not None else self.engine.get_agent(agent_name)
+        if prices is None or prices.empty or agent is None:
+            return pd.Series(dtype=float, name=agent_name)
+
+        positions = self.evaluation_positions(len(prices))
+        dates = prices.index[positions]
+        series = pd.Series(np.nan, index=dates, name=agent_name)
+        done = np.zeros(len(positions), dtype=bool)
+
+        stored = self.cache.load(agent_name, symbol) if self.cache else None
+        if stored is not None and len(stored[0]):
+            stored_series, key = stored
+            last_date = stored_series.index.max()
+            if key == self._cache_key(prices.loc[:last_date]):
+                reusable = dates.isin(stored_series.index)
+                series[reusable] = stored_series.reindex(dates[reusable]).to_numpy()
+                done = reusable
+                self.stats["cached_points"] += int(reusable.sum())
+
+        for i in np.flatnonzero(~done):
+            series.iloc[i] = self._score_at(agent, symbol, prices, positions[i])
+
+        if self.cache and not done.all() and len(series):
+            self.cache.save(agent_name, symbol, series, self._cache_key(prices.loc[:dates[-1]]))
+        self.signals.setdefault(agent_name, {})[symbol] = series
+        return series
+
+    def run(self, symbols: List[str], agents: Optional[List[str]] = None,
+            prices: Optional[Dict[str, pd.DataFrame]] = None, profile: str = "technical") -> Dict[str, pd.DataFrame]:
+        """
+        הרצת walk-forward לכל הסוכנים והמניות
+
+        Args:
+            symbols: רשימת מניות
+            agents: שמות סוכנים (ברירת מחדל: סוכני הפרופיל)
+            prices: נתוני מחיר לפי מניה (ברירת מחדל: SmartDataManager)
+            profile: פרופיל הסוכנים של AlphaScoreEngine
+
+        Returns:
+            סוכן -> טבלת ציונים תאריך x מניה
+        """
+        self.load_prices(symbols, prices)
+        agent_names = agents if agents is not None else self.engine.get_profile_agents(profile)
+        for agent_name in agent_names:
+            agent = self.engine.get_agent(agent_name)
+            if agent is None:
+                continue
+            if not self.supports_point_in_time(agent):
+                logger.info(f"{agent_name} שולף נתונים בעצמו - מדולג בבדיקה ההיסטורית")
+                self.stats["unsupported"].append(agent_name)
+                continue
+            for symbol in symbols:
+                if symbol in self.prices:
+                    self.agent_signal(agent_name, symbol, agent)
+            logger.info(f"{agent_name}: ציונים היסטוריים ל-{len(self.signals.get(agent_name, {}))} מניות")
+        return self.signal_panels()
+
+    # ---------- ציונים משוקללים ומדדים ----------
+
+    def signal_panels(self) -> Dict[str, pd.DataFrame]:
+        """סוכן -> טבלת ציונים תאריך x מניה"""
+        return {agent_name: pd.DataFrame(by_symbol).sort_index()
+                for agent_name, by_symbol in self.signals.items() if by_symbol}
+
+    def panel(self) -> SignalPanel:
+        """הציונים שחושבו כמאגר תאריך x מניה x סוכן (לשמירה ולאופטימיזציית משקלים)"""
+        return SignalPanel.from_frames(self.signal_panels())
+
+    def labels(self, horizon: Optional[int] = None) -> pd.DataFrame:
+        """תשואה עתידית לכל הנרות ולכל המניות (תאריך x מניה)"""
+        return forward_returns(price_panel(self.prices, 'close'), horizon or self.horizon)
+
+    def combine(self, weights: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+        """ציון משוקלל לכל תאריך הערכה ומניה - ללא הרצת סוכנים"""
+        weights = weights if weights is not None else getattr(
+            self.engine, "agent_weights", self.engine.AGENT_WEIGHTS)
+        return combine_scores(self.signal_panels(), weights)
+
+    def evaluate_weights(self, weights: Optional[Dict[str, float]] = None,
+                         horizon: Optional[int] = None) -> Dict:
+        """מדדי איכות של וקטור משקלים מול התשואה העתידית"""
+        scores = self.combine(weights)
+        if scores.empty:
+            return score_metrics(scores, scores, self.buy_threshold)
+        returns = self.labels(horizon).reindex(index=scores.index, columns=scores.columns)
+        return score_metrics(scores, returns, self.buy_threshold)
@@ -3,7 +3,8 @@
 import logging
 import traceback
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Tuple
 import pandas as pd
 
 # ייבוא מנהל הנתונים החכם
@@ -14,6 +15,22 @@ try:
 except ImportError as e:
     logging.warning(f"לא ניתן לייבא מנהלי נתונים: {e}")
 
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+@dataclass(frozen=True)
+class PriceRequirement:
+    """
+    דרישת נתוני המחיר של סוכן: כמה ימים אחרונים (ימי מסחר - גם באינטרוול שאינו
+    יומי מקבלים את הנרות שמכסים אותם), באיזה אינטרוול ואילו עמודות.
+    AlphaScoreEngine אוסף את הדרישות של כל סוכני הפרופיל, טוען כל מניה פעם אחת
+    באופק המקסימלי ומעביר לכל סוכן פרוסה של הימים שהוא צריך.
+    """
+    days: int
+    interval: str = "1day"
+    columns: Tuple[str, ...] = PRICE_COLUMNS
+
+
 class BaseAgent(ABC):
     """
     מחלקת בסיס חכמה לכל הסוכנים במערכת Charles_FocusedSpec
@@ -21,6 +38,9 @@ class BaseAgent(ABC):
     וגישה אחידה לנתונים דרך SmartDataManager
     """
 
+    # נתוני המחיר ש-analyze צריך כשלא הועבר price_df (None - הסוכן לא צורך מחירים)
+    price_requirement: Optional[PriceRequirement] = None
+
     def __init__(self, config=None):
         """
         אתחול הסוכן עם קונפיגורציה ואופציה ל־debug
@@ -53,12 +73,13 @@ class BaseAgent(ABC):
             self.fmp_client = None
 
     def get_stock_data(self, symbol: str, days: int = None, 
-                      include_live: bool = None) -> Optional[pd.DataFrame]:
+                      include_live: bool = None, interval: str = "1day") -> Optional[pd.DataFrame]:
         """
         קבלת נתוני מניה דרך מנהל הנתונים החכם
         :param symbol: סימול המניה
         :param days: מספר ימים לשליפה
         :param include_live: האם לכלול נתונים חיים
+        :param interval: אינטרוול הנרות (1min / 5min / 1h / 1day / 1wk / 1mo)
         :return: DataFrame עם נתוני המניה או None
         """
         if not self.data_manager:
@@ -69,15 +90,15 @@ class BaseAgent(ABC):
             days = days or self.default_days
             include_live = include_live if include_live is not None else self.include_live
             
-            data = self.data_manager.get_stock_data(symbol, days, include_live)
+            data = self.data_manager.get_stock_data(symbol, days, include_live, interval=interval)
             if data is not None and not data.empty:
-                self.logger.info(f"{self.name}: נתונים נטענו עבור {symbol} ({len(data)} רשומות)")
+                self.logger.info("%s: נתונים נטענו עבור %s (%d רשומות)", self.name, symbol, len(data))
                 return data
             else:
-                self.logger.warning(f"{self.name}: לא נמצאו נתונים עבור {symbol}")
+                self.logger.warning("%s: לא נמצאו נתונים עבור %s", self.name, symbol)
                 return None
         except Exception as e:
-            self.logger.error(f"{self.name}: שגיאה בקבלת נתונים עבור {symbol}: {e}")
+            self.logger.error("%s: שגיאה בקבלת נתונים עבור %s: %s", self.name, symbol, e)
             return None
 
     def get_technical_indicators(self, symbol: str, indicator: str = 'all', 
@@ -0,0 +1,378 @@
+"""
+Event Detection - זיהוי אירועים עמודתי לסוכנים
+===============================================
+
+תשתית משותפת לסוכנים שסורקים את כל הנרות ומחפשים אירועים (קפיצות נפח, מלכודות
+נזילות, שינויי מגמה, תבניות VCP וכו'). במקום לולאת `for i in range(...)` שקוראת
+לכמה פונקציות `_analyze_*(df, i)` לכל נר, כל פונקציה מנוסחת כתנאים ונוסחאות על
+עמודות שלמות:
+
+    volume_ratio = ratio_or(volume, trailing_mean(volume, 30), 1.0)
+    mask = count_true(volume_ratio > 1.2, price_ratio > 1.1) >= 2
+    events = EventTable.from_mask(mask, factory=build_event, strength=strength, ...)
+
+האירועים נשמרים כמערך מובנה (structured array) אחד - ספירות, ממוצעים וסינונים
+רצים על העמודות, ואובייקטי dataclass (כולל ה-context המפורט) נבנים רק לאירועים
+שמוצגים בפועל (head / top).
+
+הסמנטיקה שומרת על זו של הקוד הסקלרי: ממוצעי חלון מדלגים על NaN כמו pandas,
+ו-bounded משחזר את min()/max() של פייתון (NaN מוחלף בגבול).
+"""
+
+import logging
+import warnings
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# אורך מקסימלי לעמודות טקסט (סוג אירוע, משמעות)
+LABEL_DTYPE = "U32"
+
+
+# ---------- חלונות ----------
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def window_reduce(values, start: np.ndarray, stop: np.ndarray, how: str = "mean") -> np.ndarray:
+    """
+    צמצום של values[start[k]:stop[k]] לכל k - כמו series.iloc[start:stop].mean() וכו'.
+
+    החלונות נאספים למטריצה אחת (באורך החלון הארוך ביותר, עם NaN בשוליים) ומצטמצמים
+    בבת אחת. NaN מדולג כמו ב-pandas; חלון ריק או ללא ערכים מחזיר NaN.
+
+    Args:
+        values: סדרת ערכים
+        start, stop: גבולות החלונות (stop לא כולל)
+        how: mean / std (ddof=1) / max / min / sum / count
+    """
+    array = _as_array(values)
+    start = np.asarray(start, dtype=np.int64)
+    stop = np.asarray(stop, dtype=np.int64)
+    if not len(stop):
+        return np.empty(0)
+    width = int(max(1, (stop - start).max()))
+    positions = stop[:, None] - width + np.arange(width)
+    valid = positions >= np.maximum(start, 0)[:, None]
+    windows = np.where(valid, array[np.clip(positions, 0, max(len(array) - 1, 0))], np.nan)
+    if how == "count":
+        return (~np.isnan(windows)).sum(axis=1).astype(float)
+    if how == "sum":
+        return np.nansum(windows, axis=1)
+    reducers = {
+        "mean": np.nanmean,
+        "max": np.nanmax,
+        "min": np.nanmin,
+        "std": lambda w, axis: np.nanstd(w, axis=axis, ddof=1),
+    }
+    if how not in reducers:
+        raise ValueError(f"צמצום לא מוכר: {how}")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # חלון ללא ערכים -> NaN
+        return reducers[how](windows, axis=1)
+
+
+def trailing(values, rows: np.ndarray, lookback: int, how: str = "mean") -> np.ndarray:
+    """
+    צמצום החלון שלפני כל נר: values.iloc[max(0, i - lookback):i] לכל i ב-rows
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    return window_reduce(values, np.maximum(rows - lookback, 0), rows, how)
+
+
+def forward_window(values, rows: np.ndarray, horizon: int, stop=None) -> np.ndarray:
+    """
+    מטריצת הנרות שאחרי כל נר: שורה k היא values[rows[k] + 1 : rows[k] + 1 + horizon]
+    (עמודה j = j + 1 נרות קדימה). ערכים מ-stop[k] והלאה (סוף הנתונים / סוף המניה
+    בסריקה מרובת מניות) הם NaN.
+    """
+    array = _as_array(values)
+    rows = np.asarray(rows, dtype=np.int64)
+    stop = np.full(len(rows), len(array)) if stop is None else np.asarray(stop, dtype=np.int64)
+    positions = rows[:, None] + 1 + np.arange(max(int(horizon), 0))
+    valid = positions < np.minimum(stop, len(array))[:, None]
+    return np.where(valid, array[np.clip(positions, 0, max(len(array) - 1, 0))], np.nan)
+
+
+def window_length(rows: np.ndarray, lookback: int) -> np.ndarray:
+    """len(df.iloc[max(0, i - lookback):i]) לכל i ב-rows"""
+    rows = np.asarray(rows, dtype=np.int64)
+    return rows - np.maximum(rows - lookback, 0)
+
+
+# ---------- נוסחאות ----------
+
+def ratio_or(numerator, denominator, default: float) -> np.ndarray:
+    """numerator / denominator אם המכנה חיובי, אחרת default (גם כשהמכנה NaN)"""
+    numerator = _as_array(numerator)
+    denominator = _as_array(denominator)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / denominator, default)
+
+
+def bounded(values, lower: Optional[float] = None, upper: Optional[float] = None) -> np.ndarray:
+    """
+    min(upper, max(lower, x)) בסמנטיקה של פייתון: ערך NaN מוחלף בגבול
+    (בניגוד ל-np.clip שמשאיר NaN)
+    """
+    values = _as_array(values)
+    if lower is not None:
+        values = np.where(values > lower, values, lower)
+    if upper is not None:
+        values = np.where(values < upper, values, upper)
+    return values
+
+
+def count_true(*conditions) -> np.ndarray:
+    """מספר התנאים שמתקיימים בכל שורה (sum([cond1, cond2, ...]))"""
+    return np.sum([np.asarray(condition, dtype=bool) for condition in conditions], axis=0)
+
+
+def add_if(total, condition, amount: float) -> np.ndarray:
+    """`if condition: total += amount` על עמודה שלמה (באותו סדר חיבור כמו הקוד הסקלרי)"""
+    return total + np.where(condition, amount, 0.0)
+
+
+def tiered(conditions: Sequence[Tuple[np.ndarray, object]], default) -> np.ndarray:
+    """שרשרת if / elif / else: הערך של התנאי הראשון שמתקיים"""
+    return np.select([np.asarray(c, dtype=bool) for c, _ in conditions], [v for _, v in conditions], default)
+
+
+def significance_levels(strength, confidence, levels: Sequence[Tuple[str, float, float]],
+                        default: str = "minimal") -> np.ndarray:
+    """
+    רמת משמעות לכל אירוע: התווית הראשונה ש-strength >= סף העוצמה שלה וגם confidence >= סף הביטחון
+
+    Args:
+        levels: [(label, min_strength, min_confidence), ...] מהגבוה לנמוך
+    """
+    strength = _as_array(strength)
+    confidence = _as_array(confidence)
+    return tiered([((strength >= min_strength) & (confidence >= min_confidence), label)
+                   for label, min_strength, min_confidence in levels], default).astype(LABEL_DTYPE)
+
+
+# ---------- טבלת אירועים ----------
+
+class EventTable:
+    """
+    אירועים שזוהו, כמערך מובנה: עמודת position (מיקום הנר ב-DataFrame) ועמודה
+    לכל ערך של האירוע. factory בונה אובייקט אירוע (dataclass) משורה - רק כשמבקשים
+    אובייקטים (head / top / last).
+    """
+
+    def __init__(self, records: np.ndarray, factory: Optional[Callable[[np.void], object]] = None):
+        self.records = records
+        self.factory = factory
+
+    @classmethod
+    def from_mask(cls, mask, rows=None, factory: Optional[Callable[[np.void], object]] = None,
+                  **columns) -> "EventTable":
+        """
+        טבלה מהשורות שבהן mask מתקיים
+
+        Args:
+            mask: מסכה בוליאנית באורך העמודות
+            rows: מיקום הנר של כל שורה (ברירת מחדל 0..len-1)
+            factory: בניית אובייקט אירוע מרשומה
+            columns: עמודות באורך mask (מספרים, תוויות, או object - למשל מחרוזות ללא הגבלת אורך)
+        """
+        mask = np.asarray(mask, dtype=bool)
+        rows = np.arange(len(mask)) if rows is None else np.asarray(rows, dtype=np.int64)
+        selected = {name: np.asarray(values)[mask] for name, values in columns.items()}
+        dtype = [("position", np.int64)] + [
+            (name, LABEL_DTYPE if values.dtype.kind in "US" else
+             (object if values.dtype.kind == "O" else (bool if values.dtype.kind == "b" else np.float64)))
+            for name, values in selected.items()]
+        records = np.empty(int(mask.sum()), dtype=dtype)
+        records["position"] = rows[mask]
+        for name, values in selected.items():
+            records[name] = values
+        return cls(records, factory)
+
+    @classmethod
+    def empty(cls, factory: Optional[Callable[[np.void], object]] = None) -> "EventTable":
+        return cls(np.empty(0, dtype=[("position", np.int64)]), factory)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __bool__(self) -> bool:
+        return len(self.records) > 0
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.records[field]
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        return self.records.dtype.names
+
+    def count(self, field: str, values: Iterable) -> int:
+        """מספר האירועים שערך field שלהם נמצא ב-values"""
+        if not len(self.records):
+            return 0
+        return int(np.isin(self.records[field], list(values)).sum())
+
+    def mean(self, field: str, default: float) -> float:
+        """ממוצע העמודה (default כשאין אירועים)"""
+        return float(np.mean(self.records[field])) if len(self.records) else default
+
+    def filter(self, mask) -> "EventTable":
+        return EventTable(self.records[np.asarray(mask, dtype=bool)], self.factory)
+
+    def objects(self, records: Optional[np.ndarray] = None) -> List:
+        """בניית אובייקטי אירוע (כל הטבלה, או הרשומות שנבחרו)"""
+        records = self.records if records is None else records
+        if not len(records):
+            return []
+        if self.factory is None:
+            raise ValueError("לטבלת האירועים אין factory")
+        return [self.factory(record) for record in records]
+
+    def head(self, n: int) -> List:
+        """n האירועים הראשונים (בסדר כרונולוגי) כאובייקטים"""
+        return self.objects(self.records[:n])
+
+    def top(self, n: int, by: str) -> List:
+        """n האירועים עם הערך הגבוה ביותר ב-by כאובייקטים (יציב - המוקדם קודם בשוויון)"""
+        order = np.argsort(-self.records[by], kind="stable")[:n]
+        return self.objects(self.records[order])
+
+    def last(self):
+        """האירוע האחרון כאובייקט (None אם אין)"""
+        return self.objects(self.records[-1:])[0] if len(self.records) else None
+
+    def to_dict(self) -> Dict[str, list]:
+        """העמודות כרשימות (לייצוא / דיבאג)"""
+        return {name: self.records[name].tolist() for name in self.fields}
+
+
+# ---------- גלאי זרימה ----------
+
+@dataclass(frozen=True)
+class FlowEventSpec:
+    """
+    הגדרת גלאי זרימה של סוכן (כסף גדול, בריכות אפלות, לחץ צף, מלכודות נזילות,
+    רגשות קמעונאיים): אותם קריטריונים על עמודות בשמות אחרים ועם תוויות אחרות.
+
+    type_labels: חמש תוויות הסוג לפי סדר המדרגות - נפח ומחיר חזקים לאורך זמן,
+    נפח בלי מחיר, קפיצה חדה, משך ארוך, ואחרת (ברירת מחדל).
+    """
+    name: str
+    metrics_key: str
+    volume_column: str
+    price_column: str
+    score_column: str
+    ratio_column: str
+    sector_key: str
+    type_field: str
+    ratio_field: str
+    type_labels: Tuple[str, str, str, str, str]
+    # סף הביטחון של כל רמת משמעות (מול ספי העוצמה של הסוכן)
+    significance_confidence: Tuple[Tuple[str, float], ...] = (
+        ('extreme', 0.8), ('high', 0.6), ('moderate', 0.4), ('low', 0.2))
+
+    @classmethod
+    def from_prefix(cls, prefix: str, **kwargs) -> "FlowEventSpec":
+        """הגדרה לעמודות בשמות {prefix}_volume_ratio / _price_ratio / _score / _ratio"""
+        columns = {
+            'metrics_key': f"{prefix}_metrics",
+            'volume_column': f"{prefix}_volume_ratio",
+            'price_column': f"{prefix}_price_ratio",
+            'score_column': f"{prefix}_score",
+            'ratio_column': f"{prefix}_ratio",
+        }
+        columns.update(kwargs)
+        return cls(**columns)
+
+
+def detect_flow_events(df, spec: FlowEventSpec, metrics: Callable, sector: Callable,
+                       thresholds: Dict[str, float], build: Callable) -> EventTable:
+    """
+    זיהוי אירועי זרימה על כל הנרות בבת אחת (עמודות NumPy)
+
+    Args:
+        df: נתוני מחיר
+        spec: עמודות ותוויות הסוכן
+        metrics: חישוב המדדים של הסוכן - מילון שבו spec.metrics_key הוא הפריים
+        sector: ניתוח הסקטור של הסוכן (df, index) - מילון עם spec.sector_key
+        thresholds: ספי העוצמה לכל רמת משמעות
+        build: בניית אובייקט האירוע (df, record) - רק לאירועים שמוצגים
+    """
+    try:
+        calculated = metrics(df)
+        if not calculated:
+            return EventTable.empty()
+
+        df = calculated[spec.metrics_key]
+        rows = np.arange(20, len(df))
+        if not len(rows):
+            return EventTable.empty()
+        close = df['close'].to_numpy(dtype=float)[rows]
+
+        # נפח ומחיר - הערך הנוכחי מול ממוצע 30 הנרות הקודמים
+        volume_ratio = ratio_or(df[spec.volume_column].to_numpy(dtype=float)[rows],
+                                trailing(df[spec.volume_column], rows, 30), 1.0)
+        price_ratio = ratio_or(df[spec.price_column].to_numpy(dtype=float)[rows],
+                               trailing(df[spec.price_column], rows, 30), 1.0)
+        historical_price = trailing(df['close'], rows, 20)
+        price_impact = ratio_or(close - historical_price, historical_price, 0.0)
+
+        # זמן וסקטור
+        duration = window_length(rows, 30)
+        sector_avg = sector(df, len(df) - 1).get(spec.sector_key, 0.5)
+        relative_to_sector = df[spec.score_column].to_numpy(dtype=float)[rows] / sector_avg
+
+        # פוטנציאל פריצה (רצועות של 2% סביב המחיר)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            upside_potential = (close * 1.02 - close) / close
+            downside_potential = (close - close * 0.98) / close
+        breakout_strength = np.where(downside_potential > upside_potential, downside_potential, upside_potential)
+
+        # קריטריונים
+        volume_active = volume_ratio > 1.2
+        price_active = price_ratio > 1.1
+        time_active = duration >= 15
+        sector_active = relative_to_sector > 1.0
+        detected = count_true(volume_active, price_active, time_active, sector_active) >= 2
+
+        # עוצמה
+        strength = np.zeros(len(rows))
+        strength = strength + tiered([(volume_ratio > 1.5, 0.3), (volume_active, 0.2)], 0.0)
+        strength = strength + tiered([(price_ratio > 1.3, 0.3), (price_active, 0.2)], 0.0)
+        strength = strength + tiered([(duration >= 25, 0.2), (time_active, 0.1)], 0.0)
+        strength = add_if(strength, relative_to_sector > 1.2, 0.1)
+        strength = bounded(add_if(strength, breakout_strength > 0.05, 0.1), upper=1.0)
+
+        # ביטחון
+        confidence = count_true(volume_active, price_active, time_active, sector_active,
+                                breakout_strength > 0.03) / 5.0
+        confidence = np.where((volume_ratio + price_ratio) / 2 > 1.3, confidence * 1.2, confidence)
+        confidence = bounded(confidence, upper=1.0)
+
+        # סוג ומשמעות
+        sustained, volume_only, spike, lasting, default = spec.type_labels
+        event_type = tiered([
+            ((volume_ratio > 1.5) & (price_ratio > 1.3) & (duration >= 25), sustained),
+            ((volume_ratio > 1.3) & (price_ratio < 0.9) & (duration >= 20), volume_only),
+            ((volume_ratio > 2.0) & (price_ratio > 1.5), spike),
+            (duration >= 30, lasting),
+        ], default)
+        significance = significance_levels(strength, confidence, [
+            (label, thresholds[label], min_confidence) for label, min_confidence in spec.significance_confidence
+        ])
+
+        return EventTable.from_mask(
+            detected, rows=rows, factory=lambda record: build(df, record),
+            **{spec.type_field: event_type}, strength=strength, confidence=confidence,
+            **{spec.ratio_field: df[spec.ratio_column].to_numpy(dtype=float)[rows]},
+            volume_ratio=volume_ratio, price_impact=price_impact, significance=significance
+        )
+
+    except Exception as e:
+        logger.error("Error detecting %s: %s", spec.name, e)
+        return EventTable.empty()
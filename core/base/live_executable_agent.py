@@ -1,6 +1,29 @@
+import logging
 import time
 from abc import ABC, abstractmethod
 
+logger = logging.getLogger(__name__)
+
+
+class ResultSummary:
+    """תקציר של תוצאת הרצה - מחושב רק כשמדפיסים (טבלה מוצגת כגודל + השורה האחרונה)"""
+
+    def __init__(self, result):
+        self.result = result
+
+    def __str__(self):
+        result = self.result
+        if hasattr(result, "shape") and hasattr(result, "iloc"):
+            if len(result) == 0:
+                return f"{type(result).__name__} ריק"
+            last = result.iloc[-1]
+            last = last.to_dict() if hasattr(last, "to_dict") else last
+            return f"{type(result).__name__} {result.shape}, אחרון: {last}"
+        if isinstance(result, dict):
+            return ", ".join(f"{k}={result[k]}" for k in ("score", "signal", "confidence") if k in result) or str(result)
+        return str(result)
+
+
 class LiveExecutableAgent(ABC):
     def __init__(self, symbol, interval="1day", live_mode=False, frequency_sec=60):
         self.symbol = symbol
@@ -20,7 +43,9 @@ class LiveExecutableAgent(ABC):
             print(f"\n⚡ הרצה {i+1} | סוכן: {self.__class__.__name__} | סימבול: {self.symbol} | אינטרוול: {self.interval}")
             try:
                 result = self.run_once()
-                print(result)
+                # תקציר בלבד בכל מחזור; התוצאה המלאה נבנית רק אם DEBUG פעיל
+                print(ResultSummary(result))
+                logger.debug("תוצאה מלאה %s/%s: %s", self.__class__.__name__, self.symbol, result)
             except Exception as e:
                 print(f"❌ שגיאה במהלך ההרצה: {e}")
 
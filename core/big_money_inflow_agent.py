@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, FlowEventSpec, detect_flow_events
 from utils.constants import BIG_MONEY_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,12 @@ class BigMoneyInflowAgent(BaseAgent):
     - ניתוח כסף גדול לפי נפח ומחיר
     """
     
+    price_requirement = PriceRequirement(days=180)
+    event_spec = FlowEventSpec.from_prefix(
+        'big_money', name='big money inflows', sector_key='sector_avg_inflow',
+        type_field='inflow_type', ratio_field='money_ratio',
+        type_labels=('institutional', 'retail', 'hedge_fund', 'foreign', 'insider'))
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -140,82 +147,36 @@ class BigMoneyInflowAgent(BaseAgent):
             logger.error(f"Error calculating big money metrics: {e}")
             return {}
 
-    def _detect_big_money_inflows(self, df: pd.DataFrame) -> List[BigMoneyInflow]:
+    def _detect_big_money_inflows(self, df: pd.DataFrame) -> EventTable:
         """
-        זיהוי כסף גדול מתקדם
+        זיהוי כסף גדול - הגלאי המשותף (detect_flow_events) עם העמודות והתוויות של event_spec;
+        אובייקטי האירוע עם ה-context המפורט נבנים רק לאירועים שמוצגים (_build_big_money_inflow).
         """
-        inflows = []
-        
-        try:
-            # חישוב מדדי כסף גדול
-            big_money_metrics = self._calculate_big_money_metrics(df)
-            if not big_money_metrics:
-                return inflows
-            
-            df = big_money_metrics['big_money_metrics']
-            
-            # זיהוי כסף גדול
-            for i in range(20, len(df)):
-                # ניתוח כסף גדול נפח
-                volume_inflow = self._analyze_volume_inflow(df, i)
-                
-                # ניתוח כסף גדול מחיר
-                price_inflow = self._analyze_price_inflow(df, i)
-                
-                # ניתוח כסף גדול זמן
-                time_inflow = self._analyze_time_inflow(df, i)
-                
-                # ניתוח כסף גדול סקטור
-                sector_inflow = self._analyze_sector_inflow(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי כסף גדול
-                if self._is_big_money_inflow(volume_inflow, price_inflow, time_inflow, sector_inflow):
-                    # חישוב עוצמת הכסף הגדול
-                    strength = self._calculate_inflow_strength(
-                        volume_inflow, price_inflow, time_inflow, sector_inflow, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_inflow_confidence(
-                        volume_inflow, price_inflow, time_inflow, sector_inflow, breakout_potential
-                    )
-                    
-                    # קביעת סוג כסף גדול
-                    inflow_type = self._classify_inflow_type(
-                        volume_inflow, price_inflow, time_inflow
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_inflow_significance(strength, confidence)
-                    
-                    inflow = BigMoneyInflow(
-                        timestamp=df.index[i],
-                        inflow_type=inflow_type,
-                        strength=strength,
-                        confidence=confidence,
-                        money_ratio=df['big_money_ratio'].iloc[i],
-                        volume_ratio=volume_inflow.get('inflow_ratio', 1.0),
-                        price_impact=price_inflow.get('price_impact', 0.0),
-                        context={
-                            'volume_inflow': volume_inflow,
-                            'price_inflow': price_inflow,
-                            'time_inflow': time_inflow,
-                            'sector_inflow': sector_inflow,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    inflows.append(inflow)
-            
-            return inflows
-            
-        except Exception as e:
-            logger.error(f"Error detecting big money inflows: {e}")
-            return []
+        return detect_flow_events(df, self.event_spec, self._calculate_big_money_metrics, self._analyze_sector_inflow,
+                                  self.big_money_thresholds, self._build_big_money_inflow)
+
+    def _build_big_money_inflow(self, df: pd.DataFrame, record) -> BigMoneyInflow:
+        """
+        בניית BigMoneyInflow מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return BigMoneyInflow(
+            timestamp=df.index[i],
+            inflow_type=str(record['inflow_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            money_ratio=float(record['money_ratio']),
+            volume_ratio=float(record['volume_ratio']),
+            price_impact=float(record['price_impact']),
+            context={
+                'volume_inflow': self._analyze_volume_inflow(df, i),
+                'price_inflow': self._analyze_price_inflow(df, i),
+                'time_inflow': self._analyze_time_inflow(df, i),
+                'sector_inflow': self._analyze_sector_inflow(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_volume_inflow(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -524,17 +485,17 @@ class BigMoneyInflowAgent(BaseAgent):
             logger.error(f"Error determining inflow significance: {e}")
             return 'unknown'
 
-    def _calculate_big_money_analysis(self, df: pd.DataFrame, inflows: List[BigMoneyInflow]) -> BigMoneyAnalysis:
+    def _calculate_big_money_analysis(self, df: pd.DataFrame, inflows: EventTable) -> BigMoneyAnalysis:
         """
         חישוב ניתוח כסף גדול מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_inflows = len(inflows)
-            significant_inflows = len([i for i in inflows if i.significance in ['high', 'extreme']])
+            significant_inflows = inflows.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע עוצמת כסף גדול
-            avg_inflow_strength = np.mean([i.strength for i in inflows]) if inflows else 0.5
+            avg_inflow_strength = inflows.mean('strength', 0.5)
             
             # ניתוח מגמת כסף גדול
             recent_big_money = df['big_money_score'].tail(20).mean()
@@ -578,7 +539,7 @@ class BigMoneyInflowAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -606,8 +567,8 @@ class BigMoneyInflowAgent(BaseAgent):
             
             # יצירת הסבר
             if inflows:
-                recent_inflows = [i for i in inflows if i.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(inflows)} כספים גדולים ({len(recent_inflows)} משמעותיים). ממוצע עוצמה: {analysis.avg_inflow_strength:.2f}, מגמת כסף: {analysis.money_trend}"
+                recent_inflows = inflows.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(inflows)} כספים גדולים ({recent_inflows} משמעותיים). ממוצע עוצמה: {analysis.avg_inflow_strength:.2f}, מגמת כסף: {analysis.money_trend}"
             else:
                 explanation = "לא זוהו כספים גדולים משמעותיים"
             
@@ -640,7 +601,7 @@ class BigMoneyInflowAgent(BaseAgent):
                             "confidence": round(inflow.confidence, 3),
                             "money_ratio": round(inflow.money_ratio, 2)
                         }
-                        for inflow in inflows[:10]  # Top 10 inflows
+                        for inflow in inflows.head(10)  # Top 10 inflows
                     ],
                     "analysis": {
                         "total_inflows": analysis.total_inflows,
@@ -679,7 +640,7 @@ class BigMoneyInflowAgent(BaseAgent):
                 }
             }
 
-    def _generate_recommendations(self, inflows: List[BigMoneyInflow], analysis: BigMoneyAnalysis) -> List[str]:
+    def _generate_recommendations(self, inflows: EventTable, analysis: BigMoneyAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
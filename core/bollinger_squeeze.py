@@ -8,7 +8,7 @@ import logging
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 try:
     from ta.volatility import BollingerBands
     TA_AVAILABLE = True
@@ -22,6 +22,8 @@ class BollingerSqueeze(BaseAgent):
     מזהה מצבים של התכווצות שעלולים להוביל לפריצה
     """
     
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -46,7 +48,7 @@ class BollingerSqueeze(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
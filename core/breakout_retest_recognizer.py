@@ -1,8 +1,10 @@
 import numpy as np
 import pandas as pd
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 class BreakoutRetestRecognizer(BaseAgent):
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, symbol=None, config=None):
         super().__init__(config)
         self.symbol = symbol
@@ -107,7 +109,7 @@ class BreakoutRetestRecognizer(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -1,7 +1,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 import logging
 from typing import Dict, List
 
@@ -11,6 +11,8 @@ class BullishPatternSpotter(BaseAgent):
     כולל תבניות קנדלסטיק פשוטות ותבניות מורכבות מבוססות למידה
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -30,7 +32,7 @@ class BullishPatternSpotter(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -1,9 +1,11 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 class CandlestickAgent(BaseAgent):
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         """
         Candlestick Agent – זיהוי תבניות נרות יפניים מתקדם.
@@ -15,6 +17,8 @@ class CandlestickAgent(BaseAgent):
         self.vol_confirm = cfg.get("vol_confirm", 1.3)  # פי כמה מהנפח הממוצע הנדרש לאישור תבנית
         self.ma_period = cfg.get("ma_period", 20)  # ממוצע נע להקשר
         self.rsi_period = cfg.get("rsi_period", 14)  # תקופת RSI
+        self.accuracy_horizon = cfg.get("accuracy_horizon", 5)  # אופק (נרות) לבדיקת דיוק היסטורי
+        self.accuracy_min_samples = cfg.get("accuracy_min_samples", 5)  # מינימום תבניות עם תוצאה ידועה
         self.strong_patterns = ["Hammer", "Bullish Engulfing", "Morning Star", "Piercing Line",
                                 "Shooting Star", "Bearish Engulfing", "Evening Star", "Dark Cloud Cover",
                                 "Three White Soldiers", "Three Black Crows", "Hanging Man", "Inverted Hammer"]
@@ -32,7 +36,7 @@ class CandlestickAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -342,13 +346,59 @@ class CandlestickAgent(BaseAgent):
                             (best_pattern["type"] == "bearish" and latest["rsi"] > 60)
         }
 
+    def _pattern_directions(self, df):
+        """
+        כיוון התבנית בכל נר, וקטורית על כל הסדרה: 1 בולישי, -1 דובי, 0 אין תבנית
+        (תבניות נר בודד ו-Engulfing, באותם תנאים כמו _detect_single_patterns / _detect_multi_candle_patterns)
+        """
+        body, rng = df["body"], df["range"]
+        upper, lower = df["upper_shadow"], df["lower_shadow"]
+        open_, close = df["open"], df["close"]
+        up, down = close > open_, close < open_
+
+        long_lower = (lower > 2 * body) & (body > 0.1 * rng) & (upper < 0.3 * rng) & (lower > 0.6 * rng)
+        long_upper = (upper > 2 * body) & (body > 0.1 * rng) & (lower < 0.3 * rng) & (upper > 0.6 * rng)
+        marubozu = (body > 0.9 * rng) & (upper < 0.05 * rng) & (lower < 0.05 * rng)
+
+        prev_open, prev_close = open_.shift(1), close.shift(1)
+        bullish_engulfing = (prev_close < prev_open) & up & (close > prev_open) & (open_ < prev_close)
+        bearish_engulfing = (prev_close > prev_open) & down & (close < prev_open) & (open_ > prev_close)
+
+        bullish = ((long_lower | long_upper | marubozu) & up) | bullish_engulfing
+        bearish = ((long_lower | long_upper | marubozu) & down) | bearish_engulfing
+        return np.where(bullish & ~bearish, 1, np.where(bearish & ~bullish, -1, 0))
+
     def _analyze_historical_accuracy(self, symbol, df):
-        """ניתוח דיוק היסטורי של תבניות"""
-        # זה דורש נתונים היסטוריים נוספים - כרגע נחזיר ערך ברירת מחדל
+        """
+        ניתוח דיוק היסטורי של תבניות: באיזה שיעור מהתבניות בסדרה המחיר זז בכיוון
+        התבנית תוך accuracy_horizon נרות (רק תבניות שתוצאתן כבר ידועה)
+        """
+        horizon = self.accuracy_horizon
+        directions = self._pattern_directions(df)
+        future_return = (df["close"].shift(-horizon) / df["close"] - 1).to_numpy()
+        known = (directions != 0) & ~np.isnan(future_return)
+        samples = int(known.sum())
+        if samples < self.accuracy_min_samples:
+            return {
+                "score": 60,
+                "accuracy": "בינונית",
+                "samples": samples,
+                "note": "אין מספיק תבניות היסטוריות עם תוצאה ידועה"
+            }
+
+        hit_rate = float((np.sign(future_return[known]) == directions[known]).mean())
+        if hit_rate >= 0.6:
+            accuracy = "גבוהה"
+        elif hit_rate >= 0.45:
+            accuracy = "בינונית"
+        else:
+            accuracy = "נמוכה"
         return {
-            "score": 60,
-            "accuracy": "בינונית",
-            "note": "דיוק היסטורי דורש נתונים נוספים"
+            "score": max(1, min(100, int(round(hit_rate * 100)))),
+            "accuracy": accuracy,
+            "hit_rate": round(hit_rate, 3),
+            "samples": samples,
+            "horizon": horizon
         }
 
     def _calculate_weighted_score(self, pattern, context, confirmation, accuracy):
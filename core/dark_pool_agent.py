@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, FlowEventSpec, detect_flow_events
 from utils.constants import DARK_POOL_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,12 @@ class DarkPoolAgent(BaseAgent):
     - ניתוח פעילות בריכות אפלות לפי נפח ומחיר
     """
     
+    price_requirement = PriceRequirement(days=180)
+    event_spec = FlowEventSpec.from_prefix(
+        'dark_pool', name='dark pool activities', sector_key='sector_avg_activity',
+        type_field='activity_type', ratio_field='dark_pool_ratio',
+        type_labels=('accumulation', 'distribution', 'manipulation', 'event_driven', 'natural'))
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -140,82 +147,36 @@ class DarkPoolAgent(BaseAgent):
             logger.error(f"Error calculating dark pool metrics: {e}")
             return {}
 
-    def _detect_dark_pool_activities(self, df: pd.DataFrame) -> List[DarkPoolActivity]:
+    def _detect_dark_pool_activities(self, df: pd.DataFrame) -> EventTable:
         """
-        זיהוי פעילות בריכות אפלות מתקדם
+        זיהוי פעילות בריכות אפלות - הגלאי המשותף (detect_flow_events) עם העמודות והתוויות של event_spec;
+        אובייקטי האירוע עם ה-context המפורט נבנים רק לאירועים שמוצגים (_build_dark_pool_activity).
         """
-        activities = []
-        
-        try:
-            # חישוב מדדי בריכות אפלות
-            dark_pool_metrics = self._calculate_dark_pool_metrics(df)
-            if not dark_pool_metrics:
-                return activities
-            
-            df = dark_pool_metrics['dark_pool_metrics']
-            
-            # זיהוי פעילות בריכות אפלות
-            for i in range(20, len(df)):
-                # ניתוח פעילות בריכות אפלות נפח
-                volume_activity = self._analyze_volume_activity(df, i)
-                
-                # ניתוח פעילות בריכות אפלות מחיר
-                price_activity = self._analyze_price_activity(df, i)
-                
-                # ניתוח פעילות בריכות אפלות זמן
-                time_activity = self._analyze_time_activity(df, i)
-                
-                # ניתוח פעילות בריכות אפלות סקטור
-                sector_activity = self._analyze_sector_activity(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי פעילות בריכות אפלות
-                if self._is_dark_pool_activity(volume_activity, price_activity, time_activity, sector_activity):
-                    # חישוב עוצמת הפעילות
-                    strength = self._calculate_activity_strength(
-                        volume_activity, price_activity, time_activity, sector_activity, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_activity_confidence(
-                        volume_activity, price_activity, time_activity, sector_activity, breakout_potential
-                    )
-                    
-                    # קביעת סוג פעילות
-                    activity_type = self._classify_activity_type(
-                        volume_activity, price_activity, time_activity
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_activity_significance(strength, confidence)
-                    
-                    activity = DarkPoolActivity(
-                        timestamp=df.index[i],
-                        activity_type=activity_type,
-                        strength=strength,
-                        confidence=confidence,
-                        dark_pool_ratio=df['dark_pool_ratio'].iloc[i],
-                        volume_ratio=volume_activity.get('activity_ratio', 1.0),
-                        price_impact=price_activity.get('price_impact', 0.0),
-                        context={
-                            'volume_activity': volume_activity,
-                            'price_activity': price_activity,
-                            'time_activity': time_activity,
-                            'sector_activity': sector_activity,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    activities.append(activity)
-            
-            return activities
-            
-        except Exception as e:
-            logger.error(f"Error detecting dark pool activities: {e}")
-            return []
+        return detect_flow_events(df, self.event_spec, self._calculate_dark_pool_metrics, self._analyze_sector_activity,
+                                  self.dark_pool_thresholds, self._build_dark_pool_activity)
+
+    def _build_dark_pool_activity(self, df: pd.DataFrame, record) -> DarkPoolActivity:
+        """
+        בניית DarkPoolActivity מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return DarkPoolActivity(
+            timestamp=df.index[i],
+            activity_type=str(record['activity_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            dark_pool_ratio=float(record['dark_pool_ratio']),
+            volume_ratio=float(record['volume_ratio']),
+            price_impact=float(record['price_impact']),
+            context={
+                'volume_activity': self._analyze_volume_activity(df, i),
+                'price_activity': self._analyze_price_activity(df, i),
+                'time_activity': self._analyze_time_activity(df, i),
+                'sector_activity': self._analyze_sector_activity(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_volume_activity(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -524,17 +485,17 @@ class DarkPoolAgent(BaseAgent):
             logger.error(f"Error determining activity significance: {e}")
             return 'unknown'
 
-    def _calculate_dark_pool_analysis(self, df: pd.DataFrame, activities: List[DarkPoolActivity]) -> DarkPoolAnalysis:
+    def _calculate_dark_pool_analysis(self, df: pd.DataFrame, activities: EventTable) -> DarkPoolAnalysis:
         """
         חישוב ניתוח פעילות בריכות אפלות מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_activities = len(activities)
-            significant_activities = len([a for a in activities if a.significance in ['high', 'extreme']])
+            significant_activities = activities.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע עוצמת פעילות
-            avg_activity_strength = np.mean([a.strength for a in activities]) if activities else 0.5
+            avg_activity_strength = activities.mean('strength', 0.5)
             
             # ניתוח מגמת בריכות אפלות
             recent_dark_pool = df['dark_pool_score'].tail(20).mean()
@@ -578,7 +539,7 @@ class DarkPoolAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -606,8 +567,8 @@ class DarkPoolAgent(BaseAgent):
             
             # יצירת הסבר
             if activities:
-                recent_activities = [a for a in activities if a.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(activities)} פעילויות בריכות אפלות ({len(recent_activities)} משמעותיות). ממוצע עוצמה: {analysis.avg_activity_strength:.2f}, מגמת בריכות אפלות: {analysis.dark_pool_trend}"
+                recent_activities = activities.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(activities)} פעילויות בריכות אפלות ({recent_activities} משמעותיות). ממוצע עוצמה: {analysis.avg_activity_strength:.2f}, מגמת בריכות אפלות: {analysis.dark_pool_trend}"
             else:
                 explanation = "לא זוהו פעילויות בריכות אפלות משמעותיות"
             
@@ -640,7 +601,7 @@ class DarkPoolAgent(BaseAgent):
                             "confidence": round(activity.confidence, 3),
                             "dark_pool_ratio": round(activity.dark_pool_ratio, 2)
                         }
-                        for activity in activities[:10]  # Top 10 activities
+                        for activity in activities.head(10)  # Top 10 activities
                     ],
                     "analysis": {
                         "total_activities": analysis.total_activities,
@@ -679,7 +640,7 @@ class DarkPoolAgent(BaseAgent):
                 }
             }
 
-    def _generate_recommendations(self, activities: List[DarkPoolActivity], analysis: DarkPoolAnalysis) -> List[str]:
+    def _generate_recommendations(self, activities: EventTable, analysis: DarkPoolAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
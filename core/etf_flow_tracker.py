@@ -12,7 +12,7 @@ from typing import Dict, List, Optional, Tuple, Any
 import logging
 from datetime import datetime, timedelta
 
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.logger import get_agent_logger
 from utils.validators import validate_symbol, validate_stock_data
 
@@ -29,6 +29,8 @@ class ETFFlowTracker(BaseAgent):
     - הזדמנויות השקעה
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         """אתחול הסוכן"""
         super().__init__(config)
@@ -105,7 +107,7 @@ class ETFFlowTracker(BaseAgent):
             
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
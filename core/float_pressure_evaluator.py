@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, FlowEventSpec, detect_flow_events
 from utils.data_fetcher import data_fetcher
 from utils.constants import FLOAT_PRESSURE_THRESHOLDS, TIME_PERIODS
 import logging
@@ -70,6 +71,14 @@ class FloatPressureEvaluator(BaseAgent):
     - ניתוח לחץ צף לפי נפח ומחיר
     """
     
+    price_requirement = PriceRequirement(days=180)
+    event_spec = FlowEventSpec(
+        name='float pressures', metrics_key='float_metrics',
+        volume_column='volume_pressure_ratio', price_column='price_pressure_ratio',
+        score_column='float_pressure_score', ratio_column='float_ratio', sector_key='sector_avg_pressure',
+        type_field='pressure_type', ratio_field='float_ratio',
+        type_labels=('accumulation', 'distribution', 'manipulation', 'event_driven', 'natural'))
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -142,82 +151,36 @@ class FloatPressureEvaluator(BaseAgent):
             logger.error(f"Error calculating float metrics: {e}")
             return {}
 
-    def _detect_float_pressures(self, df: pd.DataFrame) -> List[FloatPressure]:
+    def _detect_float_pressures(self, df: pd.DataFrame) -> EventTable:
         """
-        זיהוי לחץ צף מתקדם
+        זיהוי לחץ צף - הגלאי המשותף (detect_flow_events) עם העמודות והתוויות של event_spec;
+        אובייקטי האירוע עם ה-context המפורט נבנים רק לאירועים שמוצגים (_build_float_pressure).
         """
-        pressures = []
-        
-        try:
-            # חישוב מדדי צף
-            float_metrics = self._calculate_float_metrics(df)
-            if not float_metrics:
-                return pressures
-            
-            df = float_metrics['float_metrics']
-            
-            # זיהוי לחץ צף
-            for i in range(20, len(df)):
-                # ניתוח לחץ נפח
-                volume_pressure = self._analyze_volume_pressure(df, i)
-                
-                # ניתוח לחץ מחיר
-                price_pressure = self._analyze_price_pressure(df, i)
-                
-                # ניתוח לחץ זמן
-                time_pressure = self._analyze_time_pressure(df, i)
-                
-                # ניתוח לחץ סקטור
-                sector_pressure = self._analyze_sector_pressure(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי לחץ צף
-                if self._is_float_pressure(volume_pressure, price_pressure, time_pressure, sector_pressure):
-                    # חישוב עוצמת הלחץ
-                    strength = self._calculate_pressure_strength(
-                        volume_pressure, price_pressure, time_pressure, sector_pressure, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_pressure_confidence(
-                        volume_pressure, price_pressure, time_pressure, sector_pressure, breakout_potential
-                    )
-                    
-                    # קביעת סוג לחץ
-                    pressure_type = self._classify_pressure_type(
-                        volume_pressure, price_pressure, time_pressure
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_pressure_significance(strength, confidence)
-                    
-                    pressure = FloatPressure(
-                        timestamp=df.index[i],
-                        pressure_type=pressure_type,
-                        strength=strength,
-                        confidence=confidence,
-                        float_ratio=df['float_ratio'].iloc[i],
-                        volume_ratio=volume_pressure.get('pressure_ratio', 1.0),
-                        price_impact=price_pressure.get('price_impact', 0.0),
-                        context={
-                            'volume_pressure': volume_pressure,
-                            'price_pressure': price_pressure,
-                            'time_pressure': time_pressure,
-                            'sector_pressure': sector_pressure,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    pressures.append(pressure)
-            
-            return pressures
-            
-        except Exception as e:
-            logger.error(f"Error detecting float pressures: {e}")
-            return []
+        return detect_flow_events(df, self.event_spec, self._calculate_float_metrics, self._analyze_sector_pressure,
+                                  self.float_pressure_thresholds, self._build_float_pressure)
+
+    def _build_float_pressure(self, df: pd.DataFrame, record) -> FloatPressure:
+        """
+        בניית FloatPressure מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return FloatPressure(
+            timestamp=df.index[i],
+            pressure_type=str(record['pressure_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            float_ratio=float(record['float_ratio']),
+            volume_ratio=float(record['volume_ratio']),
+            price_impact=float(record['price_impact']),
+            context={
+                'volume_pressure': self._analyze_volume_pressure(df, i),
+                'price_pressure': self._analyze_price_pressure(df, i),
+                'time_pressure': self._analyze_time_pressure(df, i),
+                'sector_pressure': self._analyze_sector_pressure(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_volume_pressure(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -526,17 +489,17 @@ class FloatPressureEvaluator(BaseAgent):
             logger.error(f"Error determining pressure significance: {e}")
             return 'unknown'
 
-    def _calculate_float_pressure_analysis(self, df: pd.DataFrame, pressures: List[FloatPressure]) -> FloatPressureAnalysis:
+    def _calculate_float_pressure_analysis(self, df: pd.DataFrame, pressures: EventTable) -> FloatPressureAnalysis:
         """
         חישוב ניתוח לחץ צף מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_pressures = len(pressures)
-            significant_pressures = len([p for p in pressures if p.significance in ['high', 'extreme']])
+            significant_pressures = pressures.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע עוצמת לחץ
-            avg_pressure_strength = np.mean([p.strength for p in pressures]) if pressures else 0.5
+            avg_pressure_strength = pressures.mean('strength', 0.5)
             
             # ניתוח מגמת צף
             recent_float_pressure = df['float_pressure_score'].tail(20).mean()
@@ -580,7 +543,7 @@ class FloatPressureEvaluator(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -608,8 +571,8 @@ class FloatPressureEvaluator(BaseAgent):
             
             # יצירת הסבר
             if pressures:
-                recent_pressures = [p for p in pressures if p.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(pressures)} לחצי צף ({len(recent_pressures)} משמעותיים). ממוצע עוצמה: {analysis.avg_pressure_strength:.2f}, מגמת צף: {analysis.float_trend}"
+                recent_pressures = pressures.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(pressures)} לחצי צף ({recent_pressures} משמעותיים). ממוצע עוצמה: {analysis.avg_pressure_strength:.2f}, מגמת צף: {analysis.float_trend}"
             else:
                 explanation = "לא זוהו לחצי צף משמעותיים"
             
@@ -642,7 +605,7 @@ class FloatPressureEvaluator(BaseAgent):
                             "confidence": round(pressure.confidence, 3),
                             "float_ratio": round(pressure.float_ratio, 2)
                         }
-                        for pressure in pressures[:10]  # Top 10 pressures
+                        for pressure in pressures.head(10)  # Top 10 pressures
                     ],
                     "analysis": {
                         "total_pressures": analysis.total_pressures,
@@ -662,7 +625,7 @@ class FloatPressureEvaluator(BaseAgent):
             self.handle_error(e)
             return self.fallback()
 
-    def _generate_recommendations(self, pressures: List[FloatPressure], analysis: FloatPressureAnalysis) -> List[str]:
+    def _generate_recommendations(self, pressures: EventTable, analysis: FloatPressureAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
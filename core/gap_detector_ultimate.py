@@ -18,11 +18,17 @@ Original features + advanced research-grade enhancements
 """
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple, Optional
+from functools import partial
+from typing import Dict, List, Tuple, Optional, Union
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import (LABEL_DTYPE, EventTable, add_if, bounded, forward_window, tiered,
+                                       window_reduce)
+from utils.price_labels import forward_hit_offsets
+
+GAP_TYPES = ["breakaway", "runaway", "common", "exhaustion"]
+GAP_TYPE_SCORES = {"breakaway": 20, "runaway": 15, "common": 5, "exhaustion": 2}
 
 @dataclass
 class GapEvent:
@@ -42,7 +48,18 @@ class GapEvent:
     sector_performance: float
     historical_success_rate: float
 
+
+def _first_hit(hits: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Per row of a forward-window mask: whether any day hit, and the 1-based offset of the first hit (0 if none)"""
+    if not hits.shape[1]:
+        return np.zeros(len(hits), dtype=bool), np.zeros(len(hits), dtype=np.int64)
+    found = hits.any(axis=1)
+    return found, np.where(found, hits.argmax(axis=1) + 1, 0)
+
+
 class GapDetectorUltimate(BaseAgent):
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -211,157 +228,237 @@ class GapDetectorUltimate(BaseAgent):
             "volume_persistence_days": volume_persistence_days
         }
 
-    def _calculate_historical_success_rate(self, df: pd.DataFrame, current_idx: int, gap_pct: float) -> float:
+    def _gap_history(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        Vectorized gap history for the whole frame (computed once per analysis):
+        gap % of every bar and the offset of the first close reaching the follow-through
+        target within the next bars (NaN if it never did)
+        """
+        opens = df["open"].to_numpy(dtype=float)
+        closes = df["close"].to_numpy(dtype=float)
+        gap_pct = np.full(len(df), np.nan)
+        if len(df) > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                gap_pct[1:] = (opens[1:] - closes[:-1]) / closes[:-1] * 100
+        hit_offsets = forward_hit_offsets(closes, opens, self.gap_run_max_days, self.gap_run_min_follow_through)
+        return {"gap_pct": gap_pct, "hit_offsets": hit_offsets}
+
+    def _calculate_historical_success_rate(self, df: pd.DataFrame, current_idx: int, gap_pct: float,
+                                           history: Optional[Dict[str, np.ndarray]] = None) -> float:
         """
         Calculate historical success rate for similar gaps
+
+        Point-in-time: a past gap counts as a success only if its follow-through
+        happened on or before current_idx (no look-ahead past the evaluated gap).
         """
         if current_idx < self.min_historical_samples:
             return 0.5  # Default neutral probability
-        
-        # Look for similar gaps in history
-        historical_gaps = []
+        if history is None:
+            history = self._gap_history(df)
+
+        # Look for similar gaps (within 2% range) in the lookback window
         lookback_start = max(0, current_idx - self.historical_lookback_periods)
-        
-        for i in range(lookback_start + 1, current_idx):
-            if i >= len(df) - 1:
-                continue
-                
-            prev_close = df.iloc[i-1]["close"]
-            curr_open = df.iloc[i]["open"]
-            hist_gap_pct = ((curr_open - prev_close) / prev_close) * 100
-            
-            # Find similar gaps (within 2% range)
-            if abs(hist_gap_pct - gap_pct) <= 2.0 and hist_gap_pct >= self.gap_threshold_pct:
-                # Calculate success (did it continue up in next 5-10 days?)
-                success = False
-                check_end = min(len(df), i + 10)
-                for j in range(i + 1, check_end):
-                    future_return = ((df.iloc[j]["close"] - curr_open) / curr_open) * 100
-                    if future_return >= 5.0:  # 5% follow-through = success
-                        success = True
-                        break
-                
-                historical_gaps.append({
-                    "gap_pct": hist_gap_pct,
-                    "success": success,
-                    "index": i
-                })
-        
-        if len(historical_gaps) < 3:
+        stop = min(current_idx, len(df) - 1)
+        if stop <= lookback_start + 1:
+            return 0.5
+        positions = np.arange(lookback_start + 1, stop)
+        hist_gap_pct = history["gap_pct"][positions]
+        similar = (np.abs(hist_gap_pct - gap_pct) <= 2.0) & (hist_gap_pct >= self.gap_threshold_pct)
+
+        if similar.sum() < 3:
             return 0.5  # Not enough data
-        
-        # Calculate success rate
-        success_count = sum(1 for gap in historical_gaps if gap["success"])
-        success_rate = success_count / len(historical_gaps)
-        
-        return success_rate
 
-    def _calculate_gap_scores(self, df, verbose=False):
+        # Success: follow-through target hit within the window and known by current_idx
+        offsets = history["hit_offsets"][positions[similar]]
+        success = ~np.isnan(offsets) & (positions[similar] + np.nan_to_num(offsets) <= current_idx)
+        return float(success.mean())
+
+    def _historical_success_rates(self, rows: np.ndarray, local: np.ndarray, first_row: np.ndarray,
+                                  gap_pct: np.ndarray, history: Dict[str, np.ndarray],
+                                  chunk_size: int = 20000) -> np.ndarray:
         """
-        Enhanced gap scoring with advanced analysis
+        Vectorized _calculate_historical_success_rate for many gaps at once: each gap
+        gets a row of its lookback window (newest first) over the gap history.
+        Chunked so a universe scan never materializes more than chunk_size windows.
         """
-        if df is None or df.empty:
-            return []
-            
-        gap_events = []
-        
-        # Historical gap statistics for normalization
-        historical_gaps = []
-        for i in range(1, min(self.history_window, len(df))):
-            try:
-                prev_close = df.iloc[i-1]["close"]
-                curr_open = df.iloc[i]["open"]
-                gap = ((curr_open - prev_close) / prev_close) * 100
-                historical_gaps.append(abs(gap))
-            except (KeyError, IndexError):
-                continue
-        
-        rare_gap_thresh = np.percentile(historical_gaps, self.rare_gap_percentile) if historical_gaps else 5.0
-
-        for idx in range(1, len(df)):
-            try:
-                prev_close = df.iloc[idx-1]["close"]
-                cur_open = df.iloc[idx]["open"]
-                cur_close = df.iloc[idx]["close"]
-                cur_high = df.iloc[idx]["high"]
-                cur_low = df.iloc[idx]["low"]
-            except (KeyError, IndexError):
-                continue
-
-            gap_pct = 100 * (cur_open - prev_close) / prev_close
-            gap_size_dollars = cur_open - prev_close
-
-            # Only up-gaps for this agent
-            if gap_pct < self.gap_threshold_pct:
-                continue
-
-            # Advanced volume analysis
-            volume_metrics = self._calculate_advanced_volume_metrics(df, idx)
-            
-            # Gap type classification
-            gap_type = self._classify_gap_type(df, idx, gap_pct, volume_metrics)
-            
-            # Gap & Run analysis
-            gap_run_analysis = self._analyze_gap_and_run_pattern(df, idx, gap_pct)
-            
-            # Historical success rate
-            historical_success_rate = self._calculate_historical_success_rate(df, idx, gap_pct)
-            
-            # Gap quality scoring (0-100)
-            quality_score = 0
-            
-            # Gap size component (0-30 points)
-            quality_score += min(30, (gap_pct / 15) * 30)
-            
-            # Volume validation component (0-25 points)
-            quality_score += volume_metrics["validation_score"] * 25
-            
-            # Gap type component (0-20 points)
-            type_scores = {"breakaway": 20, "runaway": 15, "common": 5, "exhaustion": 2}
-            quality_score += type_scores.get(gap_type, 5)
-            
-            # Gap & Run bonus (0-15 points)
-            if gap_run_analysis["is_gap_and_run"]:
-                quality_score += 15
-            
-            # Historical success component (0-10 points)
-            quality_score += historical_success_rate * 10
-            
-            quality_score = min(100, quality_score)
-            
-            # Gap filled analysis
-            gap_filled_days = None
-            for f in range(1, min(10, len(df) - idx)):
-                if df.iloc[idx + f]["low"] <= prev_close:
-                    gap_filled_days = f
-                    break
-            
-            # Create enhanced gap event
-            gap_event = GapEvent(
-                date=str(df.index[idx]) if hasattr(df, 'index') and idx < len(df.index) else str(idx),
-                gap_pct=gap_pct,
-                gap_size_dollars=gap_size_dollars,
-                volume_ratio=volume_metrics["volume_ratio_20"],
-                volume_validation_score=volume_metrics["validation_score"],
-                gap_type=gap_type,
-                gap_quality=quality_score,
-                follow_through_days=gap_run_analysis["follow_through_days"],
-                max_follow_through_pct=gap_run_analysis["max_follow_through"],
-                gap_filled_days=gap_filled_days,
-                is_gap_and_run=gap_run_analysis["is_gap_and_run"],
-                market_context="bullish" if gap_pct > 0 else "bearish",
-                sector_performance=0.0,  # Would be filled with sector data in production
-                historical_success_rate=historical_success_rate
-            )
-            
-            gap_events.append(gap_event)
-            
-            if verbose:
-                print(f"Gap@{gap_event.date}: {gap_pct:.2f}%, Quality: {quality_score:.1f}, "
-                      f"Type: {gap_type}, Volume: {volume_metrics['validation_score']:.2f}, "
-                      f"Gap&Run: {gap_run_analysis['is_gap_and_run']}")
+        span = max(int(self.historical_lookback_periods) - 1, 0)
+        rates = np.full(len(rows), 0.5)
+        if not span:
+            return rates
+        for begin in range(0, len(rows), chunk_size):
+            part = slice(begin, begin + chunk_size)
+            current = rows[part]
+            past = current[:, None] - 1 - np.arange(span)
+            oldest = first_row[part] + np.maximum(0, local[part] - self.historical_lookback_periods) + 1
+            in_window = past >= oldest[:, None]
+            past = np.maximum(past, 0)
+            hist_gap_pct = history["gap_pct"][past]
+            offsets = history["hit_offsets"][past]
+            similar = in_window & (np.abs(hist_gap_pct - gap_pct[part, None]) <= 2.0) & \
+                (hist_gap_pct >= self.gap_threshold_pct)
+            # Point-in-time, as in the scalar version: the hit must be known by the evaluated gap
+            success = similar & ~np.isnan(offsets) & (past + np.nan_to_num(offsets) <= current[:, None])
+            n_similar = similar.sum(axis=1)
+            rates[part] = np.where((local[part] >= self.min_historical_samples) & (n_similar >= 3),
+                                   success.sum(axis=1) / np.maximum(n_similar, 1), 0.5)
+        return rates
 
-        return gap_events
+    def _scan_gaps(self, price_data: Dict[str, pd.DataFrame]) -> EventTable:
+        """
+        Vectorized gap scan over one or many symbols (batch mode).
+
+        All frames are stacked into flat arrays with per-symbol boundaries, so the
+        whole universe is scanned with a handful of array operations: gaps come from
+        the shifted close, volume context from trailing windows, and follow-through,
+        volume persistence and gap fill from forward windows that stop at the end of
+        each symbol. Results match the per-bar helpers above (_calculate_advanced_volume_metrics,
+        _classify_gap_type, _analyze_gap_and_run_pattern, _calculate_historical_success_rate).
+
+        Returns:
+            EventTable with one row per up-gap (position = bar within its symbol's frame);
+            GapEvent objects are built only for the rows that are requested.
+        """
+        frames = {symbol: df for symbol, df in price_data.items() if df is not None and not df.empty}
+        if not frames:
+            return EventTable.empty()
+
+        lengths = np.array([len(df) for df in frames.values()])
+        ends = np.cumsum(lengths)
+        owner = np.repeat(np.arange(len(frames)), lengths)
+        first_row = (ends - lengths)[owner]
+        stop = ends[owner]
+        local = np.arange(len(owner)) - first_row
+        opens, highs, lows, closes, volumes = (
+            np.concatenate([df[column].to_numpy(dtype=float) for df in frames.values()])
+            for column in ("open", "high", "low", "close", "volume"))
+
+        prev_close = np.roll(closes, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            all_gaps = 100 * (opens - prev_close) / prev_close
+            history = {"gap_pct": np.where(local > 0, (opens - prev_close) / prev_close * 100, np.nan),
+                       "hit_offsets": forward_hit_offsets(closes, opens, self.gap_run_max_days,
+                                                          self.gap_run_min_follow_through)}
+        # Only up-gaps for this agent (a NaN gap is kept, like the `gap_pct < threshold` test of the loop)
+        rows = np.flatnonzero((local > 0) & ~(all_gaps < self.gap_threshold_pct))
+        if not len(rows):
+            return EventTable.empty()
+        at = local[rows]
+        gap_pct = all_gaps[rows]
+        gap_open, gap_close, gap_volume = opens[rows], closes[rows], volumes[rows]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Volume context: trailing means, or the current volume while the window is short
+            ratios = {}
+            for period in (5, 20, 50):
+                volume_ma = np.where(at >= period, window_reduce(volumes, rows - period, rows, "mean"), gap_volume)
+                ratios[period] = gap_volume / (volume_ma + 1e-9)
+            recent = volumes[np.maximum(rows[:, None] - 5 + np.arange(6), 0)]
+            centered = recent - recent.mean(axis=1, keepdims=True)
+            steps = np.arange(6) - 2.5
+            correlation = (centered @ steps) / np.sqrt((steps @ steps) * (centered ** 2).sum(axis=1))
+            volume_trend = np.where(at >= 5, np.clip(correlation, -1.0, 1.0), 0.0)
+
+            validation = tiered([(ratios[20] >= 2.0, 0.4), (ratios[20] >= 1.5, 0.2)], 0.0)
+            validation = add_if(validation, ratios[5] >= 1.3, 0.2)
+            validation = add_if(validation, volume_trend > 0.3, 0.2)
+            validation = add_if(validation, ratios[20] >= 3.0, 0.2)
+            validation = bounded(validation, upper=1.0)
+
+            # Gap type: position of the close inside the trailing 52-week range
+            lookback_start = np.maximum(first_row[rows], rows - 252)
+            range_low = window_reduce(closes, lookback_start, rows, "min")
+            range_high = window_reduce(closes, lookback_start, rows, "max")
+            price_percentile = (gap_close - range_low) / (range_high - range_low + 1e-9)
+            gap_type = tiered([
+                ((gap_pct >= 8) & (validation >= 0.8) & (price_percentile >= 0.8), "breakaway"),
+                ((gap_pct >= 5) & (validation >= 0.6) & (price_percentile >= 0.3) & (price_percentile <= 0.7),
+                 "runaway"),
+                ((gap_pct >= 6) & (validation <= 0.4) & (price_percentile >= 0.9), "exhaustion"),
+            ], "common").astype(LABEL_DTYPE)
+
+            # Gap & Run: best close over the next days (first day it was reached) and volume persistence
+            gap_day_strength = (gap_close - lows[rows]) / ((highs[rows] - lows[rows]) + 1e-9)
+            returns = ((forward_window(closes, rows, self.gap_run_max_days, stop[rows]) - gap_open[:, None])
+                       / gap_open[:, None]) * 100
+            returns = np.where(np.isnan(returns), -np.inf, returns)
+            peak = returns.max(axis=1, initial=-np.inf)
+            improved, follow_through_days = _first_hit((returns == peak[:, None]) & (peak > 0)[:, None])
+            max_follow_through = np.where(improved, peak, 0.0)
+            persistence_days = min(self.gap_run_volume_persistence, self.gap_run_max_days)
+            volume_persistence = (forward_window(volumes, rows, persistence_days, stop[rows])
+                                  / gap_volume[:, None] >= 0.7).sum(axis=1)
+            is_gap_and_run = ((gap_pct >= 3.0) & (gap_day_strength >= 0.7) &
+                              (max_follow_through >= self.gap_run_min_follow_through) & (volume_persistence >= 2))
+
+            # Gap fill: first of the next 9 days whose low reaches back to the previous close
+            filled, fill_days = _first_hit(forward_window(lows, rows, 9, stop[rows]) <= prev_close[rows][:, None])
+
+        historical_success_rate = self._historical_success_rates(rows, at, first_row[rows], gap_pct, history)
+
+        quality = bounded((gap_pct / 15) * 30, upper=30)
+        quality = quality + validation * 25
+        quality = quality + tiered([(gap_type == name, score) for name, score in GAP_TYPE_SCORES.items()], 5)
+        quality = add_if(quality, is_gap_and_run, 15)
+        quality = bounded(quality + historical_success_rate * 10, upper=100)
+
+        # object, not LABEL_DTYPE: symbol keys may be longer than a fixed-width label
+        symbols = np.array(list(frames), dtype=object)[owner[rows]]
+        return EventTable.from_mask(
+            np.ones(len(rows), dtype=bool), rows=at,
+            factory=partial(self._build_gap_event, frames),
+            symbol=symbols,
+            gap_pct=gap_pct,
+            gap_size_dollars=gap_open - prev_close[rows],
+            volume_ratio=ratios[20],
+            volume_validation_score=validation,
+            gap_type=gap_type,
+            gap_quality=quality,
+            follow_through_days=follow_through_days,
+            max_follow_through_pct=max_follow_through,
+            gap_filled_days=np.where(filled, fill_days, np.nan),
+            is_gap_and_run=is_gap_and_run,
+            historical_success_rate=historical_success_rate,
+        )
+
+    def _build_gap_event(self, frames: Dict[str, pd.DataFrame], record: np.void) -> GapEvent:
+        """GapEvent from a row of the scan table"""
+        gap_pct = float(record["gap_pct"])
+        filled_days = record["gap_filled_days"]
+        return GapEvent(
+            date=str(frames[str(record["symbol"])].index[int(record["position"])]),
+            gap_pct=gap_pct,
+            gap_size_dollars=float(record["gap_size_dollars"]),
+            volume_ratio=float(record["volume_ratio"]),
+            volume_validation_score=float(record["volume_validation_score"]),
+            gap_type=str(record["gap_type"]),
+            gap_quality=float(record["gap_quality"]),
+            follow_through_days=int(record["follow_through_days"]),
+            max_follow_through_pct=float(record["max_follow_through_pct"]),
+            gap_filled_days=None if np.isnan(filled_days) else int(filled_days),
+            is_gap_and_run=bool(record["is_gap_and_run"]),
+            market_context="bullish" if gap_pct > 0 else "bearish",
+            sector_performance=0.0,  # Would be filled with sector data in production
+            historical_success_rate=float(record["historical_success_rate"])
+        )
+
+    def _gap_table(self, df: pd.DataFrame) -> EventTable:
+        """Gap scan of a single price frame"""
+        return self._scan_gaps({"": df})
+
+    def _print_gap_events(self, gap_events: EventTable):
+        for gap_event in gap_events.objects():
+            print(f"Gap@{gap_event.date}: {gap_event.gap_pct:.2f}%, Quality: {gap_event.gap_quality:.1f}, "
+                  f"Type: {gap_event.gap_type}, Volume: {gap_event.volume_validation_score:.2f}, "
+                  f"Gap&Run: {gap_event.is_gap_and_run}")
+
+    def _calculate_gap_scores(self, df, verbose=False) -> List[GapEvent]:
+        """
+        Enhanced gap scoring with advanced analysis
+        """
+        gap_events = self._gap_table(df)
+        if verbose:
+            self._print_gap_events(gap_events)
+        return gap_events.objects()
 
     def _integrate_with_other_triggers(self, symbol: str, gap_events: List[Dict]) -> Dict:
         """
@@ -611,14 +708,16 @@ class GapDetectorUltimate(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
             if len(price_df) < 30:
                 return self.fallback()
 
-            gap_events = self._calculate_gap_scores(price_df, verbose=self.verbose)
+            gap_events = self._gap_table(price_df)
+            if self.verbose:
+                self._print_gap_events(gap_events)
             
             if not gap_events:
                 return {
@@ -633,10 +732,10 @@ class GapDetectorUltimate(BaseAgent):
                 }
 
             # Calculate comprehensive score
-            gap_and_run_count = sum(1 for event in gap_events if event.is_gap_and_run)
-            avg_quality = sum(event.gap_quality for event in gap_events) / len(gap_events)
-            avg_volume_validation = sum(event.volume_validation_score for event in gap_events) / len(gap_events)
-            avg_historical_success = sum(event.historical_success_rate for event in gap_events) / len(gap_events)
+            gap_and_run_count = gap_events.count("is_gap_and_run", [True])
+            avg_quality = gap_events.mean("gap_quality", 0.0)
+            avg_volume_validation = gap_events.mean("volume_validation_score", 0.0)
+            avg_historical_success = gap_events.mean("historical_success_rate", 0.0)
             
             # Enhanced scoring algorithm
             base_score = min(40, len(gap_events) * 8)  # Base points for having gaps
@@ -668,16 +767,16 @@ class GapDetectorUltimate(BaseAgent):
                     }
                 },
                 "details": {
-                    "gap_events": gap_events[:5],  # Top 5 for details
+                    "gap_events": gap_events.head(5),  # Top 5 for details
                     "total_gaps": len(gap_events),
                     "gap_and_run_count": gap_and_run_count,
                     "avg_quality": round(avg_quality, 1),
                     "avg_volume_validation": round(avg_volume_validation, 2),
                     "avg_historical_success": round(avg_historical_success, 2),
                     "gap_statistics": {
-                        "largest_gap": max([g.gap_pct for g in gap_events]) if gap_events else 0,
-                        "smallest_gap": min([g.gap_pct for g in gap_events]) if gap_events else 0,
-                        "avg_gap_size": sum([g.gap_pct for g in gap_events]) / len(gap_events) if gap_events else 0
+                        "largest_gap": float(np.nanmax(gap_events["gap_pct"])),
+                        "smallest_gap": float(np.nanmin(gap_events["gap_pct"])),
+                        "avg_gap_size": float(np.nanmean(gap_events["gap_pct"]))
                     }
                 }
             }
@@ -686,25 +785,68 @@ class GapDetectorUltimate(BaseAgent):
             self.handle_error(e)
             return self.fallback()
 
-    def get_gap_statistics(self, price_df) -> Dict:
+    def _summarize_gaps(self, gap_events: EventTable) -> Dict:
+        """Gap statistics report from the columns of a scan table"""
+        success_rate = gap_events["historical_success_rate"]
+        fill_days = gap_events["gap_filled_days"]
+        filled = ~np.isnan(fill_days)
+        return {
+            "total_gaps": len(gap_events),
+            "gap_types": {gap_type: gap_events.count("gap_type", [gap_type]) for gap_type in GAP_TYPES},
+            "gap_and_run_patterns": gap_events.count("is_gap_and_run", [True]),
+            "avg_gap_size": round(gap_events.mean("gap_pct", 0.0), 2),
+            "avg_quality_score": round(gap_events.mean("gap_quality", 0.0), 1),
+            "success_rate_distribution": {
+                "high_success": int((success_rate >= 0.7).sum()),
+                "medium_success": int(((success_rate >= 0.4) & (success_rate < 0.7)).sum()),
+                "low_success": int((success_rate < 0.4).sum())
+            },
+            "gap_fill": {
+                "filled_gaps": int(filled.sum()),
+                "fill_rate": round(float(filled.mean()), 3),
+                "avg_days_to_fill": round(float(fill_days[filled].mean()), 1) if filled.any() else None
+            },
+            "continuation": {
+                "avg_max_follow_through": round(gap_events.mean("max_follow_through_pct", 0.0), 2),
+                "avg_follow_through_days": round(gap_events.mean("follow_through_days", 0.0), 1)
+            }
+        }
+
+    def get_gap_statistics(self, price_df: Union[pd.DataFrame, Dict[str, pd.DataFrame]]) -> Dict:
         """
         Get comprehensive gap statistics for analysis
+
+        Batch mode: pass {symbol: price_df} to scan the whole universe in one vectorized
+        pass; the report then covers all gaps and adds a per-symbol breakdown.
         """
-        gap_events = self._calculate_gap_scores(price_df)
+        batch = isinstance(price_df, dict)
+        gap_events = self._scan_gaps(price_df if batch else {"": price_df})
         
         if not gap_events:
             return {"message": "No gaps detected"}
-        
-        return {
-            "total_gaps": len(gap_events),
-            "gap_types": {gap_type: sum(1 for e in gap_events if e.gap_type == gap_type) 
-                         for gap_type in ["breakaway", "runaway", "common", "exhaustion"]},
-            "gap_and_run_patterns": sum(1 for e in gap_events if e.is_gap_and_run),
-            "avg_gap_size": round(sum(e.gap_pct for e in gap_events) / len(gap_events), 2),
-            "avg_quality_score": round(sum(e.gap_quality for e in gap_events) / len(gap_events), 1),
-            "success_rate_distribution": {
-                "high_success": sum(1 for e in gap_events if e.historical_success_rate >= 0.7),
-                "medium_success": sum(1 for e in gap_events if 0.4 <= e.historical_success_rate < 0.7),
-                "low_success": sum(1 for e in gap_events if e.historical_success_rate < 0.4)
-            }
-        }
+
+        statistics = self._summarize_gaps(gap_events)
+        if batch:
+            statistics["symbols_scanned"] = sum(1 for df in price_df.values() if df is not None and not df.empty)
+            statistics["by_symbol"] = self._gap_statistics_by_symbol(gap_events).to_dict("index")
+        return statistics
+
+    def _gap_statistics_by_symbol(self, gap_events: EventTable) -> pd.DataFrame:
+        """Per-symbol summary of a batch scan (one row per symbol with gaps)"""
+        table = pd.DataFrame({
+            "symbol": gap_events["symbol"],
+            "gap_pct": gap_events["gap_pct"],
+            "gap_quality": gap_events["gap_quality"],
+            "is_gap_and_run": gap_events["is_gap_and_run"],
+            "filled": ~np.isnan(gap_events["gap_filled_days"]),
+            "gap_filled_days": gap_events["gap_filled_days"],
+        })
+        by_symbol = table.groupby("symbol", sort=True).agg(
+            total_gaps=("gap_pct", "size"),
+            gap_and_run_patterns=("is_gap_and_run", "sum"),
+            avg_gap_size=("gap_pct", "mean"),
+            avg_quality_score=("gap_quality", "mean"),
+            fill_rate=("filled", "mean"),
+            avg_days_to_fill=("gap_filled_days", "mean"),
+        )
+        return by_symbol.round({"avg_gap_size": 2, "avg_quality_score": 1, "fill_rate": 3, "avg_days_to_fill": 1})
@@ -12,7 +12,6 @@ from typing import Dict, List, Optional, Any, Tuple
 import logging
 from datetime import datetime
 import json
-import openai
 from collections import defaultdict
 
 from utils.logger import get_agent_logger
@@ -258,6 +257,7 @@ class GPTSentimentModel:
         קריאה ל-OpenAI API
         """
         try:
+            import openai  # ייבוא בעצלות - ספרייה כבדה שנדרשת רק בקריאה ל-API
             openai.api_key = self.api_key
             
             response = openai.ChatCompletion.create(
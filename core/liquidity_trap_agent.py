@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, FlowEventSpec, detect_flow_events
 from utils.constants import LIQUIDITY_TRAP_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,14 @@ class LiquidityTrapAgent(BaseAgent):
     - ניתוח נזילות לפי נפח ומחיר
     """
     
+    price_requirement = PriceRequirement(days=180)
+    event_spec = FlowEventSpec(
+        name='liquidity traps', metrics_key='liquidity_metrics',
+        volume_column='volume_trap_ratio', price_column='price_trap_ratio',
+        score_column='liquidity_trap_score', ratio_column='liquidity_ratio', sector_key='sector_avg_trap',
+        type_field='trap_type', ratio_field='liquidity_ratio',
+        type_labels=('liquidity_trap', 'volume_trap', 'price_trap', 'time_trap', 'sector_trap'))
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -140,82 +149,36 @@ class LiquidityTrapAgent(BaseAgent):
             logger.error(f"Error calculating liquidity metrics: {e}")
             return {}
 
-    def _detect_liquidity_traps(self, df: pd.DataFrame) -> List[LiquidityTrap]:
+    def _detect_liquidity_traps(self, df: pd.DataFrame) -> EventTable:
         """
-        זיהוי מלכודות נזילות מתקדם
+        זיהוי מלכודות נזילות - הגלאי המשותף (detect_flow_events) עם העמודות והתוויות של event_spec;
+        אובייקטי האירוע עם ה-context המפורט נבנים רק לאירועים שמוצגים (_build_liquidity_trap).
         """
-        traps = []
-        
-        try:
-            # חישוב מדדי נזילות
-            liquidity_metrics = self._calculate_liquidity_metrics(df)
-            if not liquidity_metrics:
-                return traps
-            
-            df = liquidity_metrics['liquidity_metrics']
-            
-            # זיהוי מלכודות נזילות
-            for i in range(20, len(df)):
-                # ניתוח מלכודת נפח
-                volume_trap = self._analyze_volume_trap(df, i)
-                
-                # ניתוח מלכודת מחיר
-                price_trap = self._analyze_price_trap(df, i)
-                
-                # ניתוח מלכודת זמן
-                time_trap = self._analyze_time_trap(df, i)
-                
-                # ניתוח מלכודת סקטור
-                sector_trap = self._analyze_sector_trap(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי מלכודת נזילות
-                if self._is_liquidity_trap(volume_trap, price_trap, time_trap, sector_trap):
-                    # חישוב עוצמת המלכודת
-                    strength = self._calculate_trap_strength(
-                        volume_trap, price_trap, time_trap, sector_trap, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_trap_confidence(
-                        volume_trap, price_trap, time_trap, sector_trap, breakout_potential
-                    )
-                    
-                    # קביעת סוג מלכודת
-                    trap_type = self._classify_trap_type(
-                        volume_trap, price_trap, time_trap
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_trap_significance(strength, confidence)
-                    
-                    trap = LiquidityTrap(
-                        timestamp=df.index[i],
-                        trap_type=trap_type,
-                        strength=strength,
-                        confidence=confidence,
-                        liquidity_ratio=df['liquidity_ratio'].iloc[i],
-                        volume_ratio=volume_trap.get('trap_ratio', 1.0),
-                        price_impact=price_trap.get('price_impact', 0.0),
-                        context={
-                            'volume_trap': volume_trap,
-                            'price_trap': price_trap,
-                            'time_trap': time_trap,
-                            'sector_trap': sector_trap,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    traps.append(trap)
-            
-            return traps
-            
-        except Exception as e:
-            logger.error(f"Error detecting liquidity traps: {e}")
-            return []
+        return detect_flow_events(df, self.event_spec, self._calculate_liquidity_metrics, self._analyze_sector_trap,
+                                  self.liquidity_trap_thresholds, self._build_liquidity_trap)
+
+    def _build_liquidity_trap(self, df: pd.DataFrame, record) -> LiquidityTrap:
+        """
+        בניית LiquidityTrap מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return LiquidityTrap(
+            timestamp=df.index[i],
+            trap_type=str(record['trap_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            liquidity_ratio=float(record['liquidity_ratio']),
+            volume_ratio=float(record['volume_ratio']),
+            price_impact=float(record['price_impact']),
+            context={
+                'volume_trap': self._analyze_volume_trap(df, i),
+                'price_trap': self._analyze_price_trap(df, i),
+                'time_trap': self._analyze_time_trap(df, i),
+                'sector_trap': self._analyze_sector_trap(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_volume_trap(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -524,17 +487,17 @@ class LiquidityTrapAgent(BaseAgent):
             logger.error(f"Error determining trap significance: {e}")
             return 'unknown'
 
-    def _calculate_liquidity_trap_analysis(self, df: pd.DataFrame, traps: List[LiquidityTrap]) -> LiquidityTrapAnalysis:
+    def _calculate_liquidity_trap_analysis(self, df: pd.DataFrame, traps: EventTable) -> LiquidityTrapAnalysis:
         """
         חישוב ניתוח מלכודת נזילות מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_traps = len(traps)
-            significant_traps = len([t for t in traps if t.significance in ['high', 'extreme']])
+            significant_traps = traps.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע עוצמת מלכודת
-            avg_trap_strength = np.mean([t.strength for t in traps]) if traps else 0.5
+            avg_trap_strength = traps.mean('strength', 0.5)
             
             # ניתוח מגמת נזילות
             recent_liquidity_trap = df['liquidity_trap_score'].tail(20).mean()
@@ -578,7 +541,7 @@ class LiquidityTrapAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -606,8 +569,8 @@ class LiquidityTrapAgent(BaseAgent):
             
             # יצירת הסבר
             if traps:
-                recent_traps = [t for t in traps if t.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(traps)} מלכודות נזילות ({len(recent_traps)} משמעותיות). ממוצע עוצמה: {analysis.avg_trap_strength:.2f}, מגמת נזילות: {analysis.liquidity_trend}"
+                recent_traps = traps.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(traps)} מלכודות נזילות ({recent_traps} משמעותיות). ממוצע עוצמה: {analysis.avg_trap_strength:.2f}, מגמת נזילות: {analysis.liquidity_trend}"
             else:
                 explanation = "לא זוהו מלכודות נזילות משמעותיות"
             
@@ -640,7 +603,7 @@ class LiquidityTrapAgent(BaseAgent):
                             "confidence": round(trap.confidence, 3),
                             "liquidity_ratio": round(trap.liquidity_ratio, 2)
                         }
-                        for trap in traps[:10]  # Top 10 traps
+                        for trap in traps.head(10)  # Top 10 traps
                     ],
                     "analysis": {
                         "total_traps": analysis.total_traps,
@@ -679,7 +642,7 @@ class LiquidityTrapAgent(BaseAgent):
                 }
             }
 
-    def _generate_recommendations(self, traps: List[LiquidityTrap], analysis: LiquidityTrapAnalysis) -> List[str]:
+    def _generate_recommendations(self, traps: EventTable, analysis: LiquidityTrapAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
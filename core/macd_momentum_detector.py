@@ -16,7 +16,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from utils.rolling_kernels import local_extrema, rolling_rank_pct
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,6 +47,8 @@ class MACDMomentumDetector(BaseAgent):
     - אינדיקטורים טכניים מתקדמים
     """
     
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -103,9 +106,7 @@ class MACDMomentumDetector(BaseAgent):
         df["macd_momentum_ma"] = df["macd_momentum"].rolling(window=5).mean()
         
         # אחוזון היסטורי
-        df["histogram_percentile"] = df["macd_histogram"].rolling(window=50).apply(
-            lambda x: (x < x.iloc[-1]).mean()
-        )
+        df["histogram_percentile"] = rolling_rank_pct(df["macd_histogram"], 50)
         
         return df
 
@@ -167,42 +168,50 @@ class MACDMomentumDetector(BaseAgent):
             return divergences
         
         # חישוב נקודות קיצון במחיר וב-MACD
-        price_highs = df['close'].rolling(window=5, center=True).apply(lambda x: x.iloc[2] == x.max())
-        price_lows = df['close'].rolling(window=5, center=True).apply(lambda x: x.iloc[2] == x.min())
-        macd_highs = df['macd_line'].rolling(window=5, center=True).apply(lambda x: x.iloc[2] == x.max())
-        macd_lows = df['macd_line'].rolling(window=5, center=True).apply(lambda x: x.iloc[2] == x.min())
-        
-        # זיהוי דיברגנציה בולית (מחיר יורד, MACD עולה)
-        for i in range(20, len(df)):
-            if price_lows.iloc[i] and macd_lows.iloc[i-10:i].any():
-                # בדיקה אם המחיר ירד אבל MACD עלה
-                price_change = df['close'].iloc[i] - df['close'].iloc[i-10]
-                macd_change = df['macd_line'].iloc[i] - df['macd_line'].iloc[i-10]
-                
-                if price_change < -self.divergence_threshold and macd_change > self.divergence_threshold:
-                    divergences.append({
-                        'type': 'bullish_divergence',
-                        'date': df.index[i] if hasattr(df.index[i], 'date') else i,
-                        'price_change': price_change,
-                        'macd_change': macd_change,
-                        'strength': abs(macd_change) / abs(price_change) if price_change != 0 else 0
-                    })
-        
+        price_highs = local_extrema(df['close'], 5, "max").to_numpy()
+        price_lows = local_extrema(df['close'], 5, "min").to_numpy()
+        macd_highs = local_extrema(df['macd_line'], 5, "max").to_numpy()
+        macd_lows = local_extrema(df['macd_line'], 5, "min").to_numpy()
+        close = df['close'].to_numpy(dtype=float)
+        macd_line = df['macd_line'].to_numpy(dtype=float)
+
+        def recent_pivot(pivots: np.ndarray) -> np.ndarray:
+            """האם היה pivot ב-10 הנרות שלפני כל נר (i-10 עד i-1)"""
+            counts = np.concatenate([[0], np.cumsum(pivots == 1)])
+            index = np.arange(len(pivots))
+            return counts[index] - counts[np.maximum(index - 10, 0)] > 0
+
+        # זיהוי דיברגנציה בולית (מחיר יורד, MACD עולה) - רק בנרות שהם שפל עם שפל MACD קרוב
+        candidates = np.flatnonzero((price_lows != 0) & recent_pivot(macd_lows))
+        for i in candidates[candidates >= 20]:
+            # בדיקה אם המחיר ירד אבל MACD עלה
+            price_change = close[i] - close[i-10]
+            macd_change = macd_line[i] - macd_line[i-10]
+
+            if price_change < -self.divergence_threshold and macd_change > self.divergence_threshold:
+                divergences.append({
+                    'type': 'bullish_divergence',
+                    'date': df.index[i] if hasattr(df.index[i], 'date') else i,
+                    'price_change': price_change,
+                    'macd_change': macd_change,
+                    'strength': abs(macd_change) / abs(price_change) if price_change != 0 else 0
+                })
+
         # זיהוי דיברגנציה ברישה (מחיר עולה, MACD יורד)
-        for i in range(20, len(df)):
-            if price_highs.iloc[i] and macd_highs.iloc[i-10:i].any():
-                # בדיקה אם המחיר עלה אבל MACD ירד
-                price_change = df['close'].iloc[i] - df['close'].iloc[i-10]
-                macd_change = df['macd_line'].iloc[i] - df['macd_line'].iloc[i-10]
-                
-                if price_change > self.divergence_threshold and macd_change < -self.divergence_threshold:
-                    divergences.append({
-                        'type': 'bearish_divergence',
-                        'date': df.index[i] if hasattr(df.index[i], 'date') else i,
-                        'price_change': price_change,
-                        'macd_change': macd_change,
-                        'strength': abs(macd_change) / abs(price_change) if price_change != 0 else 0
-                    })
+        candidates = np.flatnonzero((price_highs != 0) & recent_pivot(macd_highs))
+        for i in candidates[candidates >= 20]:
+            # בדיקה אם המחיר עלה אבל MACD ירד
+            price_change = close[i] - close[i-10]
+            macd_change = macd_line[i] - macd_line[i-10]
+
+            if price_change > self.divergence_threshold and macd_change < -self.divergence_threshold:
+                divergences.append({
+                    'type': 'bearish_divergence',
+                    'date': df.index[i] if hasattr(df.index[i], 'date') else i,
+                    'price_change': price_change,
+                    'macd_change': macd_change,
+                    'strength': abs(macd_change) / abs(price_change) if price_change != 0 else 0
+                })
         
         return divergences[-5:]  # רק 5 הדיברגנציות האחרונות
 
@@ -357,7 +366,7 @@ class MACDMomentumDetector(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 import requests
 import logging
 from typing import Dict, List, Optional, Any
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 # ייבוא DataFetcher במקום yfinance
 try:
@@ -20,6 +20,8 @@ class MarketDataConnector(BaseAgent):
     מתחבר למקורות נתונים שונים לניתוח מקיף
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -669,7 +671,7 @@ class MarketDataConnector(BaseAgent):
             
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
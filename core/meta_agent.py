@@ -1,8 +1,9 @@
 # meta_agent.py
 
-import yaml
 import os
 from typing import Dict
+
+import numpy as np
 from core.base.base_agent import BaseAgent
 
 class MetaAgent(BaseAgent):
@@ -21,6 +22,7 @@ class MetaAgent(BaseAgent):
         """טעינת משקלים מתוך קובץ YAML"""
         if not os.path.exists(self.config_path):
             raise FileNotFoundError(f"קובץ קונפיגורציה לא נמצא: {self.config_path}")
+        import yaml  # ייבוא בעצלות - נדרש רק בטעינת הקונפיגורציה
         with open(self.config_path, "r", encoding="utf-8") as f:
             config = yaml.safe_load(f)
         if "weights" not in config:
@@ -48,6 +50,22 @@ class MetaAgent(BaseAgent):
 
         return weighted_sum / total_weight
 
+    def consolidate_panel(self, panel):
+        """
+        שקלול מאגר ציונים שלם (utils.signal_panel.SignalPanel) לפי המשקלים מהקובץ -
+        מכפלת מטריצה-וקטור אחת במקום לולאה לכל מניה. רק סוכנים שמופיעים במשקלים נכנסים.
+
+        Returns:
+            DataFrame תאריך x מניה (NaN כשאין אף ציון משוקלל)
+        """
+        values = panel.values[~np.isnan(panel.values)]
+        if values.size and (values.min() < 0 or values.max() > 100):
+            raise ValueError("ציונים לא תקינים במאגר (מחוץ לטווח 0-100)")
+        weights = {key: self.weights.get(key, 0.0) for key in panel.agents}
+        scores = panel.consolidate(weights)
+        covered = (~np.isnan(panel.values) * panel.weight_vector(weights)).sum(axis=2) > 0
+        return scores.where(covered)
+
     def investment_decision(self, total_score: float) -> str:
         """החזרת המלצת השקעה לפי טווחי ציון"""
         if total_score >= 70:
@@ -16,7 +16,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from utils.rolling_kernels import rolling_rank_pct
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,6 +47,8 @@ class MidtermMomentumAgent(BaseAgent):
     - אינדיקטורים טכניים מתקדמים
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -106,9 +109,7 @@ class MidtermMomentumAgent(BaseAgent):
         df['momentum_acceleration_ma'] = df['momentum_acceleration'].rolling(window=self.acceleration_period).mean()
         
         # אחוזון היסטורי
-        df['momentum_percentile'] = df['short_momentum'].rolling(window=50).apply(
-            lambda x: (x < x.iloc[-1]).mean()
-        )
+        df['momentum_percentile'] = rolling_rank_pct(df['short_momentum'], 50)
         
         return df
 
@@ -361,7 +362,7 @@ class MidtermMomentumAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -15,18 +15,11 @@ import warnings
 warnings.filterwarnings('ignore')
 
 # ML imports
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from sklearn.feature_selection import SelectKBest, f_classif
-import joblib
 import pickle
 
 from utils.logger import get_agent_logger
 from utils.validators import validate_symbol, validate_stock_data
+from utils.model_store import ModelStore, data_fingerprint, feature_statistics
 
 logger = get_agent_logger("ml_breakout_model")
 
@@ -51,13 +44,25 @@ class MLBreakoutModel:
         self.breakout_threshold = self.config.get("breakout_threshold", 0.05)
         self.min_samples = self.config.get("min_samples", 100)
 
+        # מחזור חיים של מודל: אחסון מתמשך, חיזוי חם ואימון מחדש לפי גיל/drift
+        self.model_dir = self.config.get("model_dir", "models")
+        self.max_model_age_days = self.config.get("max_model_age_days", 30)
+        self.drift_threshold = self.config.get("drift_threshold", 1.0)
+        self.drift_window = self.config.get("drift_window", self.lookback_period)
+        self.train_on_demand = self.config.get("train_on_demand", True)
+        self.model_store = ModelStore(self.model_dir, namespace="ml_breakout")
+
         # מודלים
         self.models = {}
         self.scalers = {}
         self.feature_selectors = {}
+        self.preprocessor = None
         self.is_trained = False
+        self.model_key = None
+        self.model_status = {}
 
         # פרמטרים לניתוח
+        self.input_features = []
         self.feature_columns = []
         self.target_column = 'breakout'
         self.confidence_threshold = 0.7
@@ -97,9 +102,8 @@ class MLBreakoutModel:
             # יצירת תכונות
             features_df = self._create_features(df)
 
-            # אימון מודל אם נדרש
-            if not self.is_trained:
-                self._train_models(features_df)
+            # טעינת מודל שמור, או אימון מחדש רק כשהמודל חסר/ישן/סטה
+            self._ensure_models(symbol, features_df)
 
             # חיזוי פריצה
             prediction_analysis = self._predict_breakout(features_df)
@@ -155,7 +159,8 @@ class MLBreakoutModel:
                     "lookback_period": self.lookback_period,
                     "prediction_horizon": self.prediction_horizon,
                     "breakout_threshold": self.breakout_threshold,
-                    "is_trained": self.is_trained
+                    "is_trained": self.is_trained,
+                    "model_status": self.model_status
                 }
             }
 
@@ -291,18 +296,151 @@ class MLBreakoutModel:
         
         return breakout
 
-    def _train_models(self, features_df: pd.DataFrame):
+    def _get_input_features(self, features_df: pd.DataFrame) -> List[str]:
+        """
+        רשימת עמודות הקלט למודל (סכמת התכונות)
+        """
+        excluded = [self.target_column, 'open', 'high', 'low', 'close', 'volume']
+        return [col for col in features_df.columns
+                if col not in excluded and pd.api.types.is_numeric_dtype(features_df[col])]
+
+    def _ensure_models(self, symbol: str, features_df: pd.DataFrame):
+        """
+        הבטחת מודל מוכן לחיזוי: מודל בזיכרון -> מודל שמור -> אימון (רק בעת הצורך)
+        """
+        key = symbol.upper()
+        recent = features_df.tail(self.drift_window)
+        check = self.model_store.needs_retrain(
+            key, recent[self._get_input_features(recent)],
+            max_age_days=self.max_model_age_days,
+            drift_threshold=self.drift_threshold
+        )
+        self.model_status = {"model_key": key, **check}
+
+        if not check["retrain"]:
+            if self.is_trained and self.model_key == key:
+                self.model_status["source"] = "memory"
+                return
+            if self._load_from_store(key):
+                self.model_status["source"] = "store"
+                return
+
+        if self.train_on_demand:
+            logger.info(f"Training ML breakout model for {key} (reason: {check['reason']})")
+            if self._train_models(features_df) and self.is_trained:
+                self._persist_models(key, features_df)
+                self.model_status["source"] = "trained"
+                return
+
+        # ללא אימון אונליין - שימוש במודל הקיים גם אם ישן, עדיף על כלום
+        if self._load_from_store(key):
+            logger.warning(f"Using stale ML breakout model for {key} (reason: {check['reason']})")
+            self.model_status["source"] = "stale_store"
+        else:
+            self.model_status["source"] = "none"
+
+    def _load_from_store(self, key: str) -> bool:
+        """
+        טעינת pipelines מאומנים מהמאגר
+        """
+        entry = self.model_store.load(key)
+        if entry is None:
+            return False
+        bundle = entry["model"]
+        self.models = bundle.get("models", {})
+        self.preprocessor = bundle.get("preprocessor")
+        self.input_features = bundle.get("input_features", [])
+        self.feature_columns = bundle.get("selected_features", [])
+        if self.preprocessor is not None:
+            self.scalers['standard'] = self.preprocessor.named_steps['scaler']
+            self.feature_selectors['kbest'] = self.preprocessor.named_steps['select']
+        self.is_trained = bool(self.models) and self.preprocessor is not None
+        self.model_key = key if self.is_trained else None
+        return self.is_trained
+
+    def _persist_models(self, key: str, features_df: pd.DataFrame):
+        """
+        שמירת ה-pipelines המאומנים עם סכמת תכונות, טביעת אצבע וסטטיסטיקות
+        """
+        try:
+            X = features_df[self.input_features]
+            self.model_store.save(
+                key,
+                {
+                    "models": self.models,
+                    "preprocessor": self.preprocessor,
+                    "input_features": self.input_features,
+                    "selected_features": self.feature_columns,
+                },
+                feature_schema=self.input_features,
+                fingerprint=data_fingerprint(features_df[self.input_features + [self.target_column]]),
+                feature_stats=feature_statistics(X),
+                metadata={
+                    "model_type": self.model_type,
+                    "prediction_horizon": self.prediction_horizon,
+                    "breakout_threshold": self.breakout_threshold,
+                    "samples": len(features_df),
+                    "last_date": str(features_df.index[-1]) if len(features_df) else None,
+                }
+            )
+            self.model_key = key
+        except Exception as e:
+            logger.error(f"Error persisting models for {key}: {str(e)}")
+
+    def train_offline(self, symbol: str, price_df: pd.DataFrame,
+                      volume_df: pd.DataFrame = None,
+                      technical_data: pd.DataFrame = None,
+                      market_data: pd.DataFrame = None,
+                      force: bool = False) -> Dict[str, Any]:
+        """
+        אימון אופליין ושמירה למאגר - מיועד לג'ובים מתוזמנים, לא לנתיב הניתוח
+
+        Args:
+            symbol: סמל המניה
+            price_df: נתוני מחיר
+            force: אימון גם אם המודל הקיים עדכני
+
+        Returns:
+            dict עם סטטוס האימון
+        """
+        key = symbol.upper()
+        df = self._prepare_data(price_df, volume_df, technical_data, market_data)
+        features_df = self._create_features(df)
+
+        if not force:
+            manifest = self.model_store.load_manifest(key)
+            fingerprint = None
+            if manifest is not None and manifest.get("feature_schema"):
+                cols = manifest["feature_schema"] + [self.target_column]
+                if set(cols).issubset(features_df.columns):
+                    fingerprint = data_fingerprint(features_df[cols])
+            if manifest is not None and fingerprint == manifest.get("fingerprint"):
+                return {"symbol": key, "trained": False, "reason": "unchanged"}
+            check = self.model_store.needs_retrain(
+                key, features_df.tail(self.drift_window)[self._get_input_features(features_df)],
+                max_age_days=self.max_model_age_days,
+                drift_threshold=self.drift_threshold
+            )
+            if not check["retrain"]:
+                return {"symbol": key, "trained": False, "reason": check["reason"]}
+
+        if not self._train_models(features_df) or not self.is_trained:
+            return {"symbol": key, "trained": False, "reason": "insufficient_data"}
+        self._persist_models(key, features_df)
+        return {"symbol": key, "trained": True, "reason": "forced" if force else "retrain",
+                "models": list(self.models.keys()), "samples": len(features_df)}
+
+    def _train_models(self, features_df: pd.DataFrame) -> bool:
         """
         אימון מודלים
         """
         try:
             if len(features_df) < self.min_samples:
                 logger.warning(f"Insufficient data for training: {len(features_df)} samples")
-                return
+                return False
 
             # בחירת תכונות
-            feature_columns = [col for col in features_df.columns 
-                             if col not in [self.target_column, 'open', 'high', 'low', 'close', 'volume']]
+            feature_columns = self._get_input_features(features_df)
             
             X = features_df[feature_columns]
             y = features_df[self.target_column]
@@ -314,23 +452,33 @@ class MLBreakoutModel:
             
             if len(X) < self.min_samples:
                 logger.warning(f"Insufficient clean data for training: {len(X)} samples")
-                return
+                return False
+
+            # ייבוא sklearn בעצלות - נדרש רק באימון (חיזוי משתמש ב-pipeline שמור)
+            from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+            from sklearn.linear_model import LogisticRegression
+            from sklearn.svm import SVC
+            from sklearn.preprocessing import StandardScaler
+            from sklearn.model_selection import train_test_split
+            from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+            from sklearn.feature_selection import SelectKBest, f_classif
+            from sklearn.pipeline import Pipeline
 
             # חלוקה לאימון ובדיקה
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-            # נרמול נתונים
-            scaler = StandardScaler()
-            X_train_scaled = scaler.fit_transform(X_train)
-            X_test_scaled = scaler.transform(X_test)
-
-            # בחירת תכונות
-            feature_selector = SelectKBest(score_func=f_classif, k=min(20, len(feature_columns)))
-            X_train_selected = feature_selector.fit_transform(X_train_scaled, y_train)
-            X_test_selected = feature_selector.transform(X_test_scaled)
+            # נרמול ובחירת תכונות - pipeline משותף לכל המודלים
+            preprocessor = Pipeline([
+                ('scaler', StandardScaler()),
+                ('select', SelectKBest(score_func=f_classif, k=min(20, len(feature_columns))))
+            ])
+            X_train_selected = preprocessor.fit_transform(X_train, y_train)
+            X_test_selected = preprocessor.transform(X_test)
 
             # שמירת תכונות נבחרות
+            feature_selector = preprocessor.named_steps['select']
             selected_features = [feature_columns[i] for i in feature_selector.get_support(indices=True)]
+            self.input_features = feature_columns
             self.feature_columns = selected_features
 
             # אימון מודלים
@@ -341,6 +489,7 @@ class MLBreakoutModel:
                 'svm': SVC(probability=True, random_state=42)
             }
 
+            self.models = {}
             for name, model in models.items():
                 try:
                     model.fit(X_train_selected, y_train)
@@ -360,14 +509,17 @@ class MLBreakoutModel:
                     logger.error(f"Error training {name}: {str(e)}")
 
             # שמירת scaler ו-feature selector
-            self.scalers['standard'] = scaler
+            self.preprocessor = preprocessor
+            self.scalers['standard'] = preprocessor.named_steps['scaler']
             self.feature_selectors['kbest'] = feature_selector
             
-            self.is_trained = True
+            self.is_trained = bool(self.models)
             logger.info("Models trained successfully")
+            return self.is_trained
 
         except Exception as e:
             logger.error(f"Error in model training: {str(e)}")
+            return False
 
     def _predict_breakout(self, features_df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -377,18 +529,12 @@ class MLBreakoutModel:
             if not self.is_trained or not self.feature_columns:
                 return {"prediction": 0.5, "confidence": 0.0, "model_predictions": {}}
 
-            # הכנת נתונים לחיזוי
-            latest_data = features_df[self.feature_columns].iloc[-1:]
-            
-            # נרמול
-            scaler = self.scalers.get('standard')
-            feature_selector = self.feature_selectors.get('kbest')
-            
-            if scaler is None or feature_selector is None:
+            if self.preprocessor is None or not self.input_features:
                 return {"prediction": 0.5, "confidence": 0.0, "model_predictions": {}}
 
-            latest_scaled = scaler.transform(latest_data)
-            latest_selected = feature_selector.transform(latest_scaled)
+            # הכנת נתונים לחיזוי - כל סכמת הקלט, הבחירה מתבצעת ב-pipeline
+            latest_data = features_df[self.input_features].iloc[-1:]
+            latest_selected = self.preprocessor.transform(latest_data)
 
             # חיזוי מכל המודלים
             model_predictions = {}
@@ -453,8 +599,7 @@ class MLBreakoutModel:
                 return {"top_features": [], "importance_scores": {}}
 
             # מיפוי אינדקסים לתכונות
-            all_features = [col for col in features_df.columns 
-                          if col not in [self.target_column, 'open', 'high', 'low', 'close', 'volume']]
+            all_features = self.input_features or self._get_input_features(features_df)
             selected_indices = feature_selector.get_support(indices=True)
             selected_features = [all_features[i] for i in selected_indices]
             
@@ -710,6 +855,8 @@ class MLBreakoutModel:
                 'models': self.models,
                 'scalers': self.scalers,
                 'feature_selectors': self.feature_selectors,
+                'preprocessor': self.preprocessor,
+                'input_features': self.input_features,
                 'feature_columns': self.feature_columns,
                 'is_trained': self.is_trained,
                 'config': self.config
@@ -735,6 +882,8 @@ class MLBreakoutModel:
             self.scalers = model_data['scalers']
             self.feature_selectors = model_data['feature_selectors']
             self.feature_columns = model_data['feature_columns']
+            self.preprocessor = model_data.get('preprocessor')
+            self.input_features = model_data.get('input_features', [])
             self.is_trained = model_data['is_trained']
             self.config.update(model_data['config'])
             
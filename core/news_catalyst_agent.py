@@ -20,7 +20,7 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.data_fetcher import compute_sentiment_label_score
 from utils.credentials import APICredentials
 from utils.fmp_utils import fmp_client
@@ -46,6 +46,8 @@ class CatalystTrigger:
     impact_multiplier: float
 
 class NewsCatalystAgent(BaseAgent):
+    price_requirement = PriceRequirement(days=30)
+
     def __init__(self, config=None):
         """
         אתחול הסוכן עם מערכת ניקוד משוקללת מתקדמת
@@ -510,7 +512,7 @@ class NewsCatalystAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=30)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -21,35 +21,43 @@ import re
 from collections import Counter
 import logging
 
-# ניסיון לטעון מודלים מתקדמים
-try:
-    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-    from textblob import TextBlob
-    import nltk
-    from nltk.tokenize import word_tokenize, sent_tokenize
-    from nltk.corpus import stopwords
-    from nltk.stem import WordNetLemmatizer
-    
-    # הורדת נתונים נדרשים
-    try:
-        nltk.data.find('tokenizers/punkt')
-    except LookupError:
-        nltk.download('punkt')
-    
-    try:
-        nltk.data.find('corpora/stopwords')
-    except LookupError:
-        nltk.download('stopwords')
-    
+# מודלים מתקדמים (transformers / nltk / textblob) נטענים בעצלות בשימוש הראשון -
+# ייבוא המודול עצמו זול. None = טרם נבדק
+NLP_AVAILABLE = None
+
+
+def _ensure_nlp() -> bool:
+    """ייבוא ספריות NLP והורדת נתוני nltk - פעם אחת לתהליך"""
+    global NLP_AVAILABLE, pipeline, word_tokenize, sent_tokenize, stopwords
+    if NLP_AVAILABLE is not None:
+        return NLP_AVAILABLE
     try:
-        nltk.data.find('corpora/wordnet')
-    except LookupError:
-        nltk.download('wordnet')
-        
-    NLP_AVAILABLE = True
-except Exception as e:
-    logging.warning(f"⚠️ NLP libraries not available: {e}")
-    NLP_AVAILABLE = False
+        from transformers import pipeline
+        import nltk
+        from nltk.tokenize import word_tokenize, sent_tokenize
+        from nltk.corpus import stopwords
+
+        # הורדת נתונים נדרשים
+        try:
+            nltk.data.find('tokenizers/punkt')
+        except LookupError:
+            nltk.download('punkt')
+
+        try:
+            nltk.data.find('corpora/stopwords')
+        except LookupError:
+            nltk.download('stopwords')
+
+        try:
+            nltk.data.find('corpora/wordnet')
+        except LookupError:
+            nltk.download('wordnet')
+
+        NLP_AVAILABLE = True
+    except Exception as e:
+        logging.warning(f"⚠️ NLP libraries not available: {e}")
+        NLP_AVAILABLE = False
+    return NLP_AVAILABLE
 
 class NLPAnalyzer:
     def __init__(self, config=None):
@@ -112,14 +120,15 @@ class NLPAnalyzer:
         # Cache
         self.analysis_cache = {}
         
-        # אתחול מודלים (אם זמינים)
+        # מודלים (אם זמינים) - נטענים בניתוח הסנטימנט הראשון
         self.sentiment_model = None
         self.summarizer_model = None
-        self._initialize_models()
+        self._models_initialized = False
         
     def _initialize_models(self):
         """אתחול מודלים מתקדמים"""
-        if not NLP_AVAILABLE:
+        self._models_initialized = True
+        if not _ensure_nlp():
             return
             
         try:
@@ -514,8 +523,10 @@ class NLPAnalyzer:
 
     def _analyze_sentiment(self, texts: List[Dict]) -> Dict:
         """ניתוח סנטימנט מתקדם"""
-        if not NLP_AVAILABLE:
+        if not _ensure_nlp():
             return self._basic_sentiment_analysis(texts)
+        if not self._models_initialized:
+            self._initialize_models()
         
         try:
             all_scores = []
@@ -646,7 +657,7 @@ class NLPAnalyzer:
     
     def _extract_topics(self, texts: List[Dict]) -> List[Dict]:
         """זיהוי נושאים מרכזיים"""
-        if not NLP_AVAILABLE:
+        if not _ensure_nlp():
             return self._basic_topic_extraction(texts)
         
         try:
@@ -744,7 +755,7 @@ class NLPAnalyzer:
             for keyword in self.financial_keywords + self.technical_keywords:
                 if keyword in text.lower():
                     # חילוץ משפט שלם
-                    sentences = sent_tokenize(text) if NLP_AVAILABLE else text.split('.')
+                    sentences = sent_tokenize(text) if _ensure_nlp() else text.split('.')
                     for sentence in sentences:
                         if keyword in sentence.lower():
                             key_phrases.append(sentence.strip())
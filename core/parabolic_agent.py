@@ -2,13 +2,16 @@
 
 import numpy as np
 import pandas as pd
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 class ParabolicAgent(BaseAgent):
     """
     Parabolic Move Detector – גרסת על (מחקר/עסקי)
     מזהה תנועות פראבוליות חדות (run up, climax), בדגש על זוית, רצף, Convexity, נפח.
     """
+
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -114,7 +117,7 @@ class ParabolicAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
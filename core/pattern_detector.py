@@ -15,7 +15,7 @@ from dataclasses import dataclass
 import warnings
 warnings.filterwarnings('ignore')
 
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.logger import get_agent_logger
 from utils.validators import validate_symbol, validate_stock_data
 
@@ -39,6 +39,8 @@ class PatternDetector(BaseAgent):
     סוכן זיהוי תבניות גרפיות
     """
 
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         """
         אתחול הסוכן
@@ -88,7 +90,7 @@ class PatternDetector(BaseAgent):
 
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
 
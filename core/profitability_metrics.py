@@ -23,7 +23,7 @@ from dataclasses import dataclass
 from utils.data_fetcher import data_fetcher
 from utils.logger import logger
 from utils.validators import validate_symbol
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 @dataclass
 class ProfitabilityMetrics:
@@ -72,6 +72,8 @@ class ProfitabilityMetricsAgent(BaseAgent):
     - זיהוי אנומליות ברווחיות
     """
     
+    price_requirement = PriceRequirement(days=365)
+
     def __init__(self, config=None):
         super().__init__(config)
         """אתחול הסוכן עם הגדרות מתקדמות"""
@@ -139,7 +141,7 @@ class ProfitabilityMetricsAgent(BaseAgent):
         """
         try:
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=365)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             # ולידציה
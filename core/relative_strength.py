@@ -20,7 +20,7 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.logger import logger
 from utils.validators import validate_symbol, validate_stock_data
 
@@ -59,6 +59,8 @@ class RelativeStrengthAgent(BaseAgent):
     - השוואה היסטורית
     """
     
+    price_requirement = PriceRequirement(days=365)
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -117,7 +119,7 @@ class RelativeStrengthAgent(BaseAgent):
             
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=365)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
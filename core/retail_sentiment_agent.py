@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, FlowEventSpec, detect_flow_events
 from utils.constants import RETAIL_SENTIMENT_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,12 @@ class RetailSentimentAgent(BaseAgent):
     - ניתוח רגשות קמעונאיים לפי נפח ומחיר
     """
     
+    price_requirement = PriceRequirement(days=180)
+    event_spec = FlowEventSpec.from_prefix(
+        'retail_sentiment', name='retail sentiments', sector_key='sector_avg_sentiment',
+        type_field='sentiment_type', ratio_field='sentiment_ratio',
+        type_labels=('bullish', 'bearish', 'fomo', 'panic', 'neutral'))
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -140,82 +147,36 @@ class RetailSentimentAgent(BaseAgent):
             logger.error(f"Error calculating retail sentiment metrics: {e}")
             return {}
 
-    def _detect_retail_sentiments(self, df: pd.DataFrame) -> List[RetailSentiment]:
+    def _detect_retail_sentiments(self, df: pd.DataFrame) -> EventTable:
         """
-        זיהוי רגשות קמעונאיים מתקדם
+        זיהוי רגשות קמעונאיים - הגלאי המשותף (detect_flow_events) עם העמודות והתוויות של event_spec;
+        אובייקטי האירוע עם ה-context המפורט נבנים רק לאירועים שמוצגים (_build_retail_sentiment).
         """
-        sentiments = []
-        
-        try:
-            # חישוב מדדי רגשות קמעונאיים
-            retail_sentiment_metrics = self._calculate_retail_sentiment_metrics(df)
-            if not retail_sentiment_metrics:
-                return sentiments
-            
-            df = retail_sentiment_metrics['retail_sentiment_metrics']
-            
-            # זיהוי רגשות קמעונאיים
-            for i in range(20, len(df)):
-                # ניתוח רגשות קמעונאיים נפח
-                volume_sentiment = self._analyze_volume_sentiment(df, i)
-                
-                # ניתוח רגשות קמעונאיים מחיר
-                price_sentiment = self._analyze_price_sentiment(df, i)
-                
-                # ניתוח רגשות קמעונאיים זמן
-                time_sentiment = self._analyze_time_sentiment(df, i)
-                
-                # ניתוח רגשות קמעונאיים סקטור
-                sector_sentiment = self._analyze_sector_sentiment(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי רגשות קמעונאיים
-                if self._is_retail_sentiment(volume_sentiment, price_sentiment, time_sentiment, sector_sentiment):
-                    # חישוב עוצמת הרגשות
-                    strength = self._calculate_sentiment_strength(
-                        volume_sentiment, price_sentiment, time_sentiment, sector_sentiment, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_sentiment_confidence(
-                        volume_sentiment, price_sentiment, time_sentiment, sector_sentiment, breakout_potential
-                    )
-                    
-                    # קביעת סוג רגשות
-                    sentiment_type = self._classify_sentiment_type(
-                        volume_sentiment, price_sentiment, time_sentiment
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_sentiment_significance(strength, confidence)
-                    
-                    sentiment = RetailSentiment(
-                        timestamp=df.index[i],
-                        sentiment_type=sentiment_type,
-                        strength=strength,
-                        confidence=confidence,
-                        sentiment_ratio=df['retail_sentiment_ratio'].iloc[i],
-                        volume_ratio=volume_sentiment.get('sentiment_ratio', 1.0),
-                        price_impact=price_sentiment.get('price_impact', 0.0),
-                        context={
-                            'volume_sentiment': volume_sentiment,
-                            'price_sentiment': price_sentiment,
-                            'time_sentiment': time_sentiment,
-                            'sector_sentiment': sector_sentiment,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    sentiments.append(sentiment)
-            
-            return sentiments
-            
-        except Exception as e:
-            logger.error(f"Error detecting retail sentiments: {e}")
-            return []
+        return detect_flow_events(df, self.event_spec, self._calculate_retail_sentiment_metrics, self._analyze_sector_sentiment,
+                                  self.retail_sentiment_thresholds, self._build_retail_sentiment)
+
+    def _build_retail_sentiment(self, df: pd.DataFrame, record) -> RetailSentiment:
+        """
+        בניית RetailSentiment מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return RetailSentiment(
+            timestamp=df.index[i],
+            sentiment_type=str(record['sentiment_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            sentiment_ratio=float(record['sentiment_ratio']),
+            volume_ratio=float(record['volume_ratio']),
+            price_impact=float(record['price_impact']),
+            context={
+                'volume_sentiment': self._analyze_volume_sentiment(df, i),
+                'price_sentiment': self._analyze_price_sentiment(df, i),
+                'time_sentiment': self._analyze_time_sentiment(df, i),
+                'sector_sentiment': self._analyze_sector_sentiment(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_volume_sentiment(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -524,17 +485,17 @@ class RetailSentimentAgent(BaseAgent):
             logger.error(f"Error determining sentiment significance: {e}")
             return 'unknown'
 
-    def _calculate_retail_sentiment_analysis(self, df: pd.DataFrame, sentiments: List[RetailSentiment]) -> RetailSentimentAnalysis:
+    def _calculate_retail_sentiment_analysis(self, df: pd.DataFrame, sentiments: EventTable) -> RetailSentimentAnalysis:
         """
         חישוב ניתוח רגשות קמעונאיים מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_sentiments = len(sentiments)
-            significant_sentiments = len([s for s in sentiments if s.significance in ['high', 'extreme']])
+            significant_sentiments = sentiments.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע עוצמת רגשות
-            avg_sentiment_strength = np.mean([s.strength for s in sentiments]) if sentiments else 0.5
+            avg_sentiment_strength = sentiments.mean('strength', 0.5)
             
             # ניתוח מגמת רגשות
             recent_retail_sentiment = df['retail_sentiment_score'].tail(20).mean()
@@ -578,7 +539,7 @@ class RetailSentimentAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -606,8 +567,8 @@ class RetailSentimentAgent(BaseAgent):
             
             # יצירת הסבר
             if sentiments:
-                recent_sentiments = [s for s in sentiments if s.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(sentiments)} רגשות קמעונאיים ({len(recent_sentiments)} משמעותיים). ממוצע עוצמה: {analysis.avg_sentiment_strength:.2f}, מגמת רגשות: {analysis.sentiment_trend}"
+                recent_sentiments = sentiments.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(sentiments)} רגשות קמעונאיים ({recent_sentiments} משמעותיים). ממוצע עוצמה: {analysis.avg_sentiment_strength:.2f}, מגמת רגשות: {analysis.sentiment_trend}"
             else:
                 explanation = "לא זוהו רגשות קמעונאיים משמעותיים"
             
@@ -640,7 +601,7 @@ class RetailSentimentAgent(BaseAgent):
                             "confidence": round(sentiment.confidence, 3),
                             "sentiment_ratio": round(sentiment.sentiment_ratio, 2)
                         }
-                        for sentiment in sentiments[:10]  # Top 10 sentiments
+                        for sentiment in sentiments.head(10)  # Top 10 sentiments
                     ],
                     "analysis": {
                         "total_sentiments": analysis.total_sentiments,
@@ -679,7 +640,7 @@ class RetailSentimentAgent(BaseAgent):
                 }
             }
 
-    def _generate_recommendations(self, sentiments: List[RetailSentiment], analysis: RetailSentimentAnalysis) -> List[str]:
+    def _generate_recommendations(self, sentiments: EventTable, analysis: RetailSentimentAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
@@ -2,11 +2,9 @@ import os
 import joblib
 import numpy as np
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error
-from core.base.base_agent import BaseAgent
+from typing import Dict, Optional
+from core.base.base_agent import BaseAgent, PriceRequirement
+from utils.model_store import ModelStore, data_fingerprint, feature_statistics
 
 ETF_MAPPING = {
     'AAPL': 'XLK',
@@ -18,7 +16,11 @@ ETF_MAPPING = {
     # יש להרחיב לפי הצורך
 }
 
+FEATURE_COLUMNS = ['volatility', 'momentum', 'avg_volume', 'etf_return']
+
 class ReturnForecaster(BaseAgent):
+    price_requirement = PriceRequirement(days=365)
+
     def __init__(self, config=None):
         super().__init__(config)
         self.symbol = self.config.get("symbol", "")
@@ -26,9 +28,26 @@ class ReturnForecaster(BaseAgent):
         self.window_size = self.config.get("window_size", 60)
         self.forecast_days = self.config.get("forecast_days", 5)
         self.model_dir = self.config.get("model_dir", "models")
+        # per_symbol - מודל לכל מניה (ברירת מחדל) | pooled - מודל אחד לכל היקום
+        self.mode = self.config.get("mode", "per_symbol")
         self.model = None
         self.model_path = os.path.join(self.model_dir, f"{self.symbol}_{self.model_type}_model.pkl")
         os.makedirs(self.model_dir, exist_ok=True)
+        self.model_store = ModelStore(self.model_dir, namespace="return_forecaster")
+        self.pooled_model = None
+        self._symbol_models = {}
+
+    def _new_model(self):
+        # ייבוא sklearn בעצלות - נדרש רק באימון
+        if self.model_type == 'linear':
+            from sklearn.linear_model import LinearRegression
+            return LinearRegression()
+        from sklearn.ensemble import GradientBoostingRegressor
+        return GradientBoostingRegressor(n_estimators=100, max_depth=3)
+
+    @property
+    def pooled_model_name(self):
+        return f"pooled_{self.model_type}"
 
     def _prepare_features(self, price_df, etf_df=None):
         df = price_df.copy().dropna().sort_index()
@@ -50,15 +69,13 @@ class ReturnForecaster(BaseAgent):
 
     def train(self, price_df, etf_df=None):
         df = self._prepare_features(price_df, etf_df)
-        X = df[['volatility', 'momentum', 'avg_volume', 'etf_return']]
+        X = df[FEATURE_COLUMNS]
         y = df['future_return']
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_squared_error
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
-        if self.model_type == 'linear':
-            self.model = LinearRegression()
-        else:
-            self.model = GradientBoostingRegressor(n_estimators=100, max_depth=3)
-
+        self.model = self._new_model()
         self.model.fit(X_train, y_train)
         y_pred = self.model.predict(X_test)
         mse = mean_squared_error(y_test, y_pred)
@@ -68,6 +85,149 @@ class ReturnForecaster(BaseAgent):
 
         return {'mse': mse, 'last_train_date': df.index[-1], 'model_path': self.model_path}
 
+    def train_pooled(self, price_frames: Dict[str, pd.DataFrame],
+                     etf_frames: Optional[Dict[str, pd.DataFrame]] = None):
+        """
+        אימון מודל אחד על פאנל התכונות של כל היקום (שורות כל המניות זו על גבי זו)
+        :param price_frames: dict סימבול -> נתוני מחיר
+        :param etf_frames: dict סימבול ETF -> נתוני מחיר (אופציונלי, לפי ETF_MAPPING)
+        """
+        etf_frames = etf_frames or {}
+        panels = []
+        for symbol, price_df in price_frames.items():
+            if price_df is None or price_df.empty:
+                continue
+            etf_df = etf_frames.get(ETF_MAPPING.get(symbol, ""))
+            df = self._prepare_features(price_df, etf_df)
+            if not df.empty:
+                panels.append(df[FEATURE_COLUMNS + ['future_return']])
+
+        if not panels:
+            raise ValueError("No usable price data for pooled training")
+
+        # מיון לפי תאריך כך שסט הבדיקה הוא החלק המאוחר בזמן לכל המניות יחד
+        panel = pd.concat(panels).sort_index(kind="stable")
+        X = panel[FEATURE_COLUMNS]
+        y = panel['future_return']
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_squared_error
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
+
+        self.pooled_model = self._new_model()
+        self.pooled_model.fit(X_train, y_train)
+        mse = mean_squared_error(y_test, self.pooled_model.predict(X_test))
+        residual_std = float(np.std(y_test - self.pooled_model.predict(X_test)))
+
+        self.model_store.save(
+            self.pooled_model_name,
+            self.pooled_model,
+            feature_schema=FEATURE_COLUMNS,
+            fingerprint=data_fingerprint(panel),
+            feature_stats=feature_statistics(X),
+            metadata={
+                'model_type': self.model_type,
+                'window_size': self.window_size,
+                'forecast_days': self.forecast_days,
+                'symbols': len(panels),
+                'rows': len(panel),
+                'mse': mse,
+                'residual_std': residual_std,
+            }
+        )
+        return {'mse': mse, 'symbols': len(panels), 'rows': len(panel),
+                'last_train_date': panel.index.max(), 'model_name': self.pooled_model_name}
+
+    def load_pooled_model(self):
+        """טעינת המודל המאוחד מהמאגר"""
+        entry = self.model_store.load(self.pooled_model_name)
+        if entry is None:
+            raise FileNotFoundError(f"Pooled model '{self.pooled_model_name}' not found in {self.model_store.model_dir}")
+        self.pooled_model = entry['model']
+        return entry['manifest']
+
+    def _latest_feature_matrix(self, price_frames: Dict[str, pd.DataFrame],
+                               etf_frames: Optional[Dict[str, pd.DataFrame]] = None):
+        """
+        בניית מטריצת התכונות העדכנית (שורה לכל מניה) ישירות ב-numpy
+        נדרשות רק window_size+1 השורות האחרונות של כל מניה
+        :return: (רשימת סימבולים, מטריצה בגודל n_symbols x len(FEATURE_COLUMNS))
+        """
+        etf_frames = etf_frames or {}
+        w = self.window_size
+        symbols, closes, volumes, etf_returns = [], [], [], []
+
+        for symbol, price_df in price_frames.items():
+            if price_df is None or price_df.empty:
+                continue
+            tail = price_df[['close', 'volume']].dropna().sort_index().tail(w + 1)
+            if len(tail) < w + 1:
+                continue
+
+            etf_return = 0.0  # fallback כמו ב-_prepare_features
+            etf_df = etf_frames.get(ETF_MAPPING.get(symbol, ""))
+            if etf_df is not None and not etf_df.empty:
+                etf_close = etf_df['close'].dropna().sort_index()
+                etf_close = etf_close[etf_close.index <= tail.index[-1]].tail(self.forecast_days + 1)
+                if len(etf_close) == self.forecast_days + 1:
+                    etf_return = float(etf_close.iloc[-1] / etf_close.iloc[0] - 1)
+
+            symbols.append(symbol)
+            closes.append(tail['close'].to_numpy(dtype=float))
+            volumes.append(tail['volume'].to_numpy(dtype=float))
+            etf_returns.append(etf_return)
+
+        if not symbols:
+            return [], np.empty((0, len(FEATURE_COLUMNS)))
+
+        close = np.vstack(closes)
+        volume = np.vstack(volumes)
+        returns = close[:, 1:] / close[:, :-1] - 1
+        X = np.column_stack([
+            returns.std(axis=1, ddof=1),          # volatility
+            close[:, -1] / close[:, 0] - 1,       # momentum
+            volume[:, 1:].mean(axis=1),           # avg_volume
+            np.asarray(etf_returns, dtype=float), # etf_return
+        ])
+        return symbols, X
+
+    def predict_many(self, price_frames: Dict[str, pd.DataFrame],
+                     etf_frames: Optional[Dict[str, pd.DataFrame]] = None) -> pd.DataFrame:
+        """
+        תחזית תשואה לכל המניות בקריאה וקטורית אחת על שורת התכונות העדכנית
+        :param price_frames: dict סימבול -> נתוני מחיר
+        :param etf_frames: dict סימבול ETF -> נתוני מחיר (אופציונלי)
+        :return: DataFrame באינדקס סימבול עם expected_return ו-model_used
+        """
+        symbols, X = self._latest_feature_matrix(price_frames, etf_frames)
+        if not symbols:
+            return pd.DataFrame(columns=['expected_return', 'model_used'])
+
+        X_df = pd.DataFrame(X, columns=FEATURE_COLUMNS, index=symbols)
+        if self.mode == 'pooled':
+            if self.pooled_model is None:
+                self.load_pooled_model()
+            forecasts = self.pooled_model.predict(X_df)
+            model_used = self.pooled_model_name
+        else:
+            # מודל לכל מניה - נשמר כאופציה, טעינה פעם אחת לכל סימבול
+            forecasts = np.full(len(symbols), np.nan)
+            for i, symbol in enumerate(symbols):
+                model = self._load_symbol_model(symbol)
+                if model is not None:
+                    forecasts[i] = model.predict(X_df.iloc[[i]])[0]
+            model_used = self.model_type
+
+        result = X_df.copy()
+        result['expected_return'] = np.round(forecasts, 4)
+        result['model_used'] = model_used
+        return result
+
+    def _load_symbol_model(self, symbol: str):
+        if symbol not in self._symbol_models:
+            path = os.path.join(self.model_dir, f"{symbol}_{self.model_type}_model.pkl")
+            self._symbol_models[symbol] = joblib.load(path) if os.path.exists(path) else None
+        return self._symbol_models[symbol]
+
     def load_model(self):
         if os.path.exists(self.model_path):
             self.model = joblib.load(self.model_path)
@@ -79,17 +239,23 @@ class ReturnForecaster(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=365)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
-            if self.model is None:
-                self.load_model()
+            if self.mode == 'pooled':
+                if self.pooled_model is None:
+                    self.load_pooled_model()
+                model = self.pooled_model
+            else:
+                if self.model is None:
+                    self.load_model()
+                model = self.model
 
             df = self._prepare_features(price_df, etf_df)
-            X = df[['volatility', 'momentum', 'avg_volume', 'etf_return']]
+            X = df[FEATURE_COLUMNS]
             latest_data = X.iloc[[-1]]
-            forecast = self.model.predict(latest_data)[0]
+            forecast = model.predict(latest_data)[0]
 
             std_estimate = df['future_return'].std()
             conf_interval = 1.96 * std_estimate
@@ -98,14 +264,14 @@ class ReturnForecaster(BaseAgent):
                 'expected_return': round(forecast, 4),
                 'std_dev': round(std_estimate, 4),
                 'confidence_interval': [round(forecast - conf_interval, 4), round(forecast + conf_interval, 4)],
-                'model_used': self.model_type
+                'model_used': self.pooled_model_name if self.mode == 'pooled' else self.model_type
             }
 
             # ניתוח Feature Importance אם GBM
-            if hasattr(self.model, "feature_importances_"):
+            if hasattr(model, "feature_importances_"):
                 result['feature_importance'] = dict(zip(
-                    ['volatility', 'momentum', 'avg_volume', 'etf_return'],
-                    self.model.feature_importances_.round(4)
+                    FEATURE_COLUMNS,
+                    model.feature_importances_.round(4)
                 ))
 
             return result
@@ -12,7 +12,7 @@ from typing import Dict, List, Optional, Tuple, Any
 import logging
 from datetime import datetime, timedelta
 
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.logger import get_agent_logger
 from utils.validators import validate_symbol, validate_stock_data
 
@@ -23,6 +23,8 @@ class ShortInterestSpikeAgent(BaseAgent):
     סוכן לזיהוי קפיצות בשורט אינטרסט
     """
     
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         """
         אתחול הסוכן
@@ -59,7 +61,7 @@ class ShortInterestSpikeAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -0,0 +1,390 @@
+"""
+Streaming Anomaly Engine - מנוע אנומליות אונליין
+=================================================
+
+זיהוי אנומליות בזמן אמת ללא התאמה מחדש של מודל בכל קריאה:
+- סטטיסטיקות מתגלגלות (ממוצע, סטיית תקן, חציון, MAD, רבעונים) המתעדכנות אינקרמנטלית
+- IsolationForest שמאומן מחדש מדי פעם ונשמר במטמון לפי מניה או לפי סקטור
+- קריאת ניקוד בעלות O(ברים חדשים) בלבד
+"""
+
+import threading
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_agent_logger
+
+logger = get_agent_logger("streaming_anomaly_engine")
+
+STREAM_FEATURES = ['returns', 'log_returns', 'price_range', 'volume_ratio']
+# מודלי הסטרים נשמרים בנפרד ממודלי הניתוח המלא (סט תכונות שונה)
+STREAM_KEY_PREFIX = "stream:"
+
+# מטמון מודלי IsolationForest ברמת התהליך: model_key -> entry
+_ISOLATION_MODELS: Dict[str, Dict[str, Any]] = {}
+_MODELS_LOCK = threading.Lock()
+
+
+def fit_isolation_model(key: str, feature_data: pd.DataFrame, contamination: float,
+                        last_index=None, cache: bool = True) -> Dict[str, Any]:
+    """
+    אימון scaler + IsolationForest ושמירה במטמון תחת model_key
+
+    cache=False מחזיר מודל חד-פעמי בלי לגעת במטמון (למשל חלון היסטורי שמסתיים לפני המודל השמור)
+    """
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    scaler = StandardScaler()
+    scaled = scaler.fit_transform(feature_data.values)
+    model = IsolationForest(contamination=contamination, random_state=42)
+    model.fit(scaled)
+    entry = {
+        "scaler": scaler,
+        "model": model,
+        "features": list(feature_data.columns),
+        "fit_rows": len(feature_data),
+        "last_index": last_index if last_index is not None else (
+            feature_data.index.max() if len(feature_data) else None),
+        "bars_since_fit": 0,
+        "contamination": contamination,
+    }
+    if not cache:
+        return entry
+    with _MODELS_LOCK:
+        _ISOLATION_MODELS[key] = entry
+    logger.debug(f"IsolationForest refitted for {key} on {len(feature_data)} rows")
+    return entry
+
+
+def get_isolation_model(key: str) -> Optional[Dict[str, Any]]:
+    """קבלת מודל מהמטמון (או None)"""
+    with _MODELS_LOCK:
+        return _ISOLATION_MODELS.get(key)
+
+
+def clear_isolation_models():
+    """ניקוי מטמון המודלים"""
+    with _MODELS_LOCK:
+        _ISOLATION_MODELS.clear()
+
+
+class RollingRobustStats:
+    """
+    סטטיסטיקות על חלון מתגלגל עם עדכון אינקרמנטלי
+
+    ממוצע וסטיית תקן מסכומים מצטברים (O(1)), חציון ורבעונים מרשימה ממוינת (O(log w) לחיפוש).
+    """
+
+    def __init__(self, window: int = 250):
+        self.window = window
+        self._values = deque()
+        self._sorted: List[float] = []
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def update(self, value: float):
+        """הוספת ערך חדש והוצאת הישן ביותר מהחלון"""
+        if value is None or not np.isfinite(value):
+            return
+        value = float(value)
+        self._values.append(value)
+        insort(self._sorted, value)
+        self._sum += value
+        self._sumsq += value * value
+
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            del self._sorted[bisect_left(self._sorted, old)]
+            self._sum -= old
+            self._sumsq -= old * old
+
+        # סנכרון מחדש של הסכומים מדי פעם למניעת הצטברות שגיאות נקודה צפה
+        self._updates += 1
+        if self._updates % max(self.window, 1) == 0:
+            self._sum = float(sum(self._values))
+            self._sumsq = float(sum(v * v for v in self._values))
+
+    @property
+    def count(self) -> int:
+        return len(self._values)
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """סטיית תקן מדגמית (ddof=1, כמו pandas)"""
+        n = self.count
+        if n < 2:
+            return 0.0
+        var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+        return float(np.sqrt(var)) if var > 0 else 0.0
+
+    def quantile(self, q: float) -> float:
+        """רבעון עם אינטרפולציה ליניארית (כמו numpy)"""
+        n = self.count
+        if n == 0:
+            return 0.0
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        frac = pos - lo
+        return self._sorted[lo] * (1 - frac) + self._sorted[hi] * frac
+
+    @property
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    @property
+    def mad(self) -> float:
+        """Median Absolute Deviation - מחושב על החלון (O(w), וקטורי)"""
+        if self.count == 0:
+            return 0.0
+        values = np.asarray(self._sorted)
+        return float(np.median(np.abs(values - self.median)))
+
+    def zscore(self, value: float) -> float:
+        std = self.std
+        return (value - self.mean) / std if std > 0 else 0.0
+
+    def modified_zscore(self, value: float) -> float:
+        mad = self.mad
+        return 0.6745 * (value - self.median) / mad if mad > 0 else 0.0
+
+    def is_iqr_outlier(self, value: float, multiplier: float = 1.5) -> bool:
+        if self.count < 4:
+            return False
+        q1, q3 = self.quantile(0.25), self.quantile(0.75)
+        iqr = q3 - q1
+        return value < q1 - multiplier * iqr or value > q3 + multiplier * iqr
+
+
+def trailing_robust_scores(values: pd.Series, window: int = 250,
+                           iqr_multiplier: float = 1.5) -> pd.DataFrame:
+    """
+    ניקוד וקטורי של סדרה מול החלון המתגלגל שלפני כל ערך
+
+    המקבילה ה-batch של RollingRobustStats כפי שהיא משמשת ב-StreamingAnomalyEngine.update:
+    כל ערך מנוקד מול `window` הערכים הקודמים לו בלבד (בלי הערך עצמו ובלי ערכים עתידיים).
+
+    Returns:
+        DataFrame עם העמודות z_score, modified_z_score, iqr_outlier
+    """
+    prior = values.shift(1).rolling(window, min_periods=2)
+    mean, std = prior.mean(), prior.std()
+    median = prior.median()
+    mad = prior.apply(lambda x: np.nanmedian(np.abs(x - np.nanmedian(x))), raw=True)
+
+    z = ((values - mean) / std).where(std > 0, 0.0).fillna(0.0)
+    modified_z = (0.6745 * (values - median) / mad).where(mad > 0, 0.0).fillna(0.0)
+
+    quartiles = values.shift(1).rolling(window, min_periods=4)
+    q1, q3 = quartiles.quantile(0.25), quartiles.quantile(0.75)
+    iqr = q3 - q1
+    iqr_outlier = ((values < q1 - iqr_multiplier * iqr) | (values > q3 + iqr_multiplier * iqr))
+
+    return pd.DataFrame({
+        "z_score": z,
+        "modified_z_score": modified_z,
+        "iqr_outlier": iqr_outlier.fillna(False).astype(bool),
+    }, index=values.index)
+
+
+class _SymbolState:
+    """מצב סטרימינג למניה בודדת"""
+
+    def __init__(self, window: int, volume_window: int, fit_window: int):
+        self.last_index = None
+        self.last_close = None
+        self.returns = RollingRobustStats(window)
+        self.volume = RollingRobustStats(window)
+        self.recent_volumes = deque(maxlen=volume_window)
+        self.feature_buffer = deque(maxlen=fit_window)
+        self.bars_seen = 0
+
+
+class StreamingAnomalyEngine:
+    """
+    מנוע אנומליות אונליין - מעבד רק ברים חדשים ומשתמש במודל IsolationForest שמור
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.window = self.config.get("stats_window", 250)
+        self.volume_window = self.config.get("volume_window", 20)
+        self.fit_window = self.config.get("fit_window", 500)
+        self.min_fit_points = self.config.get("min_fit_points", 30)
+        self.refit_every = self.config.get("refit_every", 50)
+        self.z_score_threshold = self.config.get("z_score_threshold", 3.0)
+        self.modified_z_threshold = self.config.get("modified_z_threshold", 3.5)
+        self.iqr_multiplier = self.config.get("iqr_multiplier", 1.5)
+        self.contamination = self.config.get("contamination", 0.1)
+        # symbol - מודל לכל מניה | sector - מודל משותף לפי sector_map
+        self.model_scope = self.config.get("model_scope", "symbol")
+        self.sector_map = self.config.get("sector_map", {})
+
+        self._states: Dict[str, _SymbolState] = {}
+        self._lock = threading.Lock()
+
+    def model_key(self, symbol: str) -> str:
+        """מפתח המודל: המניה עצמה או הסקטור שלה"""
+        if self.model_scope == "sector" and symbol in self.sector_map:
+            return f"sector:{self.sector_map[symbol]}"
+        return symbol
+
+    def _get_state(self, symbol: str) -> _SymbolState:
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is None:
+                state = _SymbolState(self.window, self.volume_window, self.fit_window)
+                self._states[symbol] = state
+            return state
+
+    def update(self, symbol: str, bars: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        עדכון המנוע עם ברים ומחזיר ניקוד לכל בר חדש בלבד
+
+        Args:
+            symbol: סמל המניה
+            bars: DataFrame עם open/high/low/close/volume; ברים שכבר נראו מדולגים
+
+        Returns:
+            רשימת dict (בר חדש -> ניקוד ודגלי אנומליה)
+        """
+        if bars is None or bars.empty:
+            return []
+
+        state = self._get_state(symbol)
+        if not bars.index.is_monotonic_increasing:
+            bars = bars.sort_index()
+        if state.last_index is not None:
+            bars = bars[bars.index > state.last_index]
+        if bars.empty:
+            return []
+
+        has_volume = 'volume' in bars.columns
+        has_range = 'high' in bars.columns and 'low' in bars.columns
+        results, vectors = [], []
+
+        for row in bars.itertuples():
+            close = float(row.close)
+            volume = float(row.volume) if has_volume else np.nan
+            prev_close = state.last_close
+            state.last_close = close
+            state.last_index = row.Index
+            state.bars_seen += 1
+
+            if has_volume:
+                state.recent_volumes.append(volume)
+            if prev_close is None or prev_close <= 0:
+                continue
+
+            ret = close / prev_close - 1
+            log_ret = float(np.log(close / prev_close))
+            price_range = (float(row.high) - float(row.low)) / close if has_range and close else 0.0
+            volume_ma = np.mean(state.recent_volumes) if has_volume and state.recent_volumes else np.nan
+            volume_ratio = volume / volume_ma if volume_ma and np.isfinite(volume_ma) else np.nan
+
+            # ניקוד מול הסטטיסטיקות *לפני* הכללת הבר הנוכחי
+            z = state.returns.zscore(ret) if state.returns.count >= 2 else 0.0
+            mod_z = state.returns.modified_zscore(ret) if state.returns.count >= 2 else 0.0
+            iqr_flag = state.returns.is_iqr_outlier(ret, self.iqr_multiplier)
+            volume_z = state.volume.zscore(volume) if has_volume and state.volume.count >= 2 else 0.0
+
+            state.returns.update(ret)
+            if has_volume:
+                state.volume.update(volume)
+
+            vector = [ret, log_ret, price_range, volume_ratio if has_volume else 0.0]
+            if all(np.isfinite(vector)):
+                state.feature_buffer.append((row.Index, vector))
+                vectors.append((len(results), vector))
+
+            results.append({
+                "timestamp": row.Index,
+                "close": close,
+                "returns": ret,
+                "z_score": z,
+                "modified_z_score": mod_z,
+                "iqr_outlier": iqr_flag,
+                "volume_ratio": volume_ratio,
+                "volume_z_score": volume_z,
+                "extreme_move": abs(ret) > 0.1,
+                "isolation_score": None,
+                "isolation_anomaly": False,
+            })
+
+        self._score_isolation(symbol, results, vectors)
+
+        for result in results:
+            result["is_anomaly"] = bool(
+                abs(result["z_score"]) > self.z_score_threshold
+                or abs(result["modified_z_score"]) > self.modified_z_threshold
+                or result["extreme_move"]
+                or result["isolation_anomaly"]
+            )
+        return results
+
+    def _score_isolation(self, symbol: str, results: List[Dict], vectors: List):
+        """ניקוד וקטורי של הברים החדשים במודל השמור, ואימון מחדש לפי הצורך"""
+        key = self.model_key(symbol)
+        entry = get_isolation_model(STREAM_KEY_PREFIX + key)
+
+        if entry is not None and vectors:
+            matrix = np.asarray([v for _, v in vectors])
+            scaled = entry["scaler"].transform(matrix)
+            scores = entry["model"].decision_function(scaled)
+            for (pos, _), score in zip(vectors, scores):
+                results[pos]["isolation_score"] = float(score)
+                results[pos]["isolation_anomaly"] = bool(score < 0)
+            entry["bars_since_fit"] += len(vectors)
+
+        if entry is None or entry["bars_since_fit"] >= self.refit_every:
+            self._refit(key)
+
+    def _refit(self, key: str):
+        """אימון מחדש על באפר התכונות של כל המניות תחת אותו מפתח"""
+        with self._lock:
+            buffers = [state.feature_buffer for sym, state in self._states.items()
+                       if self.model_key(sym) == key]
+        rows = [item for buffer in buffers for item in list(buffer)]
+        if len(rows) < self.min_fit_points:
+            return
+        index = [ts for ts, _ in rows]
+        data = pd.DataFrame([v for _, v in rows], columns=STREAM_FEATURES, index=index)
+        fit_isolation_model(STREAM_KEY_PREFIX + key, data, self.contamination,
+                            last_index=max(index))
+
+    def snapshot(self, symbol: str) -> Dict[str, Any]:
+        """מצב הסטטיסטיקות הנוכחי של מניה"""
+        state = self._states.get(symbol)
+        if state is None:
+            return {}
+        entry = get_isolation_model(STREAM_KEY_PREFIX + self.model_key(symbol))
+        return {
+            "bars_seen": state.bars_seen,
+            "last_index": state.last_index,
+            "returns_mean": state.returns.mean,
+            "returns_std": state.returns.std,
+            "returns_median": state.returns.median,
+            "returns_mad": state.returns.mad,
+            "volume_mean": state.volume.mean,
+            "model_key": self.model_key(symbol),
+            "model_fitted": entry is not None,
+            "bars_since_fit": entry["bars_since_fit"] if entry else None,
+        }
+
+    def reset(self, symbol: Optional[str] = None):
+        """איפוס מצב מניה בודדת או של כל המנוע"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+            else:
+                self._states.pop(symbol, None)
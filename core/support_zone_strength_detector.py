@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 def compute_volume_profile(price_df, price_step=0.005):
     lows = price_df['low']
@@ -69,6 +69,8 @@ def find_double_top(highs, threshold=0.01):
     return False, []
 
 class SupportZoneStrengthDetector(BaseAgent):
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -107,7 +109,7 @@ class SupportZoneStrengthDetector(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -16,7 +16,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from utils.rolling_kernels import weighted_moving_average
 import logging
 
 logger = logging.getLogger(__name__)
@@ -46,6 +47,8 @@ class TrendDetector(BaseAgent):
     - אינדיקטורים טכניים מתקדמים
     """
     
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -95,12 +98,8 @@ class TrendDetector(BaseAgent):
         df['EMA_diff'] = df['EMA_short'] - df['EMA_long']
         
         # ממוצעים נעים משוקללים
-        df['WMA_short'] = df['close'].rolling(window=self.short_window).apply(
-            lambda x: np.average(x, weights=np.arange(1, len(x) + 1))
-        )
-        df['WMA_long'] = df['close'].rolling(window=self.long_window).apply(
-            lambda x: np.average(x, weights=np.arange(1, len(x) + 1))
-        )
+        df['WMA_short'] = weighted_moving_average(df['close'], self.short_window)
+        df['WMA_long'] = weighted_moving_average(df['close'], self.long_window)
         
         return df
 
@@ -384,7 +383,7 @@ class TrendDetector(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, add_if, bounded, count_true, significance_levels, tiered
 from utils.constants import TREND_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,8 @@ class TrendShiftAgent(BaseAgent):
     - מצב לייב לניטור בזמן אמת
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -182,80 +185,114 @@ class TrendShiftAgent(BaseAgent):
             logger.error(f"Error calculating technical indicators: {e}")
             return {}
 
-    def _detect_trend_shifts(self, df: pd.DataFrame) -> List[TrendShift]:
+    def _detect_trend_shifts(self, df: pd.DataFrame) -> EventTable:
         """
         זיהוי שינויי מגמה מתקדם
+
+        הקריטריונים של _analyze_*_trend מחושבים על כל הנרות בבת אחת; אובייקטי
+        TrendShift עם האינדיקטורים וה-context המפורטים נבנים רק לשינויים שמוצגים (_build_trend_shift).
         """
-        shifts = []
-        
         try:
             # חישוב אינדיקטורים
             indicators = self._calculate_technical_indicators(df)
             if not indicators:
-                return shifts
+                return EventTable.empty()
             
             df = indicators['indicators']
-            
-            # זיהוי שינויי מגמה לפי מספר קריטריונים
-            for i in range(50, len(df)):
-                # ניתוח מגמת מחיר
-                price_trend = self._analyze_price_trend(df, i)
-                
-                # ניתוח מגמת נפח
-                volume_trend = self._analyze_volume_trend(df, i)
-                
-                # ניתוח אינדיקטורים טכניים
-                technical_trend = self._analyze_technical_trend(df, i)
-                
-                # ניתוח מגמה פונדמנטלית
-                fundamental_trend = self._analyze_fundamental_trend(df, i)
-                
-                # ניתוח מגמת רגשות
-                sentiment_trend = self._analyze_sentiment_trend(df, i)
-                
-                # זיהוי שינוי מגמה
-                if self._is_trend_shift(price_trend, volume_trend, technical_trend, fundamental_trend, sentiment_trend):
-                    # חישוב עוצמת השינוי
-                    strength = self._calculate_shift_strength(
-                        price_trend, volume_trend, technical_trend, fundamental_trend, sentiment_trend
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_shift_confidence(
-                        price_trend, volume_trend, technical_trend, fundamental_trend, sentiment_trend
-                    )
-                    
-                    # קביעת סוג מגמה
-                    trend_type = self._classify_trend_type(
-                        price_trend, volume_trend, technical_trend
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_shift_significance(strength, confidence)
-                    
-                    shift = TrendShift(
-                        timestamp=df.index[i],
-                        trend_type=trend_type,
-                        strength=strength,
-                        confidence=confidence,
-                        indicators={
-                            'price_trend': price_trend,
-                            'volume_trend': volume_trend,
-                            'technical_trend': technical_trend,
-                            'fundamental_trend': fundamental_trend,
-                            'sentiment_trend': sentiment_trend
-                        },
-                        context=self._analyze_shift_context(df, i),
-                        significance=significance
-                    )
-                    
-                    shifts.append(shift)
-            
-            return shifts
+            rows = np.arange(50, len(df))
+            if not len(rows):
+                return EventTable.empty()
+            
+            def column(name: str) -> np.ndarray:
+                return df[name].to_numpy(dtype=float)[rows]
+            
+            # מגמת מחיר ופריצות (_analyze_price_trend)
+            close = column('close')
+            short_up = close > column('sma_20')
+            medium_up = column('sma_20') > column('sma_50')
+            breakout_up = close > column('bb_upper')
+            breakout_down = ~breakout_up & (close < column('bb_lower'))
+            
+            # מגמת נפח (_analyze_volume_trend)
+            volume = column('volume')
+            volume_sma_20 = df['volume'].rolling(window=20).mean().to_numpy(dtype=float)[rows]
+            volume_std = df['volume'].rolling(window=20).std().to_numpy(dtype=float)[rows]
+            volume_increasing = volume > volume_sma_20
+            unusual_volume = volume > (volume_sma_20 + volume_std * 2)
+            
+            # טכני (_analyze_technical_trend): MACD מעל האות ו-RSI בתחום הנייטרלי
+            rsi = column('rsi')
+            macd_bullish = column('macd') > column('macd_signal')
+            rsi_neutral = ~((rsi < 30) | (rsi > 70))
+            
+            # פונדמנטלי ורגשות - ערכים קבועים (סימולציה), זהים לכל הנרות
+            fundamental_positive = self._analyze_fundamental_trend(df, rows[-1]).get('overall_fundamental') == 'positive'
+            sentiment_positive = self._analyze_sentiment_trend(df, rows[-1]).get('sentiment_trend') == 'positive'
+            fundamental_shift = np.full(len(rows), fundamental_positive)
+            sentiment_shift = np.full(len(rows), sentiment_positive)
+            
+            # זיהוי שינוי מגמה (_is_trend_shift) - לפחות 3 קריטריונים
+            trends_agree = short_up == medium_up
+            detected = count_true(~trends_agree, volume_increasing & unusual_volume, macd_bullish & rsi_neutral,
+                                  fundamental_shift, sentiment_shift) >= 3
+            
+            # עוצמה (_calculate_shift_strength)
+            strength = np.zeros(len(rows))
+            strength = add_if(strength, breakout_up | breakout_down, 0.3)
+            strength = add_if(strength, unusual_volume, 0.2)
+            strength = add_if(strength, macd_bullish, 0.2)
+            strength = add_if(strength, fundamental_shift, 0.15)
+            strength = bounded(add_if(strength, sentiment_shift, 0.15), upper=1.0)
+            
+            # ביטחון (_calculate_shift_confidence)
+            confidence = count_true(trends_agree, volume_increasing, macd_bullish, fundamental_shift,
+                                    sentiment_shift) / 5.0
+            confidence = bounded(np.where(unusual_volume, confidence * 1.2, confidence), upper=1.0)
+            
+            # סוג ומשמעות (_classify_trend_type, _determine_shift_significance)
+            trend_type = tiered([
+                (breakout_up, 'uptrend'),
+                (breakout_down, 'downtrend'),
+                (trends_agree & short_up, 'up'),
+                (trends_agree, 'down'),
+            ], 'sideways')
+            thresholds = self.trend_thresholds
+            significance = significance_levels(strength, confidence, [
+                ('extreme', thresholds['extreme'], 0.8),
+                ('strong', thresholds['strong'], 0.6),
+                ('moderate', thresholds['moderate'], 0.4),
+                ('weak', thresholds['weak'], 0.2),
+            ])
+            
+            return EventTable.from_mask(
+                detected, rows=rows, factory=lambda record: self._build_trend_shift(df, record),
+                trend_type=trend_type, strength=strength, confidence=confidence, significance=significance
+            )
             
         except Exception as e:
             logger.error(f"Error detecting trend shifts: {e}")
-            return []
+            return EventTable.empty()
+
+    def _build_trend_shift(self, df: pd.DataFrame, record) -> TrendShift:
+        """
+        בניית TrendShift מרשומה בטבלת האירועים (כולל האינדיקטורים וה-context המלאים של הנר)
+        """
+        i = int(record['position'])
+        return TrendShift(
+            timestamp=df.index[i],
+            trend_type=str(record['trend_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            indicators={
+                'price_trend': self._analyze_price_trend(df, i),
+                'volume_trend': self._analyze_volume_trend(df, i),
+                'technical_trend': self._analyze_technical_trend(df, i),
+                'fundamental_trend': self._analyze_fundamental_trend(df, i),
+                'sentiment_trend': self._analyze_sentiment_trend(df, i)
+            },
+            context=self._analyze_shift_context(df, i),
+            significance=str(record['significance'])
+        )
 
     def _analyze_price_trend(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -608,7 +645,7 @@ class TrendShiftAgent(BaseAgent):
             logger.error(f"Error analyzing shift context: {e}")
             return {}
 
-    def _calculate_trend_analysis(self, df: pd.DataFrame, shifts: List[TrendShift]) -> TrendAnalysis:
+    def _calculate_trend_analysis(self, df: pd.DataFrame, shifts: EventTable) -> TrendAnalysis:
         """
         חישוב ניתוח מגמה מתקדם
         """
@@ -616,18 +653,18 @@ class TrendShiftAgent(BaseAgent):
             # קביעת מגמה נוכחית
             current_trend = 'sideways'
             if shifts:
-                latest_shift = shifts[-1]
-                current_trend = latest_shift.trend_type
+                current_trend = str(shifts['trend_type'][-1])
             
             # חישוב עוצמת מגמה
-            trend_strength = np.mean([s.strength for s in shifts]) if shifts else 0.5
+            trend_strength = shifts.mean('strength', 0.5)
             
             # חישוב משך מגמה
             trend_duration = len(shifts)
             
             # חישוב עקביות מגמה
             if len(shifts) >= 2:
-                consistent_trends = sum(1 for i in range(1, len(shifts)) if shifts[i].trend_type == shifts[i-1].trend_type)
+                trend_types = shifts['trend_type']
+                consistent_trends = int(np.sum(trend_types[1:] == trend_types[:-1]))
                 trend_consistency = consistent_trends / (len(shifts) - 1)
             else:
                 trend_consistency = 1.0
@@ -639,7 +676,7 @@ class TrendShiftAgent(BaseAgent):
             market_trend = 'positive'
             
             # ניקוד טכני
-            technical_score = np.mean([s.confidence for s in shifts]) if shifts else 0.5
+            technical_score = shifts.mean('confidence', 0.5)
             
             # ניקוד פונדמנטלי (סימולציה)
             fundamental_score = 0.6
@@ -743,7 +780,7 @@ class TrendShiftAgent(BaseAgent):
         try:
             # אחזור נתונים דרך מנהל הנתונים החכם
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)  # 6 חודשים
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)  # 6 חודשים
             
             if price_df is None or price_df.empty:
                 return {
@@ -776,8 +813,8 @@ class TrendShiftAgent(BaseAgent):
             # חישוב ציון סופי
             if shifts:
                 # חישוב ציון לפי שינויים משמעותיים
-                significant_shifts = [s for s in shifts if s.significance in ['strong', 'extreme']]
-                shift_score = min(100, len(significant_shifts) * 20 + analysis.trend_strength * 50)
+                significant_shifts = shifts.count('significance', ['strong', 'extreme'])
+                shift_score = min(100, significant_shifts * 20 + analysis.trend_strength * 50)
                 
                 # התאמה לפי עקביות
                 if analysis.trend_consistency > 0.8:
@@ -791,8 +828,8 @@ class TrendShiftAgent(BaseAgent):
             
             # יצירת הסבר
             if shifts:
-                recent_shifts = [s for s in shifts if s.significance in ['strong', 'extreme']]
-                explanation = f"זוהו {len(shifts)} שינויי מגמה ({len(recent_shifts)} משמעותיים). מגמה נוכחית: {analysis.current_trend}, עוצמה: {analysis.trend_strength:.2f}"
+                recent_shifts = shifts.count('significance', ['strong', 'extreme'])
+                explanation = f"זוהו {len(shifts)} שינויי מגמה ({recent_shifts} משמעותיים). מגמה נוכחית: {analysis.current_trend}, עוצמה: {analysis.trend_strength:.2f}"
             else:
                 explanation = "לא זוהו שינויי מגמה משמעותיים"
             
@@ -811,7 +848,7 @@ class TrendShiftAgent(BaseAgent):
                         "current_trend": analysis.current_trend,
                         "trend_strength": round(analysis.trend_strength, 2),
                         "shifts_count": len(shifts),
-                        "significant_shifts": len([s for s in shifts if s.significance in ['strong', 'extreme']])
+                        "significant_shifts": shifts.count('significance', ['strong', 'extreme'])
                     }
                 },
                 "details": {
@@ -823,7 +860,7 @@ class TrendShiftAgent(BaseAgent):
                             "significance": shift.significance,
                             "confidence": round(shift.confidence, 3)
                         }
-                        for shift in shifts[:10]  # Top 10 shifts
+                        for shift in shifts.head(10)  # Top 10 shifts
                     ],
                     "analysis": {
                         "current_trend": analysis.current_trend,
@@ -863,7 +900,7 @@ class TrendShiftAgent(BaseAgent):
                 }
             }
 
-    def _generate_recommendations(self, shifts: List[TrendShift], analysis: TrendAnalysis) -> List[str]:
+    def _generate_recommendations(self, shifts: EventTable, analysis: TrendAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
@@ -882,7 +919,7 @@ class TrendShiftAgent(BaseAgent):
             if analysis.trend_consistency > 0.8:
                 recommendations.append("🔄 מגמה עקבית - סיכוי גבוה להמשך")
             
-            if len([s for s in shifts if s.significance == 'extreme']) > 0:
+            if shifts.count('significance', ['extreme']) > 0:
                 recommendations.append("⚠️ שינויי מגמה קיצוניים - בדוק חדשות או אירועים")
             
             if analysis.technical_score > 0.7:
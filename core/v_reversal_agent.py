@@ -16,7 +16,7 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Any
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.logger import get_agent_logger
 import logging
 
@@ -46,6 +46,8 @@ class VReversalAgent(BaseAgent):
     - אינדיקטורים טכניים מתקדמים
     """
     
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         """
         אתחול סוכן היפוכי V
@@ -443,7 +445,7 @@ class VReversalAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
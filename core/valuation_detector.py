@@ -21,7 +21,7 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 from utils.data_fetcher import data_fetcher
 from utils.credentials import APICredentials
 from utils.fmp_utils import fmp_client
@@ -49,6 +49,8 @@ class SectorComparison:
     relative_discount: float
 
 class ValuationDetector(BaseAgent):
+    price_requirement = PriceRequirement(days=365)
+
     def __init__(self, config=None):
         """
         אתחול הסוכן המתקדם לניתוח הערכה
@@ -326,7 +328,7 @@ class ValuationDetector(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=365)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
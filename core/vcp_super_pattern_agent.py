@@ -21,7 +21,10 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import (
+    EventTable, add_if, bounded, count_true, ratio_or, significance_levels, tiered, trailing, window_length
+)
 from utils.constants import VCP_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +72,8 @@ class VCPSuperPatternAgent(BaseAgent):
     - ניתוח תבניות לפי רגשות השוק
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -137,84 +142,113 @@ class VCPSuperPatternAgent(BaseAgent):
             logger.error(f"Error calculating volatility metrics: {e}")
             return {}
 
-    def _detect_vcp_patterns(self, df: pd.DataFrame) -> List[VCPPattern]:
+    def _detect_vcp_patterns(self, df: pd.DataFrame) -> EventTable:
         """
         זיהוי תבניות VCP מתקדם
+
+        הקריטריונים של _analyze_* מחושבים על כל הנרות בבת אחת; אובייקטי VCPPattern
+        עם ה-context המפורט נבנים רק לתבניות שמוצגות (_build_vcp_pattern).
         """
-        patterns = []
-        
         try:
             # חישוב מדדי תנודתיות
             volatility_metrics = self._calculate_volatility_metrics(df)
             if not volatility_metrics:
-                return patterns
+                return EventTable.empty()
             
             df = volatility_metrics['volatility_metrics']
-            
-            # זיהוי תבניות VCP
-            for i in range(50, len(df)):
-                # ניתוח התכווצות מחיר
-                price_contraction = self._analyze_price_contraction(df, i)
-                
-                # ניתוח התכווצות נפח
-                volume_contraction = self._analyze_volume_contraction(df, i)
-                
-                # ניתוח זמן התכנסות
-                time_consolidation = self._analyze_time_consolidation(df, i)
-                
-                # ניתוח השוואה סקטורית
-                sector_comparison = self._analyze_sector_context(df, i)
-                
-                # ניתוח פוטנציאל פריצה
-                breakout_potential = self._analyze_breakout_potential(df, i)
-                
-                # זיהוי תבנית VCP
-                if self._is_vcp_pattern(price_contraction, volume_contraction, time_consolidation):
-                    # חישוב עוצמת התבנית
-                    strength = self._calculate_pattern_strength(
-                        price_contraction, volume_contraction, time_consolidation,
-                        sector_comparison, breakout_potential
-                    )
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_pattern_confidence(
-                        price_contraction, volume_contraction, time_consolidation,
-                        sector_comparison, breakout_potential
-                    )
-                    
-                    # קביעת סוג תבנית
-                    pattern_type = self._classify_vcp_pattern(
-                        price_contraction, volume_contraction, time_consolidation
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_pattern_significance(strength, confidence)
-                    
-                    pattern = VCPPattern(
-                        timestamp=df.index[i],
-                        pattern_type=pattern_type,
-                        strength=strength,
-                        confidence=confidence,
-                        contraction_ratio=df['vcp_score'].iloc[i],
-                        volume_contraction=volume_contraction.get('contraction_ratio', 1.0),
-                        price_contraction=price_contraction.get('contraction_ratio', 1.0),
-                        context={
-                            'price_contraction': price_contraction,
-                            'volume_contraction': volume_contraction,
-                            'time_consolidation': time_consolidation,
-                            'sector_comparison': sector_comparison,
-                            'breakout_potential': breakout_potential
-                        },
-                        significance=significance
-                    )
-                    
-                    patterns.append(pattern)
-            
-            return patterns
+            rows = np.arange(50, len(df))
+            if not len(rows):
+                return EventTable.empty()
+            close = df['close'].to_numpy(dtype=float)[rows]
+            
+            # התכווצות מחיר ונפח - התנודתיות הנוכחית מול ממוצע 30 הנרות הקודמים
+            price_ratio = ratio_or(df['price_volatility_ratio'].to_numpy(dtype=float)[rows],
+                                   trailing(df['price_volatility_ratio'], rows, 30), 1.0)
+            volume_ratio = ratio_or(df['volume_volatility_ratio'].to_numpy(dtype=float)[rows],
+                                    trailing(df['volume_volatility_ratio'], rows, 30), 1.0)
+            
+            # זמן התכנסות והשוואה סקטורית
+            consolidation_duration = window_length(rows, 30)
+            vcp_score = df['vcp_score'].to_numpy(dtype=float)[rows]
+            sector_avg = self._analyze_sector_context(df, len(df) - 1).get('sector_avg_vcp_score', 0.5)
+            relative_to_sector = vcp_score / sector_avg
+            
+            # פוטנציאל פריצה (רצועות בולינגר אם חושבו, אחרת 2% סביב המחיר)
+            bb_upper = df['bb_upper'].to_numpy(dtype=float)[rows] if 'bb_upper' in df.columns else close * 1.02
+            bb_lower = df['bb_lower'].to_numpy(dtype=float)[rows] if 'bb_lower' in df.columns else close * 0.98
+            with np.errstate(divide='ignore', invalid='ignore'):
+                upside_potential = (bb_upper - close) / close
+                downside_potential = (close - bb_lower) / close
+            breakout_strength = np.where(downside_potential > upside_potential, downside_potential, upside_potential)
+            
+            # קריטריונים (_is_vcp_pattern) - לפחות 2 מתוך 3
+            price_contracting = price_ratio < 0.8
+            volume_contracting = volume_ratio < 0.8
+            time_consolidating = consolidation_duration >= 20
+            detected = count_true(price_contracting, volume_contracting, time_consolidating) >= 2
+            
+            # עוצמה (_calculate_pattern_strength)
+            strength = np.zeros(len(rows))
+            strength = strength + tiered([(price_ratio < 0.7, 0.3), (price_ratio < 0.9, 0.2)], 0.0)
+            strength = strength + tiered([(volume_ratio < 0.7, 0.3), (volume_ratio < 0.9, 0.2)], 0.0)
+            strength = strength + tiered([(consolidation_duration >= 30, 0.2), (time_consolidating, 0.1)], 0.0)
+            strength = add_if(strength, relative_to_sector < 0.8, 0.1)
+            strength = bounded(add_if(strength, breakout_strength > 0.05, 0.1), upper=1.0)
+            
+            # ביטחון (_calculate_pattern_confidence)
+            confidence = count_true(price_contracting, volume_contracting, time_consolidating,
+                                    relative_to_sector < 1.0, breakout_strength > 0.03) / 5.0
+            confidence = np.where((price_ratio + volume_ratio) / 2 < 0.7, confidence * 1.2, confidence)
+            confidence = bounded(confidence, upper=1.0)
+            
+            # סוג ומשמעות (_classify_vcp_pattern, _determine_pattern_significance)
+            pattern_type = tiered([
+                ((price_ratio < 0.6) & (volume_ratio < 0.6) & (consolidation_duration >= 30), 'tight_vcp'),
+                (price_contracting & volume_contracting & time_consolidating, 'classic_vcp'),
+                (consolidation_duration >= 50, 'extended_vcp'),
+                ((price_ratio > 1.0) | (volume_ratio > 1.0), 'failed_vcp'),
+            ], 'wide_vcp')
+            thresholds = self.vcp_thresholds
+            significance = significance_levels(strength, confidence, [
+                ('extreme', thresholds['extreme'], 0.8),
+                ('strong', thresholds['strong'], 0.6),
+                ('moderate', thresholds['moderate'], 0.4),
+                ('weak', thresholds['weak'], 0.2),
+            ])
+            
+            return EventTable.from_mask(
+                detected, rows=rows, factory=lambda record: self._build_vcp_pattern(df, record),
+                pattern_type=pattern_type, strength=strength, confidence=confidence,
+                contraction_ratio=vcp_score, volume_contraction=volume_ratio, price_contraction=price_ratio,
+                significance=significance
+            )
             
         except Exception as e:
             logger.error(f"Error detecting VCP patterns: {e}")
-            return []
+            return EventTable.empty()
+
+    def _build_vcp_pattern(self, df: pd.DataFrame, record) -> VCPPattern:
+        """
+        בניית VCPPattern מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return VCPPattern(
+            timestamp=df.index[i],
+            pattern_type=str(record['pattern_type']),
+            strength=float(record['strength']),
+            confidence=float(record['confidence']),
+            contraction_ratio=float(record['contraction_ratio']),
+            volume_contraction=float(record['volume_contraction']),
+            price_contraction=float(record['price_contraction']),
+            context={
+                'price_contraction': self._analyze_price_contraction(df, i),
+                'volume_contraction': self._analyze_volume_contraction(df, i),
+                'time_consolidation': self._analyze_time_consolidation(df, i),
+                'sector_comparison': self._analyze_sector_context(df, i),
+                'breakout_potential': self._analyze_breakout_potential(df, i)
+            },
+            significance=str(record['significance'])
+        )
 
     def _analyze_price_contraction(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -515,17 +549,17 @@ class VCPSuperPatternAgent(BaseAgent):
             logger.error(f"Error determining pattern significance: {e}")
             return 'unknown'
 
-    def _calculate_vcp_analysis(self, df: pd.DataFrame, patterns: List[VCPPattern]) -> VCPAnalysis:
+    def _calculate_vcp_analysis(self, df: pd.DataFrame, patterns: EventTable) -> VCPAnalysis:
         """
         חישוב ניתוח VCP מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_patterns = len(patterns)
-            significant_patterns = len([p for p in patterns if p.significance in ['strong', 'extreme']])
+            significant_patterns = patterns.count('significance', ['strong', 'extreme'])
             
             # חישוב ממוצע יחסי התכווצות
-            avg_contraction_ratio = np.mean([p.contraction_ratio for p in patterns]) if patterns else 1.0
+            avg_contraction_ratio = patterns.mean('contraction_ratio', 1.0)
             
             # ניתוח מגמת נפח
             recent_volume = df['volume'].tail(20).mean()
@@ -569,7 +603,7 @@ class VCPSuperPatternAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -597,8 +631,8 @@ class VCPSuperPatternAgent(BaseAgent):
             
             # יצירת הסבר
             if patterns:
-                recent_patterns = [p for p in patterns if p.significance in ['strong', 'extreme']]
-                explanation = f"זוהו {len(patterns)} תבניות VCP ({len(recent_patterns)} משמעותיות). ממוצע התכווצות: {analysis.avg_contraction_ratio:.2f}, מגמת נפח: {analysis.volume_trend}"
+                recent_patterns = patterns.count('significance', ['strong', 'extreme'])
+                explanation = f"זוהו {len(patterns)} תבניות VCP ({recent_patterns} משמעותיות). ממוצע התכווצות: {analysis.avg_contraction_ratio:.2f}, מגמת נפח: {analysis.volume_trend}"
             else:
                 explanation = "לא זוהו תבניות VCP משמעותיות"
             
@@ -631,7 +665,7 @@ class VCPSuperPatternAgent(BaseAgent):
                             "confidence": round(pattern.confidence, 3),
                             "contraction_ratio": round(pattern.contraction_ratio, 2)
                         }
-                        for pattern in patterns[:10]  # Top 10 patterns
+                        for pattern in patterns.head(10)  # Top 10 patterns
                     ],
                     "analysis": {
                         "total_patterns": analysis.total_patterns,
@@ -651,7 +685,7 @@ class VCPSuperPatternAgent(BaseAgent):
             self.handle_error(e)
             return self.fallback()
 
-    def _generate_recommendations(self, patterns: List[VCPPattern], analysis: VCPAnalysis) -> List[str]:
+    def _generate_recommendations(self, patterns: EventTable, analysis: VCPAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
@@ -21,7 +21,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 from dataclasses import dataclass
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
+from core.base.event_detection import EventTable, bounded, ratio_or, tiered, trailing, window_length
 from utils.constants import VOLUME_THRESHOLDS, TIME_PERIODS
 import logging
 
@@ -69,6 +70,8 @@ class VolumeSpikeAgent(BaseAgent):
     - ניתוח נפח לפי סקטורים
     """
     
+    price_requirement = PriceRequirement(days=180)
+
     def __init__(self, config=None):
         """אתחול הסוכן עם הגדרות מתקדמות"""
         super().__init__(config)
@@ -145,65 +148,100 @@ class VolumeSpikeAgent(BaseAgent):
             logger.error(f"Error calculating volume metrics: {e}")
             return {}
 
-    def _detect_volume_spikes(self, df: pd.DataFrame) -> List[VolumeSpike]:
+    def _detect_volume_spikes(self, df: pd.DataFrame) -> EventTable:
         """
         זיהוי קפיצות נפח מתקדם
+
+        יחס הנפח, שינוי המחיר ורכיבי הביטחון מחושבים על כל הנרות בבת אחת;
+        אובייקטי VolumeSpike עם ה-context המפורט נבנים רק לקפיצות שמוצגות (_build_volume_spike).
         """
-        spikes = []
-        
         try:
-            # זיהוי קפיצות לפי סף יחסי
-            for i in range(20, len(df)):
-                current_volume = df['volume'].iloc[i]
-                avg_volume_20 = df['volume_sma_20'].iloc[i]
-                volume_ratio = current_volume / avg_volume_20 if avg_volume_20 > 0 else 1
-                
-                # זיהוי קפיצה משמעותית
-                if volume_ratio >= self.volume_thresholds['low']:
-                    # ניתוח הקשר
-                    price_change = (df['close'].iloc[i] - df['close'].iloc[i-1]) / df['close'].iloc[i-1]
-                    time_context = self._analyze_time_context(df, i)
-                    sector_comparison = self._analyze_sector_context(df, i)
-                    historical_pattern = self._analyze_historical_pattern(df, i)
-                    
-                    # חישוב ביטחון
-                    confidence = self._calculate_spike_confidence(
-                        volume_ratio, price_change, time_context, 
-                        sector_comparison, historical_pattern
-                    )
-                    
-                    # קביעת סוג קפיצה
-                    spike_type = self._classify_spike_type(
-                        volume_ratio, price_change, time_context
-                    )
-                    
-                    # קביעת משמעות
-                    significance = self._determine_significance(volume_ratio, confidence)
-                    
-                    spike = VolumeSpike(
-                        timestamp=df.index[i],
-                        volume=current_volume,
-                        price=df['close'].iloc[i],
-                        avg_volume=avg_volume_20,
-                        volume_ratio=volume_ratio,
-                        spike_type=spike_type,
-                        confidence=confidence,
-                        significance=significance,
-                        context={
-                            'price_change': price_change,
-                            'time_context': time_context,
-                            'sector_comparison': sector_comparison,
-                            'historical_pattern': historical_pattern
-                        }
-                    )
-                    
-                    spikes.append(spike)
-            
-            return spikes
+            rows = np.arange(20, len(df))
+            if not len(rows):
+                return EventTable.empty()
+            volume = df['volume'].to_numpy(dtype=float)
+            close = df['close'].to_numpy(dtype=float)
+            current_volume = volume[rows]
+            avg_volume_20 = df['volume_sma_20'].to_numpy(dtype=float)[rows]
+            volume_ratio = ratio_or(current_volume, avg_volume_20, 1.0)
+            
+            # זיהוי קפיצה משמעותית לפי סף יחסי
+            detected = volume_ratio >= self.volume_thresholds['low']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_change = (close[rows] - close[rows - 1]) / close[rows - 1]
+                relative_to_sector = current_volume / (avg_volume_20 * self._analyze_sector_context(df, rows[-1]).get(
+                    'sector_avg_volume_ratio', 1.0))
+            
+            # יחס לנפח הממוצע באותה שעת מסחר (_analyze_time_context) - רק לאינדקס זמן
+            hour_volume_ratio = np.ones(len(rows))
+            if hasattr(df.index, 'hour'):
+                hours = np.asarray(df.index.hour)
+                hour_avg_volume = np.empty(len(df))
+                for hour in np.unique(hours):
+                    hour_avg_volume[hours == hour] = df['volume'][hours == hour].mean()
+                hour_volume_ratio = ratio_or(current_volume, hour_avg_volume[rows], 1.0)
+            
+            # תדירות קפיצות (יחס >= 2) ב-60 הנרות הקודמים (_analyze_historical_pattern)
+            past_spikes = (df['volume_ratio_20'].to_numpy(dtype=float) >= 2.0).astype(float)
+            spike_frequency = trailing(past_spikes, rows, 60, how='sum') / window_length(rows, 60)
+            
+            # ביטחון (_calculate_spike_confidence)
+            weights = self.significance_weights
+            confidence = (
+                bounded(volume_ratio / self.volume_thresholds['extreme'], upper=1.0) * weights['volume_ratio'] +
+                bounded(np.abs(price_change) * 10, upper=1.0) * weights['price_movement'] +
+                bounded(hour_volume_ratio / 2.0, upper=1.0) * weights['time_context'] +
+                bounded(relative_to_sector / 2.0, upper=1.0) * weights['sector_comparison'] +
+                (1.0 - spike_frequency) * weights['historical_pattern']
+            )
+            confidence = bounded(confidence, lower=0.0, upper=1.0)
+            
+            # סוג ומשמעות (_classify_spike_type, _determine_significance)
+            thresholds = self.volume_thresholds
+            spike_type = tiered([
+                (volume_ratio >= thresholds['extreme'], 'extreme_volume'),
+                (volume_ratio >= thresholds['high'], 'high_volume'),
+                (volume_ratio >= thresholds['medium'], 'medium_volume'),
+                (volume_ratio >= thresholds['low'], 'low_volume'),
+            ], 'normal_volume')
+            significance = tiered([
+                ((volume_ratio >= thresholds['extreme']) & (confidence >= 0.8), 'extreme'),
+                ((volume_ratio >= thresholds['high']) & (confidence >= 0.6), 'high'),
+                ((volume_ratio >= thresholds['medium']) & (confidence >= 0.4), 'medium'),
+                ((volume_ratio >= thresholds['low']) & (confidence >= 0.2), 'low'),
+            ], 'minimal')
+            
+            return EventTable.from_mask(
+                detected, rows=rows, factory=lambda record: self._build_volume_spike(df, record),
+                volume=current_volume, price=close[rows], avg_volume=avg_volume_20, volume_ratio=volume_ratio,
+                spike_type=spike_type, confidence=confidence, significance=significance, price_change=price_change
+            )
             
         except Exception as e:
             logger.error(f"Error detecting volume spikes: {e}")
-            return []
+            return EventTable.empty()
+
+    def _build_volume_spike(self, df: pd.DataFrame, record) -> VolumeSpike:
+        """
+        בניית VolumeSpike מרשומה בטבלת האירועים (כולל ה-context המלא של הנר)
+        """
+        i = int(record['position'])
+        return VolumeSpike(
+            timestamp=df.index[i],
+            volume=float(record['volume']),
+            price=float(record['price']),
+            avg_volume=float(record['avg_volume']),
+            volume_ratio=float(record['volume_ratio']),
+            spike_type=str(record['spike_type']),
+            confidence=float(record['confidence']),
+            significance=str(record['significance']),
+            context={
+                'price_change': float(record['price_change']),
+                'time_context': self._analyze_time_context(df, i),
+                'sector_comparison': self._analyze_sector_context(df, i),
+                'historical_pattern': self._analyze_historical_pattern(df, i)
+            }
+        )
 
     def _analyze_time_context(self, df: pd.DataFrame, index: int) -> Dict:
         """
@@ -449,17 +487,17 @@ class VolumeSpikeAgent(BaseAgent):
             logger.error(f"Error determining significance: {e}")
             return 'unknown'
 
-    def _calculate_volume_analysis(self, df: pd.DataFrame, spikes: List[VolumeSpike]) -> VolumeAnalysis:
+    def _calculate_volume_analysis(self, df: pd.DataFrame, spikes: EventTable) -> VolumeAnalysis:
         """
         חישוב ניתוח נפח מתקדם
         """
         try:
             # חישוב סטטיסטיקות בסיסיות
             total_spikes = len(spikes)
-            significant_spikes = len([s for s in spikes if s.significance in ['high', 'extreme']])
+            significant_spikes = spikes.count('significance', ['high', 'extreme'])
             
             # חישוב ממוצע יחסי נפח
-            avg_volume_ratio = np.mean([s.volume_ratio for s in spikes]) if spikes else 1.0
+            avg_volume_ratio = spikes.mean('volume_ratio', 1.0)
             
             # ניתוח מגמת נפח
             recent_volume = df['volume'].tail(20).mean()
@@ -467,7 +505,7 @@ class VolumeSpikeAgent(BaseAgent):
             volume_trend = 'increasing' if recent_volume > historical_volume else 'decreasing'
             
             # ניתוח נפח חריג
-            unusual_volume_count = len([s for s in spikes if s.volume_ratio >= 3.0])
+            unusual_volume_count = int((spikes['volume_ratio'] >= 3.0).sum()) if spikes else 0
             
             # ניתוח סקטור
             sector_comparison = self._analyze_sector_context(df, len(df)-1)
@@ -500,7 +538,7 @@ class VolumeSpikeAgent(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=180)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
@@ -531,8 +569,8 @@ class VolumeSpikeAgent(BaseAgent):
             
             # יצירת הסבר
             if spikes:
-                recent_spikes = [s for s in spikes if s.significance in ['high', 'extreme']]
-                explanation = f"זוהו {len(spikes)} קפיצות נפח ({len(recent_spikes)} משמעותיות). ממוצע יחס: {analysis.avg_volume_ratio:.2f}, מגמה: {analysis.volume_trend}"
+                recent_spikes = spikes.count('significance', ['high', 'extreme'])
+                explanation = f"זוהו {len(spikes)} קפיצות נפח ({recent_spikes} משמעותיות). ממוצע יחס: {analysis.avg_volume_ratio:.2f}, מגמה: {analysis.volume_trend}"
             else:
                 explanation = "לא זוהו קפיצות נפח משמעותיות"
             
@@ -564,7 +602,7 @@ class VolumeSpikeAgent(BaseAgent):
                             "significance": spike.significance,
                             "confidence": round(spike.confidence, 3)
                         }
-                        for spike in spikes[:10]  # Top 10 spikes
+                        for spike in spikes.head(10)  # Top 10 spikes
                     ],
                     "analysis": {
                         "total_spikes": analysis.total_spikes,
@@ -584,7 +622,7 @@ class VolumeSpikeAgent(BaseAgent):
             self.handle_error(e)
             return self.fallback()
 
-    def _generate_recommendations(self, spikes: List[VolumeSpike], analysis: VolumeAnalysis) -> List[str]:
+    def _generate_recommendations(self, spikes: EventTable, analysis: VolumeAnalysis) -> List[str]:
         """
         יצירת המלצות מתקדמות
         """
@@ -2,7 +2,7 @@
 
 import numpy as np
 import pandas as pd
-from core.base.base_agent import BaseAgent
+from core.base.base_agent import BaseAgent, PriceRequirement
 
 class VolumeTensionMeter(BaseAgent):
     """
@@ -13,6 +13,8 @@ class VolumeTensionMeter(BaseAgent):
     - ציון חכם 1–100, הסבר, פרטי חישוב מלאים.
     """
 
+    price_requirement = PriceRequirement(days=90)
+
     def __init__(self, config=None):
         super().__init__(config)
         cfg = config or {}
@@ -74,7 +76,7 @@ class VolumeTensionMeter(BaseAgent):
         try:
             # קבלת נתונים דרך מנהל הנתונים החכם אם לא הועברו
             if price_df is None:
-                price_df = self.get_stock_data(symbol, days=90)
+                price_df = self.get_stock_data(symbol, days=self.price_requirement.days)
                 if price_df is None or price_df.empty:
                     return self.fallback()
             
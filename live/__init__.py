@@ -7,7 +7,8 @@ Charles_FocusedSpec - Live Module
 
 # Live Monitoring
 from .multi_agent_runner import MultiAgentRunner
-from .agent_runner import AgentRunner
+from .live_scheduler import LiveScheduler
+from .replay import ReplayRecorder, ReplayServer
 
 # Version
 __version__ = "1.0.0"
@@ -17,5 +18,7 @@ __description__ = "ניטור חי והרצת סוכנים בזמן אמת"
 # Main exports
 __all__ = [
     'MultiAgentRunner',
-    'AgentRunner',
+    'LiveScheduler',
+    'ReplayRecorder',
+    'ReplayServer',
 ] 
\ No newline at end of file
@@ -0,0 +1,371 @@
+"""
+Live Scheduler - מתזמן לייב מונחה אירועים
+==========================================
+
+מחליף את מודל תהליכון-לכל-(מניה, סוכן): תהליכון מתזמן יחיד ו-pool חסום של workers.
+- כל מניה נשלפת פעם אחת לכל מחזור (בקבוצות של batch_size דרך fetch_prices_batch)
+- הנר המשותף מועבר לכל הסוכנים שרשומים למניה
+- לכל סוכן קצב (cadence) משלו - הערכה מתבצעת רק כשהגיע מועדו
+- backpressure: תור השליפות חסום (שליפות עודפות נזרקות ונספרות, והמניה תישלף
+  במחזור הבא); הערכה שעדיין רצה לא נשלחת שוב (coalescing)
+- מדדים זמינים דרך metrics() ו-endpoint HTTP מקומי (/metrics, JSON)
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils.logger import enable_async_root_logging
+from utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+# עומק התור במצב לייב (utils.metrics)
+LIVE_QUEUE_DEPTH = get_registry().gauge("charles_live_queue_depth", "עבודות ממתינות בתור הלייב", ["queue"])
+LIVE_DROPPED = get_registry().counter("charles_live_dropped_total", "עבודות שנזרקו כי התור מלא", ["queue"])
+
+
+@dataclass
+class Subscription:
+    """רישום סוכן למניה"""
+    symbol: str
+    agent_name: str
+    agent: Any
+    interval: str
+    cadence_sec: float
+    next_due: float = 0.0
+    running: bool = False
+    runs: int = 0
+    errors: int = 0
+    total_latency: float = 0.0
+    last_result: Any = field(default=None, repr=False)
+
+
+def invoke_agent(agent: Any, symbol: str, price_data) -> Any:
+    """הפעלת סוכן על נתוני מחיר לפי הממשק שהוא חושף"""
+    if hasattr(agent, "analyze"):
+        return agent.analyze(symbol, price_data)
+    if hasattr(agent, "run_live"):
+        return agent.run_live(price_data)
+    if hasattr(agent, "run"):
+        return agent.run(price_data)
+    raise AttributeError(f"לסוכן {type(agent).__name__} אין פונקציה מתאימה (analyze/run_live/run)")
+
+
+class LiveScheduler:
+    """
+    מתזמן לייב: שליפה אחת לכל מניה במחזור, הערכת סוכנים על worker pool חסום
+    """
+
+    def __init__(self, fetch_fn: Optional[Callable] = None, on_result: Optional[Callable] = None,
+                 config: Optional[Dict] = None):
+        """
+        Args:
+            fetch_fn: fetch(symbols, interval) -> {symbol: DataFrame} (ברירת מחדל: DataFetcher.fetch_prices_batch)
+            on_result: callback(symbol, agent_name, result) לכל הערכה שהסתיימה
+            config: max_workers (0 = הרצה סינכרונית), max_pending, batch_size, tick_sec, metrics_port,
+                async_logging (ברירת מחדל True - handlers של ה-root מאחורי התור של utils.logger)
+        """
+        self.config = config or {}
+        self.max_workers = self.config.get("max_workers", 8)
+        self.max_pending = self.config.get("max_pending", 256)
+        self.batch_size = self.config.get("batch_size", 25)
+        self.tick_sec = self.config.get("tick_sec", 1.0)
+        self.metrics_port = self.config.get("metrics_port")
+        self.async_logging = self.config.get("async_logging", True)
+
+        self._fetch_fn = fetch_fn
+        self.on_result = on_result
+        # callback(stage, seconds) לכל שליפה/הערכה - למדידת השהיות (למשל בהשמעה חוזרת)
+        self.on_latency = None
+
+        # (symbol, interval) -> {agent_name: Subscription}
+        self._subscriptions: Dict[Tuple[str, str], Dict[str, Subscription]] = defaultdict(dict)
+        self._next_fetch: Dict[Tuple[str, str], float] = {}
+        self._fetching = set()
+        self._bars: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+        self._executor = None
+        self._pending = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._http_server = None
+
+        self._counters = defaultdict(int)
+        self._fetch_latency_total = 0.0
+
+    # ------------------------------------------------------------------
+    # רישום
+    # ------------------------------------------------------------------
+    def subscribe(self, symbol: str, agent_name: str, agent: Any,
+                  cadence_sec: float = 60.0, interval: str = "1day"):
+        """רישום סוכן למניה עם קצב הערכה משלו"""
+        stream = (symbol.upper(), interval)
+        with self._lock:
+            self._subscriptions[stream][agent_name] = Subscription(
+                symbol=stream[0], agent_name=agent_name, agent=agent,
+                interval=interval, cadence_sec=cadence_sec
+            )
+            self._next_fetch.setdefault(stream, 0.0)
+
+    def unsubscribe(self, symbol: str, agent_name: str, interval: str = "1day"):
+        stream = (symbol.upper(), interval)
+        with self._lock:
+            self._subscriptions.get(stream, {}).pop(agent_name, None)
+            if not self._subscriptions.get(stream):
+                self._subscriptions.pop(stream, None)
+                self._next_fetch.pop(stream, None)
+                self._bars.pop(stream, None)
+
+    def latest_bars(self, symbol: str, interval: str = "1day"):
+        """הנר המשותף האחרון שנשלף למניה"""
+        return self._bars.get((symbol.upper(), interval))
+
+    def _stream_cadence(self, stream) -> float:
+        return min(sub.cadence_sec for sub in self._subscriptions[stream].values())
+
+    # ------------------------------------------------------------------
+    # הרצה
+    # ------------------------------------------------------------------
+    def _fetch(self, symbols: List[str], interval: str) -> Dict:
+        if self._fetch_fn is None:
+            from utils.data_fetcher import DataFetcher
+            self._fetch_fn = DataFetcher().fetch_prices_batch
+        return self._fetch_fn(symbols, interval) or {}
+
+    def _count(self, name: str, amount: int = 1, latency: float = 0.0):
+        with self._lock:
+            self._counters[name] += amount
+            self._fetch_latency_total += latency
+
+    def _submit(self, fn, *args, bounded: bool = True) -> bool:
+        """
+        שליחת עבודה ל-pool; False כשהתור מלא (backpressure)
+
+        שליפות חסומות ב-max_pending. הערכות על נתונים שכבר נשלפו לא נזרקות - הן חסומות
+        ממילא במספר הרישומים, כי לכל זוג מניה-סוכן יש לכל היותר הערכה אחת בתור.
+        """
+        if self.max_workers <= 0:
+            fn(*args)
+            return True
+        with self._lock:
+            if bounded and self._pending >= self.max_pending:
+                LIVE_DROPPED.inc(queue="scheduler")
+                return False
+            self._pending += 1
+            LIVE_QUEUE_DEPTH.set(self._pending, queue="scheduler")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="live-worker")
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._job_done)
+        return True
+
+    def _job_done(self, future):
+        with self._lock:
+            self._pending -= 1
+            LIVE_QUEUE_DEPTH.set(self._pending, queue="scheduler")
+        if future.exception() is not None:
+            logger.error(f"שגיאה בעבודת מתזמן: {future.exception()}")
+
+    def run_once(self, now: Optional[float] = None) -> int:
+        """
+        מחזור תזמון יחיד: שליחת שליפות לכל הזרמים שהגיע מועדם
+
+        Returns:
+            מספר המניות שנשלחו לשליפה
+        """
+        now = time.monotonic() if now is None else now
+        due_by_interval = defaultdict(list)
+        with self._lock:
+            for stream, next_time in self._next_fetch.items():
+                if next_time <= now and stream not in self._fetching:
+                    due_by_interval[stream[1]].append(stream[0])
+
+        submitted = 0
+        for interval, symbols in due_by_interval.items():
+            for i in range(0, len(symbols), self.batch_size):
+                chunk = symbols[i:i + self.batch_size]
+                streams = [(symbol, interval) for symbol in chunk]
+                with self._lock:
+                    for stream in streams:
+                        self._fetching.add(stream)
+                        self._next_fetch[stream] = now + self._stream_cadence(stream)
+                if self._submit(self._fetch_chunk, chunk, interval, now):
+                    submitted += len(chunk)
+                else:
+                    self._count("fetches_dropped", len(chunk))
+                    with self._lock:
+                        # ניסיון חוזר במחזור הבא
+                        self._fetching.difference_update(streams)
+                        for stream in streams:
+                            if stream in self._next_fetch:
+                                self._next_fetch[stream] = now
+        return submitted
+
+    def _fetch_chunk(self, symbols: List[str], interval: str, now: float):
+        start = time.perf_counter()
+        try:
+            batch = self._fetch(symbols, interval)
+        except Exception as e:
+            logger.error(f"שגיאה בשליפת {len(symbols)} מניות ({interval}): {e}")
+            batch = {}
+            self._count("fetch_errors")
+        finally:
+            elapsed = time.perf_counter() - start
+            self._count("fetch_batches", latency=elapsed)
+            if self.on_latency:
+                self.on_latency("fetch", elapsed)
+
+        for symbol in symbols:
+            stream = (symbol, interval)
+            with self._lock:
+                self._fetching.discard(stream)
+            price_data = batch.get(symbol)
+            if price_data is None or getattr(price_data, "empty", False):
+                self._count("fetch_empty")
+                logger.debug("[%s] לא הוחזרו נתונים (%s)", symbol, interval)
+                continue
+            self._count("fetches")
+            self._bars[stream] = price_data
+            self._dispatch(stream, price_data, now)
+
+    def _dispatch(self, stream, price_data, now: float):
+        """שליחת הנר המשותף לכל הסוכנים שהגיע מועדם"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(stream, {}).values())
+        for sub in subscriptions:
+            if sub.next_due > now:
+                continue
+            if sub.running:
+                # הערכה קודמת עדיין רצה - לא נערמות הערכות על אותו זוג
+                self._count("evaluations_coalesced")
+                continue
+            sub.running = True
+            sub.next_due = now + sub.cadence_sec
+            self._submit(self._evaluate, sub, price_data, bounded=False)
+
+    def _evaluate(self, sub: Subscription, price_data):
+        start = time.perf_counter()
+        try:
+            result = invoke_agent(sub.agent, sub.symbol, price_data)
+            sub.last_result = result
+            sub.runs += 1
+            self._count("evaluations")
+            if self.on_result:
+                self.on_result(sub.symbol, sub.agent_name, result)
+        except Exception as e:
+            sub.errors += 1
+            self._count("evaluation_errors")
+            logger.error(f"[{sub.symbol}] שגיאה בסוכן {sub.agent_name}: {e}")
+        finally:
+            elapsed = time.perf_counter() - start
+            sub.total_latency += elapsed
+            sub.running = False
+            if self.on_latency:
+                self.on_latency(f"evaluate:{sub.agent_name}", elapsed)
+
+    def start(self):
+        """הפעלת תהליכון המתזמן, ה-pool וה-endpoint של המדדים"""
+        if self._thread is not None:
+            return
+        if self.async_logging:
+            # ה-workers כותבים לוג לכל הערכה - בלי להמתין ל-I/O של הקונסול/קובץ
+            enable_async_root_logging()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="live-scheduler", daemon=True)
+        self._thread.start()
+        if self.metrics_port is not None:
+            self.start_metrics_server(self.metrics_port)
+        logger.info(f"מתזמן לייב הופעל: {len(self._subscriptions)} זרמים, {self.max_workers} workers")
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"שגיאה במחזור תזמון: {e}")
+            self._stop_event.wait(self.tick_sec)
+
+    def stop(self, wait: bool = True):
+        """עצירת המתזמן"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+            self._http_server = None
+
+    # ------------------------------------------------------------------
+    # מדדים
+    # ------------------------------------------------------------------
+    def metrics(self) -> Dict:
+        """תמונת מצב של המתזמן"""
+        with self._lock:
+            subscriptions = [sub for subs in self._subscriptions.values() for sub in subs.values()]
+            streams = len(self._subscriptions)
+            pending = self._pending
+            in_flight = len(self._fetching)
+            counters = dict(self._counters)
+            fetch_latency_total = self._fetch_latency_total
+
+        agents = defaultdict(lambda: {"runs": 0, "errors": 0, "total_latency": 0.0})
+        for sub in subscriptions:
+            stats = agents[sub.agent_name]
+            stats["runs"] += sub.runs
+            stats["errors"] += sub.errors
+            stats["total_latency"] += sub.total_latency
+
+        batches = counters.get("fetch_batches", 0)
+        return {
+            "streams": streams,
+            "subscriptions": len(subscriptions),
+            "queue_depth": pending,
+            "max_pending": self.max_pending,
+            "fetches_in_flight": in_flight,
+            "counters": counters,
+            "avg_fetch_batch_latency_ms": round(1000 * fetch_latency_total / batches, 2) if batches else 0.0,
+            "agents": {
+                name: {
+                    "runs": stats["runs"],
+                    "errors": stats["errors"],
+                    "avg_latency_ms": round(1000 * stats["total_latency"] / stats["runs"], 2) if stats["runs"] else 0.0,
+                }
+                for name, stats in agents.items()
+            },
+        }
+
+    def start_metrics_server(self, port: int, host: str = "127.0.0.1"):
+        """endpoint HTTP מקומי: GET /metrics מחזיר JSON"""
+        scheduler = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(scheduler.metrics(), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._http_server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._http_server.serve_forever, name="live-metrics", daemon=True).start()
+        logger.info(f"מדדי מתזמן זמינים ב-http://{host}:{self._http_server.server_port}/metrics")
+        return self._http_server.server_port
@@ -1,23 +1,29 @@
+"""
+Multi Agent Runner - הרצת סוכנים מרובים בלייב
+הרצה דרך LiveScheduler: שליפה אחת לכל מניה במחזור, worker pool חסום וסוכן משותף
+אחד לכל סוג (במקום תהליכון ולולאת polling לכל זוג מניה-סוכן)
+"""
 import time
 import sys
-import threading
 import os
 import json
+import logging
 from datetime import datetime
 from pathlib import Path
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from utils.data_fetcher import DataFetcher
-from core.trend_shift_detector import TrendShiftDetector
-from core.bollinger_squeeze import BollingerSqueeze
-from core.breakout_retest_recognizer import BreakoutRetestRecognizer
+from core.agent_loader import get_shared_agent
+from live.live_scheduler import LiveScheduler
+from utils.logger import DEFAULT_LOG_FORMAT, enable_async_root_logging
 
-# רשימת הסוכנים הפעילים
-agent_classes = {
-    "TrendShiftDetector": TrendShiftDetector,
-    "BollingerSqueezeAgent": BollingerSqueeze,
-    "BreakoutRetestRecognizer": BreakoutRetestRecognizer,
+logger = logging.getLogger(__name__)
+
+# רשימת הסוכנים הפעילים: שם -> (מודול, מחלקה) - נטענים בעצלות, מופע משותף לכל המניות
+LIVE_AGENTS = {
+    "TrendShiftAgent": ("core.trend_shift_agent", "TrendShiftAgent"),
+    "BollingerSqueezeAgent": ("core.bollinger_squeeze", "BollingerSqueeze"),
+    "BreakoutRetestRecognizer": ("core.breakout_retest_recognizer", "BreakoutRetestRecognizer"),
 }
 
 # פונקציה לשמירת הפלט לקובץ JSON
@@ -39,129 +45,100 @@ def save_live_output(symbol, agent_name, result):
     except Exception as e:
         print(f"❌ שגיאה בשמירת קובץ JSON עבור {agent_name}: {e}")
 
-# פונקציית הרצת סוכן בלייב
-def run_agent_live(agent_name, agent_class, symbol, interval, delay):
-    fetcher = DataFetcher()
-
-    try:
-        if agent_name == "TrendShiftDetector":
-            agent = agent_class(symbol, interval=interval, live_mode=True, frequency_sec=delay)
-        else:
-            agent = agent_class(symbol)
-    except Exception as e:
-        print(f"❌ שגיאה באתחול {agent_name}: {e}")
-        return
-
-    while True:
-        try:
-            batch = fetcher.fetch_prices_batch([symbol], interval)
-            if not batch:
-                print(f"⚠️ [FETCH ERROR] לא הוחזרו נתונים כלל מהפונקציה fetch_prices_batch עבור {symbol}")
-                time.sleep(delay)
-                continue
-
-            price_data = batch.get(symbol)
-            if price_data is None:
-                print(f"⚠️ [None] הנתונים עבור {symbol} לא נמצאו ב־batch או ריקים")
-                time.sleep(delay)
-                continue
-
-            if price_data.empty:
-                print(f"❌ [{symbol}] לא נמצאו נתונים (DataFrame ריק)")
-            else:
-                print(f"📊 DEBUG: נתונים גולמיים עבור {symbol} ({interval}):\n{price_data.head()}\n")
-                print(f"\n⚡ הרצה | סוכן: {agent_name} | סימבול: {symbol} | אינטרוול: {interval}")
-                if hasattr(agent, "run_live"):
-                    if agent_name == "TrendShiftDetector":
-                        result = agent.run_live(symbol, price_data)
-                    else:
-                        result = agent.run_live(price_data)
-                elif hasattr(agent, "run"):
-                    result = agent.run()
-                elif hasattr(agent, "analyze"):
-                    result = agent.analyze(symbol, price_data)
-                else:
-                    print(f"⚠️ לסוכן {agent_name} אין פונקציה מתאימה (run/run_live/analyze)")
-                    continue
-
-                print(result)
-                save_live_output(symbol, agent_name, result)
-
-        except Exception as e:
-            print(f"❌ [{symbol}] שגיאה בסוכן {agent_name}: {e}")
-
-        time.sleep(delay)
-
-# פונקציה ראשית
-def main():
-    print("🎯 מצב לייב – הרצת סוכנים לפי בחירה")
-    symbols = input("📥 הזן סימבולים (מופרדים בפסיקים, לדו' QBTS,NVDA): ").split(",")
-    interval = input("⏱️ הזן אינטרוול (1min, 5min, 1day): ").strip()
-    delay = input("⏲️ כל כמה שניות לבצע הרצה? (ברירת מחדל: 60): ").strip()
-    delay = int(delay) if delay else 60
-
-    print(f"\n🚀 מריץ את הסוכנים: {', '.join(symbols)} | אינטרוול: {interval} | כל {delay} שניות")
-    print("🛑 לחץ Enter כדי לעצור את כל הסוכנים...")
-
-    threads = []
-    for symbol in symbols:
-        symbol = symbol.strip().upper()
-        for name, cls in agent_classes.items():
-            thread = threading.Thread(target=run_agent_live, args=(name, cls, symbol, interval, delay))
-            thread.daemon = True
-            thread.start()
-            threads.append(thread)
-
-    input()
-    print("✅ כל הסוכנים נעצרו. להתראות!")
-
 class MultiAgentRunner:
     """
     מחלקת הרצת סוכנים מרובים - ממשק תאימות לייבוא
     """
     
-    def __init__(self, symbols: list = None, interval: str = "1day", delay: int = 60):
+    def __init__(self, symbols: list = None, interval: str = "1day", delay: int = 60,
+                 agent_cadences: dict = None, config: dict = None):
         """
         אתחול הרצת סוכנים מרובים
         
         Args:
             symbols: רשימת סמלי מניות
             interval: מרווח זמן
-            delay: השהייה בין הרצות (שניות)
+            delay: השהייה בין הרצות (שניות) - קצב ברירת המחדל לכל סוכן
+            agent_cadences: קצב ייעודי לסוכן (שם -> שניות)
+            config: הגדרות המתזמן (max_workers, max_pending, batch_size, metrics_port)
         """
         self.symbols = symbols or ['AAPL', 'MSFT', 'GOOGL']
         self.interval = interval
         self.delay = delay
-        self.agent_classes = agent_classes
+        self.agent_specs = LIVE_AGENTS
+        self.agent_cadences = agent_cadences or {}
+        self.config = config or {}
+        self.scheduler = None
         self.running = False
     
-    def start(self):
-        """התחלת הרצת הסוכנים"""
+    def build_scheduler(self, symbols: list = None, fetch_fn=None) -> LiveScheduler:
+        """יצירת מתזמן ורישום כל זוגות מניה-סוכן"""
+        scheduler = LiveScheduler(fetch_fn=fetch_fn, on_result=save_live_output, config=self.config)
+        for agent_name, (module_path, class_name) in self.agent_specs.items():
+            agent = get_shared_agent(module_path, class_name)
+            if agent is None:
+                print(f"❌ שגיאה באתחול {agent_name}")
+                continue
+            cadence = self.agent_cadences.get(agent_name, self.delay)
+            for symbol in symbols or self.symbols:
+                scheduler.subscribe(symbol.strip().upper(), agent_name, agent,
+                                    cadence_sec=cadence, interval=self.interval)
+        return scheduler
+    
+    def start(self, symbols: list = None):
+        """התחלת הרצת הסוכנים (חוסם עד Ctrl+C או stop())"""
+        symbols = symbols or self.symbols
+        self.scheduler = self.build_scheduler(symbols)
+        self.scheduler.start()
         self.running = True
-        print(f"🎯 התחלת הרצת סוכנים עבור: {', '.join(self.symbols)}")
-        
-        threads = []
-        for symbol in self.symbols:
-            for agent_name, agent_class in self.agent_classes.items():
-                thread = threading.Thread(
-                    target=run_agent_live,
-                    args=(agent_name, agent_class, symbol, self.interval, self.delay)
-                )
-                thread.daemon = True
-                thread.start()
-                threads.append(thread)
+        print(f"🎯 התחלת הרצת סוכנים עבור: {', '.join(symbols)}")
         
         try:
             while self.running:
                 time.sleep(1)
         except KeyboardInterrupt:
             print("\n🛑 עצירת הרצת הסוכנים...")
-            self.running = False
+        finally:
+            self.stop()
+    
+    def run_live_monitoring(self, symbols: list):
+        """ניטור חי עבור רשימת מניות"""
+        self.start(symbols)
+    
+    def get_metrics(self) -> dict:
+        """מדדי המתזמן (תור, שליפות, זמני סוכנים)"""
+        return self.scheduler.metrics() if self.scheduler else {}
     
     def stop(self):
         """עצירת הרצת הסוכנים"""
         self.running = False
+        if self.scheduler is not None:
+            self.scheduler.stop()
         print("🛑 הסוכנים נעצרו")
 
+# פונקציה ראשית
+def main():
+    logging.basicConfig(level=logging.INFO, format=DEFAULT_LOG_FORMAT)
+    enable_async_root_logging()
+    print("🎯 מצב לייב – הרצת סוכנים לפי בחירה")
+    symbols = input("📥 הזן סימבולים (מופרדים בפסיקים, לדו' QBTS,NVDA): ").split(",")
+    interval = input("⏱️ הזן אינטרוול (1min, 5min, 1day): ").strip() or "1day"
+    delay = input("⏲️ כל כמה שניות לבצע הרצה? (ברירת מחדל: 60): ").strip()
+    delay = int(delay) if delay else 60
+    port = input("📈 פורט למדדים (ריק = ללא): ").strip()
+
+    symbols = [symbol.strip().upper() for symbol in symbols if symbol.strip()]
+    config = {"metrics_port": int(port)} if port else {}
+    runner = MultiAgentRunner(symbols, interval=interval, delay=delay, config=config)
+
+    print(f"\n🚀 מריץ את הסוכנים: {', '.join(symbols)} | אינטרוול: {interval} | כל {delay} שניות")
+    print("🛑 לחץ Enter כדי לעצור את כל הסוכנים...")
+
+    runner.scheduler = runner.build_scheduler(symbols)
+    runner.scheduler.start()
+    input()
+    runner.stop()
+    print("✅ כל הסוכנים נעצרו. להתראות!")
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,578 @@
+"""
+Replay - הקלטה והשמעה חוזרת של זרמי לייב
+=========================================
+
+בדיקות עומס לצינור הלייב בלי חיבור ל-websocket של Finnhub:
+- הקלטה: הודעות websocket ותשובות REST (דרך requests) נשמרות לקובץ JSON-lines דחוס (gzip)
+- השמעה: שרת מקומי אחד שמשמש גם כ-websocket (Upgrade) וגם כ-HTTP, ומשמיע את ההקלטה
+  במהירות מוגברת (speed=10 -> פי 10 מהזמן האמיתי)
+- מדידה: היסטוגרמות השהיה לכל שלב בצינור (p50/p95/p99)
+
+מפתחות API (token/apikey...) מוסרים מה-URL לפני השמירה ולפני החיפוש בהקלטה.
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(PROJECT_ROOT)
+
+from utils.tracing import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+RECORDING_VERSION = 1
+SECRET_PARAMS = {"token", "apikey", "api_key", "apiKey", "key", "access_key"}
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def sanitize_url(url: str) -> str:
+    """מפתח הקלטה ל-URL: /host/path?query ללא פרמטרים סודיים"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS]
+    key = f"/{parts.netloc}{parts.path}" if parts.netloc else parts.path
+    return f"{key}?{urlencode(sorted(query))}" if query else key
+
+
+# ----------------------------------------------------------------------
+# הקלטה
+# ----------------------------------------------------------------------
+class ReplayRecorder:
+    """כתיבת הודעות websocket ותשובות HTTP לקובץ הקלטה דחוס"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.records = 0
+        self._write({"version": RECORDING_VERSION, "created": datetime.now().isoformat()})
+
+    def _write(self, record: Dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.records += 1
+
+    def _elapsed(self) -> float:
+        return round(time.monotonic() - self._start, 6)
+
+    def record_ws(self, message: str):
+        self._write({"t": self._elapsed(), "kind": "ws", "data": message})
+
+    def record_http(self, method: str, url: str, status: int, body: str, content_type: str = ""):
+        self._write({"t": self._elapsed(), "kind": "http", "method": method.upper(),
+                     "url": sanitize_url(url), "status": status,
+                     "content_type": content_type, "body": body})
+
+    def wrap_ws_handler(self, on_message: Callable) -> Callable:
+        """עטיפת on_message(ws, message) של websocket-client כך שכל הודעה נרשמת"""
+        def handler(ws, message):
+            self.record_ws(message)
+            return on_message(ws, message)
+        return handler
+
+    @contextmanager
+    def record_requests(self):
+        """הקלטת כל תשובות requests בתוך הבלוק"""
+        import requests
+
+        original = requests.Session.request
+        recorder = self
+
+        def request(session, method, url, *args, **kwargs):
+            response = original(session, method, url, *args, **kwargs)
+            try:
+                recorder.record_http(method, url, response.status_code, response.text,
+                                     response.headers.get("Content-Type", ""))
+            except Exception as e:
+                logger.warning(f"שגיאה בהקלטת {url}: {e}")
+            return response
+
+        requests.Session.request = request
+        try:
+            yield self
+        finally:
+            requests.Session.request = original
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def load_recording(path: str) -> List[Dict]:
+    """טעינת רשומות ההקלטה (ללא שורת הכותרת), ממוינות לפי זמן"""
+    records = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if "kind" in record:
+                records.append(record)
+    return sorted(records, key=lambda r: r["t"])
+
+
+def iter_replay(records: List[Dict], speed: float = 1.0, kind: str = "ws") -> Iterator[Dict]:
+    """השמעת רשומות לפי התזמון המקורי מחולק ב-speed (speed<=0 - בלי המתנה)"""
+    selected = [r for r in records if r["kind"] == kind]
+    if not selected:
+        return
+    start = time.monotonic()
+    base = selected[0]["t"]
+    for record in selected:
+        if speed > 0:
+            delay = (record["t"] - base) / speed - (time.monotonic() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield record
+
+
+# ----------------------------------------------------------------------
+# שרת השמעה (websocket + HTTP)
+# ----------------------------------------------------------------------
+def _ws_frame(payload: bytes, opcode: int = 0x1, mask: bool = False) -> bytes:
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += length.to_bytes(2, "big")
+    else:
+        header.append(mask_bit | 127)
+        header += length.to_bytes(8, "big")
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+
+def _read_exact(stream, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            raise ConnectionError("החיבור נסגר")
+        data += chunk
+    return data
+
+
+def _read_ws_frame(stream):
+    """קריאת מסגרת websocket: (opcode, payload)"""
+    first, second = _read_exact(stream, 2)
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(_read_exact(stream, 2), "big")
+    elif length == 127:
+        length = int.from_bytes(_read_exact(stream, 8), "big")
+    key = _read_exact(stream, 4) if second & 0x80 else None
+    payload = _read_exact(stream, length)
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+class ReplayServer:
+    """
+    שרת מקומי שמשמיע הקלטה: חיבור websocket מקבל את הודעות ה-ws לפי התזמון המוקלט
+    (חלקי speed), ובקשות HTTP מקבלות את התשובה המוקלטת לאותו URL (לפי הסדר, במחזוריות)
+    """
+
+    def __init__(self, recording: str, speed: float = 1.0, host: str = "127.0.0.1", port: int = 0):
+        self.records = load_recording(recording) if isinstance(recording, str) else list(recording)
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self._http = defaultdict(list)
+        for record in self.records:
+            if record["kind"] == "http":
+                self._http[record["url"]].append(record)
+        self._http_cursor = defaultdict(int)
+        self._lock = threading.Lock()
+        self._server = None
+        self.stats = {"ws_connections": 0, "ws_messages": 0, "http_hits": 0, "http_misses": 0}
+
+    def http_response(self, path: str) -> Optional[Dict]:
+        key = sanitize_url(path)
+        with self._lock:
+            responses = self._http.get(key)
+            if not responses:
+                self.stats["http_misses"] += 1
+                return None
+            index = self._http_cursor[key] % len(responses)
+            self._http_cursor[key] += 1
+            self.stats["http_hits"] += 1
+        return responses[index]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if self.headers.get("Upgrade", "").lower() == "websocket":
+                    self._serve_websocket()
+                else:
+                    self._serve_http()
+
+            def _serve_http(self):
+                record = server.http_response(self.path)
+                if record is None:
+                    self.send_error(404, "לא נמצאה תשובה מוקלטת")
+                    return
+                body = record["body"].encode("utf-8")
+                self.send_response(record["status"])
+                self.send_header("Content-Type", record.get("content_type") or "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _serve_websocket(self):
+                key = self.headers.get("Sec-WebSocket-Key", "")
+                accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+                self.send_response(101, "Switching Protocols")
+                self.send_header("Upgrade", "websocket")
+                self.send_header("Connection", "Upgrade")
+                self.send_header("Sec-WebSocket-Accept", accept)
+                self.end_headers()
+                with server._lock:
+                    server.stats["ws_connections"] += 1
+                try:
+                    for record in iter_replay(server.records, server.speed, "ws"):
+                        self.wfile.write(_ws_frame(record["data"].encode("utf-8")))
+                        self.wfile.flush()
+                        with server._lock:
+                            server.stats["ws_messages"] += 1
+                    self.wfile.write(_ws_frame(b"", opcode=0x8))
+                except (BrokenPipeError, ConnectionError):
+                    pass
+                self.close_connection = True
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> "ReplayServer":
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, name="replay-server", daemon=True).start()
+        logger.info(f"שרת השמעה פעיל: {self.base_url} (ws: {self.ws_url}, speed x{self.speed})")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def ws_messages(url: str, send: Optional[List[str]] = None, timeout: float = 30.0) -> Iterator[str]:
+    """לקוח websocket מינימלי (ספרייה סטנדרטית בלבד) - מחזיר הודעות טקסט עד סגירה"""
+    parts = urlsplit(url)
+    sock = socket.create_connection((parts.hostname, parts.port or 80), timeout=timeout)
+    try:
+        key = base64.b64encode(os.urandom(16)).decode()
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUpgrade: websocket\r\n"
+                   f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n")
+        sock.sendall(request.encode())
+        stream = sock.makefile("rb")
+        status = stream.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(f"handshake נכשל: {status!r}")
+        while stream.readline() not in (b"\r\n", b""):
+            pass
+        for message in send or []:
+            sock.sendall(_ws_frame(message.encode("utf-8"), mask=True))
+        while True:
+            opcode, payload = _read_ws_frame(stream)
+            if opcode == 0x8:
+                return
+            if opcode == 0x1:
+                yield payload.decode("utf-8")
+    finally:
+        sock.close()
+
+
+@contextmanager
+def redirect_requests(base_url: str):
+    """הפניית כל בקשות requests לשרת ההשמעה (ה-host המקורי נשמר כתחילית הנתיב)"""
+    import requests
+
+    original = requests.Session.request
+
+    def request(session, method, url, *args, **kwargs):
+        parts = urlsplit(url)
+        local = f"{base_url}/{parts.netloc}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+        kwargs.pop("verify", None)
+        return original(session, method, local, *args, **kwargs)
+
+    requests.Session.request = request
+    try:
+        yield
+    finally:
+        requests.Session.request = original
+
+
+# ----------------------------------------------------------------------
+# היסטוגרמות השהיה
+# ----------------------------------------------------------------------
+class StageLatency:
+    """היסטוגרמה לכל שלב בצינור"""
+
+    def __init__(self):
+        self._stages: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.setdefault(stage, LatencyHistogram())
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            stages = dict(self._stages)
+        return {stage: histogram.summary() for stage, histogram in stages.items()}
+
+    def report(self) -> str:
+        lines = [f"{'stage':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for stage, stats in sorted(self.summary().items()):
+            if stats["count"]:
+                lines.append(f"{stage:<28}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}"
+                             f"{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+        return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# הזנת הצינורות
+# ----------------------------------------------------------------------
+def instrument_realtime_feed(feed, latency: StageLatency):
+    """מדידת שלבי realtime_feed: קליטת הודעה, המתנה בתור, הערכה"""
+    submitted_at = {}
+    evaluations = feed.evaluations
+    original_submit = evaluations.submit
+    original_handler = evaluations.handler
+    original_on_message = feed.on_message
+
+    def submit(symbol):
+        accepted = original_submit(symbol)
+        if accepted:
+            submitted_at[symbol] = time.perf_counter()
+        return accepted
+
+    def handler(symbol):
+        queued = submitted_at.pop(symbol, None)
+        if queued is not None:
+            latency.observe("queue_wait", time.perf_counter() - queued)
+        with latency.timer("evaluate"):
+            return original_handler(symbol)
+
+    def on_message(ws, message):
+        with latency.timer("ingest"):
+            return original_on_message(ws, message)
+
+    evaluations.submit = submit
+    evaluations.handler = handler
+    feed.on_message = on_message
+    return feed
+
+
+def replay_into_feed(feed, messages: Iterator[str], latency: Optional[StageLatency] = None) -> StageLatency:
+    """הזנת הודעות (מההקלטה או משרת ההשמעה) ל-RealtimeFeed עד שהתור מתרוקן"""
+    latency = latency or StageLatency()
+    instrument_realtime_feed(feed, latency)
+    feed.evaluations.start()
+    try:
+        for message in messages:
+            feed.on_message(None, message)
+        feed.evaluations.join()
+    finally:
+        feed.evaluations.stop()
+    return latency
+
+
+def run_live_agent(agent, cycles: int, speed: float = 1.0, latency: Optional[StageLatency] = None) -> StageLatency:
+    """הרצת LiveExecutableAgent.run_live במהירות מוגברת עם מדידת run_once"""
+    latency = latency or StageLatency()
+    original = agent.run_once
+
+    def run_once():
+        with latency.timer(f"run_once:{agent.__class__.__name__}"):
+            return original()
+
+    agent.run_once = run_once
+    agent.frequency_sec = agent.frequency_sec / speed if speed > 0 else 0
+    agent.run_live(cycles=cycles)
+    return latency
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def _record(args):
+    import websocket
+
+    sys.path.append(os.path.join(PROJECT_ROOT, "scripts"))
+    from realtime_feed import FINNHUB_KEY
+
+    recorder = ReplayRecorder(args.out)
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+
+    def on_open(ws):
+        for symbol in symbols:
+            ws.send(json.dumps({"type": "subscribe", "symbol": symbol}))
+
+    ws_app = websocket.WebSocketApp(f"wss://ws.finnhub.io?token={FINNHUB_KEY}", on_open=on_open,
+                                    on_message=recorder.wrap_ws_handler(lambda ws, message: None))
+    threading.Timer(args.duration, ws_app.close).start()
+    with recorder, recorder.record_requests():
+        if args.fetch:
+            from utils.data_fetcher import DataFetcher
+            DataFetcher().fetch_prices_batch(symbols, args.interval)
+        ws_app.run_forever()
+    print(f"✅ נשמרו {recorder.records} רשומות ל-{args.out}")
+
+
+def _serve(args):
+    with ReplayServer(args.recording, speed=args.speed, port=args.port) as server:
+        print(f"🎬 משמיע {args.recording} | ws: {server.ws_url} | http: {server.base_url} | x{args.speed}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+def _run_feed(args):
+    sys.path.append(os.path.join(PROJECT_ROOT, "scripts"))
+    from realtime_feed import RealtimeFeed
+
+    latency = StageLatency()
+    with ReplayServer(args.recording, speed=args.speed) as server, redirect_requests(server.base_url):
+        feed = RealtimeFeed(args.symbols.split(",") if args.symbols else None,
+                            config={"eval_interval_sec": args.eval_interval})
+        start = time.perf_counter()
+        replay_into_feed(feed, ws_messages(server.ws_url), latency)
+        elapsed = time.perf_counter() - start
+    summary = latency.summary()
+    print(latency.report())
+    print(f"\n⏱️ {elapsed:.2f}s | הערכות: {feed.evaluations.stats}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_seconds": elapsed, "stages": summary, "queue": feed.evaluations.stats}, f, indent=2)
+
+
+def _run_scheduler(args):
+    from live.multi_agent_runner import MultiAgentRunner
+
+    latency = StageLatency()
+    symbols = [s.strip().upper() for s in args.symbols.split(",") if s.strip()]
+    with ReplayServer(args.recording, speed=args.speed) as server, redirect_requests(server.base_url):
+        runner = MultiAgentRunner(symbols, interval=args.interval, delay=args.delay / args.speed,
+                                  config={"tick_sec": min(1.0, args.delay / args.speed)})
+        scheduler = runner.build_scheduler(symbols)
+        scheduler.on_latency = latency.observe
+        scheduler.start()
+        try:
+            time.sleep(args.duration)
+        finally:
+            scheduler.stop()
+    print(latency.report())
+    print(f"\n📈 {json.dumps(scheduler.metrics()['counters'], ensure_ascii=False)}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"stages": latency.summary(), "metrics": scheduler.metrics()}, f, indent=2)
+
+
+def main(argv=None):
+    """פונקציה ראשית"""
+    parser = argparse.ArgumentParser(description="הקלטה והשמעה של זרמי לייב")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="הקלטת websocket של Finnhub ותשובות REST")
+    record.add_argument("--symbols", default="QBTS")
+    record.add_argument("--out", required=True)
+    record.add_argument("--duration", type=float, default=60.0, help="משך ההקלטה בשניות")
+    record.add_argument("--fetch", action="store_true", help="הקלטת שליפת מחירים דרך DataFetcher")
+    record.add_argument("--interval", default="1day")
+    record.set_defaults(func=_record)
+
+    serve = sub.add_parser("serve", help="שרת השמעה מקומי (ws + http)")
+    serve.add_argument("recording")
+    serve.add_argument("--speed", type=float, default=1.0)
+    serve.add_argument("--port", type=int, default=8765)
+    serve.set_defaults(func=_serve)
+
+    run_feed = sub.add_parser("run-feed", help="הרצת realtime_feed מול הקלטה ומדידת השהיות")
+    run_feed.add_argument("recording")
+    run_feed.add_argument("--speed", type=float, default=10.0)
+    run_feed.add_argument("--symbols", default="")
+    run_feed.add_argument("--eval-interval", type=float, default=0.0)
+    run_feed.add_argument("--json", help="שמירת היסטוגרמות ל-JSON")
+    run_feed.set_defaults(func=_run_feed)
+
+    run_scheduler = sub.add_parser("run-scheduler", help="הרצת multi_agent_runner מול תשובות REST מוקלטות")
+    run_scheduler.add_argument("recording")
+    run_scheduler.add_argument("--symbols", default="QBTS")
+    run_scheduler.add_argument("--interval", default="1day")
+    run_scheduler.add_argument("--delay", type=float, default=60.0, help="קצב הסוכנים המקורי בשניות")
+    run_scheduler.add_argument("--speed", type=float, default=10.0)
+    run_scheduler.add_argument("--duration", type=float, default=30.0, help="משך ההרצה בשניות")
+    run_scheduler.add_argument("--json", help="שמירת היסטוגרמות ומדדים ל-JSON")
+    run_scheduler.set_defaults(func=_run_scheduler)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ from typing import Optional, List
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from utils.logger import setup_logger
+from utils.logger import DEFAULT_LOG_FORMAT, enable_async_root_logging, setup_logger
 from utils.smart_data_manager import SmartDataManager
 from core.alpha_score_engine import AlphaScoreEngine
 from dashboard.main_dashboard import run_dashboard
@@ -31,9 +31,15 @@ class CharlesFocusedSpec:
     המחלקה הראשית לניהול מערכת Charles_FocusedSpec
     """
     
-    def __init__(self):
-        """אתחול המערכת"""
+    def __init__(self, profiling: Optional[dict] = None):
+        """
+        אתחול המערכת
+
+        Args:
+            profiling: הגדרות utils.profiling.Profiler (None - לפי משתני הסביבה בלבד)
+        """
         self.logger = setup_logger(__name__)
+        self.profiling = profiling
         self.data_manager = None
         self.alpha_engine = None
         self.agent_runner = None
@@ -47,10 +53,20 @@ class CharlesFocusedSpec:
             self.data_manager = SmartDataManager()
             self.logger.info("✓ מנהל נתונים אותחל בהצלחה")
             
-            # אתחול מנוע האלפא
-            self.alpha_engine = AlphaScoreEngine()
+            # אתחול מנוע האלפא - טעינת המחירים המשותפת עוברת דרך מנהל הנתונים של המערכת
+            engine_config = {"data_manager": self.data_manager}
+            if self.profiling:
+                engine_config["profiling"] = self.profiling
+            self.alpha_engine = AlphaScoreEngine(engine_config)
             self.logger.info("✓ מנוע אלפא אותחל בהצלחה")
             
+            # פרופיילינג של מתודות מנהל הנתונים שנבחרו (למשל SmartDataManager.get_stock_data) -
+            # ברמת המחלקה, כדי לתפוס גם את המופעים שכל סוכן בונה לעצמו
+            if self.alpha_engine.profiler.enabled:
+                wrapped = self.alpha_engine.profiler.instrument(SmartDataManager)
+                self.logger.info(f"✓ פרופיילינג פעיל ({self.alpha_engine.profiler.mode}), "
+                                 f"מתודות נתונים: {wrapped or 'אין'}")
+            
             # אתחול הרצת סוכנים
             self.agent_runner = MultiAgentRunner()
             self.logger.info("✓ הרצת סוכנים אותחלה בהצלחה")
@@ -83,12 +99,24 @@ class CharlesFocusedSpec:
                 results[symbol] = result
                 
             self.logger.info(f"✓ הניתוח הושלם עבור {len(symbols)} מניות")
+            self.write_profile_summary()
             return results
             
         except Exception as e:
             self.logger.error(f"שגיאה בניתוח: {e}")
             return None
     
+    def write_profile_summary(self):
+        """כתיבת סיכום הפרופיילינג והדפסת הפונקציות החמות (אם הפרופיילינג פעיל)"""
+        profiler = self.alpha_engine.profiler if self.alpha_engine else None
+        if profiler is None or not profiler.enabled or not profiler.runs:
+            return None
+        path = profiler.write_summary()
+        print(f"\n🔥 פונקציות חמות ({profiler.mode or 'memory'}, {len(profiler.runs)} הרצות):")
+        print(profiler.report())
+        print(f"סיכום וקבצי פרופיל: {path.parent}")
+        return path
+    
     def run_dashboard(self, port: int = 8501):
         """הפעלת הדשבורד"""
         try:
@@ -168,6 +196,8 @@ def main():
   python main.py live AAPL MSFT              # ניטור חי
   python main.py update                      # עדכון נתונים
   python main.py test                        # הרצת בדיקות
+  python main.py analyze AAPL --profile cprofile --profile-targets MACDMomentumDetector
+                                             # פרופיילינג (או CHARLES_PROFILE=sampling)
         """
     )
     
@@ -204,13 +234,59 @@ def main():
         help='רמת לוג (ברירת מחדל: INFO)'
     )
     
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='הגשת מדדי Prometheus ב-http://127.0.0.1:<port>/metrics (utils.metrics)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        choices=['cprofile', 'sampling'],
+        help='פרופיילינג של סוכנים / מתודות נתונים: קובץ pstats או collapsed-stack לכל (סוכן, מניה)'
+    )
+    
+    parser.add_argument(
+        '--profile-targets',
+        help='סוכנים או Class.method מופרדים בפסיק (ברירת מחדל: כל הסוכנים)'
+    )
+    
+    parser.add_argument(
+        '--profile-dir',
+        help='תיקיית קבצי הפרופיל (ברירת מחדל: reports/profiles)'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='השוואת tracemalloc לפני ואחרי כל סוכן'
+    )
+    
     args = parser.parse_args()
     
-    # הגדרת רמת לוג
+    # הגדרת רמת לוג; הכתיבה עצמה ב-thread המאזין (basicConfig מאוחר יותר של סוכן לא מוסיף handler)
+    logging.basicConfig(format=DEFAULT_LOG_FORMAT)
     logging.getLogger().setLevel(getattr(logging, args.log_level))
+    enable_async_root_logging()
+    
+    # הגדרות פרופיילינג מהדגלים (משתני הסביבה CHARLES_PROFILE* חלים כשאין דגלים)
+    profiling = {}
+    if args.profile:
+        profiling['mode'] = args.profile
+    if args.profile_targets:
+        profiling['targets'] = [t.strip() for t in args.profile_targets.split(',') if t.strip()]
+    if args.profile_dir:
+        profiling['output_dir'] = args.profile_dir
+    if args.profile_memory:
+        profiling['memory'] = True
+    
+    # endpoint מדדים מקומי (מטמון, ספקים, סוכנים, תור לייב)
+    if args.metrics_port:
+        from utils.metrics import get_registry
+        get_registry().start_server(args.metrics_port)
     
     # יצירת מופע המערכת
-    system = CharlesFocusedSpec()
+    system = CharlesFocusedSpec(profiling or None)
     
     try:
         if args.command == 'dashboard':
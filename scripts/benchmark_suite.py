@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite - מדידת ביצועים לסוכנים, שכבת הנתונים והמנוע
+מחולל נתוני OHLCV סינתטיים דטרמיניסטיים בכמה גדלים (250 / 2,500 / 25,000 נרות,
+10 / 500 / 5,000 מניות) ומריץ עליהם:
+- micro-benchmark ל-analyze של כל סוכן ב-core
+- קריאה וכתיבה ב-SmartDataManager, וזיכרון לכל מניה של יקום טעון (10 שנים יומיות)
+- חישוב אינדיקטורים
+- קרנלים של חלונות נעים (utils.rolling_kernels) מול rolling().apply, עם יחס ההאצה
+- AlphaScoreEngine.evaluate מקצה לקצה
+- פעולות על כל היקום (תוויות תשואה, שקלול מאגר ציונים, כתיבה/קריאה של מניות רבות)
+
+התוצאות נשמרות כ-JSON, ומצב השוואה מול קובץ baseline מסמן רגרסיות (exit code 1).
+"""
+
+import os
+import sys
+import gc
+import json
+import time
+import zlib
+import contextlib
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import multiprocessing
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# הוספת הנתיב לפרויקט
+sys.path.append(PROJECT_ROOT)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# גדלי נתונים: נרות למניה, ומספר מניות ביקום
+BAR_SIZES = (250, 2500, 25000)
+UNIVERSE_SIZES = (10, 500, 5000)
+
+# פרופילי הרצה: אילו גדלים נמדדים
+PRESETS = {
+    "quick": {"bars": (250,), "symbols": (10,)},
+    "standard": {"bars": (250, 2500), "symbols": (10, 500)},
+    "full": {"bars": BAR_SIZES, "symbols": UNIVERSE_SIZES},
+}
+
+# נרות לכל מניה במדידות יקום
+UNIVERSE_BARS = 250
+
+# נרות לכל מניה במדידת הזיכרון של יקום טעון (10 שנים של נרות יומיים)
+MEMORY_BARS = 2520
+
+DEFAULT_OUTPUT_DIR = os.path.join(PROJECT_ROOT, "reports", "benchmarks")
+
+# פרופיל AlphaScoreEngine למדידת evaluate: שם פרופיל, או רשימת סוכנים מופרדת בפסיקים
+# (למשל כדי להוציא סוכנים שפונים לשירותים חיצוניים בסביבה ללא רשת)
+ENGINE_PROFILE = "technical"
+
+
+# ---------- נתונים סינתטיים ----------
+
+def symbol_seed(symbol: str, seed: int = 0) -> int:
+    """seed יציב לכל מניה - אותה מניה מקבלת אותה סדרה בכל גודל יקום"""
+    return zlib.crc32(symbol.encode("utf-8")) ^ seed
+
+
+def synthetic_ohlcv(n_bars: int, symbol: str = "SYN", seed: int = 0,
+                    start: str = "1990-01-02", newest_first: bool = False) -> pd.DataFrame:
+    """
+    נתוני OHLCV סינתטיים דטרמיניסטיים (הילוך אקראי גאומטרי עם פערים ונפח משתנה)
+
+    Args:
+        n_bars: מספר נרות
+        symbol: שם המניה (קובע את ה-seed)
+        seed: seed בסיס
+        start: תאריך הנר הראשון (ימי מסחר)
+        newest_first: סדר כמו בקבצי SmartDataManager (מהחדש לישן)
+
+    Returns:
+        DataFrame עם אינדקס date ועמודות open/high/low/close/volume
+    """
+    rng = np.random.default_rng(symbol_seed(symbol, seed))
+    returns = rng.normal(0.0003, 0.02, n_bars)
+    close = 50 * np.exp(np.cumsum(returns))
+    gaps = np.where(rng.random(n_bars) < 0.03, rng.normal(0, 0.04, n_bars), 0.0)
+    open_ = np.concatenate([[close[0]], close[:-1]]) * (1 + gaps + rng.normal(0, 0.004, n_bars))
+    spread = np.abs(rng.normal(0, 0.01, n_bars))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = (1e6 * np.exp(rng.normal(0, 0.5, n_bars))).round()
+
+    df = pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+                      index=pd.bdate_range(start, periods=n_bars, name="date"))
+    return df.iloc[::-1] if newest_first else df
+
+
+def synthetic_universe(n_symbols: int, n_bars: int = UNIVERSE_BARS, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """יקום של n_symbols מניות סינתטיות (SYN0000, SYN0001, ...)"""
+    return {f"SYN{i:04d}": synthetic_ohlcv(n_bars, f"SYN{i:04d}", seed) for i in range(n_symbols)}
+
+
+# ---------- מדידה ----------
+
+def time_call(fn: Callable[[], object], repeats: int = 5, warmup: int = 1,
+              measure_memory: bool = True) -> Dict:
+    """
+    מדידת זמן ריצה (ms) של פונקציה ללא פרמטרים
+
+    Returns:
+        dict עם min_ms, median_ms, mean_ms, repeats ו-peak_memory_mb (הקצאות פייתון בהרצה אחת)
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(max(1, repeats)):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    result = {
+        "min_ms": round(min(timings), 3),
+        "median_ms": round(float(np.median(timings)), 3),
+        "mean_ms": round(float(np.mean(timings)), 3),
+        "repeats": len(timings),
+    }
+    if measure_memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            result["peak_memory_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+@dataclass
+class Benchmark:
+    """
+    benchmark בודד
+
+    factory(size, workdir) מבצע את ההכנה (מחוץ למדידה) ומחזיר פונקציה ללא פרמטרים למדידה,
+    או None כשהמדידה לא רלוונטית לגודל הזה. לפונקציה יכול להיות מאפיין metrics -
+    פונקציה שמחזירה dict של מדדים נוספים לתוצאה (נקראת אחרי המדידה).
+    """
+    name: str
+    group: str
+    axis: str  # "bars" או "symbols" - איזה ציר גדלים נמדד
+    factory: Callable[[int, str], Optional[Callable[[], object]]]
+    max_size: Optional[int] = None
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def register(name: str, group: str, axis: str = "bars", max_size: Optional[int] = None):
+    """דקורטור לרישום benchmark"""
+    def decorator(factory):
+        BENCHMARKS.append(Benchmark(name, group, axis, factory, max_size))
+        return factory
+    return decorator
+
+
+# ---------- סוכנים ----------
+
+# סוכנים שאינם סוכני ניתוח (מחלקות בסיס, המנוע עצמו, קונסולידציה)
+NON_AGENT_EXPORTS = {"BaseAgent", "LiveExecutableAgent", "AlphaScoreEngine", "MetaAgent"}
+
+
+def core_agents() -> Dict[str, str]:
+    """כל סוכני core: שם מחלקה -> מודול (טבלת הייצוא העצלה של החבילה + סוכני המנוע)"""
+    import core
+    from core.alpha_score_engine import AlphaScoreEngine
+    modules = {**core._LAZY_IMPORTS, **AlphaScoreEngine.AGENT_MODULES}
+    return {name: f"core.{module}" for name, module in modules.items() if name not in NON_AGENT_EXPORTS}
+
+
+def _agent_factory(class_name: str, module_path: str):
+    def factory(size: int, workdir: str):
+        from core.agent_loader import get_shared_agent
+        agent = get_shared_agent(module_path, class_name)
+        if agent is None or not hasattr(agent, "analyze"):
+            return None
+        price_df = synthetic_ohlcv(size, "SYN")
+        return lambda: agent.analyze("SYN", price_df.copy())
+    return factory
+
+
+def register_agent_benchmarks():
+    for class_name, module_path in core_agents().items():
+        BENCHMARKS.append(Benchmark(f"agent.{class_name}", "agents", "bars",
+                                    _agent_factory(class_name, module_path)))
+
+
+# ---------- שכבת הנתונים ----------
+
+def _data_manager(workdir: str):
+    from utils.smart_data_manager import SmartDataManager, UsageTracker
+    manager = SmartDataManager(data_dir=os.path.join(workdir, "data"))
+    manager.usage_tracker = UsageTracker(os.path.join(workdir, "usage_log.json"))
+    return manager
+
+
+@register("data.save", "data")
+def bench_data_save(size: int, workdir: str):
+    manager = _data_manager(workdir)
+    df = synthetic_ohlcv(size, "SYN", newest_first=True)
+    return lambda: manager._save_data("SYN", df)
+
+
+@register("data.read_local", "data")
+def bench_data_read_local(size: int, workdir: str):
+    manager = _data_manager(workdir)
+    manager._save_data("SYN", synthetic_ohlcv(size, "SYN", newest_first=True))
+    return lambda: manager._get_local_data("SYN")
+
+
+@register("data.get_stock_data", "data")
+def bench_data_get_stock_data(size: int, workdir: str):
+    manager = _data_manager(workdir)
+    manager._save_data("SYN", synthetic_ohlcv(size, "SYN", newest_first=True))
+
+    def run():
+        manager._data_cache.clear()
+        return manager.get_stock_data("SYN", days=size, include_live=False)
+    return run
+
+
+@register("data.write_read_universe", "data", axis="symbols")
+def bench_data_universe(size: int, workdir: str):
+    manager = _data_manager(workdir)
+    universe = {symbol: df.iloc[::-1] for symbol, df in synthetic_universe(size).items()}
+
+    def run():
+        for symbol, df in universe.items():
+            manager._save_data(symbol, df)
+        for symbol in universe:
+            manager._get_local_data(symbol)
+    return run
+
+
+@register("data.universe_memory", "data", axis="symbols")
+def bench_data_universe_memory(size: int, workdir: str):
+    """
+    טעינת יקום של size מניות (MEMORY_BARS נרות כל אחת) דרך get_stock_data, עם
+    מדדי הזיכרון לכל מניה בייצוג החסכוני ובייצוג המלא (compact_memory=False)
+    """
+    from utils.compact_frames import frame_memory
+    manager = _data_manager(workdir)
+    symbols = [f"SYN{i:04d}" for i in range(size)]
+    for symbol in symbols:
+        df = synthetic_ohlcv(MEMORY_BARS, symbol, newest_first=True)
+        df["source"] = "local"
+        manager._save_data(symbol, df)
+    loaded = {}
+
+    def load(compact: bool = True):
+        manager.compact_memory = compact
+        manager._data_cache.clear()
+        return {symbol: manager.get_stock_data(symbol, days=MEMORY_BARS, include_live=False)
+                for symbol in symbols}
+
+    def run():
+        loaded.update(load())
+
+    def metrics():
+        compact = sum(frame_memory(df) for df in loaded.values()) / size
+        full = sum(frame_memory(df) for df in load(compact=False).values()) / size
+        manager.compact_memory = True
+        return {
+            "bytes_per_symbol": round(compact),
+            "full_bytes_per_symbol": round(full),
+            "memory_ratio": round(full / max(compact, 1), 2),
+            # יקום של 5,000 מניות באותו אורך היסטוריה
+            "projected_5000_symbols_gb": round(compact * 5000 / 2 ** 30, 3),
+        }
+    run.metrics = metrics
+    return run
+
+
+# ---------- אינדיקטורים ----------
+
+@register("indicators.calculate_all", "indicators")
+def bench_indicators_all(size: int, workdir: str):
+    from calculate_all_indicators import TechnicalIndicatorsCalculator
+    calculator = TechnicalIndicatorsCalculator(os.path.join(workdir, "data"))
+    df = synthetic_ohlcv(size, "SYN")
+    return lambda: calculator.calculate_all_indicators(df)
+
+
+@register("indicators.smart_data_manager", "indicators")
+def bench_indicators_manager(size: int, workdir: str):
+    manager = _data_manager(workdir)
+    df = synthetic_ohlcv(size, "SYN")
+    return lambda: manager._calculate_technical_indicators(df, "all")
+
+
+# ---------- קרנלים של חלונות נעים ----------
+
+def _kernel_cases() -> Dict[str, Dict[str, Callable[[pd.Series], object]]]:
+    """לכל קרנל: המימוש המקורי ב-rolling().apply (callback לכל חלון) והמימוש הווקטורי"""
+    from utils import rolling_kernels as rk
+    x20 = np.arange(20, dtype=float)
+    return {
+        "rank_pct": {
+            "apply": lambda s: s.rolling(50).apply(lambda x: (x < x.iloc[-1]).mean()),
+            "numpy": lambda s: rk.rolling_rank_pct(s, 50),
+        },
+        "wma": {
+            "apply": lambda s: s.rolling(20).apply(lambda x: np.average(x, weights=np.arange(1, len(x) + 1))),
+            "numpy": lambda s: rk.weighted_moving_average(s, 20),
+        },
+        "local_extrema": {
+            "apply": lambda s: s.rolling(window=5, center=True).apply(lambda x: x.iloc[2] == x.max()),
+            "numpy": lambda s: rk.local_extrema(s, 5, "max"),
+        },
+        "rolling_max": {
+            "apply": lambda s: s.rolling(20).apply(lambda x: x.max()),
+            "numpy": lambda s: rk.rolling_max(s, 20),
+        },
+        "slope": {
+            "apply": lambda s: s.rolling(20).apply(lambda x: np.polyfit(x20, x, 1)[0]),
+            "numpy": lambda s: rk.rolling_slope(s, 20),
+        },
+    }
+
+
+def _kernel_factory(kernel: str, variant: str):
+    def factory(size: int, workdir: str):
+        fn = _kernel_cases()[kernel][variant]
+        close = synthetic_ohlcv(size, "SYN")["close"]
+        return lambda: fn(close)
+    return factory
+
+
+def register_kernel_benchmarks():
+    for kernel, variants in _kernel_cases().items():
+        for variant in variants:
+            BENCHMARKS.append(Benchmark(f"kernels.{kernel}.{variant}", "kernels", "bars",
+                                        _kernel_factory(kernel, variant)))
+
+
+register_kernel_benchmarks()
+
+
+def kernel_speedups(results: Dict) -> Dict[str, float]:
+    """יחס זמן rolling().apply לזמן הקרנל הווקטורי, לכל קרנל וגודל שנמדדו שניהם"""
+    speedups = {}
+    for key, result in results.items():
+        if result.get("group") != "kernels" or not result["name"].endswith(".numpy"):
+            continue
+        reference = results.get(key.replace(".numpy[", ".apply["))
+        if result.get("status") == "ok" and reference and reference.get("status") == "ok":
+            kernel = result["name"][len("kernels."):-len(".numpy")]
+            speedups[f"{kernel}[{result['axis']}={result['size']}]"] = round(
+                reference["median_ms"] / max(result["median_ms"], 1e-6), 1)
+    return speedups
+
+
+# ---------- מנוע ויקום ----------
+
+@register("engine.evaluate", "engine", max_size=2500)
+def bench_engine_evaluate(size: int, workdir: str):
+    from core.alpha_score_engine import AlphaScoreEngine
+    if "," in ENGINE_PROFILE or ENGINE_PROFILE in AlphaScoreEngine.AGENT_MODULES:
+        engine = AlphaScoreEngine({"profiles": {"benchmark": ENGINE_PROFILE.split(",")}})
+        profile = "benchmark"
+    else:
+        engine, profile = AlphaScoreEngine(), ENGINE_PROFILE
+    engine.load_agents(profile)
+    df = synthetic_ohlcv(size, "SYN")
+    return lambda: engine.evaluate("SYN", df.copy(), profile=profile)
+
+
+@register("universe.forward_returns", "universe", axis="symbols")
+def bench_forward_returns(size: int, workdir: str):
+    from utils.price_labels import forward_returns, price_panel
+    close = price_panel(synthetic_universe(size))
+    return lambda: forward_returns(close, 5)
+
+
+@register("universe.gap_statistics", "universe", axis="symbols")
+def bench_gap_statistics(size: int, workdir: str):
+    from core.gap_detector_ultimate import GapDetectorUltimate
+    agent = GapDetectorUltimate()
+    universe = synthetic_universe(size)
+    return lambda: agent.get_gap_statistics(universe)
+
+
+@register("universe.consolidate_panel", "universe", axis="symbols")
+def bench_consolidate_panel(size: int, workdir: str):
+    from core.alpha_score_engine import AlphaScoreEngine
+    from utils.signal_panel import SignalPanel
+    agents = list(AlphaScoreEngine.AGENT_WEIGHTS)
+    rng = np.random.default_rng(size)
+    values = rng.uniform(0, 100, (UNIVERSE_BARS, size, len(agents))).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    panel = SignalPanel(values, pd.bdate_range("2020-01-01", periods=UNIVERSE_BARS),
+                        [f"SYN{i:04d}" for i in range(size)], agents)
+    panel.consolidate({})  # בניית מטריצות השקלול מחוץ למדידה
+    return lambda: panel.consolidate(AlphaScoreEngine.AGENT_WEIGHTS)
+
+
+# ---------- הרצה והשוואה ----------
+
+def _measure_in_child(fn: Callable[[], Dict], conn):
+    """גוף תהליך הבן: הרצת המדידה ושליחת התוצאה (או השגיאה) לתהליך האב"""
+    try:
+        conn.send(("result", fn()))
+    except Exception as e:
+        conn.send(("error", str(e)))
+    finally:
+        conn.close()
+
+
+def _run_in_child(fn: Callable[[], Dict], timeout: float) -> Dict:
+    """הרצת מדידה בתהליך בן (fork) - בחריגה מהזמן התהליך נהרג"""
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_in_child, args=(fn, sender), daemon=True)
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            process.kill()
+            return {"status": "timeout", "timeout_sec": timeout}
+        try:
+            kind, payload = receiver.recv()
+        except EOFError:
+            process.join(5)
+            raise RuntimeError(f"תהליך המדידה הסתיים ללא תוצאה (exit code {process.exitcode})")
+    finally:
+        receiver.close()
+        process.join(5)
+    if kind == "error":
+        raise RuntimeError(payload)
+    return payload
+
+
+def _run_with_timeout(fn: Callable[[], Dict], timeout: Optional[float],
+                      stray: Optional[List[threading.Thread]] = None) -> Dict:
+    """
+    הרצת מדידה עם מגבלת זמן - מדידה שחורגת (למשל סוכן שממתין לרשת) מסומנת ומדולגת.
+
+    כשיש fork המדידה רצה בתהליך בן שנהרג בחריגה, כך שלא ממשיכה לרוץ ברקע. אחרת
+    (Windows) היא רצה בחוט שלא ניתן לעצור: חוט שחרג מהזמן נוסף ל-stray, ו-run_benchmarks
+    מסמן את המדידות שאחריו כ-contaminated ולא מוחק את תיקיית העבודה שהוא עדיין כותב אליה.
+    """
+    if not timeout:
+        return fn()
+    if "fork" in multiprocessing.get_all_start_methods():
+        return _run_in_child(fn, timeout)
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = fn()
+        except Exception as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        if stray is not None:
+            stray.append(thread)
+        return {"status": "timeout", "timeout_sec": timeout}
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+def run_benchmarks(preset: str = "quick", groups: Optional[List[str]] = None, name_filter: str = "",
+                   repeats: int = 5, timeout: Optional[float] = 60.0, measure_memory: bool = True) -> Dict:
+    """
+    הרצת ה-benchmarks הנבחרים בכל הגדלים של הפרופיל
+
+    Returns:
+        dict עם meta ו-results (מפתח: "<name>[<axis>=<size>]")
+    """
+    if not any(b.group == "agents" for b in BENCHMARKS):
+        register_agent_benchmarks()
+    sizes = PRESETS[preset]
+    results = {}
+    stray = []
+    workdir = tempfile.mkdtemp(prefix="charles_bench_")
+    try:
+        for bench in BENCHMARKS:
+            if groups and bench.group not in groups:
+                continue
+            if name_filter and name_filter.lower() not in bench.name.lower():
+                continue
+            for size in sizes[bench.axis]:
+                if bench.max_size and size > bench.max_size:
+                    continue
+                key = f"{bench.name}[{bench.axis}={size}]"
+                case_dir = tempfile.mkdtemp(dir=workdir)
+
+                def measure(bench=bench, size=size, case_dir=case_dir):
+                    fn = bench.factory(size, case_dir)
+                    if fn is None:
+                        return {"status": "skipped"}
+                    result = {"status": "ok", **time_call(fn, repeats, measure_memory=measure_memory)}
+                    if hasattr(fn, "metrics"):
+                        result.update(fn.metrics())
+                    return result
+                # מדידה שרצה במקביל לחוט שחרג מהזמן אינה אמינה
+                contaminated = any(thread.is_alive() for thread in stray)
+                try:
+                    # סוכנים רבים מדפיסים לפלט - ההדפסות לא נכנסות למדידה
+                    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                        result = _run_with_timeout(measure, timeout, stray)
+                except Exception as e:
+                    result = {"status": "error", "error": str(e)[:200]}
+                result.update({"group": bench.group, "name": bench.name, "axis": bench.axis, "size": size})
+                if contaminated:
+                    result["contaminated"] = True
+                results[key] = result
+                logger.info(f"{key}: {result.get('median_ms', result['status'])}")
+    finally:
+        if any(thread.is_alive() for thread in stray):
+            logger.warning(f"מדידה שחרגה מהזמן עדיין רצה - תיקיית העבודה נשארת: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "preset": preset,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "engine_profile": ENGINE_PROFILE,
+        },
+        "results": results,
+        "kernel_speedups": kernel_speedups(results),
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, tolerance: float = 0.25,
+                    min_delta_ms: float = 1.0) -> List[Dict]:
+    """
+    השוואה מול baseline: רגרסיה = median איטי ביותר מ-tolerance יחסית וגם מ-min_delta_ms מוחלט,
+    או מדידה שעברה ב-baseline ועכשיו נכשלה (timeout / error)
+
+    Returns:
+        רשימת השוואות לכל benchmark משותף (regression=True לרגרסיות)
+    """
+    comparisons = []
+    for key, result in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(key)
+        if not base or base.get("status") != "ok":
+            continue
+        if result.get("status") in ("timeout", "error"):
+            comparisons.append({
+                "benchmark": key,
+                "baseline_ms": base["median_ms"],
+                "current_ms": None,
+                "ratio": None,
+                "status": result["status"],
+                "regression": True,
+                "improvement": False,
+            })
+            continue
+        if result.get("status") != "ok":
+            continue
+        if result.get("contaminated") or base.get("contaminated"):
+            continue
+        ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] > 0 else float("inf")
+        delta = result["median_ms"] - base["median_ms"]
+        comparisons.append({
+            "benchmark": key,
+            "baseline_ms": base["median_ms"],
+            "current_ms": result["median_ms"],
+            "ratio": round(ratio, 3),
+            "status": "ok",
+            "regression": ratio > 1 + tolerance and delta > min_delta_ms,
+            "improvement": ratio < 1 / (1 + tolerance) and -delta > min_delta_ms,
+        })
+    return comparisons
+
+
+def main():
+    """פונקציה ראשית"""
+    global ENGINE_PROFILE
+    parser = argparse.ArgumentParser(description="מדידת ביצועים לסוכנים, לשכבת הנתונים ולמנוע")
+    parser.add_argument('--preset', choices=list(PRESETS), default='quick', help='גדלי הנתונים הנמדדים')
+    parser.add_argument('--group', action='append', help='קבוצות (agents, data, indicators, kernels, engine, universe)')
+    parser.add_argument('--filter', default='', help='סינון לפי שם benchmark')
+    parser.add_argument('--repeats', type=int, default=5, help='מספר הרצות מדודות לכל מדידה')
+    parser.add_argument('--timeout', type=float, default=60.0, help='זמן מקסימלי לכל מדידה (שניות, 0 = ללא)')
+    parser.add_argument('--no-memory', action='store_true', help='ללא מדידת זיכרון (tracemalloc)')
+    parser.add_argument('--engine-profile', default=ENGINE_PROFILE,
+                        help='פרופיל המנוע למדידת evaluate (שם פרופיל או רשימת סוכנים מופרדת בפסיקים)')
+    parser.add_argument('--output', help='קובץ JSON לתוצאות (ברירת מחדל: reports/benchmarks/<timestamp>.json)')
+    parser.add_argument('--compare', help='קובץ baseline להשוואה')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='סבולת רגרסיה יחסית')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0, help='הפרש מינימלי (ms) שנחשב רגרסיה')
+    args = parser.parse_args()
+
+    ENGINE_PROFILE = args.engine_profile
+    logging.getLogger().setLevel(logging.WARNING)
+    logger.setLevel(logging.INFO)
+
+    report = run_benchmarks(args.preset, args.group, args.filter, args.repeats,
+                            args.timeout or None, not args.no_memory)
+
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 70)
+    print(f"⏱️ תוצאות benchmark ({args.preset})")
+    print("=" * 70)
+    for key, result in report["results"].items():
+        if result["status"] == "ok":
+            print(f"✅ {key}: {result['median_ms']}ms (min {result['min_ms']}ms)")
+        else:
+            print(f"⚠️ {key}: {result['status']} {result.get('error', '')}")
+    if report["kernel_speedups"]:
+        print("\n🚀 האצת קרנלים מול rolling().apply:")
+        for key, speedup in report["kernel_speedups"].items():
+            print(f"   {key}: x{speedup}")
+    print(f"\n💾 נשמר: {output}")
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparisons = compare_results(report, baseline, args.tolerance, args.min_delta_ms)
+        regressions = [c for c in comparisons if c["regression"]]
+        print("\n📊 השוואה מול baseline:")
+        for c in comparisons:
+            mark = "❌" if c["regression"] else ("🚀" if c["improvement"] else "  ")
+            if c["status"] != "ok":
+                print(f"{mark} {c['benchmark']}: {c['baseline_ms']}ms -> {c['status']}")
+                continue
+            print(f"{mark} {c['benchmark']}: {c['baseline_ms']}ms -> {c['current_ms']}ms (x{c['ratio']})")
+        print(f"\n{'❌ ' + str(len(regressions)) + ' רגרסיות' if regressions else '✅ אין רגרסיות'}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
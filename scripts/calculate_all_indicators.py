@@ -2,19 +2,25 @@
 """
 Calculate All Indicators - חישוב אינדיקטורים טכניים לכל המניות
 מחשב אינדיקטורים טכניים עבור כל המניות הזמינות
+
+מצב מקבילי: pool של תהליכים על פני המניות, מניפסט checkpoint שמאפשר להמשיך
+ריצה שנקטעה, ודילוג על מניות שקובץ הקלט שלהן (וקונפיגורציית האינדיקטורים) לא השתנו.
 """
 
 import os
 import sys
+import argparse
+import hashlib
 import pandas as pd
 import numpy as np
 import gzip
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import time
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 # הוספת הנתיב לפרויקט
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -23,12 +29,28 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+MANIFEST_FILE = "_build_manifest.json"
+
+# מחשבון לכל תהליך worker (נוצר פעם אחת ב-initializer)
+_WORKER_CALCULATOR = None
+
+
+def _init_worker(data_dir: str):
+    global _WORKER_CALCULATOR
+    _WORKER_CALCULATOR = TechnicalIndicatorsCalculator(data_dir)
+
+
+def _process_symbol_task(symbol: str, timeframes: List[str]) -> Tuple[str, Dict[str, int]]:
+    """משימת worker: עיבוד מניה אחת בתהליך נפרד"""
+    return symbol, _WORKER_CALCULATOR.process_symbol(symbol, timeframes)
+
+
 class TechnicalIndicatorsCalculator:
     """מחלקה לחישוב אינדיקטורים טכניים"""
     
-    def __init__(self):
+    def __init__(self, data_dir: str = "data"):
         # הגדרת תיקיות
-        self.data_dir = Path("data")
+        self.data_dir = Path(data_dir)
         self.daily_dir = self.data_dir / "historical_prices" / "daily"
         self.indicators_dir = self.data_dir / "technical_indicators"
         
@@ -67,17 +89,58 @@ class TechnicalIndicatorsCalculator:
             symbols.append(symbol)
         return symbols
     
+    def _price_file_path(self, symbol: str, timeframe: str) -> Path:
+        """נתיב קובץ המחירים של מניה בתדירות נתונה"""
+        if timeframe == "daily":
+            return self.daily_dir / f"{symbol}.csv.gz"
+        elif timeframe == "weekly":
+            return self.data_dir / "historical_prices" / "weekly" / f"{symbol}.csv.gz"
+        elif timeframe == "monthly":
+            return self.data_dir / "historical_prices" / "monthly" / f"{symbol}.csv.gz"
+        raise ValueError(f"תדירות לא נתמכת: {timeframe}")
+
+    def input_fingerprint(self, symbol: str, timeframe: str) -> Optional[str]:
+        """
+        טביעת אצבע של הקלט: תוכן קובץ המחירים + הגדרות האינדיקטורים
+
+        Returns:
+            sha1 או None אם קובץ הקלט לא קיים
+        """
+        file_path = self._price_file_path(symbol, timeframe)
+        if not file_path.exists():
+            return None
+        hasher = hashlib.sha1(json.dumps(self.indicators, sort_keys=True).encode("utf-8"))
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.indicators_dir / MANIFEST_FILE
+
+    def load_manifest(self) -> Dict[str, Dict]:
+        """טעינת מניפסט ה-checkpoint (symbol:timeframe -> fingerprint, rows, completed_at)"""
+        if not self.manifest_path.exists():
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"מניפסט פגום - בנייה מלאה: {e}")
+            return {}
+
+    def save_manifest(self, manifest: Dict[str, Dict]):
+        """שמירה אטומית של המניפסט (ריצה שנקטעה לא תשאיר קובץ חלקי)"""
+        tmp_path = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1)
+        tmp_path.replace(self.manifest_path)
+
     def load_price_data(self, symbol: str, timeframe: str = "daily") -> Optional[pd.DataFrame]:
         """טוען נתוני מחירים למניה"""
         try:
-            if timeframe == "daily":
-                file_path = self.daily_dir / f"{symbol}.csv.gz"
-            elif timeframe == "weekly":
-                file_path = self.data_dir / "historical_prices" / "weekly" / f"{symbol}.csv.gz"
-            elif timeframe == "monthly":
-                file_path = self.data_dir / "historical_prices" / "monthly" / f"{symbol}.csv.gz"
-            else:
-                raise ValueError(f"תדירות לא נתמכת: {timeframe}")
+            file_path = self._price_file_path(symbol, timeframe)
             
             if not file_path.exists():
                 logger.warning(f"קובץ לא קיים: {file_path}")
@@ -220,7 +283,11 @@ class TechnicalIndicatorsCalculator:
         try:
             typical_price = (df['high'] + df['low'] + df['close']) / 3
             sma_tp = typical_price.rolling(window=period).mean()
-            mad = typical_price.rolling(window=period).apply(lambda x: np.mean(np.abs(x - x.mean())))
+            # סטיית ממוצע מוחלטת בחלון - וקטורית (במקום rolling.apply עם lambda לכל חלון)
+            mad = pd.Series(np.nan, index=df.index)
+            if len(typical_price) >= period:
+                windows = np.lib.stride_tricks.sliding_window_view(typical_price.to_numpy(dtype=float), period)
+                mad.iloc[period - 1:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
             
             cci = (typical_price - sma_tp) / (0.015 * mad)
             return cci
@@ -246,8 +313,8 @@ class TechnicalIndicatorsCalculator:
             
             # Smoothed values
             tr_smooth = tr.rolling(window=period).mean()
-            plus_di = 100 * (pd.Series(plus_dm).rolling(window=period).mean() / tr_smooth)
-            minus_di = 100 * (pd.Series(minus_dm).rolling(window=period).mean() / tr_smooth)
+            plus_di = 100 * (pd.Series(plus_dm, index=df.index).rolling(window=period).mean() / tr_smooth)
+            minus_di = 100 * (pd.Series(minus_dm, index=df.index).rolling(window=period).mean() / tr_smooth)
             
             # ADX
             dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
@@ -396,45 +463,114 @@ class TechnicalIndicatorsCalculator:
         
         return results
     
-    def process_all_symbols(self, symbols: List[str] = None, timeframes: List[str] = None):
-        """מעבד את כל המניות"""
+    def process_all_symbols(self, symbols: List[str] = None, timeframes: List[str] = None,
+                            workers: int = 1, force: bool = False, checkpoint_every: int = 25):
+        """
+        מעבד את כל המניות
+
+        Args:
+            symbols: רשימת מניות (ברירת מחדל: כל הזמינות)
+            timeframes: תדירויות (daily / weekly / monthly)
+            workers: מספר תהליכים (1 = סדרתי, 0 = כמספר הליבות)
+            force: בנייה מחדש גם למניות שהקלט שלהן לא השתנה
+            checkpoint_every: כל כמה מניות שהושלמו לשמור את המניפסט
+        """
         if symbols is None:
             symbols = self.get_available_symbols()
         
         if timeframes is None:
             timeframes = ['daily']
+
+        if workers is None or workers <= 0:
+            workers = os.cpu_count() or 1
         
-        logger.info(f"מתחיל עיבוד {len(symbols)} מניות...")
+        logger.info(f"מתחיל עיבוד {len(symbols)} מניות ({workers} תהליכים)...")
+        start_time = time.time()
         
         results = {
             'success': [],
             'failed': [],
+            'skipped': [],
             'stats': {
                 'total_symbols': len(symbols),
                 'total_indicators': len(self.indicators),
-                'total_timeframes': len(timeframes)
+                'total_timeframes': len(timeframes),
+                'workers': workers
             }
         }
-        
-        for i, symbol in enumerate(symbols, 1):
-            logger.info(f"מעבד {symbol} ({i}/{len(symbols)})...")
-            
-            try:
-                symbol_results = self.process_symbol(symbol, timeframes)
-                
-                if symbol_results:
-                    results['success'].append(symbol)
-                    logger.info(f"✅ הושלם {symbol}")
-                else:
-                    results['failed'].append(symbol)
-                    logger.warning(f"❌ נכשל {symbol}")
-                
-                # השהייה בין מניות
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(f"שגיאה בעיבוד {symbol}: {e}")
+
+        # דילוג על מניות שהקלט שלהן לא השתנה מאז הבנייה האחרונה.
+        # force מבטל רק את הרשומות של המניות והתדירויות בריצה הזו - השאר נשמרות
+        manifest = self.load_manifest()
+        if force:
+            for symbol in symbols:
+                for tf in timeframes:
+                    manifest.pop(f"{symbol}:{tf}", None)
+        fingerprints = {}
+        pending = []
+        for symbol in symbols:
+            fingerprints[symbol] = {tf: self.input_fingerprint(symbol, tf) for tf in timeframes}
+            unchanged = all(
+                fp is None or manifest.get(f"{symbol}:{tf}", {}).get('fingerprint') == fp
+                for tf, fp in fingerprints[symbol].items()
+            ) and any(fp is not None for fp in fingerprints[symbol].values())
+            if unchanged:
+                results['skipped'].append(symbol)
+            else:
+                pending.append(symbol)
+
+        if results['skipped']:
+            logger.info(f"⏭️ דילוג על {len(results['skipped'])} מניות ללא שינוי")
+
+        completed_since_checkpoint = 0
+
+        def record(symbol: str, symbol_results: Dict[str, int]):
+            nonlocal completed_since_checkpoint
+            if symbol_results:
+                results['success'].append(symbol)
+                for tf, rows in symbol_results.items():
+                    manifest[f"{symbol}:{tf}"] = {
+                        'fingerprint': fingerprints[symbol].get(tf),
+                        'rows': rows,
+                        'completed_at': datetime.now().isoformat()
+                    }
+                completed_since_checkpoint += 1
+                if completed_since_checkpoint >= checkpoint_every:
+                    self.save_manifest(manifest)
+                    completed_since_checkpoint = 0
+            else:
                 results['failed'].append(symbol)
+                logger.warning(f"❌ נכשל {symbol}")
+
+        try:
+            if workers == 1 or len(pending) <= 1:
+                for i, symbol in enumerate(pending, 1):
+                    logger.info(f"מעבד {symbol} ({i}/{len(pending)})...")
+                    try:
+                        record(symbol, self.process_symbol(symbol, timeframes))
+                    except Exception as e:
+                        logger.error(f"שגיאה בעיבוד {symbol}: {e}")
+                        results['failed'].append(symbol)
+            else:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(str(self.data_dir),)) as executor:
+                    futures = {executor.submit(_process_symbol_task, symbol, timeframes): symbol
+                               for symbol in pending}
+                    for future in as_completed(futures):
+                        symbol = futures[future]
+                        try:
+                            record(*future.result())
+                        except Exception as e:
+                            logger.error(f"שגיאה בעיבוד {symbol}: {e}")
+                            results['failed'].append(symbol)
+        finally:
+            # checkpoint אחרון - גם כשהריצה נקטעת (Ctrl+C / חריגה)
+            self.save_manifest(manifest)
+
+        elapsed = time.time() - start_time
+        processed = len(results['success']) + len(results['failed'])
+        results['stats']['elapsed_seconds'] = round(elapsed, 2)
+        results['stats']['symbols_per_second'] = round(processed / elapsed, 2) if elapsed > 0 else 0.0
         
         return results
     
@@ -447,6 +583,10 @@ class TechnicalIndicatorsCalculator:
         print(f"❌ מניות שנכשלו: {len(results['failed'])}")
         print(f"📊 אינדיקטורים: {results['stats']['total_indicators']}")
         print(f"📅 תדירויות: {results['stats']['total_timeframes']}")
+        print(f"⏭️ דולגו (ללא שינוי): {len(results.get('skipped', []))}")
+        if 'symbols_per_second' in results['stats']:
+            print(f"⚡ קצב: {results['stats']['symbols_per_second']} מניות/שנייה "
+                  f"({results['stats']['elapsed_seconds']} שניות, {results['stats']['workers']} תהליכים)")
         
         if results['success']:
             print(f"\n✅ מניות שהושלמו: {', '.join(results['success'][:10])}{'...' if len(results['success']) > 10 else ''}")
@@ -456,12 +596,21 @@ class TechnicalIndicatorsCalculator:
 
 def main():
     """פונקציה ראשית"""
+    parser = argparse.ArgumentParser(description="חישוב אינדיקטורים טכניים לכל המניות")
+    parser.add_argument('symbols', nargs='*', help='סימבולים (ברירת מחדל: כל המניות הזמינות)')
+    parser.add_argument('--timeframes', nargs='+', default=['daily'],
+                        choices=['daily', 'weekly', 'monthly'], help='תדירויות לחישוב')
+    parser.add_argument('--workers', type=int, default=0, help='מספר תהליכים (0 = כמספר הליבות)')
+    parser.add_argument('--force', action='store_true', help='בנייה מחדש גם למניות ללא שינוי')
+    parser.add_argument('--data-dir', default='data', help='תיקיית הנתונים')
+    args = parser.parse_args()
+
     print("🚀 מתחיל חישוב אינדיקטורים טכניים...")
     
-    calculator = TechnicalIndicatorsCalculator()
+    calculator = TechnicalIndicatorsCalculator(args.data_dir)
     
     # קבלת רשימת מניות זמינות
-    available_symbols = calculator.get_available_symbols()
+    available_symbols = args.symbols or calculator.get_available_symbols()
     print(f"📋 מניות זמינות: {len(available_symbols)}")
     
     if not available_symbols:
@@ -469,7 +618,8 @@ def main():
         return
     
     # עיבוד כל המניות
-    results = calculator.process_all_symbols(available_symbols, ['daily'])
+    results = calculator.process_all_symbols(available_symbols, args.timeframes,
+                                             workers=args.workers, force=args.force)
     
     # הדפסת סיכום
     calculator.print_summary(results)
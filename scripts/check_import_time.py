@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Check Import Time - בדיקת זמן עלייה קר (cold start)
+מריץ `python -X importtime -c "import <module>"` בתהליך נקי, מסכם את זמן הייבוא
+ואת המודולים הכבדים ביותר, ונכשל (exit code 1) כאשר:
+- זמן הייבוא עובר את התקציב
+- ספרייה כבדה (transformers, sklearn, openai...) נטענת כבר בזמן import
+- יש רגרסיה מעבר לסבולת מול קובץ baseline שמור
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# מודולי כניסה ותקציב (מילישניות) לכל אחד
+DEFAULT_BUDGETS_MS = {
+    "core": 300,
+    "core.alpha_score_engine": 300,
+    "core.base.base_agent": 1500,
+    "main": 2500,
+}
+
+# ספריות שאסור שייטענו בזמן import - רק בשימוש הראשון
+HEAVY_MODULES = [
+    "transformers", "torch", "nltk", "textblob", "sklearn", "scipy",
+    "openai", "talib", "ta", "yaml", "matplotlib", "joblib",
+]
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, int]]:
+    """
+    פענוח פלט -X importtime
+
+    Returns:
+        dict: שם מודול -> {"self_us", "cumulative_us"}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        modules[parts[2].strip()] = {"self_us": self_us, "cumulative_us": cumulative_us}
+    return modules
+
+
+def measure_import(module: str, repeats: int = 3) -> Dict:
+    """
+    מדידת ייבוא מודול בתהליך חדש (המינימום מבין repeats הרצות)
+
+    Returns:
+        dict עם total_ms, heavy_modules שנטענו ו-top (המודולים הכבדים ביותר)
+    """
+    env = dict(os.environ)
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env.setdefault("TRANSFORMERS_OFFLINE", "1")
+    env["PYTHONPATH"] = PROJECT_ROOT + os.pathsep + env.get("PYTHONPATH", "")
+
+    # מודולים שהמפרש טוען גם בלי קוד (site וכו') - לא נספרים ברשימת הכבדים
+    startup = parse_importtime(subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "pass"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    ).stderr)
+
+    best = None
+    for _ in range(max(1, repeats)):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+        )
+        modules = parse_importtime(proc.stderr)
+        total_us = modules.get(module, {}).get("cumulative_us")
+        if total_us is None:
+            # המודול עצמו לא נמצא בפלט - סכום רמות העליונות
+            total_us = sum(m["self_us"] for m in modules.values())
+        result = {
+            "module": module,
+            "ok": proc.returncode == 0,
+            "total_ms": round(total_us / 1000.0, 1),
+            "heavy_modules": sorted(m for m in HEAVY_MODULES if m in modules),
+            "top": sorted(
+                ({"module": name, "cumulative_ms": round(v["cumulative_us"] / 1000.0, 1)}
+                 for name, v in modules.items() if name != module and name not in startup),
+                key=lambda item: item["cumulative_ms"], reverse=True
+            )[:10],
+        }
+        if not result["ok"]:
+            result["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ""
+        if best is None or result["total_ms"] < best["total_ms"]:
+            best = result
+    return best
+
+
+def check_results(results: List[Dict], budgets: Dict[str, float],
+                  baseline: Optional[Dict] = None, tolerance: float = 0.25) -> List[str]:
+    """
+    בדיקת תקציבים, ספריות כבדות ורגרסיה מול baseline
+
+    Returns:
+        רשימת הפרות (ריקה = עבר)
+    """
+    failures = []
+    for result in results:
+        module = result["module"]
+        if not result["ok"]:
+            failures.append(f"{module}: ייבוא נכשל ({result.get('error', '')})")
+            continue
+        budget = budgets.get(module)
+        if budget is not None and result["total_ms"] > budget:
+            failures.append(f"{module}: {result['total_ms']}ms > תקציב {budget}ms")
+        if result["heavy_modules"]:
+            failures.append(f"{module}: ספריות כבדות נטענו בזמן import: {', '.join(result['heavy_modules'])}")
+        if baseline and module in baseline:
+            allowed = baseline[module] * (1 + tolerance)
+            if result["total_ms"] > allowed:
+                failures.append(f"{module}: רגרסיה {result['total_ms']}ms מול baseline {baseline[module]}ms")
+    return failures
+
+
+def main():
+    """פונקציה ראשית"""
+    parser = argparse.ArgumentParser(description="בדיקת זמן import קר")
+    parser.add_argument('modules', nargs='*', help='מודולים לבדיקה (ברירת מחדל: נקודות הכניסה הראשיות)')
+    parser.add_argument('--repeats', type=int, default=3, help='מספר הרצות לכל מודול (נלקח המינימום)')
+    parser.add_argument('--budget-ms', type=float, help='תקציב אחיד לכל המודולים')
+    parser.add_argument('--baseline', help='קובץ JSON עם זמני בסיס (module -> ms)')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='סבולת רגרסיה יחסית מול baseline')
+    parser.add_argument('--save-baseline', help='שמירת התוצאות הנוכחיות כ-baseline')
+    parser.add_argument('--json', action='store_true', help='הדפסת תוצאות כ-JSON')
+    args = parser.parse_args()
+
+    modules = args.modules or list(DEFAULT_BUDGETS_MS)
+    budgets = {m: args.budget_ms for m in modules} if args.budget_ms else DEFAULT_BUDGETS_MS
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = [measure_import(module, args.repeats) for module in modules]
+    failures = check_results(results, budgets, baseline, args.tolerance)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({r["module"]: r["total_ms"] for r in results if r["ok"]}, f, indent=2)
+
+    if args.json:
+        print(json.dumps({"results": results, "failures": failures}, indent=2, ensure_ascii=False))
+    else:
+        print("\n" + "=" * 60)
+        print("⏱️ זמני import קר")
+        print("=" * 60)
+        for result in results:
+            status = "✅" if result["ok"] else "❌"
+            print(f"{status} {result['module']}: {result['total_ms']}ms")
+            for item in result["top"][:5]:
+                print(f"    {item['module']}: {item['cumulative_ms']}ms")
+        if failures:
+            print("\n❌ הפרות:")
+            for failure in failures:
+                print(f"  - {failure}")
+        else:
+            print("\n✅ כל הבדיקות עברו")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,114 +2,290 @@
 """
 DataManager - ניהול מאגר נתונים מרכזי למערכת Charles FocusedSpec
 מנהל שליפה, בדיקת חוסרים, ועדכון נתונים (מחירים, אינדיקטורים, חדשות, מאקרו)
+
+ביצועים:
+- pool של חיבורים (ללא פתיחה/סגירה בכל קריאה) במצב WAL - קוראים לא נחסמים ע"י הכותב
+- UPSERT מרוכז ב-executemany בטרנזקציה אחת (ללא כשל על התנגשות מפתח ראשי)
+- אינדקסים מכסים (symbol, date) לשאילתות טווח
+- זיהוי תאריכים חסרים ב-SQL (CTE של ימי מסחר מול הטבלה)
+- מצב קריאה בלבד (read_only=True) לדשבורדים שרצים במקביל ל-ingester
 """
 import os
-import pandas as pd
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+# טבלה -> עמודות המפתח הראשי (יעד ה-ON CONFLICT)
+TABLE_KEYS = {
+    'historical_prices': ('date', 'symbol'),
+    'technical_indicators': ('date', 'symbol'),
+    'news_sentiment': ('date', 'symbol', 'headline'),
+    'macro_data': ('date', 'indicator'),
+}
+
+MISSING_DATES_QUERY = '''
+    WITH RECURSIVE calendar(day) AS (
+        SELECT date(?)
+        UNION ALL
+        SELECT date(day, '+1 day') FROM calendar WHERE day < date(?)
+    )
+    SELECT day FROM calendar
+    WHERE strftime('%w', day) NOT IN ('0', '6')
+      AND NOT EXISTS (
+          SELECT 1 FROM historical_prices p WHERE p.symbol = ? AND p.date = calendar.day
+      )
+    ORDER BY day
+'''
+
 
 class DataManager:
-    def __init__(self, db_path="data/database/historical.db"):
+    def __init__(self, db_path="data/database/historical.db", read_only=False,
+                 pool_size=4, timeout=30.0):
         self.db_path = db_path
-        self._ensure_db()
+        self.read_only = read_only
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+
+        self._pool = queue.Queue()
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        # חיבורים מושאלים, וחיבורים מושאלים שנסגרים בהחזרה (close() נקרא בזמן ההשאלה)
+        self._leased = set()
+        self._retired = set()
+        self._columns_cache = {}
+
+        if not read_only:
+            self._ensure_db()
+
+    # ------------------------------------------------------------------
+    # ניהול חיבורים
+    # ------------------------------------------------------------------
+    def _connect(self):
+        """יצירת חיבור חדש עם הגדרות ביצועים"""
+        if self.read_only:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=self.timeout,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA query_only=ON")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """השאלת חיבור מה-pool (נוצר בעצלות עד pool_size, אחרת ממתין לחיבור פנוי)"""
+        conn = None
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                if self._created < self.pool_size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if not create:
+                conn = self._pool.get(timeout=self.timeout)
+            else:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    # החיבור לא נוצר - המקום שהוקצה לו ב-pool מתפנה
+                    with self._pool_lock:
+                        self._created -= 1
+                    raise
+        with self._pool_lock:
+            self._leased.add(conn)
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                self._leased.discard(conn)
+                retired = conn in self._retired
+                if retired:
+                    self._retired.discard(conn)
+                    self._created -= 1
+            if retired:
+                conn.close()
+            else:
+                self._pool.put(conn)
+
+    def close(self):
+        """
+        סגירת כל החיבורים: הפנויים מיד, והמושאלים כשהם מוחזרים
+        (סגירה באמצע שאילתה של תהליכון אחר הייתה שוברת אותה)
+        """
+        closed = 0
+        while True:
+            try:
+                self._pool.get_nowait().close()
+                closed += 1
+            except queue.Empty:
+                break
+        with self._pool_lock:
+            self._created -= closed
+            self._retired.update(self._leased)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def _ensure_db(self):
-        """יוצר טבלאות נדרשות אם לא קיימות"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS historical_prices (
-                date TEXT, symbol TEXT, open REAL, high REAL, low REAL, close REAL, volume INTEGER, adjusted_close REAL,
-                PRIMARY KEY (date, symbol)
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS technical_indicators (
-                date TEXT, symbol TEXT, rsi_14 REAL, macd REAL, macd_signal REAL, sma_20 REAL, ema_20 REAL,
-                bollinger_upper REAL, bollinger_lower REAL, atr_14 REAL, PRIMARY KEY (date, symbol)
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS news_sentiment (
-                date TEXT, symbol TEXT, headline TEXT, sentiment REAL, source TEXT, url TEXT, category TEXT,
-                PRIMARY KEY (date, symbol, headline)
-            )
-        ''')
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS macro_data (
-                date TEXT, indicator TEXT, value REAL, PRIMARY KEY (date, indicator)
-            )
-        ''')
-        conn.commit()
-        conn.close()
+        """יוצר טבלאות ואינדקסים נדרשים אם לא קיימים"""
+        with self._connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS historical_prices (
+                    date TEXT, symbol TEXT, open REAL, high REAL, low REAL, close REAL, volume INTEGER, adjusted_close REAL,
+                    PRIMARY KEY (date, symbol)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS technical_indicators (
+                    date TEXT, symbol TEXT, rsi_14 REAL, macd REAL, macd_signal REAL, sma_20 REAL, ema_20 REAL,
+                    bollinger_upper REAL, bollinger_lower REAL, atr_14 REAL, PRIMARY KEY (date, symbol)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS news_sentiment (
+                    date TEXT, symbol TEXT, headline TEXT, sentiment REAL, source TEXT, url TEXT, category TEXT,
+                    PRIMARY KEY (date, symbol, headline)
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS macro_data (
+                    date TEXT, indicator TEXT, value REAL, PRIMARY KEY (date, indicator)
+                )
+            ''')
+            # אינדקסים מכסים לשאילתות טווח לפי מניה (המפתח הראשי מתחיל ב-date)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_prices_symbol_date
+                ON historical_prices (symbol, date, open, high, low, close, volume, adjusted_close)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_indicators_symbol_date
+                ON technical_indicators (symbol, date)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_news_symbol_date
+                ON news_sentiment (symbol, date)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_macro_indicator_date
+                ON macro_data (indicator, date)
+            ''')
+            conn.commit()
 
+    def _table_columns(self, table):
+        """עמודות הטבלה (נשמר במטמון)"""
+        if table not in self._columns_cache:
+            with self._connection() as conn:
+                rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+            self._columns_cache[table] = [row[1] for row in rows]
+        return self._columns_cache[table]
+
+    def _query(self, query, params):
+        with self._connection() as conn:
+            return pd.read_sql_query(query, conn, params=params)
+
+    # ------------------------------------------------------------------
+    # שליפה
+    # ------------------------------------------------------------------
     def get_price_data(self, symbol, start_date, end_date):
         """שליפת נתוני מחירים מהמאגר"""
-        conn = sqlite3.connect(self.db_path)
         query = '''SELECT * FROM historical_prices WHERE symbol=? AND date BETWEEN ? AND ? ORDER BY date'''
-        df = pd.read_sql_query(query, conn, params=(symbol, start_date, end_date))
-        conn.close()
-        return df
+        return self._query(query, (symbol, start_date, end_date))
 
     def get_technical_indicators(self, symbol, start_date, end_date):
         """שליפת אינדיקטורים טכניים מהמאגר"""
-        conn = sqlite3.connect(self.db_path)
         query = '''SELECT * FROM technical_indicators WHERE symbol=? AND date BETWEEN ? AND ? ORDER BY date'''
-        df = pd.read_sql_query(query, conn, params=(symbol, start_date, end_date))
-        conn.close()
-        return df
+        return self._query(query, (symbol, start_date, end_date))
 
     def get_news(self, symbol, start_date, end_date):
         """שליפת חדשות/סנטימנט מהמאגר"""
-        conn = sqlite3.connect(self.db_path)
         query = '''SELECT * FROM news_sentiment WHERE symbol=? AND date BETWEEN ? AND ? ORDER BY date'''
-        df = pd.read_sql_query(query, conn, params=(symbol, start_date, end_date))
-        conn.close()
-        return df
+        return self._query(query, (symbol, start_date, end_date))
 
     def get_macro_data(self, indicator, start_date, end_date):
         """שליפת נתוני מאקרו מהמאגר"""
-        conn = sqlite3.connect(self.db_path)
         query = '''SELECT * FROM macro_data WHERE indicator=? AND date BETWEEN ? AND ? ORDER BY date'''
-        df = pd.read_sql_query(query, conn, params=(indicator, start_date, end_date))
-        conn.close()
-        return df
+        return self._query(query, (indicator, start_date, end_date))
 
     def find_missing_dates(self, symbol, start_date, end_date):
-        """בודק אילו תאריכים חסרים במאגר עבור סימבול מסוים"""
-        df = self.get_price_data(symbol, start_date, end_date)
-        all_dates = pd.date_range(start=start_date, end=end_date, freq='B').strftime('%Y-%m-%d')
-        existing_dates = set(df['date'])
-        missing = [d for d in all_dates if d not in existing_dates]
-        return missing
+        """בודק אילו ימי מסחר (א'-ה' / ב'-ו') חסרים במאגר עבור סימבול מסוים - בשאילתה אחת"""
+        start = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+        with self._connection() as conn:
+            rows = conn.execute(MISSING_DATES_QUERY, (start, end, symbol)).fetchall()
+        return [row[0] for row in rows]
+
+    # ------------------------------------------------------------------
+    # עדכון (UPSERT)
+    # ------------------------------------------------------------------
+    def _upsert(self, table, df_new, key_column, key_value):
+        """
+        UPSERT מרוכז: executemany על statement אחד בטרנזקציה אחת
+
+        Returns:
+            מספר השורות שנכתבו
+        """
+        if self.read_only:
+            raise PermissionError("DataManager נפתח במצב קריאה בלבד")
+        if df_new is None or df_new.empty:
+            return 0
+
+        df = df_new.copy()
+        if 'date' not in df.columns:
+            df = df.reset_index().rename(columns={df.index.name or 'index': 'date'})
+        df['date'] = pd.to_datetime(df['date']).dt.strftime('%Y-%m-%d')
+        df[key_column] = key_value
+
+        table_columns = self._table_columns(table)
+        columns = [col for col in table_columns if col in df.columns]
+        keys = TABLE_KEYS[table]
+        updates = [col for col in columns if col not in keys]
+
+        placeholders = ', '.join('?' for _ in columns)
+        statement = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        if updates:
+            assignments = ', '.join(f"{col}=excluded.{col}" for col in updates)
+            statement += f" ON CONFLICT({', '.join(keys)}) DO UPDATE SET {assignments}"
+        else:
+            statement += f" ON CONFLICT({', '.join(keys)}) DO NOTHING"
+
+        values = df[columns].astype(object).where(df[columns].notna(), None)
+        rows = list(values.itertuples(index=False, name=None))
+        with self._connection() as conn:
+            with conn:
+                conn.executemany(statement, rows)
+        return len(rows)
 
     def update_price_data(self, symbol, df_new):
         """עדכון/הוספת נתוני מחירים חדשים למאגר"""
-        conn = sqlite3.connect(self.db_path)
-        df_new['symbol'] = symbol
-        df_new.to_sql('historical_prices', conn, if_exists='append', index=False)
-        conn.close()
+        return self._upsert('historical_prices', df_new, 'symbol', symbol)
 
     def update_technical_indicators(self, symbol, df_new):
         """עדכון/הוספת אינדיקטורים חדשים למאגר"""
-        conn = sqlite3.connect(self.db_path)
-        df_new['symbol'] = symbol
-        df_new.to_sql('technical_indicators', conn, if_exists='append', index=False)
-        conn.close()
+        return self._upsert('technical_indicators', df_new, 'symbol', symbol)
 
     def update_news(self, symbol, df_new):
         """עדכון/הוספת חדשות/סנטימנט למאגר"""
-        conn = sqlite3.connect(self.db_path)
-        df_new['symbol'] = symbol
-        df_new.to_sql('news_sentiment', conn, if_exists='append', index=False)
-        conn.close()
+        return self._upsert('news_sentiment', df_new, 'symbol', symbol)
 
     def update_macro_data(self, indicator, df_new):
         """עדכון/הוספת נתוני מאקרו למאגר"""
-        conn = sqlite3.connect(self.db_path)
-        df_new['indicator'] = indicator
-        df_new.to_sql('macro_data', conn, if_exists='append', index=False)
-        conn.close()
+        return self._upsert('macro_data', df_new, 'indicator', indicator)
 
 # דוגמה לשימוש
 if __name__ == "__main__":
@@ -119,4 +295,4 @@ if __name__ == "__main__":
     print(df.head())
     # בדיקת אילו תאריכים חסרים
     missing = dm.find_missing_dates('AAPL', '2020-01-01', '2020-12-31')
-    print("תאריכים חסרים:", missing) 
\ No newline at end of file
+    print("תאריכים חסרים:", missing)
@@ -4,12 +4,34 @@
 יוצר: AI Lead Developer
 """
 import os
+import sys
 import pandas as pd
 import numpy as np
 import sqlite3
 from datetime import datetime
 import logging
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.incremental_resampler import resample_ohlcv, update_resampled
+
+def _ewm_continue(values, prev_mean, count, span):
+    """
+    המשך ewm(span).mean() (adjust=True) מהערך האחרון שחושב על count תצפיות קודמות -
+    זהה לחישוב על כל ההיסטוריה, בלי לעבור עליה שוב
+    """
+    alpha = 2.0 / (span + 1.0)
+    beta = 1.0 - alpha
+    den = (1.0 - beta ** count) / alpha
+    num = prev_mean * den
+    out = np.empty(len(values))
+    for i, value in enumerate(values):
+        num = value + beta * num
+        den = 1.0 + beta * den
+        out[i] = num / den
+    return out
+
+
 class EnhancedDataProcessor:
     def __init__(self):
         self.raw_dir = "data/raw_price_data"
@@ -104,53 +126,42 @@ class EnhancedDataProcessor:
         df['atr_14'] = true_range.rolling(14).mean()
         return df
     
-    def aggregate_to_weekly(self, df):
-        """המרת נתונים יומיים לשבועיים"""
-        df = df.copy()
-        df['date'] = pd.to_datetime(df['date'])
+    def _aggregate(self, df, timeframe, existing=None):
+        """
+        צבירת נתונים יומיים לנרות (תווית = סוף התקופה, כמו בקבצים הקיימים)
         
-        # יצירת עמודת שבוע
-        df['week'] = df['date'].dt.to_period('W')
-        
-        # חישוב נתונים שבועיים
-        weekly_data = df.groupby('week').agg({
-            'open': 'first',  # מחיר פתיחה של היום הראשון בשבוע
-            'high': 'max',    # מחיר הגבוה ביותר בשבוע
-            'low': 'min',     # מחיר הנמוך ביותר בשבוע
-            'close': 'last',  # מחיר סגירה של היום האחרון בשבוע
-            'volume': 'sum',  # סכום הנפח השבועי
-            'adjusted_close': 'last'  # מחיר מותאם של היום האחרון
-        }).reset_index()
+        כאשר existing (נרות קודמים כולל אינדיקטורים) מועבר - רק הנר הפתוח מחושב מחדש
+        ונרות שנסגרו מתווספים; עמודות האינדיקטורים של נרות שלא השתנו נשמרות.
+        """
+        if existing is not None and not existing.empty:
+            bars, _ = update_resampled(existing, df, timeframe)
+            bars = bars.copy()
+        else:
+            bars = resample_ohlcv(df, timeframe)
         
         # המרת תאריך חזרה למחרוזת
-        weekly_data['date'] = weekly_data['week'].dt.strftime('%Y-%m-%d')
-        weekly_data = weekly_data.drop('week', axis=1)
-        
-        return weekly_data
+        bars['date'] = pd.to_datetime(bars['date']).dt.strftime('%Y-%m-%d')
+        return bars
     
-    def aggregate_to_monthly(self, df):
-        """המרת נתונים יומיים לחודשיים"""
-        df = df.copy()
-        df['date'] = pd.to_datetime(df['date'])
-        
-        # יצירת עמודת חודש
-        df['month'] = df['date'].dt.to_period('M')
-        
-        # חישוב נתונים חודשיים
-        monthly_data = df.groupby('month').agg({
-            'open': 'first',  # מחיר פתיחה של היום הראשון בחודש
-            'high': 'max',    # מחיר הגבוה ביותר בחודש
-            'low': 'min',     # מחיר הנמוך ביותר בחודש
-            'close': 'last',  # מחיר סגירה של היום האחרון בחודש
-            'volume': 'sum',  # סכום הנפח החודשי
-            'adjusted_close': 'last'  # מחיר מותאם של היום האחרון
-        }).reset_index()
-        
-        # המרת תאריך חזרה למחרוזת
-        monthly_data['date'] = monthly_data['month'].dt.strftime('%Y-%m-%d')
-        monthly_data = monthly_data.drop('month', axis=1)
-        
-        return monthly_data
+    def aggregate_to_weekly(self, df, existing=None):
+        """המרת נתונים יומיים לשבועיים (open ראשון, high מקסימום, low מינימום, close אחרון, סכום volume)"""
+        return self._aggregate(df, 'weekly', existing)
+    
+    def aggregate_to_monthly(self, df, existing=None):
+        """המרת נתונים יומיים לחודשיים (open ראשון, high מקסימום, low מינימום, close אחרון, סכום volume)"""
+        return self._aggregate(df, 'monthly', existing)
+    
+    def load_existing(self, symbol, timeframe):
+        """טעינת נרות קיימים (כולל אינדיקטורים) לעדכון מצטבר"""
+        directory = self.weekly_dir if timeframe == 'weekly' else self.monthly_dir
+        file_path = os.path.join(directory, f"{symbol}.csv")
+        if not os.path.exists(file_path):
+            return None
+        try:
+            return pd.read_csv(file_path)
+        except Exception as e:
+            print(f"⚠️ שגיאה בטעינת {file_path}: {e}")
+            return None
     
     def calculate_timeframe_indicators(self, df, timeframe):
         """חישוב אינדיקטורים עבור טווח זמן ספציפי"""
@@ -185,41 +196,82 @@ class EnhancedDataProcessor:
             bb_period = 20
             atr_period = 14
         
+        # עדכון מצטבר: שורות שכבר מחושבות (נרות סגורים מריצה קודמת) לא מחושבות מחדש
+        start = self._first_stale_row(df)
+        if start >= len(df):
+            return df
+        # ממוצעים נעים צריכים חלון חימום לפני השורה הראשונה לחישוב
+        warmup = max(rsi_period, sma_period, bb_period, atr_period) + 1
+        begin = max(0, start - warmup)
+        window = df.iloc[begin:]
+        
+        def put(column, values):
+            """כתיבת ערכים לשורות start ואילך (סדרות מחושבות על window נחתכות לשם)"""
+            if column not in df.columns:
+                df[column] = np.nan
+            if isinstance(values, pd.Series):
+                values = values.to_numpy()[start - begin:]
+            df.iloc[start:, df.columns.get_loc(column)] = values
+        
         # RSI
-        delta = df['close'].diff()
+        delta = window['close'].diff()
         gain = delta.clip(lower=0)
         loss = -delta.clip(upper=0)
         avg_gain = gain.rolling(rsi_period).mean()
         avg_loss = loss.rolling(rsi_period).mean()
         rs = avg_gain / avg_loss
-        df['rsi_14'] = 100 - (100 / (1 + rs))
+        put('rsi_14', 100 - (100 / (1 + rs)))
         
-        # MACD
-        ema_fast = df['close'].ewm(span=macd_fast).mean()
-        ema_slow = df['close'].ewm(span=macd_slow).mean()
-        df['macd'] = ema_fast - ema_slow
-        df['macd_signal'] = df['macd'].ewm(span=macd_signal).mean()
+        # MACD (ממוצעים אקספוננציאליים ממשיכים מהערך הקודם)
+        close_tail = df['close'].iloc[start:].to_numpy(dtype=float)
+        if start == 0:
+            ema_fast = df['close'].ewm(span=macd_fast).mean().to_numpy()
+            ema_slow = df['close'].ewm(span=macd_slow).mean().to_numpy()
+            macd = ema_fast - ema_slow
+            put('ema_fast', ema_fast)
+            put('ema_slow', ema_slow)
+            put('macd', macd)
+            put('macd_signal', pd.Series(macd).ewm(span=macd_signal).mean().to_numpy())
+            put('ema_20', df['close'].ewm(span=ema_period).mean().to_numpy())
+        else:
+            ema_fast = _ewm_continue(close_tail, df['ema_fast'].iloc[start - 1], start, macd_fast)
+            ema_slow = _ewm_continue(close_tail, df['ema_slow'].iloc[start - 1], start, macd_slow)
+            macd = ema_fast - ema_slow
+            put('ema_fast', ema_fast)
+            put('ema_slow', ema_slow)
+            put('macd', macd)
+            put('macd_signal', _ewm_continue(macd, df['macd_signal'].iloc[start - 1], start, macd_signal))
+            put('ema_20', _ewm_continue(close_tail, df['ema_20'].iloc[start - 1], start, ema_period))
         
         # Moving Averages
-        df['sma_20'] = df['close'].rolling(window=sma_period).mean()
-        df['ema_20'] = df['close'].ewm(span=ema_period).mean()
+        put('sma_20', window['close'].rolling(window=sma_period).mean())
         
         # Bollinger Bands
-        df['bollinger_middle'] = df['close'].rolling(window=bb_period).mean()
-        bb_std = df['close'].rolling(window=bb_period).std()
-        df['bollinger_upper'] = df['bollinger_middle'] + (bb_std * 2)
-        df['bollinger_lower'] = df['bollinger_middle'] - (bb_std * 2)
+        bollinger_middle = window['close'].rolling(window=bb_period).mean()
+        bb_std = window['close'].rolling(window=bb_period).std()
+        put('bollinger_middle', bollinger_middle)
+        put('bollinger_upper', bollinger_middle + (bb_std * 2))
+        put('bollinger_lower', bollinger_middle - (bb_std * 2))
         
         # ATR
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
+        high_low = window['high'] - window['low']
+        high_close = np.abs(window['high'] - window['close'].shift())
+        low_close = np.abs(window['low'] - window['close'].shift())
         ranges = pd.concat([high_low, high_close, low_close], axis=1)
         true_range = ranges.max(axis=1)
-        df['atr_14'] = true_range.rolling(atr_period).mean()
+        put('atr_14', true_range.rolling(atr_period).mean())
         
         return df
     
+    @staticmethod
+    def _first_stale_row(df):
+        """השורה הראשונה שדורשת חישוב אינדיקטורים (0 = חישוב מלא)"""
+        state_columns = ['ema_fast', 'ema_slow', 'macd_signal', 'ema_20']
+        if any(col not in df.columns for col in state_columns) or df['close'].isna().any():
+            return 0
+        computed = df[state_columns].notna().all(axis=1).to_numpy()
+        return len(df) if computed.all() else int(np.argmin(computed))
+    
     def process_all_files(self):
         """עיבוד כל הקבצים הגולמיים"""
         for file in os.listdir(self.raw_dir):
@@ -302,20 +354,20 @@ class EnhancedDataProcessor:
             # חישוב אינדיקטורים יומיים
             df_daily = self.calculate_enhanced_indicators(df)
             
-            # יצירת נתונים שבועיים
-            df_weekly = self.aggregate_to_weekly(df)
-            df_weekly = self.calculate_timeframe_indicators(df_weekly, 'weekly')
-            
-            # יצירת נתונים חודשיים
-            df_monthly = self.aggregate_to_monthly(df)
-            df_monthly = self.calculate_timeframe_indicators(df_monthly, 'monthly')
-            
-            # שמירת קבצים
             if 'symbol' in df.columns and len(df) > 0:
                 symbol = df['symbol'].iloc[0]
             else:
                 symbol = filename.replace(' Stock Price History.csv', '').replace('.csv', '')
             
+            # עדכון מצטבר של נתונים שבועיים - רק הנר הפתוח ונרות חדשים מחושבים
+            df_weekly = self.aggregate_to_weekly(df, self.load_existing(symbol, 'weekly'))
+            df_weekly = self.calculate_timeframe_indicators(df_weekly, 'weekly')
+            
+            # עדכון מצטבר של נתונים חודשיים
+            df_monthly = self.aggregate_to_monthly(df, self.load_existing(symbol, 'monthly'))
+            df_monthly = self.calculate_timeframe_indicators(df_monthly, 'monthly')
+            
+            # שמירת קבצים
             # שמירת קבצים יומיים
             output_file_daily = os.path.join(self.historical_dir, f"{symbol}.csv")
             df_daily.to_csv(output_file_daily, index=False)
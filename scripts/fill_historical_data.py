@@ -20,6 +20,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.smart_data_manager import smart_data_manager
 from utils.data_fetcher import DataFetcher
+from utils.incremental_resampler import PERIOD_FREQ, resample_ohlcv, update_resampled
 
 # הגדרת לוגר
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -121,49 +122,34 @@ class HistoricalDataFiller:
             logger.error(f"שגיאה בשמירת {symbol} ({timeframe}): {e}")
             return False
     
-    def resample_data(self, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-        """ממיר נתונים יומיים לשבועיים/חודשיים"""
+    def load_bars(self, symbol: str, timeframe: str) -> pd.DataFrame:
+        """טוען נרות שבועיים/חודשיים קיימים (None אם אין קובץ)"""
+        target_dir = self.weekly_dir if timeframe == "weekly" else self.monthly_dir
+        file_path = target_dir / f"{symbol}.csv.gz"
+        if not file_path.exists():
+            return None
         try:
-            if df.empty:
-                return df
-            
-            # הגדרת אינדקס תאריך
-            if 'date' in df.columns:
-                df = df.set_index('date')
-            elif 'Date' in df.columns:
-                df = df.set_index('Date')
-            
-            # המרה לתאריך
-            df.index = pd.to_datetime(df.index)
-            
-            # Resampling
-            if timeframe == "weekly":
-                resampled = df.resample('W').agg({
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                })
-            elif timeframe == "monthly":
-                resampled = df.resample('M').agg({
-                    'open': 'first',
-                    'high': 'max',
-                    'low': 'min',
-                    'close': 'last',
-                    'volume': 'sum'
-                })
-            else:
+            return pd.read_csv(file_path, compression='gzip')
+        except Exception as e:
+            logger.warning(f"שגיאה בטעינת {symbol} ({timeframe}): {e}")
+            return None
+    
+    def resample_data(self, df: pd.DataFrame, timeframe: str, existing: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        ממיר נתונים יומיים לשבועיים/חודשיים
+        
+        כאשר existing (נרות קיימים) מועבר, רק הנר הפתוח מחושב מחדש ונרות שנסגרו מתווספים.
+        אם לא השתנה דבר מוחזר existing עצמו.
+        """
+        try:
+            if df.empty or timeframe not in PERIOD_FREQ:
                 return df
             
-            # הסרת שורות ריקות
-            resampled = resampled.dropna()
-            
-            # איפוס אינדקס
-            resampled = resampled.reset_index()
-            resampled = resampled.rename(columns={resampled.index.name: 'date'})
+            if existing is not None:
+                resampled, _ = update_resampled(existing, df, timeframe)
+                return resampled
             
-            return resampled
+            return resample_ohlcv(df, timeframe)
             
         except Exception as e:
             logger.error(f"שגיאה ב-resampling ל-{timeframe}: {e}")
@@ -199,15 +185,12 @@ class HistoricalDataFiller:
                     if self.save_data(daily_df, symbol, "daily"):
                         results['stats']['daily_files'] += 1
                     
-                    # יצירת נתונים שבועיים
-                    weekly_df = self.resample_data(daily_df, "weekly")
-                    if self.save_data(weekly_df, symbol, "weekly"):
-                        results['stats']['weekly_files'] += 1
-                    
-                    # יצירת נתונים חודשיים
-                    monthly_df = self.resample_data(daily_df, "monthly")
-                    if self.save_data(monthly_df, symbol, "monthly"):
-                        results['stats']['monthly_files'] += 1
+                    # עדכון מצטבר של נרות שבועיים/חודשיים (נכתב רק אם השתנה)
+                    for timeframe in ("weekly", "monthly"):
+                        existing = self.load_bars(symbol, timeframe)
+                        bars_df = self.resample_data(daily_df, timeframe, existing)
+                        if bars_df is existing or self.save_data(bars_df, symbol, timeframe):
+                            results['stats'][f'{timeframe}_files'] += 1
                     
                     results['success'].append(symbol)
                     logger.info(f"✅ הושלם {symbol}")
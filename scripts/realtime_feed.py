@@ -1,11 +1,31 @@
-import websocket
+#!/usr/bin/env python3
+"""
+Realtime Feed - הזנת עסקאות חיות מ-Finnhub והערכת AlphaScore
+צינור זרימה בשלושה שלבים:
+1. עסקאות מה-websocket נצברות לנרות בזיכרון לכל מניה (BarAggregator)
+2. תור הערכה חסום עם coalescing - לכל מניה לכל היותר הערכה אחת ממתינה (EvaluationQueue)
+3. ההערכה משתמשת בנרות שנצברו מקומית על גבי היסטוריה שנטענת פעם אחת - ללא שליפת REST בכל הערכה
+"""
+
+import os
+import sys
 import json
-import pandas as pd
 import time
+import queue
+import logging
 import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+# הוספת הנתיב לפרויקט
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import data_fetcher
-from core.alpha_score_engine import AlphaScoreEngine
+from utils.metrics import get_registry
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # מפתחות API (Finnhub)
 FINNHUB_KEY = "d1in1ahr01qhbuvr1dggd1in1ahr01qhbuvr1dh0"
@@ -13,60 +33,270 @@ FINNHUB_KEY = "d1in1ahr01qhbuvr1dggd1in1ahr01qhbuvr1dh0"
 # רשימת סימולים
 SYMBOLS = ["QBTS"]
 
-# פרמטר: כל כמה שניות לבצע הערכה מחודשת (מניעת יותר מדי קריאות API)
+# פרמטר: כל כמה שניות לבצע הערכה מחודשת למניה
 EVAL_INTERVAL_SEC = 120
 
-# זיכרון מתי כל סימול נבדק לאחרונה
-last_evaluated = {}
+# גודל נר מצטבר (ברירת מחדל: יומי, כמו ההיסטוריה שהסוכנים מקבלים)
+BAR_SECONDS = 86400
+
+# מספר נרות היסטוריים שנטענים פעם אחת לכל מניה
+HISTORY_BARS = 100
+
+# ציון AlphaScore (final_score) שממנו מודפסת התראת קנייה חזקה
+SIGNAL_SCORE = 80
+
+# עומק תור ההערכה (אותם מדדים כמו ב-live.live_scheduler, queue="realtime_feed")
+LIVE_QUEUE_DEPTH = get_registry().gauge("charles_live_queue_depth", "עבודות ממתינות בתור הלייב", ["queue"])
+LIVE_DROPPED = get_registry().counter("charles_live_dropped_total", "עבודות שנזרקו כי התור מלא", ["queue"])
+
+
+class BarAggregator:
+    """צבירת עסקאות לנרות OHLCV בזיכרון, לכל מניה"""
+
+    def __init__(self, bar_seconds: int = BAR_SECONDS, max_bars: int = 500):
+        self.bar_ms = int(bar_seconds * 1000)
+        self.max_bars = max_bars
+        self._bars: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def add_trade(self, symbol: str, price: float, volume: float, timestamp_ms: int):
+        """הוספת עסקה לנר הפתוח (או פתיחת נר חדש כשעבר גבול הנר)"""
+        bucket = (int(timestamp_ms) // self.bar_ms) * self.bar_ms
+        with self._lock:
+            bars = self._bars.setdefault(symbol, deque(maxlen=self.max_bars))
+            if bars and bars[-1]['t'] == bucket:
+                bar = bars[-1]
+                bar['high'] = max(bar['high'], price)
+                bar['low'] = min(bar['low'], price)
+                bar['close'] = price
+                bar['volume'] += volume
+            elif not bars or bucket > bars[-1]['t']:
+                bars.append({'t': bucket, 'open': price, 'high': price, 'low': price,
+                             'close': price, 'volume': volume})
+            # עסקה מאוחרת לנר שכבר נסגר - מתעלמים
+
+    def frame(self, symbol: str) -> pd.DataFrame:
+        """הנרות שנצברו כ-DataFrame (אינדקס date, מהישן לחדש)"""
+        with self._lock:
+            rows = [dict(bar) for bar in self._bars.get(symbol, ())]
+        if not rows:
+            return pd.DataFrame(columns=['open', 'high', 'low', 'close', 'volume'])
+        df = pd.DataFrame(rows)
+        df.index = pd.to_datetime(df.pop('t'), unit='ms')
+        df.index.name = 'date'
+        return df
+
+    def symbols(self):
+        with self._lock:
+            return list(self._bars)
+
+
+class EvaluationQueue:
+    """
+    תור הערכה חסום עם coalescing
+
+    מניה שכבר ממתינה בתור לא נכנסת שוב - ההערכה תרוץ על הנרות העדכניים ביותר
+    בזמן הביצוע. כשהתור מלא הבקשה נזרקת ונספרת.
+    """
+
+    def __init__(self, handler: Callable[[str], None], workers: int = 2, max_pending: int = 64):
+        self.handler = handler
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self.stats = {'submitted': 0, 'coalesced': 0, 'dropped': 0, 'completed': 0, 'errors': 0}
+
+    def submit(self, symbol: str) -> bool:
+        with self._lock:
+            if symbol in self._pending:
+                self.stats['coalesced'] += 1
+                return False
+            try:
+                self._queue.put_nowait(symbol)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                LIVE_DROPPED.inc(queue="realtime_feed")
+                return False
+            self._pending.add(symbol)
+            self.stats['submitted'] += 1
+        LIVE_QUEUE_DEPTH.set(self.depth(), queue="realtime_feed")
+        return True
 
-# טוען קונפיגורציה
-with open("config/settings.json", "r") as f:
-    config = json.load(f)
+    def _worker(self):
+        while True:
+            symbol = self._queue.get()
+            if symbol is None:
+                self._queue.task_done()
+                return
+            # המניה יוצאת מ-pending לפני הביצוע - עסקאות חדשות יכולות לתזמן הערכה הבאה
+            with self._lock:
+                self._pending.discard(symbol)
+            LIVE_QUEUE_DEPTH.set(self.depth(), queue="realtime_feed")
+            outcome = 'completed'
+            try:
+                self.handler(symbol)
+            except Exception as e:
+                outcome = 'errors'
+                logger.error(f"שגיאה בהערכת {symbol}: {e}")
+            finally:
+                with self._lock:
+                    self.stats[outcome] += 1
+                self._queue.task_done()
 
-engine = AlphaScoreEngine(config)
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"eval-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
 
-def evaluate_symbol(symbol):
-    try:
-        price_df = data_fetcher.get_price_data(symbol, interval="1day", outputsize=100)
-        result = engine.evaluate(symbol, price_df)
-        print(f"[{symbol}] AlphaScore: {result['score']} | {result['recommendation']}")
+    def join(self):
+        """המתנה לסיום כל ההערכות שבתור"""
+        self._queue.join()
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+
+class RealtimeFeed:
+    """הזנה חיה: עסקאות -> נרות -> תור הערכה -> AlphaScoreEngine"""
+
+    def __init__(self, symbols=None, engine=None, history_loader: Optional[Callable] = None,
+                 config: Optional[Dict] = None):
+        self.config = config or {}
+        self.symbols = symbols or SYMBOLS
+        self.eval_interval = self.config.get('eval_interval_sec', EVAL_INTERVAL_SEC)
+        self.history_bars = self.config.get('history_bars', HISTORY_BARS)
+        self.print_trades = self.config.get('print_trades', False)
+        self.profile = self.config.get('profile', 'full')
+        self.signal_score = self.config.get('signal_score', SIGNAL_SCORE)
+
+        self._engine = engine
+        self._history_loader = history_loader
+        self._history: Dict[str, pd.DataFrame] = {}
+        self._history_lock = threading.Lock()
+        self.last_evaluated: Dict[str, float] = {}
+
+        self.aggregator = BarAggregator(self.config.get('bar_seconds', BAR_SECONDS))
+        self.evaluations = EvaluationQueue(
+            self.evaluate_symbol,
+            workers=self.config.get('eval_workers', 2),
+            max_pending=self.config.get('max_pending', 64),
+        )
+        self.on_result = None
+
+    @property
+    def engine(self):
+        with self._history_lock:
+            if self._engine is None:
+                self._engine = self._create_engine()
+        return self._engine
+
+    @staticmethod
+    def _create_engine():
+        from core.alpha_score_engine import AlphaScoreEngine
+        settings_path = "config/settings.json"
+        settings = {}
+        if os.path.exists(settings_path):
+            with open(settings_path, "r") as f:
+                settings = json.load(f)
+        return AlphaScoreEngine(settings)
+
+    def _load_history(self, symbol: str) -> pd.DataFrame:
+        """היסטוריה נטענת פעם אחת לכל מניה (מקומית דרך SmartDataManager)"""
+        with self._history_lock:
+            if symbol in self._history:
+                return self._history[symbol]
+        if self._history_loader is not None:
+            history = self._history_loader(symbol, self.history_bars)
+        else:
+            from utils.smart_data_manager import smart_data_manager
+            history = smart_data_manager.get_stock_data(symbol, days=self.history_bars)
+        if history is None:
+            history = pd.DataFrame()
+        with self._history_lock:
+            return self._history.setdefault(symbol, history)
+
+    def price_frame(self, symbol: str) -> pd.DataFrame:
+        """היסטוריה + נרות חיים שנצברו (נר חי גובר על נר היסטורי באותו תאריך)"""
+        history = self._load_history(symbol)
+        live = self.aggregator.frame(symbol)
+        if live.empty:
+            return history
+        if history.empty:
+            return live
+        newest_first = history.index.is_monotonic_decreasing and len(history) > 1
+        combined = pd.concat([history[~history.index.isin(live.index)], live[history.columns.intersection(live.columns)]])
+        return combined.sort_index(ascending=not newest_first)
+
+    def evaluate_symbol(self, symbol: str):
+        price_df = self.price_frame(symbol)
+        result = self.engine.evaluate(symbol, price_df, profile=self.profile)
+        score = result.get('final_score')
+        print(f"[{symbol}] AlphaScore: {score} | סוכנים: {result.get('agents_count', 0)}")
         # כאן אפשר להוסיף: שליחת התראה/מייל/וואטסאפ וכו׳ אם התוצאה היא קניה חזקה!
-        if result['recommendation'].startswith("HIGH"):
+        if score is not None and score >= self.signal_score:
             print(f"🚨🚨 SIGNAL: {symbol} = STRONG BUY 🚨🚨")
+        if self.on_result:
+            self.on_result(symbol, result)
         return result
-    except Exception as e:
-        print(f"Error evaluating {symbol}: {e}")
-
-def on_message(ws, message):
-    data = json.loads(message)
-    if data.get("type") == "trade":
-        for trade in data["data"]:
-            symbol = trade['s']
-            print(f"Live trade: {symbol} | Price: {trade['p']} | Volume: {trade['v']}")
-            # נבדוק אם עבר מספיק זמן מאז ההערכה האחרונה
-            now = time.time()
-            if symbol not in last_evaluated or now - last_evaluated[symbol] > EVAL_INTERVAL_SEC:
-                threading.Thread(target=evaluate_symbol, args=(symbol,)).start()
-                last_evaluated[symbol] = now
-
-def on_error(ws, error):
-    print(f"WebSocket error: {error}")
-
-def on_close(ws, close_status_code, close_msg):
-    print("WebSocket connection closed")
-
-def on_open(ws):
-    # נרשם לקבלת עדכונים
-    for sym in SYMBOLS:
-        ws.send(json.dumps({"type": "subscribe", "symbol": sym}))
-    print(f"Subscribed to real-time data for: {SYMBOLS}")
+
+    def handle_trade(self, symbol: str, price: float, volume: float, timestamp_ms: Optional[int] = None):
+        timestamp_ms = timestamp_ms if timestamp_ms is not None else int(time.time() * 1000)
+        self.aggregator.add_trade(symbol, float(price), float(volume), timestamp_ms)
+        if self.print_trades:
+            print(f"Live trade: {symbol} | Price: {price} | Volume: {volume}")
+        # נבדוק אם עבר מספיק זמן מאז ההערכה האחרונה
+        now = time.time()
+        if symbol not in self.last_evaluated or now - self.last_evaluated[symbol] > self.eval_interval:
+            if self.evaluations.submit(symbol):
+                self.last_evaluated[symbol] = now
+
+    def on_message(self, ws, message):
+        data = json.loads(message)
+        if data.get("type") == "trade":
+            for trade in data["data"]:
+                self.handle_trade(trade['s'], trade['p'], trade.get('v', 0), trade.get('t'))
+
+    def on_error(self, ws, error):
+        print(f"WebSocket error: {error}")
+
+    def on_close(self, ws, close_status_code, close_msg):
+        print("WebSocket connection closed")
+
+    def on_open(self, ws):
+        # נרשם לקבלת עדכונים
+        for sym in self.symbols:
+            ws.send(json.dumps({"type": "subscribe", "symbol": sym}))
+        print(f"Subscribed to real-time data for: {self.symbols}")
+
+    def run(self, socket_url: Optional[str] = None):
+        import websocket
+
+        socket_url = socket_url or f"wss://ws.finnhub.io?token={FINNHUB_KEY}"
+        self.evaluations.start()
+        ws_app = websocket.WebSocketApp(socket_url,
+                                        on_open=self.on_open,
+                                        on_message=self.on_message,
+                                        on_error=self.on_error,
+                                        on_close=self.on_close)
+        print("Connecting to Finnhub WebSocket...")
+        try:
+            ws_app.run_forever()
+        finally:
+            self.evaluations.stop()
+
 
 if __name__ == "__main__":
-    socket_url = f"wss://ws.finnhub.io?token={FINNHUB_KEY}"
-    ws_app = websocket.WebSocketApp(socket_url,
-                                    on_open=on_open,
-                                    on_message=on_message,
-                                    on_error=on_error,
-                                    on_close=on_close)
-    print("Connecting to Finnhub WebSocket...")
-    ws_app.run_forever()
+    # כתיבת הלוג ב-thread מאזין - ה-workers של ההערכה לא מחכים ל-I/O
+    from utils.logger import enable_async_root_logging
+    enable_async_root_logging()
+    RealtimeFeed(SYMBOLS).run()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Train ML Breakout Models - אימון אופליין של מודלי MLBreakoutModel
+מאמן ושומר pipelines לכל מניה במאגר המודלים, כך שהניתוח עצמו רק טוען ומנבא.
+מודל מאומן מחדש רק אם הנתונים השתנו וגם המודל ישן או שזוהה drift (או עם --force).
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+from typing import Dict, List
+
+# הוספת הנתיב לפרויקט
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.ml_breakout_model import MLBreakoutModel
+from utils.smart_data_manager import SmartDataManager
+
+# הגדרת לוגר
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def train_symbols(symbols: List[str], days: int = 1000, force: bool = False,
+                  config: Dict = None) -> Dict[str, List]:
+    """
+    אימון מודלים לרשימת מניות
+
+    Args:
+        symbols: רשימת סימבולים
+        days: היסטוריה לאימון
+        force: אימון מחדש גם למודלים עדכניים
+        config: קונפיגורציה ל-MLBreakoutModel
+
+    Returns:
+        dict עם רשימות trained / skipped / failed
+    """
+    data_manager = SmartDataManager()
+    model = MLBreakoutModel(config)
+    results = {'trained': [], 'skipped': [], 'failed': []}
+
+    for i, symbol in enumerate(symbols, 1):
+        logger.info(f"מאמן {symbol} ({i}/{len(symbols)})...")
+        try:
+            price_df = data_manager.get_stock_data(symbol, days, include_live=False)
+            if price_df is None or price_df.empty:
+                results['failed'].append(symbol)
+                continue
+
+            status = model.train_offline(symbol, price_df.sort_index(), force=force)
+            if status['trained']:
+                results['trained'].append(symbol)
+            elif status['reason'] == 'insufficient_data':
+                results['failed'].append(symbol)
+            else:
+                results['skipped'].append(symbol)
+            logger.info(f"{symbol}: {status}")
+
+        except Exception as e:
+            logger.error(f"שגיאה באימון {symbol}: {e}")
+            results['failed'].append(symbol)
+
+    return results
+
+
+def main():
+    """פונקציה ראשית"""
+    parser = argparse.ArgumentParser(description="אימון אופליין של מודלי פריצה")
+    parser.add_argument('symbols', nargs='*', help='סימבולים (ברירת מחדל: כל הנתונים המקומיים)')
+    parser.add_argument('--days', type=int, default=1000, help='היסטוריה לאימון')
+    parser.add_argument('--force', action='store_true', help='אימון מחדש גם למודלים עדכניים')
+    parser.add_argument('--model-dir', default='models', help='תיקיית מאגר המודלים')
+    parser.add_argument('--max-age-days', type=float, default=30, help='גיל מודל מקסימלי בימים')
+    parser.add_argument('--drift-threshold', type=float, default=1.0, help='סף drift לאימון מחדש')
+    args = parser.parse_args()
+
+    symbols = args.symbols
+    if not symbols:
+        daily_dir = os.path.join("data", "historical_prices", "daily")
+        symbols = sorted(f.split('.')[0] for f in os.listdir(daily_dir) if f.endswith('.csv.gz'))
+
+    config = {
+        'model_dir': args.model_dir,
+        'max_model_age_days': args.max_age_days,
+        'drift_threshold': args.drift_threshold,
+    }
+
+    start = time.time()
+    results = train_symbols(symbols, days=args.days, force=args.force, config=config)
+    elapsed = time.time() - start
+
+    print("\n" + "=" * 60)
+    print("📊 סיכום אימון מודלי פריצה")
+    print("=" * 60)
+    print(f"🧠 אומנו: {len(results['trained'])}")
+    print(f"⏭️ דולגו (עדכניים): {len(results['skipped'])}")
+    print(f"❌ נכשלו: {len(results['failed'])}")
+    print(f"⏱️ זמן כולל: {elapsed:.1f} שניות")
+
+
+if __name__ == "__main__":
+    main()
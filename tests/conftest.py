@@ -0,0 +1,17 @@
+import os
+import shutil
+import tempfile
+
+_USAGE_LOG_DIR = tempfile.mkdtemp(prefix="charles_usage_")
+
+
+def pytest_configure(config):
+    """
+    מנהלי נתונים שנבנים בבדיקות (גם המופע הגלובלי שנוצר בייבוא utils.smart_data_manager
+    והמופעים שבתוך הסוכנים) כותבים את usage_log לתיקייה זמנית ולא ל-data/usage_log.json
+    """
+    os.environ["CHARLES_USAGE_LOG"] = os.path.join(_USAGE_LOG_DIR, "usage_log.json")
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_USAGE_LOG_DIR, ignore_errors=True)
@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.alpha_score_engine import AlphaScoreEngine
+from utils.tracing import AgentTracer, load_trace_summary
+
+
+class _SleepyAgent:
+    def __init__(self, seconds, score=70):
+        self.seconds = seconds
+        self.score = score
+
+    def analyze(self, symbol):
+        time.sleep(self.seconds)
+        return {"score": self.score}
+
+
+class _BrokenAgent:
+    def analyze(self, symbol):
+        raise RuntimeError("boom")
+
+
+def _engine(tmp_path, agents):
+    engine = AlphaScoreEngine({
+        "profiles": {"traced": list(agents)},
+        "tracing": {"export_path": str(tmp_path / "traces.json"), "performance_log": False},
+    })
+    engine.get_agent = agents.get
+    return engine
+
+
+def test_evaluate_records_nested_spans_and_percentiles(tmp_path):
+    agents = {"VReversalAgent": _SleepyAgent(0.02), "GoldenCrossDetector": _SleepyAgent(0.001, score=40),
+              "TrendDetector": _BrokenAgent()}
+    engine = _engine(tmp_path, agents)
+    for _ in range(5):
+        result = engine.evaluate("AAA", profile="traced")
+    assert result["agents_count"] == 2
+
+    trace = engine.tracer.traces[-1]
+    assert trace.name == "evaluate" and trace.attrs["symbol"] == "AAA"
+    assert [span.name for span in trace.children] == list(agents)
+    slow = trace.child("VReversalAgent")
+    assert [phase.name for phase in slow.children] == ["fetch", "compute", "post_process"]
+    assert slow.child("compute").duration_ms >= 20
+    assert slow.attrs["score"] == 70
+    assert trace.child("TrendDetector").attrs["status"] == "error"
+
+    stats = engine.get_trace_stats()
+    assert stats["evaluations"]["count"] == 5
+    # מהאיטי ביותר למהיר
+    assert list(stats["agents"])[0] == "VReversalAgent"
+    slow_stats = stats["agents"]["VReversalAgent"]
+    assert slow_stats["count"] == 5 and slow_stats["p50_ms"] <= slow_stats["p95_ms"] <= slow_stats["p99_ms"]
+    assert slow_stats["phases"]["compute"]["p50_ms"] >= 20
+    assert slow_stats["rss_delta_max_mb"] >= 0
+    assert stats["agents"]["TrendDetector"]["errors"] == 5
+
+    exported = load_trace_summary(str(engine.export_traces()))
+    assert exported["agents"]["VReversalAgent"]["count"] == 5
+    assert exported["recent_traces"][-1]["children"][0]["children"][1]["name"] == "compute"
+    json.dumps(exported)
+
+
+def test_disabled_tracer_is_transparent(tmp_path):
+    tracer = AgentTracer({"enabled": False})
+    with tracer.span("evaluate") as span:
+        assert span is None
+    assert not tracer.traces and tracer.agent_summary() == {}
+
+    engine = _engine(tmp_path, {"VReversalAgent": _SleepyAgent(0)})
+    engine.tracer = tracer
+    assert engine.evaluate("AAA", profile="traced")["final_score"] == 70
@@ -0,0 +1,139 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.alpha_score_engine import AlphaScoreEngine
+from core.agent_loader import clear_shared_agents, get_shared_agent
+
+
+def test_engine_init_builds_no_agents():
+    clear_shared_agents()
+    engine = AlphaScoreEngine()
+    assert engine.get_agent_status()["loaded_agents"] == 0
+    assert "NLPAnalyzer" in engine.enabled_agents
+
+
+def test_cheap_profiles_skip_heavy_agents():
+    engine = AlphaScoreEngine()
+    for profile in ("technical", "sentiment", "news"):
+        agents = engine.get_profile_agents(profile)
+        assert agents
+        assert "NLPAnalyzer" not in agents
+        assert "ReturnForecaster" not in agents
+    assert set(engine.get_profile_agents("full")) == set(engine.enabled_agents)
+
+
+def test_agents_are_shared_across_engines():
+    clear_shared_agents()
+    first = AlphaScoreEngine().get_agent("ATRScoreAgent")
+    second = AlphaScoreEngine().get_agent("ATRScoreAgent")
+    assert first is not None and first is second
+    assert AlphaScoreEngine().get_agent_status()["loaded_agent_names"] == ["ATRScoreAgent"]
+
+
+class _SlowAgent:
+    builds = 0
+
+    def __init__(self, config=None):
+        type(self).builds += 1
+        time.sleep(0.05)
+
+
+class _FlakyAgent:
+    failures = 1
+
+    def __init__(self, config=None):
+        if type(self).failures:
+            type(self).failures -= 1
+            raise RuntimeError("import-time failure")
+
+
+def test_shared_agent_is_built_once_under_concurrency():
+    clear_shared_agents()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_shared_agent(__name__, "_SlowAgent")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _SlowAgent.builds == 1
+    assert len(results) == 8 and all(agent is results[0] for agent in results)
+
+
+def test_failed_agent_build_is_not_cached():
+    clear_shared_agents()
+    assert get_shared_agent(__name__, "_FlakyAgent") is None
+    assert get_shared_agent(__name__, "_FlakyAgent") is not None
+
+
+def test_disabled_agents_are_never_built(tmp_path):
+    config_path = tmp_path / "agent_config.yaml"
+    config_path.write_text(
+        "active_agents:\n"
+        "  technical_analysis:\n"
+        "    atr_score_agent:\n"
+        "      enabled: false\n",
+        encoding="utf-8",
+    )
+    engine = AlphaScoreEngine({"agent_config_path": str(config_path)})
+    assert "ATRScoreAgent" not in engine.enabled_agents
+    assert engine.get_agent("ATRScoreAgent") is None
+    assert "ATRScoreAgent" not in engine.agents
+
+
+class _CountingDataManager:
+    """מנהל נתונים מזויף: סופר טעינות ומחזיר נתונים מהחדש לישן כמו SmartDataManager"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_stock_data(self, symbol, days=90, include_live=True, interval="1day"):
+        import pandas as pd
+        self.requests.append((symbol, days))
+        index = pd.bdate_range(end="2024-06-28", periods=days)[::-1]
+        return pd.DataFrame({column: range(days, 0, -1) for column in ("open", "high", "low", "close", "volume")},
+                            index=index, dtype=float)
+
+
+class _WindowAgent:
+    def __init__(self, days):
+        from core.base.base_agent import PriceRequirement
+        self.price_requirement = PriceRequirement(days=days)
+        self.seen = []
+
+    def analyze(self, symbol, price_df=None):
+        self.seen.append(price_df)
+        return {"score": 50 if price_df is None else len(price_df)}
+
+
+class _SignalsAgent:
+    def analyze(self, symbol, signals=None):
+        return {"score": 10 if signals is None else 90}
+
+
+def test_profile_prices_are_loaded_once_at_max_horizon():
+    manager = _CountingDataManager()
+    agents = {"BollingerSqueeze": _WindowAgent(90), "VolumeSpikeAgent": _WindowAgent(180),
+              "GoldenCrossDetector": _WindowAgent(365), "MultiAgentValidator": _SignalsAgent()}
+    engine = AlphaScoreEngine({"profiles": {"mixed": list(agents)}, "data_manager": manager,
+                               "tracing": {"performance_log": False}})
+    engine.get_agent = agents.get
+
+    result = engine.evaluate("AAA", profile="mixed")
+    assert manager.requests == [("AAA", 365)]
+    assert result["agent_scores"] == {"BollingerSqueeze": 90, "VolumeSpikeAgent": 180,
+                                      "GoldenCrossDetector": 365, "MultiAgentValidator": 10}
+    # כל סוכן מקבל את הימים האחרונים מתוך אותה טעינה
+    short, full = agents["BollingerSqueeze"].seen[0], agents["GoldenCrossDetector"].seen[0]
+    assert short.index[0] == full.index[0] and short["close"].iloc[-1] == full["close"].iloc[89]
+    assert np.shares_memory(short["close"].to_numpy(), full["close"].to_numpy())
+
+    # price_data שהועבר מגיע גם לסוכנים עם analyze(symbol, price_df=None)
+    engine.evaluate("AAA", full, profile="mixed")
+    assert len(manager.requests) == 1 and agents["BollingerSqueeze"].seen[-1] is full
@@ -0,0 +1,103 @@
+import logging
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils import logger as logger_module
+from utils.logger import AgentLogger, SamplingFilter, flush_logs, get_logging_stats
+
+
+class _SlowHandler(logging.Handler):
+    """handler שכותב לאט (כמו דיסק עמוס) ורושם באיזה thread רץ"""
+
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.messages = []
+        self.threads = set()
+        self.formatted_on = set()
+
+    def emit(self, record):
+        time.sleep(0.005)
+        self.threads.add(record.threadName)
+        self.messages.append(self.format(record))
+
+
+class _Lazy:
+    """ערך שמתעד מתי הומר למחרוזת"""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def __str__(self):
+        import threading
+        self.sink.add(threading.current_thread().name)
+        return "lazy"
+
+
+def test_slow_handlers_never_block_the_caller():
+    assert logger_module.ASYNC_LOGGING
+    handler = _SlowHandler()
+    log = logging.getLogger("test.async.slow")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    log.addHandler(logger_module._ASYNC.wrap([handler], sample=False))
+
+    started = time.perf_counter()
+    for i in range(40):
+        log.info("סריקה %s", _Lazy(handler.formatted_on) if i == 0 else i)
+    # 40 * 5ms = 200ms של כתיבה - הקורא לא מחכה לה
+    assert time.perf_counter() - started < 0.1
+    assert flush_logs()
+    assert len(handler.messages) == 40 and handler.messages[0] == "סריקה lazy"
+    # ההודעה הורכבה בזמן הקריאה; הפורמט והכתיבה - ב-thread המאזין
+    assert handler.formatted_on == {threading.current_thread().name}
+    assert get_logging_stats()["batches"] >= 1
+
+
+def test_message_reflects_arguments_at_call_time():
+    handler = _SlowHandler()
+    handler.setLevel(logging.INFO)
+    log = logging.getLogger("test.async.snapshot")
+    log.setLevel(logging.DEBUG)
+    log.propagate = False
+    log.addHandler(logger_module._ASYNC.wrap([handler], sample=False))
+
+    state = {"score": 10}
+    log.info("מצב %s", state)
+    state["score"] = 99
+    # מתחת לרמת ה-handler - ההודעה לא מורכבת בכלל
+    log.debug("לא נכתב %s", _Lazy(handler.formatted_on))
+    assert flush_logs()
+    assert handler.messages == ["מצב {'score': 10}"]
+    assert handler.formatted_on == set()
+
+
+def test_repetitive_per_symbol_messages_are_sampled():
+    sampler = SamplingFilter(burst=3, every=50, window=60)
+
+    def record(msg, level=logging.INFO):
+        return logging.LogRecord("agent.X", level, __file__, 1, msg, None, None)
+
+    passed = sum(sampler.filter(record(f"RSI {i % 97}.5 עבור AAPL")) for i in range(200))
+    assert passed == 3 + (200 - 3) // 50
+    # מניה אחרת - תבנית אחרת
+    assert sampler.filter(record("RSI 12.5 עבור MSFT"))
+    # אזהרות לא נדגמות
+    assert all(sampler.filter(record("חסרים נתונים עבור AAPL", logging.WARNING)) for _ in range(20))
+    assert sampler.suppressed == 200 - passed
+
+
+def test_agent_logger_writes_through_listener(tmp_path, monkeypatch):
+    monkeypatch.setattr(logger_module, "DEFAULT_LOG_DIR", str(tmp_path))
+    agent_logger = AgentLogger("AsyncTestAgent", log_level=logging.INFO)
+    agent_logger.debug("לא נכתב %s", "x")
+    agent_logger.info("ציון %d עבור %s", 70, "AAPL", symbol="AAPL")
+    assert flush_logs()
+    for handler in agent_logger.logger.handlers:
+        for target in handler.targets:
+            getattr(target, "flush_batch", target.flush)()
+    text = (tmp_path / "AsyncTestAgent.log").read_text(encoding="utf-8")
+    assert "ציון 70 עבור AAPL" in text and "לא נכתב" not in text
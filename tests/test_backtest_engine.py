@@ -0,0 +1,186 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.backtest_engine import BacktestEngine
+from utils.price_labels import forward_returns, price_panel
+from core.gap_detector_ultimate import GapDetectorUltimate
+
+
+def _prices(n=200, seed=0, gaps=False, volatility=1.0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, volatility, n))
+    open_ = close + rng.normal(0, 0.5, n)
+    if gaps:
+        jumps = rng.random(n) < 0.15
+        open_[jumps] = close[np.maximum(np.flatnonzero(jumps) - 1, 0)] * rng.uniform(1.03, 1.08, jumps.sum())
+    return pd.DataFrame({
+        "date": pd.bdate_range("2022-01-03", periods=n),
+        "open": open_,
+        "high": np.maximum(open_, close) + 1,
+        "low": np.minimum(open_, close) - 1,
+        "close": close,
+        "volume": rng.integers(1000, 5000, n),
+    })
+
+
+class _LastCloseAgent:
+    """ציון = סגירה אחרונה שהסוכן ראה; רושם את התאריך המאוחר ביותר שקיבל"""
+
+    def __init__(self):
+        self.calls = 0
+        self.latest_seen = []
+
+    def analyze(self, symbol, price_df):
+        self.calls += 1
+        self.latest_seen.append(price_df.index.max())
+        return {"score": float(price_df["close"].iloc[-1])}
+
+
+class _Engine:
+    AGENT_WEIGHTS = {"A": 1, "B": 1}
+
+    def __init__(self, agents):
+        self.agents = agents
+
+    def get_agent(self, name):
+        return self.agents.get(name)
+
+    def get_profile_agents(self, profile):
+        return list(self.agents)
+
+
+def test_walk_forward_has_no_look_ahead_and_reweighting_uses_cache(tmp_path):
+    extended = {"AAA": _prices(n=210, seed=1), "BBB": _prices(n=210, seed=2)}
+    prices = {symbol: df.iloc[:200] for symbol, df in extended.items()}
+    agent_a, agent_b = _LastCloseAgent(), _LastCloseAgent()
+    config = {"step": 10, "window": 50, "warmup": 30, "cache_dir": str(tmp_path)}
+    backtest = BacktestEngine(_Engine({"A": agent_a, "B": agent_b}), config)
+
+    panels = backtest.run(["AAA", "BBB"], prices=prices)
+    signal = panels["A"]["AAA"].dropna()
+    # בכל תאריך הערכה הסוכן ראה נתונים עד אותו תאריך בלבד
+    assert len(signal) == len(range(29, 200, 10))
+    expected = prices["AAA"].set_index("date")["close"].reindex(signal.index)
+    assert np.allclose(signal.to_numpy(), expected.to_numpy())
+    assert all(seen in signal.index or seen in panels["A"]["BBB"].index for seen in agent_a.latest_seen)
+    calls = agent_a.calls + agent_b.calls
+
+    # שינוי משקלים לא מריץ סוכנים
+    equal = backtest.combine({"A": 1, "B": 1})
+    skewed = backtest.combine({"A": 3, "B": 0})
+    assert agent_a.calls + agent_b.calls == calls
+    assert np.allclose(skewed.to_numpy(), panels["A"].reindex(skewed.index).to_numpy())
+    assert equal.shape == skewed.shape
+    metrics = backtest.evaluate_weights({"A": 1, "B": 2}, horizon=5)
+    assert metrics["observations"] > 0
+
+    # מנוע חדש על אותם נתונים - הציונים נטענים מהדיסק; נר חדש מחשב רק את התאריך החדש
+    fresh_a = _LastCloseAgent()
+    again = BacktestEngine(_Engine({"A": fresh_a}), config)
+    again.run(["AAA", "BBB"], prices=extended)
+    assert fresh_a.calls == 2
+    assert again.stats["cached_points"] == 2 * len(signal)
+
+
+def test_forward_returns_are_vectorized_over_panel():
+    prices = {"AAA": _prices(seed=3).set_index("date"), "BBB": _prices(seed=4).set_index("date")}
+    close = price_panel(prices)
+    labels = forward_returns(close, 5)
+    for symbol in close.columns:
+        values = close[symbol].to_numpy()
+        expected = [values[i + 5] / values[i] - 1 if i + 5 < len(values) else np.nan for i in range(len(values))]
+        assert np.allclose(labels[symbol].to_numpy(), expected, equal_nan=True)
+
+
+def _reference_success_rate(agent, df, current_idx, gap_pct):
+    """המימוש הלולאתי הקודם, עם הגבלת התוצאה לנרות עד current_idx"""
+    if current_idx < agent.min_historical_samples:
+        return 0.5
+    gaps = []
+    for i in range(max(0, current_idx - agent.historical_lookback_periods) + 1, current_idx):
+        if i >= len(df) - 1:
+            continue
+        curr_open = df.iloc[i]["open"]
+        hist_gap_pct = (curr_open - df.iloc[i - 1]["close"]) / df.iloc[i - 1]["close"] * 100
+        if abs(hist_gap_pct - gap_pct) <= 2.0 and hist_gap_pct >= agent.gap_threshold_pct:
+            success = any((df.iloc[j]["close"] - curr_open) / curr_open * 100 >= 5.0
+                          for j in range(i + 1, min(len(df), i + 10, current_idx + 1)))
+            gaps.append(success)
+    return 0.5 if len(gaps) < 3 else sum(gaps) / len(gaps)
+
+
+def test_gap_success_rate_matches_loop_reference():
+    df = _prices(n=300, seed=5, gaps=True, volatility=2.5).drop(columns="date")
+    agent = GapDetectorUltimate()
+    history = agent._gap_history(df)
+    rates = [agent._calculate_historical_success_rate(df, 299, gap_pct, history) for gap_pct in (3.5, 5.0, 7.0)]
+    assert any(0 < rate < 1 for rate in rates)
+    for current_idx in (5, 40, 120, 250, 299):
+        for gap_pct in (3.5, 5.0, 7.0):
+            assert np.isclose(agent._calculate_historical_success_rate(df, current_idx, gap_pct, history),
+                              _reference_success_rate(agent, df, current_idx, gap_pct))
+
+
+def test_batch_gap_scan_matches_per_bar_helpers():
+    """סריקת פערים וקטורית על כמה מניות יחד = הלולאה הסקלרית על כל מניה בנפרד"""
+    agent = GapDetectorUltimate()
+    universe = {symbol: _prices(n=260, seed=seed, gaps=True, volatility=2.0).set_index("date")
+                for symbol, seed in (("AAA", 3), ("BBB", 4), ("CCC", 6))}
+    events = agent._scan_gaps(universe)
+    assert set(events["symbol"]) == set(universe)
+
+    for symbol, df in universe.items():
+        table = events.filter(events["symbol"] == symbol)
+        history = agent._gap_history(df)
+        expected = []
+        for idx in range(1, len(df)):
+            prev_close = df["close"].iloc[idx - 1]
+            gap_pct = 100 * (df["open"].iloc[idx] - prev_close) / prev_close
+            if gap_pct < agent.gap_threshold_pct:
+                continue
+            volume = agent._calculate_advanced_volume_metrics(df, idx)
+            run = agent._analyze_gap_and_run_pattern(df, idx, gap_pct)
+            filled = next((f for f in range(1, min(10, len(df) - idx)) if df["low"].iloc[idx + f] <= prev_close), None)
+            expected.append((idx, volume["validation_score"], agent._classify_gap_type(df, idx, gap_pct, volume),
+                             run["max_follow_through"], run["is_gap_and_run"], filled,
+                             agent._calculate_historical_success_rate(df, idx, gap_pct, history)))
+
+        assert table["position"].tolist() == [e[0] for e in expected]
+        np.testing.assert_allclose(table["volume_validation_score"], [e[1] for e in expected])
+        assert table["gap_type"].tolist() == [e[2] for e in expected]
+        np.testing.assert_allclose(table["max_follow_through_pct"], [e[3] for e in expected])
+        assert table["is_gap_and_run"].tolist() == [e[4] for e in expected]
+        assert [event.gap_filled_days for event in table.objects()] == [e[5] for e in expected]
+        np.testing.assert_allclose(table["historical_success_rate"], [e[6] for e in expected])
+        assert [event.date for event in table.head(2)] == [str(df.index[e[0]]) for e in expected[:2]]
+
+
+def test_gap_statistics_batch_mode():
+    agent = GapDetectorUltimate()
+    universe = {"AAA": _prices(n=260, seed=3, gaps=True), "BBB": _prices(n=260, seed=4, gaps=True),
+                "EMPTY": pd.DataFrame()}
+    report = agent.get_gap_statistics(universe)
+    singles = {symbol: agent.get_gap_statistics(universe[symbol]) for symbol in ("AAA", "BBB")}
+    assert report["symbols_scanned"] == 2
+    assert report["total_gaps"] == sum(s["total_gaps"] for s in singles.values())
+    assert report["gap_fill"]["filled_gaps"] == sum(s["gap_fill"]["filled_gaps"] for s in singles.values())
+    for symbol, single in singles.items():
+        assert report["by_symbol"][symbol]["total_gaps"] == single["total_gaps"]
+        assert report["by_symbol"][symbol]["fill_rate"] == single["gap_fill"]["fill_rate"]
+    assert agent.get_gap_statistics(pd.DataFrame()) == {"message": "No gaps detected"}
+
+
+def test_batch_gap_scan_keeps_long_symbol_keys():
+    agent = GapDetectorUltimate()
+    long_key = "NASDAQ:" + "VERYLONGINSTRUMENTIDENTIFIER" * 2
+    universe = {long_key: _prices(n=260, seed=3, gaps=True).set_index("date"),
+                "BBB": _prices(n=260, seed=4, gaps=True).set_index("date")}
+    events = agent._scan_gaps(universe)
+    assert set(events["symbol"]) == set(universe)
+    table = events.filter(events["symbol"] == long_key)
+    assert len(table) and table.head(1)[0].date == str(universe[long_key].index[int(table["position"][0])])
+    assert long_key in agent.get_gap_statistics(universe)["by_symbol"]
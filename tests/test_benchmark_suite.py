@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+import benchmark_suite
+from benchmark_suite import compare_results, run_benchmarks, synthetic_ohlcv, synthetic_universe
+
+
+def test_synthetic_data_is_deterministic_and_consistent():
+    small = synthetic_universe(3, n_bars=100)
+    large = synthetic_universe(10, n_bars=100)
+    # אותה מניה - אותה סדרה בכל גודל יקום
+    assert small["SYN0001"].equals(large["SYN0001"])
+    assert not small["SYN0001"].equals(small["SYN0002"])
+
+    df = synthetic_ohlcv(2500, "ABC")
+    assert len(df) == 2500 and df.index.is_monotonic_increasing
+    assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+    assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
+    assert synthetic_ohlcv(2500, "ABC", newest_first=True).index.is_monotonic_decreasing
+
+
+def test_run_and_compare_flags_regressions():
+    report = run_benchmarks("quick", groups=["universe"], repeats=1, measure_memory=True)
+    results = report["results"]
+    assert set(results) == {"universe.forward_returns[symbols=10]", "universe.gap_statistics[symbols=10]",
+                            "universe.consolidate_panel[symbols=10]"}
+    assert all(r["status"] == "ok" and r["peak_memory_mb"] >= 0 for r in results.values())
+
+    baseline = {"results": {key: dict(r) for key, r in results.items()}}
+    key = "universe.forward_returns[symbols=10]"
+    baseline["results"][key]["median_ms"] = results[key]["median_ms"] / 10
+    comparisons = {c["benchmark"]: c for c in compare_results(report, baseline, tolerance=0.25, min_delta_ms=0.0)}
+    assert comparisons[key]["regression"]
+    assert not comparisons["universe.consolidate_panel[symbols=10]"]["regression"]
+    # הפרש מוחלט קטן מסף הרעש אינו רגרסיה
+    assert not compare_results(report, baseline, min_delta_ms=1e6)[0]["regression"]
+
+
+def test_failed_case_against_ok_baseline_is_a_regression():
+    baseline = {"results": {"a": {"status": "ok", "median_ms": 5.0},
+                            "b": {"status": "ok", "median_ms": 5.0},
+                            "c": {"status": "ok", "median_ms": 5.0},
+                            "d": {"status": "timeout"}}}
+    current = {"results": {"a": {"status": "timeout", "timeout_sec": 60},
+                           "b": {"status": "error", "error": "boom"},
+                           "c": {"status": "skipped"},
+                           "d": {"status": "timeout", "timeout_sec": 60}}}
+    comparisons = {c["benchmark"]: c for c in compare_results(current, baseline)}
+    assert set(comparisons) == {"a", "b"}
+    assert comparisons["a"]["regression"] and comparisons["a"]["status"] == "timeout"
+    assert comparisons["b"]["regression"] and comparisons["b"]["status"] == "error"
+
+
+def test_agent_benchmarks_cover_core_agents():
+    agents = benchmark_suite.core_agents()
+    assert agents["CandlestickAgent"] == "core.candlestick_agent"
+    assert agents["GapDetectorUltimate"] == "core.gap_detector_ultimate"
+    assert "AlphaScoreEngine" not in agents and "BaseAgent" not in agents
+    report = run_benchmarks("quick", groups=["agents"], name_filter="agent.VReversalAgent", repeats=1)
+    assert report["results"]["agent.VReversalAgent[bars=250]"]["status"] == "ok"
+    assert np.isfinite(report["results"]["agent.VReversalAgent[bars=250]"]["median_ms"])
+
+
+def test_kernel_benchmarks_report_speedup():
+    report = run_benchmarks("quick", groups=["kernels"], name_filter="kernels.wma", repeats=1, measure_memory=False)
+    assert set(report["results"]) == {"kernels.wma.apply[bars=250]", "kernels.wma.numpy[bars=250]"}
+    assert report["kernel_speedups"]["wma[bars=250]"] > 1
+
+
+def test_universe_memory_benchmark_reports_bytes_per_symbol():
+    report = run_benchmarks("quick", groups=["data"], name_filter="data.universe_memory", repeats=1,
+                            measure_memory=False)
+    result = report["results"]["data.universe_memory[symbols=10]"]
+    assert result["status"] == "ok"
+    # 10 שנים יומיות: כ-32 בתים לנר בייצוג החסכוני
+    assert result["bytes_per_symbol"] <= 40 * benchmark_suite.MEMORY_BARS
+    assert result["memory_ratio"] > 3 and result["projected_5000_symbols_gb"] < 1
+
+
+def _hanging_benchmarks(monkeypatch, marker):
+    """שתי מדידות: הראשונה חורגת מהזמן (וכותבת את marker אם לא נעצרה), השנייה מהירה"""
+    def slow(size, workdir):
+        def run():
+            time.sleep(1.5)
+            open(marker, "w").close()
+        return run
+    monkeypatch.setattr(benchmark_suite, "BENCHMARKS", [
+        benchmark_suite.Benchmark("test.slow", "test", "bars", slow),
+        benchmark_suite.Benchmark("test.fast", "test", "bars", lambda size, workdir: lambda: None),
+    ])
+
+
+def test_timed_out_case_is_killed(tmp_path, monkeypatch):
+    marker = tmp_path / "finished"
+    _hanging_benchmarks(monkeypatch, marker)
+    report = run_benchmarks("quick", groups=["test"], repeats=1, timeout=0.3, measure_memory=False)
+    time.sleep(2)
+    assert report["results"]["test.slow[bars=250]"]["status"] == "timeout"
+    assert report["results"]["test.fast[bars=250]"]["status"] == "ok"
+    assert "contaminated" not in report["results"]["test.fast[bars=250]"]
+    assert not marker.exists()
+
+
+def test_thread_fallback_marks_later_results(tmp_path, monkeypatch):
+    marker = tmp_path / "finished"
+    _hanging_benchmarks(monkeypatch, marker)
+    monkeypatch.setattr(benchmark_suite.multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+    report = run_benchmarks("quick", groups=["test"], repeats=1, timeout=0.3, measure_memory=False)
+    assert report["results"]["test.slow[bars=250]"]["status"] == "timeout"
+    assert report["results"]["test.fast[bars=250]"]["contaminated"]
+    # המדידה המזוהמת לא משתתפת בהשוואה
+    assert compare_results(report, report) == []
+    time.sleep(2)
+    assert marker.exists()
+
@@ -0,0 +1,59 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from calculate_all_indicators import TechnicalIndicatorsCalculator
+
+
+def _write_prices(data_dir, symbol, n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    df = pd.DataFrame({
+        "date": pd.date_range("2022-01-01", periods=n, freq="D"),
+        "open": close, "high": close * 1.01, "low": close * 0.99,
+        "close": close, "volume": rng.integers(1e5, 2e5, n),
+    })
+    path = data_dir / "historical_prices" / "daily"
+    path.mkdir(parents=True, exist_ok=True)
+    df.to_csv(path / f"{symbol}.csv.gz", compression="gzip", index=False)
+
+
+def test_parallel_build_resumes_and_skips_unchanged(tmp_path):
+    for i, symbol in enumerate(["AAA", "BBB", "CCC"]):
+        _write_prices(tmp_path, symbol, seed=i)
+    calculator = TechnicalIndicatorsCalculator(str(tmp_path))
+
+    first = calculator.process_all_symbols(workers=2)
+    assert sorted(first["success"]) == ["AAA", "BBB", "CCC"]
+    assert first["stats"]["symbols_per_second"] > 0
+    assert (tmp_path / "technical_indicators" / "rsi" / "daily" / "AAA.csv.gz").exists()
+    assert set(calculator.load_manifest()) == {"AAA:daily", "BBB:daily", "CCC:daily"}
+
+    second = calculator.process_all_symbols(workers=2)
+    assert sorted(second["skipped"]) == ["AAA", "BBB", "CCC"]
+    assert second["success"] == []
+
+    _write_prices(tmp_path, "BBB", n=320, seed=7)
+    third = calculator.process_all_symbols(workers=1)
+    assert third["success"] == ["BBB"]
+    indicators = calculator.calculate_all_indicators(calculator.load_price_data("BBB"))
+    assert calculator.load_manifest()["BBB:daily"]["rows"] == len(indicators)
+
+
+def test_forced_subset_keeps_other_manifest_entries(tmp_path):
+    for i, symbol in enumerate(["AAA", "BBB"]):
+        _write_prices(tmp_path, symbol, seed=i)
+    calculator = TechnicalIndicatorsCalculator(str(tmp_path))
+    calculator.process_all_symbols(workers=1)
+    before = calculator.load_manifest()
+
+    forced = calculator.process_all_symbols(symbols=["AAA"], workers=1, force=True)
+    assert forced["success"] == ["AAA"]
+    after = calculator.load_manifest()
+    assert set(after) == {"AAA:daily", "BBB:daily"}
+    assert after["BBB:daily"] == before["BBB:daily"]
+    assert calculator.process_all_symbols(workers=1)["success"] == []
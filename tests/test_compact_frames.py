@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from benchmark_suite import synthetic_ohlcv
+from utils.compact_frames import compact_news, compact_prices, frame_memory
+from utils.smart_data_manager import SmartDataManager, UsageTracker
+
+
+def test_price_policy_keeps_precision_and_drops_labels():
+    df = synthetic_ohlcv(500, "AAA", newest_first=True)
+    df["symbol"] = "AAA"
+    df["source"] = ["api"] * 5 + ["local"] * 495
+    compact = compact_prices(df)
+
+    assert {compact[col].dtype for col in ("open", "high", "low", "close")} == {np.dtype(np.float32)}
+    assert compact["volume"].dtype == np.int64 and (compact["volume"] == df["volume"]).all()
+    assert "symbol" not in compact.columns and compact.attrs["symbol"] == "AAA"
+    assert isinstance(compact["source"].dtype, pd.CategoricalDtype)
+    np.testing.assert_allclose(compact["close"], df["close"], atol=1e-3, rtol=0)
+    assert frame_memory(compact) * 4 < frame_memory(df)
+    # המקור לא השתנה
+    assert df["close"].dtype == np.float64 and "symbol" in df.columns
+
+    assert compact_prices(df, volume_dtype="uint32")["volume"].dtype == np.uint32
+
+
+def test_price_policy_falls_back_when_float32_is_not_enough():
+    df = synthetic_ohlcv(50, "BRK") * [3000, 3000, 3000, 3000, 1]
+    df.iloc[3, df.columns.get_loc("volume")] = np.nan
+    compact = compact_prices(df)
+    # מחירים של ~150,000: צעד float32 גדול מהסבולת - כל המחירים נשארים float64
+    assert (compact.dtypes[["open", "high", "low", "close"]] == np.float64).all()
+    assert compact["volume"].dtype == np.float64
+    with pytest.raises(ValueError):
+        compact_prices(df, volume_dtype="int8")
+
+
+def test_news_strings_are_interned_across_frames():
+    def news(symbol):
+        # מחרוזות שנבנות בזמן ריצה - אובייקט חדש בכל קריאה (בניגוד לליטרלים)
+        wrap = " ".join(["Market", "wrap"])
+        return pd.DataFrame({
+            "headline": [f"{symbol} beats estimates", wrap, f"{symbol} guidance"],
+            "source": ["Reuters", "Reuters", "".join(["Bloom", "berg"])],
+            "url": [f"https://x/{symbol}/{i}" for i in range(3)],
+        })
+    first, second = compact_news(news("AAA")), compact_news(news("BBB"))
+    assert first["headline"].iloc[1] is second["headline"].iloc[1]
+    assert first["url"].dtype == object
+    assert isinstance(compact_news(pd.concat([news("AAA")] * 4))["source"].dtype, pd.CategoricalDtype)
+
+
+def test_manager_serves_compact_frames(tmp_path):
+    manager = SmartDataManager(data_dir=str(tmp_path / "data"))
+    manager.usage_tracker = UsageTracker(str(tmp_path / "usage.json"))
+    manager._save_data("AAA", synthetic_ohlcv(300, "AAA", newest_first=True))
+
+    df = manager.get_stock_data("AAA", days=250, include_live=False)
+    assert len(df) == 250 and df["close"].dtype == np.float32 and df["volume"].dtype == np.int64
+    assert "symbol" not in df.columns and df.attrs["symbol"] == "AAA"
+    assert manager.get_stock_data("AAA", days=250, include_live=False, interval="1wk")["close"].dtype == np.float32
+
+    # הקריאה מהדיסק בדיוק מלא; ללא הייצוג החסכוני גם התוצאה
+    full = manager._get_local_data("AAA")
+    assert full["close"].dtype == np.float64 and "symbol" in full.columns
+    manager.compact_memory = False
+    manager._data_cache.clear()
+    assert manager.get_stock_data("AAA", days=250, include_live=False)["close"].dtype == np.float64
+
+
+def test_api_top_up_writes_full_precision_to_disk(tmp_path):
+    manager = SmartDataManager(data_dir=str(tmp_path / "data"))
+    manager.usage_tracker = UsageTracker(str(tmp_path / "usage.json"))
+    history = synthetic_ohlcv(320, "AAA", newest_first=True) * [25, 25, 25, 25, 1]
+    history.iloc[-1, history.columns.get_loc("close")] = 1234.5678
+    manager._save_data("AAA", history.iloc[20:])
+    manager._get_api_data = lambda symbol, days: history.iloc[:20].copy()
+
+    result = manager.get_stock_data("AAA", days=320, include_live=True)
+    assert len(result) == 320 and result["close"].dtype == np.float32
+
+    stored = manager._get_local_data("AAA")
+    assert stored["close"].dtype == np.float64 and stored["close"].iloc[-1] == 1234.5678
+    # float32 היה משנה כבר בספרה הרביעית אחרי הנקודה; קריאת CSV - לכל היותר ulp
+    np.testing.assert_allclose(stored[["open", "high", "low", "close"]].to_numpy(),
+                               history[["open", "high", "low", "close"]].to_numpy(), rtol=1e-12, atol=0)
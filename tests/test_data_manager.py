@@ -0,0 +1,97 @@
+import os
+import sys
+import sqlite3
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from data_manager import DataManager
+
+
+def _prices(start="2024-01-01", periods=5, close=100.0):
+    dates = pd.bdate_range(start, periods=periods)
+    return pd.DataFrame({
+        "date": dates,
+        "open": close, "high": close + 1, "low": close - 1, "close": close,
+        "volume": 1000, "adjusted_close": close,
+    })
+
+
+def test_upsert_is_idempotent_and_updates(tmp_path):
+    with DataManager(str(tmp_path / "h.db")) as dm:
+        assert dm.update_price_data("AAA", _prices()) == 5
+        # כתיבה חוזרת של אותם תאריכים - עדכון במקום כשל מפתח ראשי
+        dm.update_price_data("AAA", _prices(close=200.0))
+        df = dm.get_price_data("AAA", "2024-01-01", "2024-12-31")
+        assert len(df) == 5
+        assert (df["close"] == 200.0).all()
+        assert list(df["date"]) == sorted(df["date"])
+
+
+def test_missing_dates_in_sql(tmp_path):
+    with DataManager(str(tmp_path / "h.db")) as dm:
+        prices = _prices(periods=5).drop(index=2)
+        dm.update_price_data("AAA", prices)
+        # 2024-01-03 נמחק, סופ"ש לא נספר
+        assert dm.find_missing_dates("AAA", "2024-01-01", "2024-01-09") == ["2024-01-03", "2024-01-08", "2024-01-09"]
+
+
+def test_wal_index_and_read_only(tmp_path):
+    db = str(tmp_path / "h.db")
+    with DataManager(db) as writer:
+        writer.update_price_data("AAA", _prices())
+        with writer._connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM historical_prices WHERE symbol=? AND date BETWEEN ? AND ?",
+                ("AAA", "2024-01-01", "2024-12-31"),
+            ).fetchall()
+            assert any("idx_prices_symbol_date" in row[-1] for row in plan)
+
+    with DataManager(db, read_only=True) as reader:
+        assert len(reader.get_price_data("AAA", "2024-01-01", "2024-12-31")) == 5
+        with pytest.raises(PermissionError):
+            reader.update_price_data("AAA", _prices())
+        with reader._connection() as conn:
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM historical_prices")
+
+
+def test_failed_connect_releases_pool_slot(tmp_path):
+    db = str(tmp_path / "h.db")
+    reader = DataManager(db, read_only=True, pool_size=1, timeout=0.5)
+    # הקובץ עוד לא קיים - חיבור לקריאה בלבד נכשל, פעמיים, בלי לחכות לחיבור שלא ייווצר
+    for _ in range(2):
+        with pytest.raises(sqlite3.OperationalError):
+            with reader._connection():
+                pass
+    assert reader._created == 0
+
+    with DataManager(db) as writer:
+        writer.update_price_data("AAA", _prices())
+    with reader:
+        assert len(reader.get_price_data("AAA", "2024-01-01", "2024-12-31")) == 5
+
+
+
+def test_close_also_closes_leased_connections(tmp_path):
+    dm = DataManager(str(tmp_path / "h.db"), pool_size=2)
+    with dm._connection() as leased:
+        with dm._connection() as idle:
+            pass
+        assert idle is not leased
+        dm.close()
+        assert dm._created == 1
+        # חיבור מושאל ממשיך לעבוד עד שהוא מוחזר
+        assert leased.execute("SELECT 1").fetchone() == (1,)
+    for conn in (idle, leased):
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    assert dm._created == 0 and dm._pool.empty()
+
+    # אחרי close ה-pool נבנה מחדש בעצלות
+    dm.update_price_data("AAA", _prices())
+    assert len(dm.get_price_data("AAA", "2024-01-01", "2024-12-31")) == 5
+    dm.close()
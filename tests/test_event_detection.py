@@ -0,0 +1,103 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from benchmark_suite import synthetic_ohlcv
+from core.base.event_detection import EventTable, bounded, ratio_or, tiered, trailing
+from core.big_money_inflow_agent import BigMoneyInflowAgent
+from core.dark_pool_agent import DarkPoolAgent
+from core.float_pressure_evaluator import FloatPressureEvaluator
+from core.liquidity_trap_agent import LiquidityTrapAgent
+from core.trend_shift_agent import TrendShiftAgent
+
+
+def test_window_helpers_match_scalar_semantics():
+    values = pd.Series(np.random.default_rng(1).normal(size=120))
+    values[[10, 11, 40]] = np.nan
+    rows = np.arange(0, 120)
+    for how, reduce in (("mean", lambda w: w.mean()), ("std", lambda w: w.std()), ("max", lambda w: w.max())):
+        expected = [reduce(values.iloc[max(0, i - 30):i]) for i in rows]
+        np.testing.assert_allclose(trailing(values, rows, 30, how), expected, rtol=1e-12, equal_nan=True)
+
+    # כמו `x / d if d > 0 else default` ו-min(1.0, x) של פייתון: NaN לא "דולף"
+    np.testing.assert_array_equal(ratio_or([1.0, 2.0, 3.0], [2.0, np.nan, 0.0], 1.0), [0.5, 1.0, 1.0])
+    np.testing.assert_array_equal(bounded([np.nan, 2.0, -1.0], lower=0.0, upper=1.0), [0.0, 1.0, 0.0])
+    assert tiered([(np.array([True, False, False]), "a"), (np.array([True, True, False]), "b")], "c").tolist() == \
+        ["a", "b", "c"]
+
+
+def test_event_table_builds_objects_lazily():
+    built = []
+    table = EventTable.from_mask(np.array([True, False, True, True]), rows=np.arange(20, 24),
+                                 factory=lambda record: built.append(int(record["position"])) or int(record["position"]),
+                                 strength=np.array([0.2, 0.9, 0.8, 0.5]),
+                                 significance=np.array(["low", "high", "high", "low"]))
+    assert len(table) == 3 and table.count("significance", ["high"]) == 1
+    assert table.mean("strength", 0.5) == pytest.approx(0.5) and not built
+    assert table.head(2) == [20, 22] and table.top(1, "strength") == [22] and table.last() == 23
+    assert built == [20, 22, 22, 23]
+    empty = EventTable.empty()
+    assert not empty and empty.head(10) == [] and empty.mean("strength", 0.5) == 0.5 and empty.last() is None
+
+
+@pytest.mark.parametrize("agent_cls", [LiquidityTrapAgent, TrendShiftAgent])
+def test_columnar_detection_matches_per_bar_helpers(agent_cls):
+    """הזיהוי העמודתי מחזיר בדיוק את מה שלולאת ה-helpers הסקלריים הייתה מחזירה"""
+    agent = agent_cls()
+    df = synthetic_ohlcv(300, seed=4)
+    df.iloc[120:124, df.columns.get_loc("volume")] = np.nan
+
+    if agent_cls is LiquidityTrapAgent:
+        events = agent._detect_liquidity_traps(df)
+        parts = lambda i: [agent._analyze_volume_trap(df, i), agent._analyze_price_trap(df, i),
+                           agent._analyze_time_trap(df, i), agent._analyze_sector_trap(df, i),
+                           agent._analyze_breakout_potential(df, i)]
+        detect = lambda p: agent._is_liquidity_trap(*p[:4])
+        strength, confidence = agent._calculate_trap_strength, agent._calculate_trap_confidence
+        start, type_field, classify = 20, "trap_type", agent._classify_trap_type
+    else:
+        events = agent._detect_trend_shifts(df)
+        parts = lambda i: [agent._analyze_price_trend(df, i), agent._analyze_volume_trend(df, i),
+                           agent._analyze_technical_trend(df, i), agent._analyze_fundamental_trend(df, i),
+                           agent._analyze_sentiment_trend(df, i)]
+        detect = lambda p: agent._is_trend_shift(*p)
+        strength, confidence = agent._calculate_shift_strength, agent._calculate_shift_confidence
+        start, type_field, classify = 50, "trend_type", agent._classify_trend_type
+
+    expected = []
+    for i in range(start, len(df)):
+        p = parts(i)
+        if detect(p):
+            expected.append((i, strength(*p), confidence(*p), classify(*p[:3])))
+
+    assert events["position"].tolist() == [e[0] for e in expected]
+    assert events["strength"].tolist() == [e[1] for e in expected]
+    assert events["confidence"].tolist() == [e[2] for e in expected]
+    assert events[type_field].tolist() == [e[3] for e in expected]
+    first = events.head(1)[0]
+    assert first.timestamp == df.index[expected[0][0]] and first.strength == expected[0][1]
+
+
+@pytest.mark.parametrize("agent_cls, detect", [
+    (BigMoneyInflowAgent, "_detect_big_money_inflows"),
+    (DarkPoolAgent, "_detect_dark_pool_activities"),
+    (FloatPressureEvaluator, "_detect_float_pressures"),
+    (LiquidityTrapAgent, "_detect_liquidity_traps"),
+])
+def test_flow_agents_share_one_detector(agent_cls, detect):
+    agent = agent_cls()
+    spec = agent.event_spec
+    events = getattr(agent, detect)(synthetic_ohlcv(300, seed=2))
+
+    assert events.fields == ("position", spec.type_field, "strength", "confidence", spec.ratio_field,
+                             "volume_ratio", "price_impact", "significance")
+    assert set(events[spec.type_field]) <= set(spec.type_labels)
+    assert set(events["significance"]) <= {"extreme", "high", "moderate", "low", "minimal"}
+    assert len(events) and events.last().significance == events["significance"][-1]
+
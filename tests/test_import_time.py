@@ -0,0 +1,32 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from check_import_time import measure_import, check_results, parse_importtime
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   yaml\n"
+        "import time:       300 |        420 | core.alpha_score_engine\n"
+    )
+    modules = parse_importtime(stderr)
+    assert modules["yaml"] == {"self_us": 120, "cumulative_us": 120}
+    assert modules["core.alpha_score_engine"]["cumulative_us"] == 420
+
+
+def test_engine_import_does_not_load_heavy_dependencies():
+    result = measure_import("core.alpha_score_engine", repeats=1)
+    assert result["ok"]
+    assert result["heavy_modules"] == []
+    assert check_results([result], {"core.alpha_score_engine": 1000}) == []
+
+
+def test_core_package_exports_are_lazy():
+    import core
+    assert "AnomalyDetector" in dir(core)
+    from core import AnomalyDetector
+    assert AnomalyDetector.__module__ == "core.anomaly_detector"
@@ -0,0 +1,87 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from utils.incremental_resampler import resample_ohlcv, update_resampled
+
+
+def _daily(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        "date": pd.bdate_range("2023-01-02", periods=n),
+        "open": close + rng.normal(0, 0.5, n),
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": rng.integers(1000, 5000, n),
+    })
+
+
+def test_incremental_matches_full_resample():
+    daily = _daily()
+    for timeframe in ("weekly", "monthly"):
+        for label in ("end", "start"):
+            bars = resample_ohlcv(daily.iloc[:200], timeframe, label)
+            bars["marker"] = 1.0
+            updated, first_changed = update_resampled(bars, daily, timeframe, label)
+            full = resample_ohlcv(daily, timeframe, label)
+
+            pd.testing.assert_frame_equal(
+                updated[full.columns].reset_index(drop=True), full, check_dtype=False)
+            # נרות סגורים לא נוגעו - העמודה הנוספת נשמרה עד הנר הפתוח
+            assert first_changed == len(bars) - 1
+            assert updated["marker"].iloc[:first_changed].eq(1.0).all()
+            assert updated["marker"].iloc[first_changed:].isna().all()
+
+            # אין נתונים חדשים - מוחזר אותו אובייקט
+            same, unchanged = update_resampled(full, daily, timeframe, label)
+            assert same is full and unchanged == len(full)
+
+
+def test_timeframe_indicators_incremental_matches_full(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    from enhanced_data_processor import EnhancedDataProcessor
+
+    processor = EnhancedDataProcessor()
+    daily = _daily(n=600)
+    daily["adjusted_close"] = daily["close"]
+
+    previous = processor.calculate_timeframe_indicators(processor.aggregate_to_weekly(daily.iloc[:500]), "weekly")
+    incremental = processor.calculate_timeframe_indicators(processor.aggregate_to_weekly(daily, previous), "weekly")
+    full = processor.calculate_timeframe_indicators(processor.aggregate_to_weekly(daily), "weekly")
+
+    assert list(incremental["date"]) == list(full["date"])
+    for column in ["rsi_14", "macd", "macd_signal", "sma_20", "ema_20", "bollinger_upper", "atr_14"]:
+        np.testing.assert_allclose(incremental[column].to_numpy(dtype=float),
+                                   full[column].to_numpy(dtype=float), rtol=1e-9, equal_nan=True)
+
+
+def test_incremental_update_over_baseline_format_file(tmp_path, monkeypatch):
+    """קובץ קיים בפורמט הישן (תווית סוף התקופה כמחרוזת) - העדכון המצטבר לא מערבב תוויות"""
+    monkeypatch.chdir(tmp_path)
+    from enhanced_data_processor import EnhancedDataProcessor
+
+    processor = EnhancedDataProcessor()
+    daily = _daily(n=400)
+    daily["adjusted_close"] = daily["close"]
+    for timeframe, freq, aggregate in (("weekly", "W", processor.aggregate_to_weekly),
+                                       ("monthly", "M", processor.aggregate_to_monthly)):
+        # כמו הצבירה המקורית: groupby(to_period) ו-strftime של ה-Period
+        old = daily.iloc[:300].copy()
+        old["period"] = pd.to_datetime(old["date"]).dt.to_period(freq)
+        existing = old.groupby("period").agg({"open": "first", "high": "max", "low": "min", "close": "last",
+                                              "volume": "sum", "adjusted_close": "last"}).reset_index()
+        existing["date"] = existing["period"].dt.strftime("%Y-%m-%d")
+        existing = existing.drop(columns="period")
+
+        updated = aggregate(daily, existing)
+        full = aggregate(daily)
+        assert list(updated["date"]) == list(full["date"])
+        assert list(updated["date"][:len(existing)]) == list(existing["date"])
+        labels = pd.DatetimeIndex(pd.to_datetime(updated["date"]))
+        assert (labels == labels.to_period(freq).end_time.normalize()).all()
@@ -0,0 +1,66 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.indicator_store import IndicatorStore
+from utils.smart_data_manager import SmartDataManager
+
+
+def _indicators(n=50, start="2023-01-01"):
+    index = pd.date_range(start, periods=n, freq="D")
+    return pd.DataFrame({
+        "rsi": np.linspace(30, 70, n),
+        "macd": np.linspace(-1, 1, n),
+        "sma_200": [np.nan] * 10 + list(np.linspace(90, 110, n - 10)),
+    }, index=index)
+
+
+def test_roundtrip_with_projection(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    data = _indicators()
+    store.write("abc", data)
+
+    assert store.columns("ABC") == ["rsi", "macd", "sma_200"]
+    rsi = store.read("ABC", ["rsi"])
+    assert list(rsi.columns) == ["rsi"]
+    # מהחדש לישן, מיושר לאינדקס המחירים (כולל שורות חימום עם NaN)
+    assert rsi.index[0] == data.index[-1]
+    assert len(store.read("ABC")) == 50
+    assert store.read("ABC")["sma_200"].isna().sum() == 10
+    assert store.read("ABC", ["missing"]) is None
+
+
+def test_write_merges_new_columns_and_dates(tmp_path):
+    store = IndicatorStore(str(tmp_path))
+    store.write("ABC", _indicators())
+    extra = pd.DataFrame({"atr": np.ones(5)}, index=pd.date_range("2023-02-16", periods=5, freq="D"))
+    store.write("ABC", extra)
+
+    merged = store.read("ABC")
+    assert set(merged.columns) == {"rsi", "macd", "sma_200", "atr"}
+    assert len(merged) == 50 + 1  # 2023-02-20 חדש; השאר חופפים
+    assert list(tmp_path.glob("wide/daily/*")) == [store.path("ABC")]
+
+
+def test_indicators_are_computed_once_and_returned_newest_first(tmp_path):
+    manager = SmartDataManager(data_dir=str(tmp_path / "data"))
+    requests = []
+
+    def get_stock_data(symbol, days=90, **kwargs):
+        requests.append(days)
+        index = pd.bdate_range(end="2024-06-28", periods=days)[::-1]
+        close = 100 + np.sin(np.arange(days) / 7.0) * 5
+        return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1,
+                             "close": close, "volume": np.full(days, 1e6)}, index=index)
+
+    manager.get_stock_data = get_stock_data
+    miss = manager.get_technical_indicators("ABC", "sma", days=90)
+    hit = manager.get_technical_indicators("ABC", "sma", days=90)
+
+    # החישוב (כולל חימום ל-sma_200) רץ פעם אחת; הקריאה השנייה מהטבלה השמורה
+    assert len(requests) == 1
+    assert len(miss) == 90 and miss.index.is_monotonic_decreasing
+    pd.testing.assert_frame_equal(miss, hit, check_freq=False, check_names=False)
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import time
+import threading
+import urllib.request
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from live.live_scheduler import LiveScheduler
+
+
+class _Fetcher:
+    def __init__(self, gate=None):
+        self.calls = []
+        self.gate = gate
+
+    def __call__(self, symbols, interval):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(symbols))
+        return {s: pd.DataFrame({"close": [1.0, 2.0]}) for s in symbols}
+
+
+class _Agent:
+    def __init__(self, delay=0.0):
+        self.seen = []
+        self.delay = delay
+
+    def analyze(self, symbol, price_df):
+        time.sleep(self.delay)
+        self.seen.append((symbol, len(price_df)))
+        return {"score": 50}
+
+
+def test_one_fetch_per_symbol_shared_by_agents_with_cadence():
+    fetcher = _Fetcher()
+    fast, slow = _Agent(), _Agent()
+    scheduler = LiveScheduler(fetch_fn=fetcher, config={"max_workers": 0, "batch_size": 2})
+    for symbol in ["AAA", "BBB", "CCC"]:
+        scheduler.subscribe(symbol, "fast", fast, cadence_sec=10)
+        scheduler.subscribe(symbol, "slow", slow, cadence_sec=30)
+
+    assert scheduler.run_once(now=0) == 3
+    # שלוש מניות בשתי קבוצות - שליפה אחת לכל מניה לשני הסוכנים
+    assert sorted(s for call in fetcher.calls for s in call) == ["AAA", "BBB", "CCC"]
+    assert len(fast.seen) == 3 and len(slow.seen) == 3
+
+    assert scheduler.run_once(now=5) == 0
+    scheduler.run_once(now=10)
+    assert len(fast.seen) == 6 and len(slow.seen) == 3
+    scheduler.run_once(now=30)
+    assert len(fast.seen) == 9 and len(slow.seen) == 6
+
+    metrics = scheduler.metrics()
+    assert metrics["subscriptions"] == 6
+    assert metrics["counters"]["fetches"] == 9
+    assert metrics["agents"]["slow"]["runs"] == 6
+
+
+def test_backpressure_and_metrics_endpoint():
+    gate = threading.Event()
+    agent = _Agent()
+    scheduler = LiveScheduler(fetch_fn=_Fetcher(gate), config={"max_workers": 1, "max_pending": 2, "batch_size": 1})
+    for symbol in ["AAA", "BBB", "CCC", "DDD"]:
+        scheduler.subscribe(symbol, "agent", agent, cadence_sec=60)
+    port = scheduler.start_metrics_server(0)
+    try:
+        scheduler.run_once(now=0)
+        # תור חסום: רק max_pending שליפות נשלחו, השאר נזרקו ונספרו
+        assert scheduler.metrics()["counters"]["fetches_dropped"] == 2
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = json.loads(response.read().decode("utf-8"))
+        assert body["streams"] == 4
+        assert body["queue_depth"] == 2
+
+        gate.set()
+        deadline = time.time() + 5
+        while scheduler.metrics()["queue_depth"] and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(agent.seen) == 2
+    finally:
+        gate.set()
+        scheduler.stop()
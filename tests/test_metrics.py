@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.metrics import MetricsRegistry, get_registry, parse_metrics, scrape
+from utils.smart_data_manager import SmartDataManager, UsageTracker
+
+
+def _value(samples, name, **labels):
+    return next(s["value"] for s in samples if s["name"] == name and all(s["labels"].get(k) == v for k, v in labels.items()))
+
+
+def test_text_format_and_http_endpoint():
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "בקשות", ["source"])
+    depth = registry.gauge("test_queue_depth", "עומק")
+    latency = registry.histogram("test_latency_seconds", "השהיה", ["source"], buckets=(0.1, 1.0))
+    requests.inc(source='fmp "x"')
+    requests.inc(2, source="yfinance")
+    latency.observe(0.05, source="fmp")
+    latency.observe(0.5, source="fmp")
+    latency.observe(5.0, source="fmp")
+    registry.register_collector(lambda: depth.set(7))
+
+    text = registry.render()
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_latency_seconds_bucket{source="fmp",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{source="fmp",le="+Inf"} 3' in text
+    samples = parse_metrics(text)
+    assert _value(samples, "test_requests_total", source='fmp "x"') == 1
+    assert _value(samples, "test_queue_depth") == 7
+    assert _value(samples, "test_latency_seconds_sum", source="fmp") == pytest.approx(5.55)
+
+    with pytest.raises(ValueError):
+        registry.gauge("test_requests_total", "סוג אחר")
+    with pytest.raises(ValueError):
+        requests.inc(symbol="AAA")
+
+    port = registry.start_server(0)
+    try:
+        scraped = scrape(f"http://127.0.0.1:{port}/metrics")
+        assert _value(scraped, "test_requests_total", source="yfinance") == 2
+    finally:
+        registry.stop_server()
+
+
+def test_data_layer_feeds_shared_registry(tmp_path):
+    registry = get_registry()
+    before = parse_metrics(registry.render())
+    read_before = next((s["value"] for s in before if s["name"] == "charles_disk_bytes_read_total"), 0.0)
+
+    manager = SmartDataManager(data_dir=str(tmp_path / "data"))
+    manager.usage_tracker = UsageTracker(str(tmp_path / "usage.json"))
+    prices = pd.DataFrame({"date": pd.bdate_range("2024-01-01", periods=40)[::-1],
+                           "close": np.linspace(10, 20, 40), "volume": 1000})
+    manager._save_data("AAA", prices)
+    assert len(manager.get_stock_data("AAA", days=30, include_live=False)) == 30
+    manager.usage_tracker.log_api_call("fmp", "AAA", False, 0.2)
+    manager.cache_size = 1
+    manager._set_cached_data("BBB", 30, prices)
+
+    samples = parse_metrics(registry.render())
+    assert _value(samples, "charles_disk_bytes_read_total", kind="prices") > read_before
+    assert _value(samples, "charles_provider_requests_total", source="fmp", status="error") >= 1
+    assert _value(samples, "charles_cache_evictions_total") >= 1
+    assert _value(samples, "charles_data_files") == 1
+    assert _value(samples, "charles_data_request_seconds_count", source="local") >= 1
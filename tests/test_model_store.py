@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.model_store import ModelStore, data_fingerprint, feature_statistics
+
+
+def _features(n=200, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "a": rng.normal(shift, 1.0, n),
+        "b": rng.normal(10 + shift, 2.0, n),
+    })
+
+
+def test_save_load_roundtrip(tmp_path):
+    store = ModelStore(str(tmp_path), namespace="unit")
+    X = _features()
+    store.save("ABC", {"coef": [1, 2]}, feature_schema=list(X.columns),
+               fingerprint=data_fingerprint(X), feature_stats=feature_statistics(X))
+
+    entry = store.load("ABC")
+    assert entry["model"] == {"coef": [1, 2]}
+    assert entry["manifest"]["feature_schema"] == ["a", "b"]
+    # טעינה שנייה מוגשת מהמטמון בזיכרון - אותו אובייקט
+    assert store.load("ABC") is entry
+    assert store.list_models() == ["ABC"]
+
+
+def test_needs_retrain_reasons(tmp_path):
+    store = ModelStore(str(tmp_path))
+    X = _features()
+    assert store.needs_retrain("ABC", X)["reason"] == "missing"
+
+    store.save("ABC", object, feature_schema=list(X.columns), feature_stats=feature_statistics(X))
+    assert store.needs_retrain("ABC", _features(seed=1))["retrain"] is False
+    assert store.needs_retrain("ABC", _features(shift=5.0))["reason"] == "drift"
+    assert store.needs_retrain("ABC", X, max_age_days=-1)["reason"] == "age"
+    assert store.needs_retrain("ABC", X[["a"]])["reason"] == "schema_changed"
+
+
+def test_fingerprint_changes_with_data():
+    X = _features()
+    assert data_fingerprint(X) == data_fingerprint(X.copy())
+    Y = X.copy()
+    Y.iloc[-1, 0] += 1
+    assert data_fingerprint(X) != data_fingerprint(Y)
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.alpha_score_engine import AlphaScoreEngine
+from utils.profiling import Profiler
+
+
+class _IlocLoopAgent:
+    """נקודה חמה בסגנון PatternDetector - לולאת iloc על כל הנרות"""
+
+    def analyze(self, symbol):
+        df = pd.DataFrame({"close": np.arange(400, dtype=float)})
+        total = sum(df.iloc[i]["close"] for i in range(len(df)))
+        return {"score": 50 + total % 10}
+
+
+class _DataManager:
+    def get_stock_data(self, symbol, days=30):
+        deadline = time.perf_counter() + 0.05
+        blocks = []
+        while time.perf_counter() < deadline:
+            blocks.append(np.ones(10000))
+        return pd.DataFrame({"close": np.concatenate(blocks)[:days]})
+
+
+def test_cprofile_writes_pstats_per_agent_and_symbol(tmp_path):
+    engine = AlphaScoreEngine({
+        "profiles": {"hot": ["BullishPatternSpotter"]},
+        "profiling": {"mode": "cprofile", "output_dir": str(tmp_path)},
+        "tracing": {"performance_log": False},
+    })
+    engine.get_agent = {"BullishPatternSpotter": _IlocLoopAgent()}.get
+    for symbol in ("AAA", "BBB"):
+        assert engine.evaluate(symbol, profile="hot")["agents_count"] == 1
+
+    assert (tmp_path / "BullishPatternSpotter" / "AAA.pstats").exists()
+    assert (tmp_path / "BullishPatternSpotter" / "BBB.pstats").exists()
+    hot = engine.profiler.hot_functions(10)
+    # ה-iloc של pandas מופיע בראש הרשימה
+    assert any("indexing.py" in row["function"] for row in hot)
+    summary = json.loads(engine.profiler.write_summary().read_text(encoding="utf-8"))
+    assert summary["runs"] == 2 and summary["targets"]["BullishPatternSpotter"]["runs"] == 2
+
+
+def test_sampling_and_memory_on_data_manager_methods(tmp_path):
+    profiler = Profiler({"mode": "sampling", "memory": True, "interval_ms": 1, "output_dir": str(tmp_path),
+                         "targets": ["_DataManager.get_stock_data"]})
+    manager = _DataManager()
+    assert profiler.instrument(manager) == ["get_stock_data"]
+    assert len(manager.get_stock_data("AAA", days=10)) == 10
+    profiler.close()
+
+    lines = (tmp_path / "_DataManager.get_stock_data" / "AAA.collapsed").read_text(encoding="utf-8").splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("get_stock_data" in line for line in lines)
+    assert (tmp_path / "_DataManager.get_stock_data" / "AAA.alloc.txt").exists()
+    summary = profiler.summary()
+    assert summary["hot_functions"][0]["self_samples"] > 0
+    assert summary["artifacts"][0]["allocated_kb"] > 0
+
+
+def test_disabled_by_default_and_env_switch(monkeypatch):
+    assert not Profiler().enabled and not Profiler().wants("MACDMomentumDetector")
+    monkeypatch.setenv("CHARLES_PROFILE", "sampling")
+    monkeypatch.setenv("CHARLES_PROFILE_TARGETS", "MACDMomentumDetector, SmartDataManager.get_stock_data")
+    profiler = Profiler.from_env()
+    assert profiler.mode == "sampling"
+    assert profiler.wants("MACDMomentumDetector") and not profiler.wants("BullishPatternSpotter")
+    assert profiler.wants("SmartDataManager.get_stock_data")
+
+
+def test_class_instrumentation_covers_every_instance(tmp_path):
+    profiler = Profiler({"mode": "cprofile", "output_dir": str(tmp_path),
+                         "targets": ["_DataManager.get_stock_data"]})
+    original = _DataManager.get_stock_data
+    assert profiler.instrument(_DataManager) == ["get_stock_data"]
+    # מופעים שנבנים אחרי העטיפה (למשל בתוך סוכן) נמדדים גם הם
+    _DataManager().get_stock_data("AAA", days=5)
+    _DataManager().get_stock_data(symbol="BBB")
+    assert {run["symbol"] for run in profiler.runs} == {"AAA", "BBB"}
+    assert (tmp_path / "_DataManager.get_stock_data" / "AAA.pstats").exists()
+
+    profiler.close()
+    assert _DataManager.get_stock_data is original
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import threading
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from realtime_feed import BarAggregator, EvaluationQueue, RealtimeFeed
+
+
+def test_trades_aggregate_into_bars():
+    agg = BarAggregator(bar_seconds=60)
+    for t, price, volume in [(0, 10.0, 1), (10_000, 12.0, 2), (50_000, 9.0, 3), (60_000, 11.0, 4)]:
+        agg.add_trade("AAA", price, volume, t)
+    df = agg.frame("AAA")
+    assert len(df) == 2
+    first = df.iloc[0]
+    assert (first["open"], first["high"], first["low"], first["close"], first["volume"]) == (10.0, 12.0, 9.0, 9.0, 6)
+    assert df.iloc[1]["open"] == 11.0
+
+
+def test_queue_coalesces_and_is_bounded():
+    gate = threading.Event()
+    seen = []
+
+    def handler(symbol):
+        gate.wait(5)
+        seen.append(symbol)
+
+    evaluations = EvaluationQueue(handler, workers=1, max_pending=2)
+    assert evaluations.submit("AAA")
+    assert not evaluations.submit("AAA")  # כבר ממתינה
+    assert evaluations.submit("BBB")
+    assert not evaluations.submit("CCC")  # התור מלא
+    assert evaluations.stats["coalesced"] == 1 and evaluations.stats["dropped"] == 1
+
+    evaluations.start()
+    gate.set()
+    evaluations.join()
+    evaluations.stop()
+    assert seen == ["AAA", "BBB"]
+
+
+class _Engine:
+    def __init__(self):
+        self.frames = []
+
+    def evaluate(self, symbol, price_df, profile="full"):
+        self.frames.append(price_df)
+        return {"symbol": symbol, "final_score": 60, "agent_scores": {}, "agents_count": 0}
+
+
+def test_feed_reuses_local_bars_without_refetch():
+    loads = []
+    history = pd.DataFrame(
+        {"open": 1.0, "high": 1.0, "low": 1.0, "close": 1.0, "volume": 1.0},
+        index=pd.DatetimeIndex(["2024-01-03", "2024-01-02"], name="date"),
+    )
+
+    def loader(symbol, bars):
+        loads.append(symbol)
+        return history
+
+    engine = _Engine()
+    feed = RealtimeFeed(["AAA"], engine=engine, history_loader=loader, config={"eval_interval_sec": 0})
+    day_ms = int(pd.Timestamp("2024-01-04").value // 1_000_000)
+    message = {"type": "trade", "data": [{"s": "AAA", "p": 5.0, "v": 10, "t": day_ms}]}
+    feed.on_message(None, json.dumps(message))
+    feed.evaluate_symbol("AAA")
+    feed.evaluate_symbol("AAA")
+
+    assert loads == ["AAA"]
+    frame = engine.frames[-1]
+    assert list(frame.index) == list(pd.DatetimeIndex(["2024-01-04", "2024-01-03", "2024-01-02"]))
+    assert frame.iloc[0]["close"] == 5.0
+
+
+def test_feed_delivers_real_engine_results():
+    from benchmark_suite import synthetic_ohlcv
+    from core.alpha_score_engine import AlphaScoreEngine
+
+    engine = AlphaScoreEngine({"profiles": {"atr": ["ATRScoreAgent"]}, "tracing": {"performance_log": False}})
+    feed = RealtimeFeed(["AAA"], engine=engine, config={"profile": "atr", "eval_interval_sec": 0},
+                        history_loader=lambda symbol, bars: synthetic_ohlcv(bars, symbol, newest_first=True))
+    delivered = []
+    feed.on_result = lambda symbol, result: delivered.append((symbol, result))
+
+    feed.evaluations.start()
+    assert feed.evaluations.submit("AAA")
+    feed.evaluations.join()
+    feed.evaluations.stop()
+
+    assert [symbol for symbol, _ in delivered] == ["AAA"]
+    result = delivered[0][1]
+    assert 0 <= result["final_score"] <= 100 and set(result["agent_scores"]) == {"ATRScoreAgent"}
+
@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import time
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+
+from live.replay import (ReplayRecorder, ReplayServer, StageLatency, load_recording,
+                         redirect_requests, replay_into_feed, sanitize_url, ws_messages)
+
+
+def _trade(symbol, price, t):
+    return json.dumps({"type": "trade", "data": [{"s": symbol, "p": price, "v": 1, "t": t}]})
+
+
+def _recording(path):
+    with ReplayRecorder(str(path)) as recorder:
+        recorder.record_ws(_trade("AAA", 1.0, 0))
+        recorder.record_http("GET", "https://api.example.com/v1/quote?symbol=AAA&token=SECRET", 200, '{"c": 1.5}')
+        time.sleep(0.2)
+        recorder.record_ws(_trade("AAA", 2.0, 1000))
+    return str(path)
+
+
+def test_recording_strips_secrets_and_roundtrips(tmp_path):
+    records = load_recording(_recording(tmp_path / "rec.jsonl.gz"))
+    assert [r["kind"] for r in records] == ["ws", "http", "ws"]
+    assert records[1]["url"] == "/api.example.com/v1/quote?symbol=AAA"
+    assert sanitize_url("https://h/p?b=2&apikey=x&a=1") == "/h/p?a=1&b=2"
+
+
+def test_server_replays_ws_at_speed_and_serves_http(tmp_path):
+    path = _recording(tmp_path / "rec.jsonl.gz")
+    with ReplayServer(path, speed=20.0) as server:
+        start = time.perf_counter()
+        messages = list(ws_messages(server.ws_url))
+        elapsed = time.perf_counter() - start
+        assert [json.loads(m)["data"][0]["p"] for m in messages] == [1.0, 2.0]
+        assert elapsed < 0.2  # 0.2s מוקלטים במהירות x20
+
+        with redirect_requests(server.base_url):
+            response = requests.get("https://api.example.com/v1/quote?token=OTHER&symbol=AAA", timeout=5)
+        assert response.json() == {"c": 1.5}
+        assert server.stats["http_hits"] == 1
+
+
+class _Engine:
+    def evaluate(self, symbol, price_df):
+        return {"score": 50, "recommendation": "HOLD"}
+
+
+def test_feed_stage_histograms(tmp_path):
+    from realtime_feed import RealtimeFeed
+
+    path = _recording(tmp_path / "rec.jsonl.gz")
+    feed = RealtimeFeed(["AAA"], engine=_Engine(), history_loader=lambda s, n: None,
+                        config={"eval_interval_sec": 0})
+    with ReplayServer(path, speed=0) as server:
+        latency = replay_into_feed(feed, ws_messages(server.ws_url), StageLatency())
+    summary = latency.summary()
+    assert summary["ingest"]["count"] == 2
+    assert summary["evaluate"]["count"] >= 1
+    assert {"p50_ms", "p95_ms", "p99_ms"} <= set(summary["queue_wait"])
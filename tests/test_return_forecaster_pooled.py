@@ -0,0 +1,52 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.return_forecaster import ReturnForecaster, FEATURE_COLUMNS
+
+
+def _universe(n_symbols=5, n_bars=300, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range("2022-01-03", periods=n_bars)
+    frames = {}
+    for i in range(n_symbols):
+        close = 50 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, n_bars)))
+        frames[f"S{i}"] = pd.DataFrame({
+            "close": close,
+            "volume": rng.integers(100_000, 1_000_000, n_bars).astype(float),
+        }, index=index)
+    return frames
+
+
+def test_latest_feature_matrix_matches_rolling_features(tmp_path):
+    forecaster = ReturnForecaster({"model_dir": str(tmp_path), "window_size": 20})
+    frames = _universe()
+    symbols, X = forecaster._latest_feature_matrix(frames)
+
+    df = frames["S0"].copy()
+    df["returns"] = df["close"].pct_change()
+    expected = [
+        df["returns"].rolling(20).std().iloc[-1],
+        df["close"].iloc[-1] / df["close"].shift(20).iloc[-1] - 1,
+        df["volume"].rolling(20).mean().iloc[-1],
+        0.0,
+    ]
+    assert symbols[0] == "S0"
+    np.testing.assert_allclose(X[0], expected, rtol=1e-9)
+
+
+def test_pooled_train_and_predict_many(tmp_path):
+    frames = _universe()
+    forecaster = ReturnForecaster({"model_dir": str(tmp_path), "mode": "pooled", "window_size": 20})
+    info = forecaster.train_pooled(frames)
+    assert info["symbols"] == len(frames)
+
+    # מופע חדש טוען את המודל המאוחד מהמאגר
+    fresh = ReturnForecaster({"model_dir": str(tmp_path), "mode": "pooled", "window_size": 20})
+    predictions = fresh.predict_many(frames)
+    assert list(predictions.index) == list(frames)
+    assert list(predictions.columns[:len(FEATURE_COLUMNS)]) == FEATURE_COLUMNS
+    assert predictions["expected_return"].notna().all()
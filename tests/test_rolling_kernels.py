@@ -0,0 +1,50 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.rolling_kernels import (RollingExtremum, local_extrema, rolling_max, rolling_min, rolling_rank_pct,
+                                   rolling_slope, weighted_moving_average)
+
+
+def _series(n=400, seed=3):
+    values = np.random.default_rng(seed).normal(size=n).round(1)  # עיגול - כדי שיהיו שוויונות
+    values[[60, 250]] = np.nan
+    return pd.Series(values, index=pd.bdate_range("2024-01-01", periods=n))
+
+
+def test_kernels_match_rolling_apply():
+    s = _series()
+    pd.testing.assert_series_equal(rolling_rank_pct(s, 50), s.rolling(50).apply(lambda x: (x < x.iloc[-1]).mean()))
+    pd.testing.assert_series_equal(
+        weighted_moving_average(s, 20),
+        s.rolling(20).apply(lambda x: np.average(x, weights=np.arange(1, len(x) + 1))))
+    pd.testing.assert_series_equal(rolling_slope(s, 10),
+                                   s.rolling(10).apply(lambda x: np.polyfit(np.arange(10), x, 1)[0]))
+    for window in (4, 5):
+        pd.testing.assert_series_equal(
+            local_extrema(s, window, "min"),
+            s.rolling(window, center=True).apply(lambda x: x.iloc[window // 2] == x.min()))
+
+
+@pytest.mark.parametrize("window", [1, 7, 50, 400, 401])
+def test_rolling_min_max_match_pandas(window):
+    s = _series()
+    pd.testing.assert_series_equal(rolling_max(s, window), s.rolling(window).max())
+    pd.testing.assert_series_equal(rolling_min(s, window), s.rolling(window).min())
+    # קלט מערך מחזיר מערך
+    assert isinstance(rolling_max(s.to_numpy(), window), np.ndarray)
+
+
+def test_streaming_extremum_matches_batch():
+    values = np.random.default_rng(5).normal(size=300)
+    highs, lows = RollingExtremum(14, "max"), RollingExtremum(14, "min")
+    streamed_high = [highs.update(v) for v in values]
+    streamed_low = [lows.update(v) for v in values]
+    np.testing.assert_allclose(streamed_high, rolling_max(values, 14), equal_nan=True)
+    np.testing.assert_allclose(streamed_low, rolling_min(values, 14), equal_nan=True)
+    assert len(highs._deque) <= 14
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.meta_agent import MetaAgent
+from utils.signal_panel import SignalPanel, optimize_weights
+
+
+def _frames(agents, n_dates=60, symbols=("AAA", "BBB", "CCC"), seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2024-01-01", periods=n_dates)
+    frames = {}
+    for agent_name in agents:
+        values = rng.uniform(0, 100, (n_dates, len(symbols)))
+        values[rng.random(values.shape) < 0.2] = np.nan
+        frames[agent_name] = pd.DataFrame(values, index=dates, columns=list(symbols))
+    return frames
+
+
+def test_panel_consolidation_matches_per_symbol_loops(tmp_path):
+    frames = _frames(["technical", "news", "sentiment"])
+    panel = SignalPanel.from_frames(frames)
+    weights = {"technical": 4, "news": 2}
+    scores = panel.consolidate(weights)
+
+    date, symbol = frames["news"].index[7], "BBB"
+    cell = {name: frame.loc[date, symbol] for name, frame in frames.items() if not np.isnan(frame.loc[date, symbol])}
+    # כמו AlphaScoreEngine.evaluate: סוכן בלי משקל מקבל 1
+    expected = sum(s * weights.get(n, 1) for n, s in cell.items()) / sum(weights.get(n, 1) for n in cell)
+    assert np.isclose(scores.loc[date, symbol], expected, rtol=1e-5)
+
+    loaded = SignalPanel.load(panel.save(tmp_path / "panel.npz"))
+    assert loaded.agents == panel.agents and loaded.symbols == panel.symbols
+    pd.testing.assert_frame_equal(loaded.consolidate(weights), scores)
+
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text("weights:\n  technical: 0.4\n  news: 0.2\n  fundamental: 0.4\n", encoding="utf-8")
+    meta = MetaAgent({"config_path": str(config_path)})
+    meta_scores = meta.consolidate_panel(panel)
+    assert np.isclose(meta_scores.loc[date, symbol], meta.consolidate_scores(cell), rtol=1e-5)
+
+
+def test_rescoring_large_universe_is_sub_second():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(0, 100, (2500, 65, 32)).astype(np.float32)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    panel = SignalPanel(values, pd.bdate_range("2015-01-01", periods=2500),
+                        [f"S{i}" for i in range(65)], [f"A{k}" for k in range(32)])
+    panel.consolidate({})
+    started = time.perf_counter()
+    scores = panel.consolidate({f"A{k}": k % 5 + 1 for k in range(32)})
+    assert time.perf_counter() - started < 1.0
+    assert scores.shape == (2500, 65)
+
+
+def test_optimizer_prefers_informative_agent():
+    rng = np.random.default_rng(2)
+    dates = pd.bdate_range("2024-01-01", periods=120)
+    symbols = [f"S{i}" for i in range(20)]
+    returns = pd.DataFrame(rng.normal(0, 0.02, (120, 20)), index=dates, columns=symbols)
+    informative = 50 + 1000 * returns + rng.normal(0, 5, returns.shape)
+    noise = pd.DataFrame(rng.uniform(0, 100, returns.shape), index=dates, columns=symbols)
+    panel = SignalPanel.from_frames({"Good": informative.clip(0, 100), "Noise": noise})
+
+    initial = {"Good": 1, "Noise": 5}
+    result = optimize_weights(panel, returns, initial=initial, iterations=20)
+    assert -1 <= result["baseline_ic"] < result["ic"] <= 1
+    scores = panel.consolidate(initial)
+    aligned = returns.reindex(index=scores.index, columns=scores.columns)
+    baseline = stats.spearmanr(scores.to_numpy().ravel(), aligned.to_numpy().ravel())
+    assert np.isclose(result["baseline_ic"], baseline.correlation)
+    assert result["weights"]["Good"] > result["weights"]["Noise"]
@@ -0,0 +1,93 @@
+import gzip
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.incremental_resampler import resample_ohlcv
+from utils.smart_data_manager import SmartDataManager, UsageTracker, bars_for
+
+
+def _manager(tmp_path):
+    manager = SmartDataManager(data_dir=str(tmp_path / "data"))
+    manager.usage_tracker = UsageTracker(str(tmp_path / "usage.json"))
+    # בלי רשת: מה שאין בדיסק לא קיים
+    manager._get_api_data = lambda symbol, days: None
+    return manager
+
+
+def _daily(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        "date": pd.bdate_range("2023-01-02", periods=n)[::-1],
+        "open": close + 0.5, "high": close + 2, "low": close - 2, "close": close,
+        "volume": rng.integers(1000, 5000, n),
+    })
+
+
+def test_weekly_and_monthly_are_derived_from_cached_daily_bars(tmp_path):
+    manager = _manager(tmp_path)
+    daily = _daily()
+    manager._save_data("AAA", daily)
+    reads = []
+    read_local = manager._get_local_data
+    manager._get_local_data = lambda symbol, interval="1day": reads.append(interval) or read_local(symbol, interval)
+
+    weekly = manager.get_stock_data("AAA", days=250, include_live=False, interval="1wk")
+    expected = resample_ohlcv(daily.head(250), "weekly").set_index("date").sort_index(ascending=False)
+    assert len(weekly) == bars_for(250, "1wk") == 50
+    pd.testing.assert_frame_equal(weekly, expected.head(50), check_dtype=False)
+    assert weekly.index.is_monotonic_decreasing
+
+    # אופק קצר יותר - אותה דגימה (memo), הנרות היומיים מהמטמון
+    assert manager.get_stock_data("AAA", days=250, include_live=False) is not None
+    short = manager.get_stock_data("AAA", days=100, include_live=False, interval="weekly")
+    pd.testing.assert_frame_equal(short, weekly.head(20))
+    monthly = manager.get_stock_data("AAA", days=250, include_live=False, interval="1mo")
+    assert monthly.index[0] == pd.Timestamp(daily["date"].iloc[0]) + pd.offsets.MonthEnd(0)
+    assert reads == ["1day", "1day"]
+
+    with pytest.raises(ValueError):
+        manager.get_stock_data("AAA", days=10, interval="3day")
+
+
+def test_stored_weekly_file_is_used_without_daily_bars(tmp_path):
+    manager = _manager(tmp_path)
+    weekly_dir = tmp_path / "data" / "historical_prices" / "weekly"
+    weekly_dir.mkdir(parents=True)
+    bars = resample_ohlcv(_daily().iloc[::-1], "weekly")
+    bars["symbol"] = "BBB"
+    (weekly_dir / "BBB.csv.gz").write_bytes(gzip.compress(bars.to_csv(index=False).encode("utf-8")))
+
+    weekly = manager.get_stock_data("BBB", days=100, include_live=False, interval="1wk")
+    assert len(weekly) == 20
+    assert weekly.index[0] == bars["date"].iloc[-1]
+    assert weekly["close"].iloc[0] == pytest.approx(bars["close"].iloc[-1])
+
+
+def test_intraday_intervals_share_one_minute_fetch(tmp_path):
+    manager = _manager(tmp_path)
+    minutes = pd.date_range("2024-06-03 09:30", "2024-06-04 15:59", freq="min")
+    minutes = minutes[minutes.indexer_between_time("09:30", "15:59")]
+    close = np.linspace(100, 110, len(minutes))
+
+    class _Fetcher:
+        calls = 0
+
+        def fetch_live_prices(self, symbol, interval="1min"):
+            _Fetcher.calls += 1
+            return pd.DataFrame({"open": close, "high": close + 1, "low": close - 1, "close": close,
+                                 "volume": 10.0}, index=minutes)
+
+    manager.data_fetcher = _Fetcher()
+    five = manager.get_stock_data("AAA", days=1, interval="5min")
+    hourly = manager.get_stock_data("AAA", days=1, interval="1h")
+    assert _Fetcher.calls == 1
+    assert len(five) == 78 and five.index[0] == minutes[-1].floor("5min")
+    assert five["volume"].iloc[0] == 50.0 and five["open"].iloc[0] == pytest.approx(close[-5])
+    assert len(hourly) == 7 and hourly["high"].iloc[0] == pytest.approx(close[-1] + 1)
@@ -0,0 +1,91 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.streaming_anomaly_engine import (
+    RollingRobustStats, StreamingAnomalyEngine, clear_isolation_models, get_isolation_model
+)
+from core.anomaly_detector import AnomalyDetector
+
+
+def _bars(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    index = pd.date_range("2022-01-01", periods=n, freq="D")
+    return pd.DataFrame({
+        "open": close, "high": close * 1.01, "low": close * 0.99,
+        "close": close, "volume": rng.integers(1e5, 2e5, n).astype(float),
+    }, index=index)
+
+
+def test_rolling_stats_match_numpy():
+    values = np.random.default_rng(1).normal(0, 1, 400)
+    stats = RollingRobustStats(window=100)
+    for v in values:
+        stats.update(v)
+    tail = values[-100:]
+    assert np.isclose(stats.mean, tail.mean())
+    assert np.isclose(stats.std, tail.std(ddof=1))
+    assert np.isclose(stats.median, np.median(tail))
+    assert np.isclose(stats.quantile(0.25), np.quantile(tail, 0.25))
+
+
+def test_update_scores_only_new_bars():
+    clear_isolation_models()
+    engine = StreamingAnomalyEngine({"refit_every": 1000})
+    bars = _bars()
+    first = engine.update("ABC", bars.iloc[:200])
+    assert len(first) == 199
+    assert engine.update("ABC", bars.iloc[:200]) == []
+
+    second = engine.update("ABC", bars)
+    assert len(second) == 100
+    assert all(r["isolation_score"] is not None for r in second)
+    assert engine.snapshot("ABC")["bars_since_fit"] == 100
+
+
+def test_detector_reuses_cached_model():
+    clear_isolation_models()
+    detector = AnomalyDetector({"refit_every": 50})
+    bars = _bars()
+    assert detector._detect_multivariate_anomalies(bars.iloc[:250], "ABC")["model_refitted"]
+    assert not detector._detect_multivariate_anomalies(bars.iloc[:260], "ABC")["model_refitted"]
+    assert detector._detect_multivariate_anomalies(bars, "ABC")["model_refitted"]
+
+
+def test_earlier_window_does_not_reuse_model_trained_on_future_bars():
+    clear_isolation_models()
+    detector = AnomalyDetector({"refit_every": 50})
+    bars = _bars()
+    detector._detect_multivariate_anomalies(bars, "ABC")
+    cached = get_isolation_model("ABC")
+
+    result = detector._detect_multivariate_anomalies(bars.iloc[:150], "ABC")
+    assert result["model_refitted"]
+    assert get_isolation_model("ABC") is cached
+    assert not detector._detect_multivariate_anomalies(bars, "ABC")["model_refitted"]
+
+
+def test_lof_stays_in_ensemble():
+    clear_isolation_models()
+    result = AnomalyDetector()._detect_multivariate_anomalies(_bars(), "ABC")
+    assert result["lof_anomalies"] > 0
+    assert result["total_multivariate_anomalies"] == (
+        result["isolation_forest_anomalies"] + result["lof_anomalies"]
+    )
+
+
+def test_statistical_outliers_use_trailing_window():
+    bars = _bars(400, seed=3)
+    bars.iloc[320, bars.columns.get_loc("close")] *= 1.2
+    detector = AnomalyDetector({"stats_window": 100})
+    outliers = detector._detect_statistical_anomalies(bars)["outliers_methods"]
+
+    scored = StreamingAnomalyEngine({"stats_window": 100}).update("ABC", bars)
+    assert outliers["z_score"] == sum(abs(r["z_score"]) > 3.0 for r in scored)
+    assert outliers["modified_z_score"] == sum(abs(r["modified_z_score"]) > 3.5 for r in scored)
+    assert outliers["iqr"] == sum(r["iqr_outlier"] for r in scored)
+    assert outliers["z_score"] > 0
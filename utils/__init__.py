@@ -27,6 +27,8 @@ from .twelve_utils import TwelveDataUtils
 from .finnhub_utils import FinnhubUtils
 from .forecast_logger import ForecastLogger
 from .fix_cert import fix_certificates
+from .model_store import ModelStore
+from .indicator_store import IndicatorStore
 
 # Version
 __version__ = "1.0.0"
@@ -67,4 +69,6 @@ __all__ = [
     'FinnhubUtils',
     'ForecastLogger',
     'fix_certificates',
+    'ModelStore',
+    'IndicatorStore',
 ]
@@ -0,0 +1,144 @@
+"""
+Compact Frames - ייצוג חסכוני בזיכרון לנתוני מחירים וחדשות
+===========================================================
+
+מדיניות הטיפוסים של שכבת הנתונים (SmartDataManager) לפריימים שנשמרים בזיכרון:
+- מחירים (OHLC) ב-float32 כשהדיוק מאפשר: שגיאת העיגול בכל העמודות קטנה
+  מ-PRICE_TOLERANCE (בפועל - מחירים עד כ-30,000). אחרת כל המחירים נשארים float64.
+- volume שלם וללא NaN כ-int64 (או uint32 לבקשה - חסכוני יותר, אבל הפרש של שני
+  ערכי uint32 גולש, ולכן ברירת המחדל לסוכנים היא int64).
+- symbol / source: ערך יחיד בכל השורות - העמודה נשמטת והערך עובר ל-df.attrs;
+  כמה ערכים - category.
+- חדשות: מחרוזות עוברות sys.intern (כותרת / מקור שחוזרים בכמה מניות נשמרים פעם
+  אחת בתהליך), ועמודות עם מעט ערכים שונים הופכות ל-category.
+
+כ-32 בתים לנר יומי (אינדקס תאריך, 4 * float32, int64) במקום כ-170 עם symbol/source
+כמחרוזות - יקום של 5,000 מניות ו-10 שנים (כ-12.6 מיליון נרות) תופס כ-0.4GB.
+"""
+
+import logging
+import sys
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'adjusted_close')
+
+# שגיאת עיגול מקסימלית (בדולרים) שמותרת במעבר ל-float32 - עשירית סנט
+PRICE_TOLERANCE = 0.001
+
+# עמודות תווית שחוזרות על כל שורה
+LABEL_COLUMNS = ('symbol', 'source')
+
+# חלק מקסימלי של ערכים שונים בעמודת טקסט של חדשות כדי להפוך אותה ל-category
+NEWS_CATEGORY_MAX_RATIO = 0.5
+
+VOLUME_DTYPES = {
+    'int64': np.iinfo(np.int64).max,
+    'uint32': np.iinfo(np.uint32).max,
+}
+
+
+def _compact_prices_columns(df: pd.DataFrame, columns, tolerance: float) -> Dict[str, np.ndarray]:
+    """עמודות המחיר כ-float32 אם כולן עומדות בסבולת (אחרת מילון ריק)"""
+    converted = {}
+    for col in columns:
+        if not pd.api.types.is_float_dtype(df[col]) and not pd.api.types.is_integer_dtype(df[col]):
+            return {}
+        values = df[col].to_numpy(dtype=np.float64)
+        narrow = values.astype(np.float32)
+        with np.errstate(invalid='ignore'):
+            error = np.abs(narrow.astype(np.float64) - values)
+        if np.nanmax(error, initial=0.0) > tolerance:
+            return {}
+        converted[col] = narrow
+    return converted
+
+
+def _compact_volume(volume: pd.Series, dtype: str):
+    """volume כמספר שלם (None אם יש NaN, ערכים לא שלמים או שליליים, או חריגה מהטווח)"""
+    if pd.api.types.is_integer_dtype(volume) and volume.dtype == dtype:
+        return None
+    if not (pd.api.types.is_float_dtype(volume) or pd.api.types.is_integer_dtype(volume)):
+        return None
+    values = volume.to_numpy(dtype=np.float64)
+    if not len(values) or np.isnan(values).any() or (values < 0).any():
+        return None
+    if (values != np.round(values)).any() or values.max() > VOLUME_DTYPES[dtype]:
+        return None
+    return values.astype(dtype)
+
+
+def compact_prices(df: pd.DataFrame, volume_dtype: str = 'int64',
+                   tolerance: float = PRICE_TOLERANCE) -> pd.DataFrame:
+    """
+    פריים מחירים בייצוג החסכוני (הפריים המקורי לא משתנה)
+
+    Args:
+        df: נתוני OHLCV (כל סדר ואינדקס)
+        volume_dtype: int64 או uint32
+        tolerance: שגיאת עיגול מקסימלית למעבר ל-float32
+    """
+    if volume_dtype not in VOLUME_DTYPES:
+        raise ValueError(f"טיפוס volume לא נתמך: {volume_dtype}")
+    if df is None or df.empty:
+        return df
+
+    out = df.copy(deep=False)
+    prices = [col for col in PRICE_COLUMNS if col in out.columns]
+    for col, values in _compact_prices_columns(out, prices, tolerance).items():
+        out[col] = values
+
+    if 'volume' in out.columns:
+        volume = _compact_volume(out['volume'], volume_dtype)
+        if volume is not None:
+            out['volume'] = volume
+
+    for col in LABEL_COLUMNS:
+        if col not in out.columns:
+            continue
+        values = out[col]
+        if values.nunique(dropna=False) == 1:
+            out.attrs[col] = values.iloc[0]
+            out = out.drop(columns=col)
+        elif not isinstance(values.dtype, pd.CategoricalDtype):
+            out[col] = values.astype('category')
+    return out
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def compact_news(df: pd.DataFrame, category_ratio: float = NEWS_CATEGORY_MAX_RATIO) -> pd.DataFrame:
+    """
+    פריים חדשות עם מחרוזות interned ועמודות category (הפריים המקורי לא משתנה)
+
+    Args:
+        df: חדשות (כותרת, תקציר, מקור, url ...)
+        category_ratio: עמודה שבה חלק הערכים השונים קטן מזה הופכת ל-category
+    """
+    if df is None or df.empty:
+        return df
+
+    out = df.copy(deep=False)
+    for col in out.columns:
+        if out[col].dtype != object:
+            continue
+        values = [_intern(value) for value in out[col]]
+        strings = all(isinstance(value, str) for value in values)
+        if strings and len(set(values)) <= category_ratio * len(values):
+            out[col] = pd.Categorical(values)
+        else:
+            out[col] = pd.Series(values, index=out.index, dtype=object)
+    return out
+
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """בתים שהפריים תופס בזיכרון (כולל האינדקס ותוכן המחרוזות)"""
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
@@ -6,54 +6,68 @@ from datetime import datetime
 from utils.credentials import APICredentials
 from utils.fmp_utils import fmp_client
 import time
+import threading
 import urllib3
 import logging
 
 # ביטול אזהרות SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-# ניסיון לטעון huggingface עם pipeline
-try:
+# מודלי huggingface / כלי NLP נטענים בעצלות בשימוש הראשון
+# (ייבוא transformers ויצירת pipeline לוקחים שניות ארוכות - לא בזמן import)
+_NLP_MODELS = {}
+_NLP_LOCK = threading.Lock()
+
+
+def _load_nlp_model(name: str, factory):
+    """טעינת מודל NLP פעם אחת לתהליך (None אם נכשל)"""
+    with _NLP_LOCK:
+        if name not in _NLP_MODELS:
+            try:
+                _NLP_MODELS[name] = factory()
+            except Exception as e:
+                _NLP_MODELS[name] = None
+                logging.warning(f"⚠️ לא ניתן לטעון מודל {name} - משתמש בפתרון חלופי: {e}")
+        return _NLP_MODELS[name]
+
+
+def _create_hf_pipeline(task: str, model: str):
     from transformers import pipeline
-    sentiment_classifier = pipeline(
-        "sentiment-analysis",
-        model="distilbert-base-uncased-finetuned-sst-2-english",
-        use_auth_token=None,
-        trust_remote_code=True,
-        local_files_only=False,
-        ignore_mismatched_sizes=True
-    )
-except Exception as e:
-    sentiment_classifier = None
-    logging.warning(f"⚠️ לא ניתן לטעון מודל sentiment - משתמש בפתרון חלופי: {e}")
-
-try:
-    summarizer = pipeline(
-        "summarization",
-        model="sshleifer/distilbart-cnn-12-6",
+    return pipeline(
+        task,
+        model=model,
         use_auth_token=None,
         trust_remote_code=True,
         local_files_only=False,
         ignore_mismatched_sizes=True
     )
-except Exception as e:
-    summarizer = None
-    logging.warning(f"⚠️ לא ניתן לטעון מודל summarizer - משתמש בפתרון חלופי: {e}")
 
-# כלים חלופיים קלים ל-NLP
-try:
+
+def get_sentiment_classifier():
+    """pipeline סנטימנט של huggingface (נטען בקריאה הראשונה)"""
+    return _load_nlp_model("sentiment", lambda: _create_hf_pipeline(
+        "sentiment-analysis", "distilbert-base-uncased-finetuned-sst-2-english"))
+
+
+def get_summarizer():
+    """pipeline סיכום של huggingface (נטען בקריאה הראשונה)"""
+    return _load_nlp_model("summarizer", lambda: _create_hf_pipeline(
+        "summarization", "sshleifer/distilbart-cnn-12-6"))
+
+
+def _create_vader_analyzer():
     from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer  # type: ignore
-    vader_analyzer = SentimentIntensityAnalyzer()
-except Exception:
-    vader_analyzer = None
-
-try:
-    from sumy.parsers.plaintext import PlaintextParser  # type: ignore
-    from sumy.nlp.tokenizers import Tokenizer  # type: ignore
-    from sumy.summarizers.lsa import LsaSummarizer  # type: ignore
-    sumy_available = True
-except Exception:
-    sumy_available = False
+    return SentimentIntensityAnalyzer()
+
+
+def get_vader_analyzer():
+    """מנתח Vader קל (נטען בקריאה הראשונה)"""
+    return _load_nlp_model("vader", _create_vader_analyzer)
+
+
+def _sumy_available() -> bool:
+    import importlib.util
+    return importlib.util.find_spec("sumy") is not None
 
 def compute_sentiment_label_score(text: str) -> dict:
     """החזרת label ו-score בהתאם לכלי הזמין (OpenAI → transformers → vader → fallback)."""
@@ -99,7 +113,8 @@ def compute_sentiment_label_score(text: str) -> dict:
 
     # 2) transformers מקומי
     try:
-        if sentiment_classifier is not None and text:
+        sentiment_classifier = get_sentiment_classifier() if text else None
+        if sentiment_classifier is not None:
             res = sentiment_classifier(text[:512])[0]
             label_raw = str(res.get('label', '')).lower()
             score = float(res.get('score', 0.5))
@@ -114,7 +129,8 @@ def compute_sentiment_label_score(text: str) -> dict:
         pass
     # 3) Vader
     try:
-        if vader_analyzer is not None and text:
+        vader_analyzer = get_vader_analyzer() if text else None
+        if vader_analyzer is not None:
             vs = vader_analyzer.polarity_scores(text)
             compound = float(vs.get('compound', 0.0))
             if compound >= 0.05:
@@ -395,10 +411,14 @@ class DataFetcher:
         return df[['open', 'close', 'volume', 'high', 'low']]
 
     def summarize_text(self, text, max_length=60, min_length=20):
+        summarizer = get_summarizer()
         if summarizer is None:
             # נסה sumy
-            if sumy_available and text:
+            if text and _sumy_available():
                 try:
+                    from sumy.parsers.plaintext import PlaintextParser  # type: ignore
+                    from sumy.nlp.tokenizers import Tokenizer  # type: ignore
+                    from sumy.summarizers.lsa import LsaSummarizer  # type: ignore
                     parser = PlaintextParser.from_string(text, Tokenizer('english'))
                     lsa = LsaSummarizer()
                     sentences = list(lsa(parser.document, 2))
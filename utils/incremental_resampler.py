@@ -0,0 +1,164 @@
+"""
+Incremental Resampler - המרה מצטברת של נרות יומיים לשבועיים/חודשיים
+=====================================================================
+
+במקום לבנות מחדש את כל הנרות השבועיים/חודשיים מההיסטוריה היומית המלאה בכל ריצה,
+מחשבים מחדש רק את הנר הפתוח (השבוע/החודש הנוכחי) ומוסיפים נרות חדשים שנסגרו.
+נרות סגורים נשמרים כפי שהם - כולל עמודות נוספות (למשל אינדיקטורים) שחושבו עליהם.
+
+resample_intraday ממיר באותו אופן נרות דקה לנרות של 5 דקות / שעה.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# תדירות -> תדירות Period של pandas (שבוע: ב'-א', כמו resample('W'))
+PERIOD_FREQ = {
+    'weekly': 'W',
+    'monthly': 'M',
+}
+
+# תדירות תוך-יומית -> כלל עיגול של pandas (הנר מסומן בתחילת התקופה)
+INTRADAY_FREQ = {
+    '5min': '5min',
+    '1h': 'h',
+}
+
+# עמודה -> פונקציית צבירה
+OHLCV_AGG = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'adjusted_close': 'last',
+}
+
+
+def _prepare_daily(daily: pd.DataFrame, normalize: bool = True) -> pd.DataFrame:
+    """
+    נרמול נתונים יומיים: אינדקס תאריכים ממוין מהישן לחדש, עמודות OHLCV בלבד
+    (normalize=False שומר את השעה - לנרות תוך-יומיים)
+    """
+    if 'date' in daily.columns:
+        dates = daily['date']
+    elif 'Date' in daily.columns:
+        dates = daily['Date']
+    elif isinstance(daily.index, pd.DatetimeIndex):
+        dates = daily.index
+    else:
+        raise ValueError("לנתונים היומיים אין עמודת date או אינדקס תאריכים")
+
+    frame = daily[[col for col in OHLCV_AGG if col in daily.columns]].copy()
+    index = pd.DatetimeIndex(pd.to_datetime(pd.Index(dates), errors='coerce'))
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index.normalize() if normalize else index
+    frame = frame[~frame.index.isna()].sort_index()
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def period_labels(index: pd.DatetimeIndex, timeframe: str, label: str = 'end') -> pd.DatetimeIndex:
+    """
+    תווית הנר לכל תאריך יומי
+
+    Args:
+        index: תאריכים יומיים
+        timeframe: weekly / monthly
+        label: 'end' (סוף התקופה, כמו resample) או 'start' (תחילת התקופה)
+    """
+    periods = index.to_period(PERIOD_FREQ[timeframe])
+    if label == 'start':
+        return pd.DatetimeIndex(periods.start_time)
+    return pd.DatetimeIndex(periods.end_time).normalize()
+
+
+def _aggregate(frame: pd.DataFrame, timeframe: str, label: str) -> pd.DataFrame:
+    if frame.empty:
+        return pd.DataFrame(columns=['date'] + list(frame.columns))
+    keys = period_labels(frame.index, timeframe, label)
+    bars = frame.groupby(keys).agg({col: OHLCV_AGG[col] for col in frame.columns})
+    if 'close' in bars.columns:
+        bars = bars.dropna(subset=['close'])
+    bars.index.name = 'date'
+    return bars.reset_index()
+
+
+def resample_ohlcv(daily: pd.DataFrame, timeframe: str, label: str = 'end') -> pd.DataFrame:
+    """
+    בנייה מלאה של נרות שבועיים/חודשיים מנתונים יומיים
+
+    Returns:
+        DataFrame עם עמודת date ועמודות OHLCV, ממוין מהישן לחדש
+    """
+    return _aggregate(_prepare_daily(daily), timeframe, label)
+
+
+def resample_intraday(bars: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    נרות של 5 דקות / שעה מנרות דקה (או מכל נר תוך-יומי קצר יותר)
+
+    Args:
+        bars: נרות תוך-יומיים עם אינדקס זמן או עמודת date
+        timeframe: מפתח ב-INTRADAY_FREQ
+
+    Returns:
+        DataFrame עם עמודת date (תחילת הנר) ועמודות OHLCV, ממוין מהישן לחדש
+    """
+    frame = _prepare_daily(bars, normalize=False)
+    if frame.empty:
+        return pd.DataFrame(columns=['date'] + list(frame.columns))
+    keys = frame.index.floor(INTRADAY_FREQ[timeframe])
+    grouped = frame.groupby(keys).agg({col: OHLCV_AGG[col] for col in frame.columns})
+    if 'close' in grouped.columns:
+        grouped = grouped.dropna(subset=['close'])
+    grouped.index.name = 'date'
+    return grouped.reset_index()
+
+
+def update_resampled(bars: Optional[pd.DataFrame], daily: pd.DataFrame, timeframe: str,
+                     label: str = 'end') -> Tuple[pd.DataFrame, int]:
+    """
+    עדכון מצטבר של נרות קיימים מזרם הנתונים היומי
+
+    רק הנר האחרון (הפתוח) מחושב מחדש, מהימים היומיים שמתחילת תקופתו, ונרות חדשים
+    מתווספים בסופו. daily חייב לכלול את כל הימים מתחילת התקופה של הנר האחרון
+    (הקובץ היומי המלא או הזנב שלו).
+
+    Returns:
+        (bars מעודכן, מיקום השורה הראשונה שהשתנתה). כשלא השתנה דבר מוחזר
+        אובייקט bars המקורי ו-len(bars).
+    """
+    if bars is None or bars.empty:
+        return resample_ohlcv(daily, timeframe, label), 0
+
+    current = bars.copy()
+    current['date'] = pd.to_datetime(current['date'])
+    current = current.sort_values('date').reset_index(drop=True)
+
+    frame = _prepare_daily(daily)
+    freq = PERIOD_FREQ[timeframe]
+    open_period = pd.Period(current['date'].iloc[-1], freq=freq)
+    tail = frame.iloc[frame.index.searchsorted(open_period.start_time):]
+    if tail.empty:
+        return bars, len(bars)
+
+    tail_bars = _aggregate(tail, timeframe, label)
+    if pd.Period(tail.index[0], freq=freq) == open_period:
+        # הנר הפתוח מחושב מחדש - אם לא השתנה ואין נרות חדשים, אין מה לעדכן
+        columns = [col for col in tail_bars.columns if col != 'date' and col in current.columns]
+        if len(tail_bars) == 1 and np.allclose(
+                tail_bars[columns].to_numpy(dtype=float),
+                current[columns].iloc[[-1]].to_numpy(dtype=float), equal_nan=True):
+            return bars, len(bars)
+        kept = current.iloc[:-1]
+    else:
+        kept = current
+
+    updated = pd.concat([kept, tail_bars], ignore_index=True)
+    return updated, len(kept)
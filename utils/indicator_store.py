@@ -0,0 +1,127 @@
+"""
+Indicator Store - טבלת אינדיקטורים רחבה לכל מניה
+=================================================
+
+קובץ אחד לכל מניה ותדירות, עם כל עמודות האינדיקטורים מיושרות לאינדקס המחירים.
+האחסון עמודתי (npz דחוס - מערך numpy לכל עמודה), כך שקריאה טוענת רק את
+העמודות המבוקשות ושמירה כותבת קובץ יחיד במקום קובץ לכל עמודה.
+"""
+
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_KEY = "__index__"
+
+# קבוצת אינדיקטור -> עמודות בטבלה הרחבה
+INDICATOR_COLUMNS = {
+    'rsi': ['rsi'],
+    'macd': ['macd', 'macd_signal', 'macd_histogram'],
+    'bollinger': ['bb_upper', 'bb_middle', 'bb_lower'],
+    'sma': ['sma_20', 'sma_50', 'sma_200'],
+    'ema': ['ema_12', 'ema_26'],
+    'stochastic': ['stoch_k', 'stoch_d'],
+    'williams_r': ['williams_r'],
+    'cci': ['cci'],
+    'atr': ['atr'],
+    'adx': ['adx'],
+}
+
+# חלון החימום של האינדיקטור הארוך ביותר (sma_200) - נטען בנוסף בחישוב ראשון
+INDICATOR_WARMUP_BARS = 200
+
+
+class IndicatorStore:
+    """
+    אחסון עמודתי של טבלת אינדיקטורים רחבה
+
+    מבנה: <base_dir>/wide/<timeframe>/<SYMBOL>.npz
+    """
+
+    def __init__(self, base_dir: str, timeframe: str = "daily"):
+        self.base_dir = Path(base_dir) / "wide" / timeframe
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, symbol: str) -> Path:
+        return self.base_dir / f"{symbol.upper()}.npz"
+
+    def exists(self, symbol: str) -> bool:
+        return self.path(symbol).exists()
+
+    def columns(self, symbol: str) -> List[str]:
+        """עמודות השמורות בטבלה (קריאת ראש הקובץ בלבד)"""
+        if not self.exists(symbol):
+            return []
+        with np.load(self.path(symbol), allow_pickle=False) as data:
+            return [key for key in data.files if key != INDEX_KEY]
+
+    def read(self, symbol: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        קריאת הטבלה - רק העמודות המבוקשות נטענות מהקובץ
+
+        Args:
+            symbol: סימבול המניה
+            columns: עמודות לטעינה (None = כולן)
+
+        Returns:
+            DataFrame ממוין מהחדש לישן, או None אם הקובץ או עמודה מבוקשת חסרים
+        """
+        if not self.exists(symbol):
+            return None
+        try:
+            with np.load(self.path(symbol), allow_pickle=False) as data:
+                stored = [key for key in data.files if key != INDEX_KEY]
+                wanted = stored if columns is None else list(columns)
+                if any(col not in stored for col in wanted):
+                    return None
+                index = pd.DatetimeIndex(data[INDEX_KEY].astype("datetime64[ns]"), name="date")
+                frame = pd.DataFrame({col: data[col] for col in wanted}, index=index)
+        except Exception as e:
+            logger.warning(f"שגיאה בקריאת טבלת אינדיקטורים עבור {symbol}: {e}")
+            return None
+        return frame.sort_index(ascending=False)
+
+    def write(self, symbol: str, data: pd.DataFrame, merge: bool = True) -> Path:
+        """
+        כתיבת הטבלה לקובץ יחיד (החלפה אטומית)
+
+        Args:
+            symbol: סימבול המניה
+            data: DataFrame עם אינדקס תאריכים ועמודות אינדיקטורים
+            merge: מיזוג עם עמודות/תאריכים קיימים (ערכים חדשים גוברים)
+        """
+        frame = data.copy()
+        frame.index = pd.to_datetime(frame.index)
+        if merge:
+            existing = self.read(symbol)
+            if existing is not None:
+                frame = frame.combine_first(existing)
+        frame = frame[~frame.index.duplicated(keep="first")].sort_index()
+
+        arrays = {INDEX_KEY: frame.index.values.astype("datetime64[ns]").astype(np.int64)}
+        for col in frame.columns:
+            values = pd.to_numeric(frame[col], errors="coerce").to_numpy()
+            arrays[str(col)] = values.astype(np.float64, copy=False)
+
+        path = self.path(symbol)
+        fd, tmp_name = tempfile.mkstemp(dir=self.base_dir, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **arrays)
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+    def delete(self, symbol: str):
+        if self.exists(symbol):
+            self.path(symbol).unlink()
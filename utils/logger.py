@@ -9,9 +9,15 @@ Logger System - מערכת לוגים מתקדמת
 import logging
 import logging.handlers
 import os
+import queue
+import re
 import sys
+import threading
+import time
+import atexit
+import copy
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import json
 import traceback
 from pathlib import Path
@@ -23,6 +29,19 @@ DEFAULT_LOG_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 DEFAULT_LOG_BACKUP_COUNT = 5
 DEFAULT_LOG_DIR = "log"
 
+# לוגים אסינכרוניים: הקריאה ללוג רק מכניסה רשומה לתור; פורמט וכתיבה לקובץ/למסך
+# מתבצעים ב-thread מאזין יחיד, באצוות. CHARLES_SYNC_LOGGING=1 מחזיר כתיבה ישירה.
+ASYNC_LOGGING = os.getenv("CHARLES_SYNC_LOGGING", "").strip().lower() not in ("1", "true", "yes")
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+# דגימת הודעות חוזרות (רמות מתחת ל-WARNING): burst הראשונות בכל חלון עוברות,
+# אחריהן אחת מכל every
+DEFAULT_SAMPLE_BURST = 5
+DEFAULT_SAMPLE_EVERY = 100
+DEFAULT_SAMPLE_WINDOW = 60.0
+
 class StructuredFormatter(logging.Formatter):
     """
     פורמטר לוגים מובנה עם JSON
@@ -66,6 +85,291 @@ class StructuredFormatter(logging.Formatter):
         
         return json.dumps(log_entry, ensure_ascii=False)
 
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler בלי flush אחרי כל רשומה - המאזין קורא ל-flush_batch
+    פעם אחת בסוף כל אצווה
+    """
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+    def close(self):
+        self.flush_batch()
+        super().close()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    דגימת הודעות חוזרות (למשל אותה הודעה לכל מניה בכל מחזור סריקה).
+
+    המפתח הוא שם הלוגר, הרמה ותבנית ההודעה כשמספרים מוחלפים ב-# - כך
+    "RSI 31.2 עבור AAPL" ו-"RSI 44.0 עבור AAPL" נספרות יחד. WARNING ומעלה לא נדגמות.
+    """
+
+    _NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+    def __init__(self, burst: int = DEFAULT_SAMPLE_BURST, every: int = DEFAULT_SAMPLE_EVERY,
+                 window: float = DEFAULT_SAMPLE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.every = max(1, every)
+        self.window = window
+        self._counts: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.burst <= 0:
+            return True
+        template = record.msg if isinstance(record.msg, str) else str(type(record.msg))
+        key = (record.name, record.levelno, self._NUMBERS.sub("#", template))
+        now = record.created
+        with self._lock:
+            entry = self._counts.get(key)
+            if entry is None or now - entry[0] > self.window:
+                if len(self._counts) > 10000:
+                    self._counts.clear()
+                entry = self._counts[key] = [now, 0]
+            entry[1] += 1
+            seen = entry[1]
+            passed = seen <= self.burst or (seen - self.burst) % self.every == 0
+            if not passed:
+                self.suppressed += 1
+        return passed
+
+
+class LogQueueListener(threading.Thread):
+    """
+    thread מאזין יחיד: מוציא רשומות מהתור באצוות, מעביר כל רשומה ל-handlers
+    של הלוגר שלה (לפי רמת ה-handler) ומבצע flush פעם אחת לכל handler בסוף האצווה
+    """
+
+    def __init__(self, log_queue: queue.Queue, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        super().__init__(daemon=True, name="log-listener")
+        self.queue = log_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.batches = 0
+        self.records = 0
+        self._stopping = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            if first is None:
+                self.queue.task_done()
+                self._drain()
+                return
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.queue.task_done()
+                    self._dispatch(batch)
+                    self._drain()
+                    return
+                batch.append(item)
+            self._dispatch(batch)
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.task_done()
+            else:
+                batch.append(item)
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[tuple]):
+        touched = {}
+        for targets, record in batch:
+            for handler in targets:
+                if record.levelno >= handler.level:
+                    try:
+                        handler.handle(record)
+                    except Exception:
+                        handler.handleError(record)
+                    touched[id(handler)] = handler
+        for handler in touched.values():
+            try:
+                getattr(handler, "flush_batch", handler.flush)()
+            except Exception:
+                pass
+        self.batches += 1
+        self.records += len(batch)
+        for _ in batch:
+            self.queue.task_done()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self.join(timeout)
+
+
+class AsyncQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler שמעביר לתור עותק של הרשומה, יחד עם ה-handlers היעד.
+    ההודעה מורכבת מ-args כבר כאן (רק לרשומות שעברו את הרמה והדגימה) - אובייקט
+    שמשתנה אחרי הקריאה (dict, DataFrame, מצב של סוכן) לא משנה את מה שנכתב.
+    פורמט ה-handlers (JSON, זמן) והכתיבה נשארים ב-thread המאזין; כשהתור מלא
+    הרשומה נזרקת ונספרת - הלוג לעולם לא חוסם את הסריקה.
+    """
+
+    def __init__(self, log_queue: queue.Queue, targets: List[logging.Handler]):
+        super().__init__(log_queue)
+        self.targets = list(targets)
+        self.setLevel(min((h.level for h in self.targets), default=logging.NOTSET))
+        self.dropped = 0
+
+    def emit(self, record: logging.LogRecord):
+        # עותק - handlers אחרים של אותה רשומה (למשל ה-root) רואים את המקור
+        record = copy.copy(record)
+        try:
+            record.msg = record.getMessage()
+        except Exception:
+            self.handleError(record)
+            return
+        record.args = None
+        try:
+            self.queue.put_nowait((self.targets, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        for handler in self.targets:
+            handler.close()
+        super().close()
+
+
+class _AsyncLogging:
+    """תור משותף, מאזין ומסנן דגימה לכל הלוגרים של המודול"""
+
+    def __init__(self):
+        self.queue: Optional[queue.Queue] = None
+        self.listener: Optional[LogQueueListener] = None
+        self.sampler = SamplingFilter()
+        self.handlers: List[AsyncQueueHandler] = []
+        self._lock = threading.Lock()
+
+    def ensure_started(self) -> queue.Queue:
+        with self._lock:
+            if self.listener is None or not self.listener.is_alive():
+                self.queue = queue.Queue(maxsize=DEFAULT_QUEUE_SIZE)
+                self.listener = LogQueueListener(self.queue)
+                self.listener.start()
+                for handler in self.handlers:
+                    handler.queue = self.queue
+            return self.queue
+
+    def wrap(self, handlers: List[logging.Handler], sample: bool = True) -> AsyncQueueHandler:
+        handler = AsyncQueueHandler(self.ensure_started(), handlers)
+        if sample:
+            handler.addFilter(self.sampler)
+        with self._lock:
+            self.handlers.append(handler)
+        return handler
+
+    def stop(self):
+        with self._lock:
+            listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+
+
+_ASYNC = _AsyncLogging()
+atexit.register(_ASYNC.stop)
+
+
+def _attach_handlers(logger: logging.Logger, handlers: List[logging.Handler], sample: bool = True):
+    """חיבור handlers ללוגר - מאחורי התור האסינכרוני, או ישירות כשהוא כבוי"""
+    if ASYNC_LOGGING:
+        logger.addHandler(_ASYNC.wrap(handlers, sample=sample))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+
+
+def _file_handler(log_file: Path, level: int) -> logging.Handler:
+    """handler קובץ עם רוטציה (flush באצוות כשהלוג אסינכרוני)"""
+    handler_class = BufferedRotatingFileHandler if ASYNC_LOGGING else logging.handlers.RotatingFileHandler
+    handler = handler_class(
+        log_file,
+        maxBytes=DEFAULT_LOG_FILE_SIZE,
+        backupCount=DEFAULT_LOG_BACKUP_COUNT,
+        encoding='utf-8'
+    )
+    handler.setLevel(level)
+    handler.setFormatter(StructuredFormatter())
+    return handler
+
+
+def enable_async_root_logging(sample: bool = True) -> bool:
+    """
+    העברת ה-handlers של ה-root logger (למשל מ-logging.basicConfig) מאחורי התור,
+    כך שגם לוגרים רגילים (logging.getLogger(__name__)) לא כותבים על ה-thread הקורא
+
+    Returns:
+        האם בוצעה העברה
+    """
+    root = logging.getLogger()
+    handlers = [h for h in root.handlers if not isinstance(h, AsyncQueueHandler)]
+    if not ASYNC_LOGGING or not handlers:
+        return False
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(_ASYNC.wrap(handlers, sample=sample))
+    return True
+
+
+def flush_logs(timeout: float = 5.0) -> bool:
+    """המתנה עד שכל הרשומות שבתור נכתבו (למשל לפני יציאה או בבדיקות)"""
+    log_queue = _ASYNC.queue
+    if log_queue is None:
+        return True
+    deadline = time.monotonic() + timeout
+    with log_queue.all_tasks_done:
+        while log_queue.unfinished_tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            log_queue.all_tasks_done.wait(remaining)
+    return True
+
+
+def get_logging_stats() -> Dict[str, int]:
+    """מוני הלוג האסינכרוני: רשומות, אצוות, הודעות שנדגמו החוצה ורשומות שנזרקו"""
+    listener = _ASYNC.listener
+    return {
+        'async': ASYNC_LOGGING,
+        'queued': _ASYNC.queue.qsize() if _ASYNC.queue is not None else 0,
+        'records': listener.records if listener else 0,
+        'batches': listener.batches if listener else 0,
+        'suppressed': _ASYNC.sampler.suppressed,
+        'dropped': sum(handler.dropped for handler in _ASYNC.handlers),
+    }
+
+
 class AgentLogger:
     """
     לוגר מותאם לסוכנים
@@ -87,54 +391,47 @@ class AgentLogger:
         log_dir.mkdir(exist_ok=True)
         
         # File handler עם רוטציה
-        log_file = log_dir / f"{self.agent_name}.log"
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=DEFAULT_LOG_FILE_SIZE,
-            backupCount=DEFAULT_LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.DEBUG)
+        file_handler = _file_handler(log_dir / f"{self.agent_name}.log", logging.DEBUG)
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
-        
-        # הגדרת פורמט
-        formatter = StructuredFormatter()
-        file_handler.setFormatter(formatter)
         console_handler.setFormatter(logging.Formatter(DEFAULT_LOG_FORMAT))
         
-        # הוספת handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # הוספת handlers (מאחורי התור האסינכרוני - ללא I/O על thread הסוכן)
+        _attach_handlers(self.logger, [file_handler, console_handler])
     
-    def debug(self, message: str, **kwargs):
+    def debug(self, message: str, *args, **kwargs):
         """לוג debug"""
-        self._log(logging.DEBUG, message, **kwargs)
+        self._log(logging.DEBUG, message, *args, **kwargs)
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, *args, **kwargs):
         """לוג info"""
-        self._log(logging.INFO, message, **kwargs)
+        self._log(logging.INFO, message, *args, **kwargs)
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, *args, **kwargs):
         """לוג warning"""
-        self._log(logging.WARNING, message, **kwargs)
+        self._log(logging.WARNING, message, *args, **kwargs)
     
-    def error(self, message: str, **kwargs):
+    def error(self, message: str, *args, **kwargs):
         """לוג error"""
-        self._log(logging.ERROR, message, **kwargs)
+        self._log(logging.ERROR, message, *args, **kwargs)
     
-    def critical(self, message: str, **kwargs):
+    def critical(self, message: str, *args, **kwargs):
         """לוג critical"""
-        self._log(logging.CRITICAL, message, **kwargs)
+        self._log(logging.CRITICAL, message, *args, **kwargs)
     
-    def _log(self, level: int, message: str, **kwargs):
-        """פונקציה פנימית ללוג"""
+    def _log(self, level: int, message: str, *args, **kwargs):
+        """
+        פונקציה פנימית ללוג - בדיקת רמה לפני כל עבודה; args בסגנון %s מורכבים
+        להודעה רק לרשומות שעוברות את הרמה והדגימה
+        """
+        if not self.logger.isEnabledFor(level):
+            return
         extra = {'agent_name': self.agent_name}
         extra.update(kwargs)
         
-        self.logger.log(level, message, extra=extra)
+        self.logger.log(level, message, *args, extra=extra)
 
 class SystemLogger:
     """
@@ -157,54 +454,47 @@ class SystemLogger:
         log_dir.mkdir(exist_ok=True)
         
         # File handler עם רוטציה
-        log_file = log_dir / f"{self.name}.log"
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=DEFAULT_LOG_FILE_SIZE,
-            backupCount=DEFAULT_LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.DEBUG)
+        file_handler = _file_handler(log_dir / f"{self.name}.log", logging.DEBUG)
         
         # Console handler
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
-        
-        # הגדרת פורמט
-        formatter = StructuredFormatter()
-        file_handler.setFormatter(formatter)
         console_handler.setFormatter(logging.Formatter(DEFAULT_LOG_FORMAT))
         
-        # הוספת handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        # הוספת handlers (מאחורי התור האסינכרוני - ללא I/O על ה-thread הקורא)
+        _attach_handlers(self.logger, [file_handler, console_handler])
     
-    def debug(self, message: str, **kwargs):
+    def debug(self, message: str, *args, **kwargs):
         """לוג debug"""
-        self._log(logging.DEBUG, message, **kwargs)
+        self._log(logging.DEBUG, message, *args, **kwargs)
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, *args, **kwargs):
         """לוג info"""
-        self._log(logging.INFO, message, **kwargs)
+        self._log(logging.INFO, message, *args, **kwargs)
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, *args, **kwargs):
         """לוג warning"""
-        self._log(logging.WARNING, message, **kwargs)
+        self._log(logging.WARNING, message, *args, **kwargs)
     
-    def error(self, message: str, **kwargs):
+    def error(self, message: str, *args, **kwargs):
         """לוג error"""
-        self._log(logging.ERROR, message, **kwargs)
+        self._log(logging.ERROR, message, *args, **kwargs)
     
-    def critical(self, message: str, **kwargs):
+    def critical(self, message: str, *args, **kwargs):
         """לוג critical"""
-        self._log(logging.CRITICAL, message, **kwargs)
+        self._log(logging.CRITICAL, message, *args, **kwargs)
     
-    def _log(self, level: int, message: str, **kwargs):
-        """פונקציה פנימית ללוג"""
+    def _log(self, level: int, message: str, *args, **kwargs):
+        """
+        פונקציה פנימית ללוג - בדיקת רמה לפני כל עבודה; args בסגנון %s מורכבים
+        להודעה רק לרשומות שעוברות את הרמה והדגימה
+        """
+        if not self.logger.isEnabledFor(level):
+            return
         extra = {'system_name': self.name}
         extra.update(kwargs)
         
-        self.logger.log(level, message, extra=extra)
+        self.logger.log(level, message, *args, extra=extra)
 
 class PerformanceLogger:
     """
@@ -227,21 +517,10 @@ class PerformanceLogger:
         log_dir.mkdir(exist_ok=True)
         
         # File handler עם רוטציה
-        log_file = log_dir / "performance.log"
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=DEFAULT_LOG_FILE_SIZE,
-            backupCount=DEFAULT_LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.INFO)
-        
-        # הגדרת פורמט
-        formatter = StructuredFormatter()
-        file_handler.setFormatter(formatter)
+        file_handler = _file_handler(log_dir / "performance.log", logging.INFO)
         
-        # הוספת handler
-        self.logger.addHandler(file_handler)
+        # הוספת handler (מדדים לא נדגמים - כל רשומה נשמרת)
+        _attach_handlers(self.logger, [file_handler], sample=False)
     
     def log_execution_time(self, agent_name: str, symbol: str, execution_time: float, 
                           score: Optional[float] = None, confidence: Optional[str] = None):
@@ -305,21 +584,10 @@ class DataLogger:
         log_dir.mkdir(exist_ok=True)
         
         # File handler עם רוטציה
-        log_file = log_dir / "data.log"
-        file_handler = logging.handlers.RotatingFileHandler(
-            log_file,
-            maxBytes=DEFAULT_LOG_FILE_SIZE,
-            backupCount=DEFAULT_LOG_BACKUP_COUNT,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.INFO)
-        
-        # הגדרת פורמט
-        formatter = StructuredFormatter()
-        file_handler.setFormatter(formatter)
+        file_handler = _file_handler(log_dir / "data.log", logging.INFO)
         
-        # הוספת handler
-        self.logger.addHandler(file_handler)
+        # הוספת handler (מדדים לא נדגמים - כל רשומה נשמרת)
+        _attach_handlers(self.logger, [file_handler], sample=False)
     
     def log_data_validation(self, symbol: str, data_type: str, is_valid: bool, 
                            validation_errors: Optional[list] = None):
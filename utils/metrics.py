@@ -0,0 +1,311 @@
+"""
+Metrics Registry - מדדים תפעוליים בפורמט Prometheus
+===================================================
+
+רישום מרכזי של counters, gauges ו-histograms לשכבת הנתונים, לספקי ה-API,
+למנוע ולמצב הלייב. המדדים מוגשים בפורמט הטקסט של Prometheus דרך endpoint
+HTTP מקומי (GET /metrics) ונקראים גם ע"י דשבורדי Streamlit (scrape).
+
+שימוש:
+    from utils.metrics import get_registry
+    CACHE_REQUESTS = get_registry().counter("charles_cache_requests_total", "בקשות למטמון", ["result"])
+    CACHE_REQUESTS.inc(result="hit")
+
+ערכים שמחושבים רק בעת קריאה (למשל מספר קבצי נתונים) נאספים ע"י collectors
+שנרשמים ב-register_collector ורצים לפני כל render().
+"""
+
+import logging
+import math
+import re
+import threading
+import weakref
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_PORT = 9108
+
+# דליי זמן בשניות (ברירת המחדל של לקוחות Prometheus, מורחבת לקריאות API איטיות)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """משפחת מדד עם שמות labels; כל צירוף ערכי labels הוא סדרה נפרדת"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels {sorted(labels)} לא תואמים ל-{list(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        help_text = self.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines = [f"# HELP {self.name} {help_text}", f"# TYPE {self.name} {self.type_name}"]
+        return "\n".join(lines + self._samples())
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """מונה עולה בלבד"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("counter יכול רק לעלות")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    """ערך נוכחי שיכול לעלות ולרדת"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """היסטוגרמה מצטברת (דליים, סכום ומונה) כמו ב-Prometheus"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state["counts"][bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def snapshot(self, **labels) -> Dict:
+        """count ו-sum לסדרה אחת (למשל לבדיקות או לסיכומים)"""
+        state = self._values.get(self._key(labels))
+        return {"count": state["count"], "sum": state["sum"]} if state else {"count": 0, "sum": 0.0}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]})
+                           for key, s in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), state["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} "
+                             f"{cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """רישום המדדים של התהליך והגשתם ב-HTTP"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable] = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"המדד {name} כבר רשום כ-{metric.type_name} עם labels {list(metric.labelnames)}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def register_collector(self, collector: Callable):
+        """
+        פונקציה שרצה לפני כל render() ומעדכנת gauges.
+        מתודה של מופע נשמרת כ-weakref - המופע לא נשאר חי בגלל הרישום.
+        """
+        ref = weakref.WeakMethod(collector) if hasattr(collector, "__self__") else (lambda: collector)
+        with self._lock:
+            self._collectors.append(ref)
+
+    def collect(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        dead = []
+        for ref in collectors:
+            collector = ref()
+            if collector is None:
+                dead.append(ref)
+                continue
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"collector מדדים נכשל: {e}")
+        if dead:
+            with self._lock:
+                self._collectors = [ref for ref in self._collectors if ref not in dead]
+
+    def render(self) -> str:
+        """כל המדדים בפורמט הטקסט של Prometheus"""
+        self.collect()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    def reset(self):
+        """איפוס ערכי כל המדדים (ההגדרות נשארות)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.clear()
+
+    # ---------- HTTP ----------
+
+    def start_server(self, port: int = DEFAULT_METRICS_PORT, host: str = "127.0.0.1") -> int:
+        """endpoint HTTP מקומי: GET /metrics מחזיר את המדדים בפורמט Prometheus"""
+        if self._server is not None:
+            return self._server.server_port
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0].rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info(f"מדדי Prometheus זמינים ב-http://{host}:{self._server.server_port}/metrics")
+        return self._server.server_port
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+REGISTRY = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """הרישום המשותף של התהליך"""
+    return REGISTRY
+
+
+_SAMPLE_RE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{(.*)\})?\s+(\S+)$')
+_LABEL_RE = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> List[Dict]:
+    """
+    פענוח טקסט בפורמט Prometheus לרשימת דגימות {name, labels, value}
+    (לדשבורדים - ללא תלות בספריית Prometheus)
+    """
+    samples = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _SAMPLE_RE.match(line)
+        if not match:
+            continue
+        labels = {key: value.replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")
+                  for key, value in _LABEL_RE.findall(match.group(3) or "")}
+        samples.append({"name": match.group(1), "labels": labels, "value": float(match.group(4))})
+    return samples
+
+
+def scrape(url: str = f"http://127.0.0.1:{DEFAULT_METRICS_PORT}/metrics", timeout: float = 2.0) -> List[Dict]:
+    """קריאת endpoint מדדים ופענוחו"""
+    from urllib.request import urlopen
+    with urlopen(url, timeout=timeout) as response:
+        return parse_metrics(response.read().decode("utf-8"))
@@ -0,0 +1,248 @@
+"""
+Model Store - מאגר מודלים מאומנים
+==================================
+
+אחסון מתמשך של pipelines מאומנים יחד עם סכמת תכונות, טביעת אצבע של נתוני האימון
+וסטטיסטיקות תכונות לזיהוי drift.
+כולל מטמון בזיכרון ברמת התהליך כך שחיזוי חם אינו טוען את הקובץ מחדש.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_DIR = "models"
+DEFAULT_MAX_MODEL_AGE_DAYS = 30
+DEFAULT_DRIFT_THRESHOLD = 1.0
+
+# מטמון ברמת התהליך: (נתיב, mtime) -> רשומה טעונה
+_MEMORY_CACHE: Dict[str, Dict[str, Any]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    טביעת אצבע יציבה של DataFrame (ערכים + אינדקס + עמודות)
+
+    Args:
+        df: נתוני האימון
+
+    Returns:
+        מחרוזת sha1 המזהה את הנתונים
+    """
+    hasher = hashlib.sha1()
+    hasher.update(",".join(map(str, df.columns)).encode("utf-8"))
+    if len(df) > 0:
+        row_hashes = pd.util.hash_pandas_object(df, index=True).values
+        hasher.update(row_hashes.tobytes())
+    return hasher.hexdigest()
+
+
+def feature_statistics(X: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+    """חישוב ממוצע וסטיית תקן לכל תכונה - בסיס לבדיקת drift"""
+    stats = {}
+    for col in X.columns:
+        values = pd.to_numeric(X[col], errors="coerce")
+        stats[col] = {
+            "mean": float(values.mean()) if values.notna().any() else 0.0,
+            "std": float(values.std()) if values.notna().sum() > 1 else 0.0,
+        }
+    return stats
+
+
+def drift_score(train_stats: Dict[str, Dict[str, float]], X: pd.DataFrame) -> float:
+    """
+    מדד drift: ממוצע ההפרש המתוקנן בין ממוצעי התכונות הנוכחיים לממוצעי האימון
+
+    Args:
+        train_stats: סטטיסטיקות שנשמרו בעת האימון
+        X: תכונות עדכניות
+
+    Returns:
+        ציון drift (0 = אין שינוי)
+    """
+    shifts = []
+    for col, stats in train_stats.items():
+        if col not in X.columns:
+            continue
+        values = pd.to_numeric(X[col], errors="coerce").dropna()
+        if values.empty:
+            continue
+        std = stats.get("std") or 0.0
+        if std <= 0 or not np.isfinite(std):
+            continue
+        shifts.append(abs(float(values.mean()) - stats.get("mean", 0.0)) / std)
+    return float(np.mean(shifts)) if shifts else 0.0
+
+
+class ModelStore:
+    """
+    מאגר מודלים מאומנים על הדיסק
+
+    כל מודל נשמר כזוג קבצים:
+    - <name>.joblib - האובייקט המאומן (pipeline / dict של pipelines)
+    - <name>.json - מניפסט: סכמת תכונות, טביעת אצבע, סטטיסטיקות, זמן אימון
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_MODEL_DIR, namespace: str = ""):
+        self.model_dir = Path(model_dir) / namespace if namespace else Path(model_dir)
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+    def _model_path(self, name: str) -> Path:
+        return self.model_dir / f"{name}.joblib"
+
+    def _manifest_path(self, name: str) -> Path:
+        return self.model_dir / f"{name}.json"
+
+    def exists(self, name: str) -> bool:
+        """האם קיים מודל שמור בשם זה"""
+        return self._model_path(name).exists() and self._manifest_path(name).exists()
+
+    def save(self, name: str, model: Any, feature_schema: List[str],
+             fingerprint: str = "", feature_stats: Optional[Dict] = None,
+             metadata: Optional[Dict] = None) -> Path:
+        """
+        שמירת מודל מאומן ומניפסט
+
+        Args:
+            name: שם המודל (למשל סימבול)
+            model: האובייקט המאומן
+            feature_schema: רשימת התכונות בסדר שבו המודל מצפה להן
+            fingerprint: טביעת אצבע של נתוני האימון
+            feature_stats: סטטיסטיקות תכונות לזיהוי drift
+            metadata: מידע נוסף (מדדי ביצוע, קונפיגורציה וכו')
+
+        Returns:
+            נתיב קובץ המודל
+        """
+        model_path = self._model_path(name)
+        manifest = {
+            "name": name,
+            "trained_at": datetime.now().isoformat(),
+            "feature_schema": list(feature_schema),
+            "fingerprint": fingerprint,
+            "feature_stats": feature_stats or {},
+            "metadata": metadata or {},
+        }
+
+        # כתיבה לקובץ זמני והחלפה אטומית - קוראים במקביל לא יראו קובץ חלקי
+        import joblib
+        tmp_path = model_path.with_suffix(".joblib.tmp")
+        joblib.dump(model, tmp_path)
+        tmp_path.replace(model_path)
+        with open(self._manifest_path(name), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+
+        with _CACHE_LOCK:
+            _MEMORY_CACHE.pop(str(model_path), None)
+
+        logger.info(f"מודל נשמר: {model_path}")
+        return model_path
+
+    def load_manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        """טעינת המניפסט בלבד (זול - ללא deserialization של המודל)"""
+        path = self._manifest_path(name)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"שגיאה בטעינת מניפסט {path}: {e}")
+            return None
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        טעינת מודל ומניפסט - מוגש מהמטמון בזיכרון כל עוד הקובץ לא השתנה
+
+        Returns:
+            dict עם model ו-manifest, או None אם אין מודל שמור
+        """
+        model_path = self._model_path(name)
+        if not self.exists(name):
+            return None
+
+        key = str(model_path)
+        mtime = model_path.stat().st_mtime
+        with _CACHE_LOCK:
+            cached = _MEMORY_CACHE.get(key)
+            if cached is not None and cached["mtime"] == mtime:
+                return cached["entry"]
+
+        try:
+            import joblib
+            entry = {"model": joblib.load(model_path), "manifest": self.load_manifest(name) or {}}
+        except Exception as e:
+            logger.warning(f"שגיאה בטעינת מודל {model_path}: {e}")
+            return None
+
+        with _CACHE_LOCK:
+            _MEMORY_CACHE[key] = {"mtime": mtime, "entry": entry}
+        return entry
+
+    def model_age_days(self, name: str) -> Optional[float]:
+        """גיל המודל בימים לפי זמן האימון במניפסט"""
+        manifest = self.load_manifest(name)
+        if not manifest or "trained_at" not in manifest:
+            return None
+        trained_at = datetime.fromisoformat(manifest["trained_at"])
+        return (datetime.now() - trained_at).total_seconds() / 86400.0
+
+    def needs_retrain(self, name: str, X: Optional[pd.DataFrame] = None,
+                      max_age_days: float = DEFAULT_MAX_MODEL_AGE_DAYS,
+                      drift_threshold: float = DEFAULT_DRIFT_THRESHOLD) -> Dict[str, Any]:
+        """
+        בדיקה האם נדרש אימון מחדש: מודל חסר, ישן מדי, או drift בתכונות
+
+        Args:
+            name: שם המודל
+            X: תכונות עדכניות לבדיקת drift (אופציונלי)
+            max_age_days: גיל מקסימלי בימים
+            drift_threshold: סף ציון drift
+
+        Returns:
+            dict עם retrain (bool), reason, age_days ו-drift
+        """
+        manifest = self.load_manifest(name)
+        if manifest is None or not self._model_path(name).exists():
+            return {"retrain": True, "reason": "missing", "age_days": None, "drift": None}
+
+        age = self.model_age_days(name)
+        drift = None
+        if X is not None and not X.empty:
+            drift = drift_score(manifest.get("feature_stats", {}), X)
+
+        if X is not None and set(manifest.get("feature_schema", [])) - set(X.columns):
+            return {"retrain": True, "reason": "schema_changed", "age_days": age, "drift": drift}
+        if age is not None and age > max_age_days:
+            return {"retrain": True, "reason": "age", "age_days": age, "drift": drift}
+        if drift is not None and drift > drift_threshold:
+            return {"retrain": True, "reason": "drift", "age_days": age, "drift": drift}
+        return {"retrain": False, "reason": "fresh", "age_days": age, "drift": drift}
+
+    def list_models(self) -> List[str]:
+        """רשימת שמות המודלים השמורים"""
+        return sorted(p.stem for p in self.model_dir.glob("*.joblib"))
+
+    def delete(self, name: str):
+        """מחיקת מודל ומניפסט"""
+        for path in (self._model_path(name), self._manifest_path(name)):
+            if path.exists():
+                path.unlink()
+        with _CACHE_LOCK:
+            _MEMORY_CACHE.pop(str(self._model_path(name)), None)
+
+
+def clear_memory_cache():
+    """ניקוי מטמון המודלים בזיכרון"""
+    with _CACHE_LOCK:
+        _MEMORY_CACHE.clear()
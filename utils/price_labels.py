@@ -0,0 +1,79 @@
+"""
+Price Labels - נרמול מחירים ותוויות תשואה עתידית
+================================================
+
+פונקציות משותפות ל-BacktestEngine, ל-GapDetectorUltimate ול-benchmark_suite:
+- normalize_prices: אינדקס תאריכים ממוין מהישן לחדש ועמודות באותיות קטנות
+- price_panel: טבלת תאריך x מניה של עמודה אחת
+- forward_returns: תשואה עתידית וקטורית על כל הנרות וכל המניות
+- forward_hit_offsets: אחרי כמה נרות המחיר הגיע ליעד (חלון קדימה, בלי לולאה על נרות)
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def normalize_prices(df: pd.DataFrame) -> pd.DataFrame:
+    """נרמול נתוני מחיר: אינדקס תאריכים ממוין מהישן לחדש ועמודות באותיות קטנות"""
+    frame = df.copy()
+    frame.columns = [str(col).lower() for col in frame.columns]
+    if 'date' in frame.columns:
+        frame.index = pd.to_datetime(frame.pop('date'), errors='coerce')
+    elif not isinstance(frame.index, pd.DatetimeIndex):
+        raise ValueError("לנתוני המחיר אין עמודת date או אינדקס תאריכים")
+    index = pd.DatetimeIndex(frame.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame.index = index
+    frame.index.name = 'date'
+    frame = frame[~frame.index.isna()].sort_index()
+    return frame[~frame.index.duplicated(keep='last')]
+
+
+def price_panel(prices: Dict[str, pd.DataFrame], column: str = 'close') -> pd.DataFrame:
+    """טבלת תאריך x מניה של עמודה אחת מכל המניות"""
+    columns = {symbol: df[column] for symbol, df in prices.items() if column in df.columns}
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index()
+
+
+def forward_returns(close: pd.DataFrame, horizon: int = 5) -> pd.DataFrame:
+    """
+    תשואה עתידית close(t+h) / close(t) - 1 לכל הנרות ולכל המניות בבת אחת
+
+    Returns:
+        אותו מבנה כמו close; NaN היכן שהעתיד עוד לא ידוע
+    """
+    return close.shift(-horizon) / close - 1
+
+
+def forward_hit_offsets(close, reference, window: int, threshold_pct: float) -> np.ndarray:
+    """
+    לכל נר: אחרי כמה נרות (1..window-1) הסגירה הגיעה לפחות ל-reference * (1 + threshold_pct%)
+
+    Args:
+        close: מחירי סגירה, מהישן לחדש
+        reference: מחיר הייחוס לכל נר (למשל מחיר הפתיחה של הפער)
+        window: אורך חלון הבדיקה (כמו range(i + 1, i + window))
+        threshold_pct: אחוז התנועה הנדרש
+
+    Returns:
+        מערך float - ההיסט של הפגיעה הראשונה, או NaN אם לא הייתה
+    """
+    close = np.asarray(close, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    n = len(close)
+    span = max(int(window) - 1, 0)
+    offsets = np.full(n, np.nan)
+    if n == 0 or span == 0:
+        return offsets
+    future = sliding_window_view(np.concatenate([close[1:], np.full(span, np.nan)]), span)
+    with np.errstate(invalid='ignore'):
+        hits = future >= (reference * (1 + threshold_pct / 100.0))[:, None]
+    found = hits.any(axis=1)
+    offsets[found] = hits[found].argmax(axis=1) + 1
+    return offsets
@@ -0,0 +1,339 @@
+"""
+Profiling Hooks - פרופיילינג לפי דרישה לסוכנים ולמסלולי נתונים
+===============================================================
+
+מצב פרופיילינג שמופעל להרצה אחת (main.py --profile או משתני סביבה):
+- cprofile: פרופיילר דטרמיניסטי - קובץ pstats לכל (סוכן, מניה)
+- sampling: דגימת מחסנית כל interval_ms - קובץ collapsed-stack (פורמט flamegraph) לכל (סוכן, מניה)
+- memory: השוואת snapshots של tracemalloc לפני ואחרי כל סוכן
+
+בסוף הרצה על יקום, summary() מצרף את כל ההרצות ומחזיר את הפונקציות החמות ביותר
+ואת שורות ההקצאה הגדולות ביותר.
+
+משתני סביבה:
+    CHARLES_PROFILE=cprofile|sampling
+    CHARLES_PROFILE_TARGETS=MACDMomentumDetector,SmartDataManager.get_stock_data
+    CHARLES_PROFILE_DIR=reports/profiles
+    CHARLES_PROFILE_MEMORY=1
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.path.join("reports", "profiles")
+
+PROFILE_MODES = ("cprofile", "sampling")
+
+ENV_MODE = "CHARLES_PROFILE"
+ENV_TARGETS = "CHARLES_PROFILE_TARGETS"
+ENV_DIR = "CHARLES_PROFILE_DIR"
+ENV_MEMORY = "CHARLES_PROFILE_MEMORY"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _safe_name(value) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(value)) or "_"
+
+
+class _StackSampler(threading.Thread):
+    """דוגם את מחסנית ה-thread הנמדד כל interval שניות ומונה מחסניות collapsed"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True, name="profiling-sampler")
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stop_event.set()
+        self.join()
+        return self.stacks
+
+
+class Profiler:
+    """
+    עוטף קריאות של סוכנים / מתודות SmartDataManager בפרופיילר
+
+    הגדרות (config):
+        mode: cprofile / sampling (None - כבוי)
+        targets: שמות סוכנים או "Class.method" לפרופיילינג (ריק - כל הסוכנים)
+        output_dir: תיקיית הקבצים (ברירת מחדל reports/profiles)
+        memory: השוואת tracemalloc לפני ואחרי כל קריאה
+        interval_ms: מרווח הדגימה במצב sampling (ברירת מחדל 5)
+        top: מספר הפונקציות / שורות ההקצאה בסיכום (ברירת מחדל 25)
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {}
+        self.mode = self.config.get("mode")
+        if self.mode not in (None, *PROFILE_MODES):
+            raise ValueError(f"מצב פרופיילינג לא מוכר: {self.mode} (אפשרויות: {', '.join(PROFILE_MODES)})")
+        self.memory = bool(self.config.get("memory", False))
+        self.targets = set(self.config.get("targets") or [])
+        self.output_dir = Path(self.config.get("output_dir", DEFAULT_PROFILE_DIR))
+        self.interval = self.config.get("interval_ms", 5) / 1000.0
+        self.top = self.config.get("top", 25)
+
+        self.runs: List[Dict] = []
+        self._stats: Optional[pstats.Stats] = None
+        self._samples: Counter = Counter()
+        self._allocations: Counter = Counter()
+        self._active = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+        self._patched: List[tuple] = []
+
+    @classmethod
+    def from_env(cls, config: Optional[Dict] = None) -> "Profiler":
+        """הגדרות ממשתני הסביבה, דרוסות ע"י config"""
+        env = {}
+        if os.getenv(ENV_MODE):
+            env["mode"] = os.getenv(ENV_MODE).strip().lower()
+        if os.getenv(ENV_TARGETS):
+            env["targets"] = [t.strip() for t in os.getenv(ENV_TARGETS).split(",") if t.strip()]
+        if os.getenv(ENV_DIR):
+            env["output_dir"] = os.getenv(ENV_DIR)
+        if os.getenv(ENV_MEMORY):
+            env["memory"] = os.getenv(ENV_MEMORY).strip().lower() in ("1", "true", "yes")
+        return cls({**env, **(config or {})})
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None or self.memory
+
+    def wants(self, target: str) -> bool:
+        """האם target (שם סוכן או "Class.method") נבחר לפרופיילינג"""
+        if not self.enabled:
+            return False
+        if not self.targets:
+            return "." not in target
+        return target in self.targets or target.split(".")[0] in self.targets
+
+    # ---------- מדידה ----------
+
+    @contextmanager
+    def profile(self, target: str, symbol: str = ""):
+        """
+        פרופיילינג של קטע קוד אחד - קובץ ל-(target, symbol).
+        קריאה מקוננת באותו thread (למשל get_stock_data מתוך סוכן) נספרת בקריאה החיצונית.
+        """
+        if not self.wants(target) or getattr(self._active, "running", False):
+            yield
+            return
+        self._active.running = True
+        run = {"target": target, "symbol": symbol, "mode": self.mode,
+               "started_at": datetime.now().isoformat()}
+        profiler = sampler = snapshot = None
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(25)
+                self._started_tracemalloc = True
+            snapshot = tracemalloc.take_snapshot()
+        started = time.perf_counter()
+        try:
+            if self.mode == "cprofile":
+                profiler = cProfile.Profile()
+                profiler.enable()
+            elif self.mode == "sampling":
+                sampler = _StackSampler(threading.get_ident(), self.interval)
+                sampler.start()
+            yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            stacks = sampler.stop() if sampler is not None else None
+            run["duration_ms"] = round((time.perf_counter() - started) * 1000.0, 3)
+            try:
+                self._record(run, profiler, stacks, snapshot)
+            except Exception as e:
+                logger.warning(f"שמירת פרופיל {target}/{symbol} נכשלה: {e}")
+            finally:
+                self._active.running = False
+
+    def _record(self, run: Dict, profiler, stacks: Optional[Counter], snapshot):
+        base = self.output_dir / _safe_name(run["target"]) / _safe_name(run["symbol"] or "all")
+        base.parent.mkdir(parents=True, exist_ok=True)
+
+        if profiler is not None:
+            path = base.with_suffix(".pstats")
+            profiler.dump_stats(str(path))
+            run["artifact"] = str(path)
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profiler)
+                else:
+                    self._stats.add(profiler)
+
+        if stacks is not None:
+            path = base.with_suffix(".collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            run["artifact"] = str(path)
+            run["samples"] = sum(stacks.values())
+            with self._lock:
+                self._samples.update(stacks)
+
+        if snapshot is not None:
+            diff = tracemalloc.take_snapshot().compare_to(snapshot, "lineno")
+            growth = [stat for stat in diff if stat.size_diff > 0][:self.top]
+            path = base.with_suffix(".alloc.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(str(stat) for stat in growth))
+            run["allocated_kb"] = round(sum(stat.size_diff for stat in diff) / 1024.0, 1)
+            run["allocation_artifact"] = str(path)
+            with self._lock:
+                for stat in growth:
+                    frame = stat.traceback[0]
+                    self._allocations[f"{frame.filename}:{frame.lineno}"] += stat.size_diff
+
+        with self._lock:
+            self.runs.append(run)
+
+    def wrap(self, func, target: str, skip_self: bool = False):
+        """
+        עטיפת פונקציה; הארגומנט הראשון (למשל symbol) מזהה את קובץ הפרופיל.
+        skip_self - הפונקציה היא מתודה לא קשורה (עטיפה ברמת המחלקה) ו-args[0] הוא self
+        """
+        offset = 1 if skip_self else 0
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            positional = args[offset:]
+            symbol = kwargs.get("symbol", positional[0] if positional and isinstance(positional[0], str) else "")
+            with self.profile(target, symbol):
+                return func(*args, **kwargs)
+        wrapper.__profiled__ = True
+        return wrapper
+
+    def instrument(self, obj, methods: Optional[List[str]] = None) -> List[str]:
+        """
+        עטיפת מתודות של מופע או של מחלקה (למשל SmartDataManager) - ברירת מחדל: המתודות
+        שמופיעות ב-targets בצורת "Class.method".
+        עטיפת המחלקה תופסת כל מופע שלה (גם אלה שנבנו בתוך המנוע והסוכנים); close() משחזר אותה.
+
+        Returns:
+            שמות המתודות שנעטפו
+        """
+        is_class = isinstance(obj, type)
+        class_name = obj.__name__ if is_class else type(obj).__name__
+        if methods is None:
+            methods = [t.split(".", 1)[1] for t in self.targets if t.startswith(f"{class_name}.")]
+        wrapped = []
+        for method in methods:
+            func = obj.__dict__.get(method) if is_class else getattr(obj, method, None)
+            if func is None or getattr(func, "__profiled__", False):
+                continue
+            target = f"{class_name}.{method}"
+            self.targets.add(target)
+            setattr(obj, method, self.wrap(func, target, skip_self=is_class))
+            if is_class:
+                self._patched.append((obj, method, func))
+            wrapped.append(method)
+        return wrapped
+
+    # ---------- סיכום ----------
+
+    def hot_functions(self, top: Optional[int] = None) -> List[Dict]:
+        """הפונקציות החמות ביותר בכל ההרצות (לפי זמן עצמי / דגימות עצמיות)"""
+        top = top or self.top
+        with self._lock:
+            stats, samples = self._stats, Counter(self._samples)
+        if stats is not None:
+            rows = []
+            for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+                rows.append({
+                    "function": f"{name} ({os.path.basename(filename)}:{line})",
+                    "calls": calls,
+                    "self_ms": round(tottime * 1000.0, 3),
+                    "cumulative_ms": round(cumtime * 1000.0, 3),
+                })
+            return sorted(rows, key=lambda row: row["self_ms"], reverse=True)[:top]
+
+        self_samples, total_samples = Counter(), Counter()
+        for stack, count in samples.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] += count
+            for frame in set(frames):
+                total_samples[frame] += count
+        return [{"function": frame, "self_samples": count, "total_samples": total_samples[frame]}
+                for frame, count in self_samples.most_common(top)]
+
+    def summary(self) -> Dict:
+        with self._lock:
+            runs = list(self.runs)
+            allocations = self._allocations.most_common(self.top)
+        by_target: Dict[str, Dict] = {}
+        for run in runs:
+            entry = by_target.setdefault(run["target"], {"runs": 0, "total_ms": 0.0})
+            entry["runs"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + run["duration_ms"], 3)
+        return {
+            "mode": self.mode,
+            "memory": self.memory,
+            "runs": len(runs),
+            "targets": dict(sorted(by_target.items(), key=lambda item: item[1]["total_ms"], reverse=True)),
+            "hot_functions": self.hot_functions(),
+            "top_allocations": [{"line": line, "size_kb": round(size / 1024.0, 1)} for line, size in allocations],
+            "artifacts": runs,
+        }
+
+    def write_summary(self, path: Optional[str] = None) -> Path:
+        """כתיבת הסיכום ל-summary.json בתיקיית הפרופילים"""
+        path = Path(path or self.output_dir / "summary.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def report(self, top: int = 15) -> str:
+        """טבלת טקסט של הפונקציות החמות"""
+        rows = self.hot_functions(top)
+        if not rows:
+            return "אין נתוני פרופיילינג"
+        if "self_ms" in rows[0]:
+            lines = [f"{'self ms':>12}{'cum ms':>12}{'calls':>10}  function"]
+            lines += [f"{r['self_ms']:>12.1f}{r['cumulative_ms']:>12.1f}{r['calls']:>10}  {r['function']}" for r in rows]
+        else:
+            lines = [f"{'self':>8}{'total':>8}  function"]
+            lines += [f"{r['self_samples']:>8}{r['total_samples']:>8}  {r['function']}" for r in rows]
+        return "\n".join(lines)
+
+    def close(self):
+        """שחזור מחלקות שנעטפו ועצירת tracemalloc אם הופעל כאן"""
+        for cls, method, func in reversed(self._patched):
+            setattr(cls, method, func)
+        self._patched = []
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
@@ -0,0 +1,206 @@
+"""
+Rolling Kernels - חלונות נעים וקטוריים
+======================================
+
+תחליפים ל-rolling().apply(lambda) שמריץ callback של פייתון לכל חלון. החלונות
+נבנים כ-view מרוחק (sliding_window_view) על מערך NumPy, בלי העתקה, והחישוב רץ
+על כל החלונות בבת אחת:
+- rolling_rank_pct: חלק ערכי החלון שקטנים מהערך האחרון (אחוזון היסטורי)
+- weighted_moving_average: ממוצע נע משוקלל ליניארית (WMA)
+- local_extrema: האם הנר במרכז החלון הוא השיא/השפל שלו (pivots)
+- rolling_max / rolling_min: מקסימום/מינימום נע ב-O(n) (van Herk / Gil-Werman)
+- rolling_slope: שיפוע OLS של החלון מול מספר הנר
+- RollingExtremum: מקסימום/מינימום נע מצטבר עם deque מונוטוני (לעדכוני לייב)
+
+הסמנטיקה זהה ל-pandas עם min_periods=window: חלון שחסר או שמכיל NaN מחזיר NaN.
+קלט Series מחזיר Series עם אותו אינדקס; קלט מערך מחזיר מערך.
+"""
+
+import logging
+from collections import deque
+from typing import Union
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+ArrayLike = Union[pd.Series, np.ndarray, list]
+
+
+def _as_array(values: ArrayLike) -> np.ndarray:
+    return np.asarray(values, dtype=float)
+
+
+def _wrap(result: np.ndarray, like: ArrayLike):
+    if isinstance(like, pd.Series):
+        return pd.Series(result, index=like.index, name=like.name)
+    return result
+
+
+def sliding_windows(values: ArrayLike, window: int) -> np.ndarray:
+    """
+    מטריצת חלונות (n - window + 1, window) כ-view על הנתונים - ללא העתקה.
+    שורה i היא החלון שמסתיים בנר i + window - 1.
+    """
+    if window < 1:
+        raise ValueError("window חייב להיות חיובי")
+    array = _as_array(values)
+    if len(array) < window:
+        return np.empty((0, window))
+    return sliding_window_view(array, window)
+
+
+def _trailing(values: ArrayLike, window: int, reduced: np.ndarray) -> np.ndarray:
+    """הצבת תוצאת חלונות מסתיימים במקומה: NaN ל-window-1 הנרות הראשונים"""
+    out = np.full(len(values), np.nan)
+    if len(reduced):
+        out[window - 1:] = reduced
+    return out
+
+
+def _nan_windows(array: np.ndarray, window: int) -> np.ndarray:
+    """לכל חלון מסתיים - האם הוא מכיל NaN (סכום מצטבר של דגלי NaN, בלי isnan על מטריצת החלונות)"""
+    counts = np.concatenate([[0], np.cumsum(np.isnan(array))])
+    return (counts[window:] - counts[:-window]) > 0
+
+
+def rolling_rank_pct(values: ArrayLike, window: int) -> Union[pd.Series, np.ndarray]:
+    """
+    חלק ערכי החלון שקטנים ממש מהערך האחרון בו -
+    שווה ל-rolling(window).apply(lambda x: (x < x.iloc[-1]).mean())
+    """
+    array = _as_array(values)
+    windows = sliding_windows(array, window)
+    ranks = (windows < windows[:, -1:]).mean(axis=1)
+    if len(ranks):
+        ranks[_nan_windows(array, window)] = np.nan
+    return _wrap(_trailing(array, window, ranks), values)
+
+
+def weighted_moving_average(values: ArrayLike, window: int) -> Union[pd.Series, np.ndarray]:
+    """
+    ממוצע נע משוקלל ליניארית (משקל 1 לנר הישן ביותר ו-window לאחרון) -
+    שווה ל-rolling(window).apply(lambda x: np.average(x, weights=np.arange(1, len(x) + 1)))
+    """
+    windows = sliding_windows(values, window)
+    weights = np.arange(1, window + 1, dtype=float)
+    return _wrap(_trailing(values, window, windows @ (weights / weights.sum())), values)
+
+
+def rolling_slope(values: ArrayLike, window: int) -> Union[pd.Series, np.ndarray]:
+    """
+    שיפוע OLS של כל חלון מול מספר הנר (0..window-1) - כמו np.polyfit(range(window), x, 1)[0]
+    """
+    if window < 2:
+        raise ValueError("שיפוע דורש חלון של שני נרות לפחות")
+    windows = sliding_windows(values, window)
+    x = np.arange(window, dtype=float)
+    x -= x.mean()
+    return _wrap(_trailing(values, window, windows @ (x / (x @ x))), values)
+
+
+def local_extrema(values: ArrayLike, window: int = 5, kind: str = "max") -> Union[pd.Series, np.ndarray]:
+    """
+    האם הערך במרכז חלון ממורכז הוא השיא (kind="max") או השפל (kind="min") של החלון.
+    מחזיר 1.0 / 0.0, ו-NaN בקצוות - שווה ל-
+    rolling(window, center=True).apply(lambda x: x.iloc[window // 2] == x.max())
+    """
+    if kind not in ("max", "min"):
+        raise ValueError(f"kind לא מוכר: {kind}")
+    array = _as_array(values)
+    windows = sliding_windows(array, window)
+    out = np.full(len(array), np.nan)
+    if len(windows):
+        offset = window // 2
+        extreme = windows.max(axis=1) if kind == "max" else windows.min(axis=1)
+        flags = (windows[:, offset] == extreme).astype(float)
+        flags[np.isnan(extreme)] = np.nan
+        out[offset:offset + len(flags)] = flags
+    return _wrap(out, values)
+
+
+def _running_extreme(array: np.ndarray, window: int, ufunc) -> np.ndarray:
+    """
+    van Herk / Gil-Werman: מקסימום/מינימום של כל חלון משתי סריקות מצטברות
+    (קדימה ואחורה בתוך בלוקים בגודל window) - O(n) ללא תלות בגודל החלון
+    """
+    n = len(array)
+    n_blocks = -(-n // window)
+    fill = -np.inf if ufunc is np.maximum else np.inf
+    padded = np.full(n_blocks * window, fill)
+    padded[:n] = array
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    return ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+
+
+def _rolling_extreme(values: ArrayLike, window: int, ufunc) -> Union[pd.Series, np.ndarray]:
+    array = _as_array(values)
+    if window < 1:
+        raise ValueError("window חייב להיות חיובי")
+    if len(array) < window:
+        return _wrap(np.full(len(array), np.nan), values)
+    nan_mask = np.isnan(array)
+    reduced = _running_extreme(np.where(nan_mask, 0.0, array), window, ufunc)
+    if nan_mask.any():
+        reduced[_nan_windows(array, window)] = np.nan
+    return _wrap(_trailing(array, window, reduced), values)
+
+
+def rolling_max(values: ArrayLike, window: int) -> Union[pd.Series, np.ndarray]:
+    """מקסימום נע - שווה ל-rolling(window).max()"""
+    return _rolling_extreme(values, window, np.maximum)
+
+
+def rolling_min(values: ArrayLike, window: int) -> Union[pd.Series, np.ndarray]:
+    """מינימום נע - שווה ל-rolling(window).min()"""
+    return _rolling_extreme(values, window, np.minimum)
+
+
+class RollingExtremum:
+    """
+    מקסימום/מינימום נע מצטבר לזרם נרות (לייב): deque מונוטוני של (אינדקס, ערך),
+    O(1) בממוצע לכל עדכון במקום חישוב מחדש של החלון כולו.
+
+    שימוש:
+        highs = RollingExtremum(20, kind="max")
+        for price in stream:
+            current_high = highs.update(price)
+    """
+
+    def __init__(self, window: int, kind: str = "max"):
+        if window < 1:
+            raise ValueError("window חייב להיות חיובי")
+        if kind not in ("max", "min"):
+            raise ValueError(f"kind לא מוכר: {kind}")
+        self.window = window
+        self.kind = kind
+        self._deque = deque()
+        self._count = 0
+
+    def _dominates(self, new: float, old: float) -> bool:
+        return new >= old if self.kind == "max" else new <= old
+
+    def update(self, value: float) -> float:
+        """הוספת ערך והחזרת הקיצון של window הערכים האחרונים (NaN עד שהחלון מתמלא)"""
+        index = self._count
+        self._count += 1
+        while self._deque and self._dominates(value, self._deque[-1][1]):
+            self._deque.pop()
+        self._deque.append((index, value))
+        if self._deque[0][0] <= index - self.window:
+            self._deque.popleft()
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if self._count < self.window or not self._deque:
+            return float("nan")
+        return self._deque[0][1]
+
+    def reset(self):
+        self._deque.clear()
+        self._count = 0
@@ -0,0 +1,233 @@
+"""
+Signal Panel - מאגר ציוני סוכנים כמערך תאריך x מניה x סוכן
+==========================================================
+
+ציוני הסוכנים ההיסטוריים נשמרים כמערך תלת-ממדי אחד (float32) עם צירי תאריכים,
+מניות וסוכנים. שקלול כל היקום תחת וקטור משקלים הוא מכפלת מטריצה-וקטור אחת,
+ללא הרצת סוכנים, ו-optimize_weights מחפש וקטור משקלים מול תשואות עתידיות
+כשכל מועמדי סבב מוערכים יחד במכפלת מטריצות אחת.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PANEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'backtest', 'signal_panel.npz')
+
+# ציון כשאף סוכן לא החזיר ציון (כמו AlphaScoreEngine.evaluate)
+NEUTRAL_SCORE = 50.0
+
+
+def _weighted_scores(filled: np.ndarray, present: np.ndarray, weight_matrix: np.ndarray) -> np.ndarray:
+    """ממוצע משוקלל לכל שורה ולכל עמודת משקלים - רק סוכנים עם ציון נכנסים למכנה"""
+    weight_matrix = np.asarray(weight_matrix, dtype=np.float32)
+    weighted_sum = filled @ weight_matrix
+    total_weight = present @ weight_matrix
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total_weight > 0, weighted_sum / total_weight, NEUTRAL_SCORE).astype(np.float32)
+
+
+class SignalPanel:
+    """
+    מערך ציונים values[date, symbol, agent] (NaN = אין ציון)
+
+    המטריצות לשקלול (ציונים עם אפסים במקום NaN, ומסכת נוכחות) נבנות פעם אחת
+    ומשמשות את כל השקלולים הבאים.
+    """
+
+    def __init__(self, values: np.ndarray, dates, symbols: List[str], agents: List[str]):
+        values = np.asarray(values, dtype=np.float32)
+        if values.shape != (len(dates), len(symbols), len(agents)):
+            raise ValueError(f"צורת המערך {values.shape} לא תואמת לצירים "
+                             f"({len(dates)}, {len(symbols)}, {len(agents)})")
+        self.values = values
+        self.dates = pd.DatetimeIndex(dates, name='date')
+        self.symbols = list(symbols)
+        self.agents = list(agents)
+        self._matrices = None
+
+    @classmethod
+    def from_frames(cls, signals: Dict[str, pd.DataFrame]) -> "SignalPanel":
+        """בנייה מסוכן -> טבלת ציונים תאריך x מניה (למשל BacktestEngine.signal_panels())"""
+        agents = list(signals)
+        if not agents:
+            return cls(np.empty((0, 0, 0), dtype=np.float32), [], [], [])
+        dates = pd.DatetimeIndex(sorted(set().union(*(frame.index for frame in signals.values()))))
+        symbols = sorted(set().union(*(frame.columns for frame in signals.values())))
+        values = np.full((len(dates), len(symbols), len(agents)), np.nan, dtype=np.float32)
+        for k, agent_name in enumerate(agents):
+            values[:, :, k] = signals[agent_name].reindex(index=dates, columns=symbols).to_numpy(dtype=np.float32)
+        return cls(values, dates, symbols, agents)
+
+    # ---------- אחסון ----------
+
+    def save(self, path: str = DEFAULT_PANEL_PATH) -> Path:
+        """שמירה לקובץ npz יחיד (החלפה אטומית)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, values=self.values,
+                         dates=self.dates.values.astype("datetime64[ns]").astype(np.int64),
+                         symbols=np.array(self.symbols, dtype=str), agents=np.array(self.agents, dtype=str))
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_PANEL_PATH) -> Optional["SignalPanel"]:
+        """טעינה מקובץ (None אם הקובץ חסר)"""
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data['values'], pd.to_datetime(data['dates']),
+                       data['symbols'].tolist(), data['agents'].tolist())
+
+    # ---------- שקלול ----------
+
+    def _weighting_matrices(self):
+        """(ציונים עם 0 במקום NaN, מסכת נוכחות) בצורת (date*symbol, agent)"""
+        if self._matrices is None:
+            flat = self.values.reshape(-1, len(self.agents))
+            present = ~np.isnan(flat)
+            self._matrices = (np.where(present, flat, 0).astype(np.float32), present.astype(np.float32))
+        return self._matrices
+
+    def weight_vector(self, weights: Dict[str, float], default: float = 1.0) -> np.ndarray:
+        """וקטור משקלים בסדר ציר הסוכנים (סוכן חסר מקבל default, כמו במנוע)"""
+        return np.array([weights.get(agent_name, default) for agent_name in self.agents], dtype=np.float32)
+
+    def consolidate_matrix(self, weight_matrix: np.ndarray) -> np.ndarray:
+        """
+        שקלול מספר וקטורי משקלים יחד
+
+        Args:
+            weight_matrix: (agents, K) - עמודה לכל וקטור משקלים
+
+        Returns:
+            (date*symbol, K) - ציון משוקלל, NEUTRAL_SCORE כשאין ציונים
+        """
+        filled, present = self._weighting_matrices()
+        return _weighted_scores(filled, present, weight_matrix)
+
+    def consolidate(self, weights: Dict[str, float]) -> pd.DataFrame:
+        """ציון משוקלל לכל תאריך ומניה (לפני העיגול ל-int שהמנוע מבצע)"""
+        scores = self.consolidate_matrix(self.weight_vector(weights)[:, None])[:, 0]
+        return pd.DataFrame(scores.reshape(len(self.dates), len(self.symbols)).astype(np.float64),
+                            index=self.dates, columns=self.symbols)
+
+    def align(self, frame: pd.DataFrame) -> np.ndarray:
+        """טבלת תאריך x מניה (למשל תשואות עתידיות) כווקטור בסדר השורות של המערך"""
+        return frame.reindex(index=self.dates, columns=self.symbols).to_numpy(dtype=np.float64).reshape(-1)
+
+
+def _unit_ranks(values: np.ndarray) -> np.ndarray:
+    """דירוג (ממוצע בשוויון), ממורכז ומנורמל לנורמה 1 - מכפלה פנימית של שניים כאלה היא קורלציית ספירמן"""
+    ranks = pd.Series(values).rank().to_numpy()
+    centered = ranks - ranks.mean()
+    norm = np.sqrt((centered ** 2).sum())
+    return centered / norm if norm > 0 else centered
+
+
+def _rank_ic(scores: np.ndarray, target: np.ndarray) -> np.ndarray:
+    """קורלציה של כל עמודת ציונים עם target (דירוג התשואה כ-_unit_ranks)"""
+    centered = scores - scores.mean(axis=0)
+    norms = np.sqrt((centered ** 2).sum(axis=0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ic = (centered.T @ target) / norms
+    return np.where(norms > 0, ic, -np.inf)
+
+
+def optimize_weights(panel: SignalPanel, returns: pd.DataFrame, initial: Optional[Dict[str, float]] = None,
+                     iterations: int = 40, batch: int = 64, max_weight: float = 5.0,
+                     seed: int = 0, min_observations: int = 30) -> Dict:
+    """
+    חיפוש וקטור משקלים שממקסם את ה-IC (קורלציה בין הציון המשוקלל לדירוג התשואה העתידית)
+
+    כל סבב מעריך batch וקטורים יחד: חיפוש אקראי בחצי הראשון של הסבבים ושיפור
+    מקומי סביב הטוב ביותר (עם רעש מתכווץ) בחצי השני. בחיפוש הציון עצמו לא מדורג
+    (מכפלת מטריצות אחת לכל סבב); ה-IC המדווח (ic, baseline_ic) הוא קורלציית ספירמן מלאה.
+
+    Args:
+        panel: מאגר הציונים
+        returns: תשואות עתידיות תאריך x מניה (למשל BacktestEngine.labels())
+        initial: משקלים התחלתיים (למשל AGENT_WEIGHTS) - נכללים כמועמד וכבסיס להשוואה
+
+    Returns:
+        weights, ic, baseline_ic, observations, evaluated
+    """
+    filled, present = panel._weighting_matrices()
+    target = panel.align(returns)
+    rows = ~np.isnan(target) & (present.sum(axis=1) > 0)
+    observations = int(rows.sum())
+    if observations < min_observations or not panel.agents:
+        raise ValueError(f"אין מספיק תצפיות לאופטימיזציה ({observations})")
+
+    filled, present = filled[rows], present[rows]
+    ranked_target = _unit_ranks(target[rows])
+    target = ranked_target.astype(np.float32)
+
+    def evaluate(weight_matrix):
+        return _rank_ic(_weighted_scores(filled, present, weight_matrix), target)
+
+    def spearman(weights):
+        scores = _weighted_scores(filled, present, weights[:, None])[:, 0].astype(np.float64)
+        return float(_unit_ranks(scores) @ ranked_target)
+
+    rng = np.random.default_rng(seed)
+    n_agents = len(panel.agents)
+    start = panel.weight_vector(initial or {}).astype(np.float64)
+    best, best_ic, evaluated = start, float(evaluate(start[:, None])[0]), 1
+
+    for round_no in range(iterations):
+        if round_no < iterations // 2:
+            candidates = rng.uniform(0, max_weight, (n_agents, batch))
+        else:
+            scale = max_weight * 0.5 * (1 - (round_no - iterations // 2) / max(1, iterations - iterations // 2))
+            candidates = np.clip(best[:, None] + rng.normal(0, scale + 1e-3, (n_agents, batch)), 0, max_weight)
+        ics = evaluate(candidates)
+        evaluated += batch
+        top = int(np.argmax(ics))
+        if ics[top] > best_ic:
+            best, best_ic = candidates[:, top], float(ics[top])
+
+    baseline_ic, best_ic = spearman(start), spearman(best)
+    if best_ic < baseline_ic:
+        # השיפור במדד החיפוש לא החזיק בדירוג המלא - המשקלים ההתחלתיים נשארים
+        best, best_ic = start, baseline_ic
+
+    logger.info(f"אופטימיזציית משקלים: IC {baseline_ic:.4f} -> {best_ic:.4f} ({evaluated} וקטורים)")
+    return {
+        'weights': {agent_name: round(float(w), 4) for agent_name, w in zip(panel.agents, best)},
+        'ic': best_ic,
+        'baseline_ic': baseline_ic,
+        'observations': observations,
+        'evaluated': evaluated,
+    }
+
+
+def save_weights(weights: Dict[str, float], path: str):
+    """שמירת משקלים (למשל תוצאת optimize_weights) כ-JSON שהמנוע טוען"""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(weights, f, ensure_ascii=False, indent=2)
+
+
+def load_weights(path: str) -> Dict[str, float]:
+    """טעינת משקלים מ-JSON ({} אם הקובץ חסר)"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {name: float(weight) for name, weight in json.load(f).items()}
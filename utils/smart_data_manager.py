@@ -13,23 +13,98 @@ from pathlib import Path
 import gzip
 import pickle
 import hashlib
-from functools import lru_cache
 import json
+import math
 import time
+from fractions import Fraction
 
 # ייבוא המודולים הקיימים
 from utils.fmp_utils import fmp_client
 from utils.data_fetcher import DataFetcher
 from utils.credentials import APICredentials
+from utils.indicator_store import IndicatorStore, INDICATOR_COLUMNS, INDICATOR_WARMUP_BARS
+from utils.incremental_resampler import INTRADAY_FREQ, resample_intraday, resample_ohlcv
+from utils.compact_frames import compact_news, compact_prices
+from utils.metrics import get_registry
 
 # הגדרת לוגר מתקדם
 logger = logging.getLogger(__name__)
 
+# מדדי Prometheus של שכבת הנתונים (utils.metrics)
+_METRICS = get_registry()
+CACHE_REQUESTS = _METRICS.counter("charles_cache_requests_total", "בקשות למטמון הנתונים בזיכרון", ["result"])
+CACHE_EVICTIONS = _METRICS.counter("charles_cache_evictions_total", "פריטים שהוצאו ממטמון הנתונים")
+CACHE_ENTRIES = _METRICS.gauge("charles_cache_entries", "פריטים במטמון הנתונים")
+CACHE_HIT_RATIO = _METRICS.gauge("charles_cache_hit_ratio", "שיעור הפגיעות במטמון הנתונים")
+PROVIDER_REQUESTS = _METRICS.counter("charles_provider_requests_total", "קריאות לספקי נתונים", ["source", "status"])
+PROVIDER_LATENCY = _METRICS.histogram("charles_provider_latency_seconds", "זמן קריאה לספק נתונים", ["source"])
+DATA_REQUESTS = _METRICS.histogram("charles_data_request_seconds", "זמן בקשת נתוני מניה לפי מקור", ["source"])
+DATA_ERRORS = _METRICS.counter("charles_data_errors_total", "שגיאות בשכבת הנתונים", ["type"])
+DISK_BYTES_READ = _METRICS.counter("charles_disk_bytes_read_total", "בתים שנקראו מקבצי נתונים", ["kind"])
+DISK_BYTES_WRITTEN = _METRICS.counter("charles_disk_bytes_written_total", "בתים שנכתבו לקבצי נתונים", ["kind"])
+DATA_FILES = _METRICS.gauge("charles_data_files", "קבצי מחירים היסטוריים בדיסק")
+RESAMPLES = _METRICS.counter("charles_resample_total", "בקשות לנרות נגזרים (אינטרוול גבוה מנרות בסיס)",
+                             ["interval", "result"])
+
+# אינטרוולים נתמכים -> מספר הנרות ליום מסחר (days בבקשה הוא תמיד אורך ההיסטוריה בימי מסחר)
+INTERVAL_BARS_PER_DAY = {
+    '1min': Fraction(390),
+    '5min': Fraction(78),
+    '1h': Fraction(7),
+    '1day': Fraction(1),
+    '1wk': Fraction(1, 5),
+    '1mo': Fraction(1, 21),
+}
+
+# שמות חלופיים (כמו במיפויי האינטרוולים של DataFetcher)
+INTERVAL_ALIASES = {
+    '1m': '1min',
+    '5m': '5min',
+    '60min': '1h',
+    '1d': '1day',
+    'daily': '1day',
+    '1w': '1wk',
+    'weekly': '1wk',
+    'monthly': '1mo',
+}
+
+# אינטרוול נגזר -> (אינטרוול הבסיס, תדירות ב-incremental_resampler)
+DERIVED_INTERVALS = {
+    '5min': ('1min', '5min'),
+    '1h': ('1min', '1h'),
+    '1wk': ('1day', 'weekly'),
+    '1mo': ('1day', 'monthly'),
+}
+
+# תיקיית הקבצים השמורים לכל אינטרוול תחת historical_prices
+INTERVAL_DIRS = {
+    '1day': 'daily',
+    '1wk': 'weekly',
+    '1mo': 'monthly',
+}
+
+
+def normalize_interval(interval: str) -> str:
+    """שם האינטרוול הקנוני (1min / 5min / 1h / 1day / 1wk / 1mo)"""
+    name = INTERVAL_ALIASES.get(interval, interval)
+    if name not in INTERVAL_BARS_PER_DAY:
+        raise ValueError(f"אינטרוול לא נתמך: {interval}")
+    return name
+
+
+def bars_for(days: int, interval: str) -> int:
+    """מספר הנרות באינטרוול שמכסים days ימי מסחר"""
+    return max(1, math.ceil(days * INTERVAL_BARS_PER_DAY[normalize_interval(interval)]))
+
+# קובץ סטטיסטיקות השימוש - ניתן להפניה (למשל לתיקייה זמנית בבדיקות) דרך משתנה הסביבה
+USAGE_LOG_ENV = "CHARLES_USAGE_LOG"
+DEFAULT_USAGE_LOG = os.path.join("data", "usage_log.json")
+
 class UsageTracker:
     """מעקב אחר שימוש במערכת"""
     
-    def __init__(self, log_file: str = "data/usage_log.json"):
-        self.log_file = Path(log_file)
+    def __init__(self, log_file: Optional[str] = None):
+        self.log_file = Path(log_file or os.getenv(USAGE_LOG_ENV) or DEFAULT_USAGE_LOG)
         self.log_file.parent.mkdir(parents=True, exist_ok=True)
         self.usage_stats = self._load_usage_stats()
     
@@ -59,6 +134,8 @@ class UsageTracker:
     
     def log_api_call(self, source: str, symbol: str, success: bool, duration: float):
         """תיעוד קריאת API"""
+        PROVIDER_REQUESTS.inc(source=source, status='success' if success else 'error')
+        PROVIDER_LATENCY.observe(duration, source=source)
         if source not in self.usage_stats['api_calls']:
             self.usage_stats['api_calls'][source] = {
                 'total_calls': 0,
@@ -85,6 +162,7 @@ class UsageTracker:
     
     def log_data_request(self, symbol: str, days: int, source: str, duration: float):
         """תיעוד בקשת נתונים"""
+        DATA_REQUESTS.observe(duration, source=source)
         if symbol not in self.usage_stats['data_requests']:
             self.usage_stats['data_requests'][symbol] = {
                 'total_requests': 0,
@@ -109,6 +187,7 @@ class UsageTracker:
     
     def log_cache_hit(self, hit: bool):
         """תיעוד פגיעה במטמון"""
+        CACHE_REQUESTS.inc(result='hit' if hit else 'miss')
         if hit:
             self.usage_stats['cache_stats']['hits'] += 1
         else:
@@ -117,6 +196,7 @@ class UsageTracker:
     
     def log_error(self, error_type: str, message: str, symbol: str = None):
         """תיעוד שגיאות"""
+        DATA_ERRORS.inc(type=error_type)
         error_entry = {
             'timestamp': datetime.now().isoformat(),
             'type': error_type,
@@ -161,9 +241,11 @@ class SmartDataManager:
     """
     
     def __init__(self, data_dir: str = "data", enable_compression: bool = True, 
-                 cache_size: int = 100, enable_indexing: bool = True):
+                 cache_size: int = 100, enable_indexing: bool = True, compact_memory: bool = True):
         self.data_dir = Path(data_dir)
         self.historical_dir = self.data_dir / "historical_prices" / "daily"
+        self.interval_dirs = {interval: self.data_dir / "historical_prices" / folder
+                              for interval, folder in INTERVAL_DIRS.items()}
         self.raw_dir = self.data_dir / "raw_price_data"
         self.metadata_dir = self.data_dir / "metadata"
         self.cache_dir = self.data_dir / "cache"
@@ -177,9 +259,14 @@ class SmartDataManager:
         self.enable_compression = enable_compression
         self.enable_indexing = enable_indexing
         self.cache_size = cache_size
+        # ייצוג חסכוני בזיכרון (float32 / category - utils.compact_frames)
+        self.compact_memory = compact_memory
         
         # יצירת תיקיות נדרשות
         self._ensure_directories()
+
+        # טבלת אינדיקטורים רחבה - קובץ עמודתי אחד לכל מניה
+        self.indicator_store = IndicatorStore(self.technical_dir)
         
         # ייבוא מודולים
         try:
@@ -200,11 +287,16 @@ class SmartDataManager:
         
         # זיכרון מטמון
         self._data_cache = {}
+        # נרות נגזרים לכל (מניה, אינטרוול): (הנר האחרון בבסיס, אורך הבסיס, נרות)
+        self._resample_cache = {}
         self._cache_hits = 0
         self._cache_misses = 0
         
         # מערכת מעקב שימוש
         self.usage_tracker = UsageTracker()
+
+        # gauges שמחושבים בעת קריאת המדדים (get_performance_stats / get_data_status)
+        _METRICS.register_collector(self.collect_metrics)
     
     def _ensure_directories(self):
         """יצירת תיקיות נדרשות"""
@@ -262,15 +354,16 @@ class SmartDataManager:
         except Exception as e:
             logger.error(f"שגיאה בשמירת אינדקס: {e}")
     
-    def _get_file_path(self, symbol: str, compressed: bool = None) -> Path:
+    def _get_file_path(self, symbol: str, compressed: bool = None, interval: str = '1day') -> Path:
         """קבלת נתיב קובץ עם תמיכה בדחיסה"""
         if compressed is None:
             compressed = self.enable_compression
+        directory = self.historical_dir if interval == '1day' else self.interval_dirs[interval]
         
         if compressed:
-            return self.historical_dir / f"{symbol.upper()}.csv.gz"
+            return directory / f"{symbol.upper()}.csv.gz"
         else:
-            return self.historical_dir / f"{symbol.upper()}.csv"
+            return directory / f"{symbol.upper()}.csv"
     
     def _compress_data(self, data: pd.DataFrame) -> bytes:
         """דחיסת נתונים"""
@@ -290,10 +383,24 @@ class SmartDataManager:
         import io
         return pd.read_csv(io.StringIO(csv_data), index_col=0, parse_dates=True)
     
-    @lru_cache(maxsize=100)
-    def _get_cached_data(self, symbol: str, days: int) -> Optional[pd.DataFrame]:
+    def _compact(self, data: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        פריים מחירים בייצוג החסכוני (כשמופעל) - רק למה שנשמר במטמון ומוחזר;
+        הנתונים שנקראים מהדיסק ונכתבים אליו נשארים בדיוק מלא
+        """
+        if not self.compact_memory or data is None:
+            return data
+        return compact_prices(data)
+
+    @staticmethod
+    def _cache_key(symbol: str, days: int, interval: str = '1day') -> str:
+        if interval == '1day':
+            return f"{symbol}_{days}"
+        return f"{symbol}_{days}_{interval}"
+
+    def _get_cached_data(self, symbol: str, days: int, interval: str = '1day') -> Optional[pd.DataFrame]:
         """קבלת נתונים מהמטמון"""
-        cache_key = f"{symbol}_{days}"
+        cache_key = self._cache_key(symbol, days, interval)
         if cache_key in self._data_cache:
             self._cache_hits += 1
             return self._data_cache[cache_key]
@@ -301,20 +408,22 @@ class SmartDataManager:
         self._cache_misses += 1
         return None
     
-    def _set_cached_data(self, symbol: str, days: int, data: pd.DataFrame):
+    def _set_cached_data(self, symbol: str, days: int, data: pd.DataFrame, interval: str = '1day'):
         """שמירת נתונים במטמון"""
-        cache_key = f"{symbol}_{days}"
+        cache_key = self._cache_key(symbol, days, interval)
         
         # ניהול גודל המטמון
         if len(self._data_cache) >= self.cache_size:
             # הסרת הפריט הישן ביותר
             oldest_key = next(iter(self._data_cache))
             del self._data_cache[oldest_key]
+            CACHE_EVICTIONS.inc()
         
         self._data_cache[cache_key] = data
+        CACHE_ENTRIES.set(len(self._data_cache))
     
     def get_stock_data(self, symbol: str, days: int = 90, 
-                      include_live: bool = True) -> Optional[pd.DataFrame]:
+                      include_live: bool = True, interval: str = '1day') -> Optional[pd.DataFrame]:
         """
         שליפת נתוני מניה עם אסטרטגיה חכמה ואופטימיזציות
         
@@ -322,10 +431,16 @@ class SmartDataManager:
             symbol: סימבול המניה
             days: מספר ימים נדרש
             include_live: האם לכלול נתונים חיים
+            interval: 1min / 5min / 1h / 1day / 1wk / 1mo - אינטרוולים גבוהים נגזרים
+                מנרות הבסיס שבמטמון (ראו _get_interval_data)
             
         Returns:
             DataFrame עם נתונים או None
         """
+        interval = normalize_interval(interval)
+        if interval != '1day':
+            return self._get_interval_data(symbol, days, include_live, interval)
+
         start_time = time.time()
         
         try:
@@ -348,7 +463,7 @@ class SmartDataManager:
                 # בדיקה אם יש מספיק נתונים
                 if len(local_data) >= days:
                     logger.info(f"נתונים מקומיים מספיקים עבור {symbol}")
-                    result = local_data.head(days)
+                    result = self._compact(local_data.head(days))
                     self._set_cached_data(symbol, days, result)
                     self.usage_tracker.log_data_request(symbol, days, 'local', time.time() - start_time)
                     return result
@@ -361,13 +476,13 @@ class SmartDataManager:
                     if api_data is not None and not api_data.empty:
                         combined_data = self._combine_data(local_data, api_data)
                         self._save_data(symbol, combined_data)  # ✅ שמירה של כלל הנתונים המאוחדים
-                        result = combined_data.head(days)
+                        result = self._compact(combined_data.head(days))
                         self._set_cached_data(symbol, days, result)
                         self.usage_tracker.log_data_request(symbol, days, 'local+api', time.time() - start_time)
                         return result
                 
                 # החזרת הנתונים המקומיים הקיימים
-                result = local_data.head(len(local_data))
+                result = self._compact(local_data.head(len(local_data)))
                 self._set_cached_data(symbol, days, result)
                 self.usage_tracker.log_data_request(symbol, days, 'local_partial', time.time() - start_time)
                 return result
@@ -377,6 +492,7 @@ class SmartDataManager:
             api_data = self._get_api_data(symbol, days)
             if api_data is not None and not api_data.empty:
                 self._save_data(symbol, api_data)  # שמירת נתונים חדשים
+                api_data = self._compact(api_data)
                 self._set_cached_data(symbol, days, api_data)
                 self.usage_tracker.log_data_request(symbol, days, 'api', time.time() - start_time)
                 return api_data
@@ -390,12 +506,92 @@ class SmartDataManager:
             self.usage_tracker.log_error('data_fetch_exception', str(e), symbol)
             return None
     
-    def _get_local_data(self, symbol: str) -> Optional[pd.DataFrame]:
+    def _get_interval_data(self, symbol: str, days: int, include_live: bool,
+                           interval: str) -> Optional[pd.DataFrame]:
+        """
+        נרות באינטרוול שאינו יומי, ל-days ימי המסחר האחרונים (bars_for נרות, מהחדש לישן).
+
+        שבועי/חודשי נגזרים מהנרות היומיים ו-5 דקות/שעה מנרות הדקה - דרך get_stock_data,
+        כך שנרות הבסיס מגיעים מהמטמון ולא מהורדה נפרדת. רק כשאין נרות יומיים נקרא
+        הקובץ השמור (historical_prices/weekly|monthly). נרות דקה מגיעים מ-DataFetcher.
+        """
+        start_time = time.time()
+
+        try:
+            cached_data = self._get_cached_data(symbol, days, interval)
+            if cached_data is not None:
+                self.usage_tracker.log_cache_hit(True)
+                self.usage_tracker.log_data_request(symbol, days, 'cache', time.time() - start_time)
+                return cached_data
+
+            self.usage_tracker.log_cache_hit(False)
+
+            if interval == '1min':
+                bars, source = self._get_intraday_data(symbol, include_live), 'api'
+            else:
+                base_interval, _ = DERIVED_INTERVALS[interval]
+                base = self.get_stock_data(symbol, days, include_live, interval=base_interval)
+                bars, source = None, f'resample_{base_interval}'
+                if base is not None and not base.empty:
+                    bars = self._resample_bars(symbol, interval, base)
+                elif interval in INTERVAL_DIRS:
+                    bars, source = self._get_local_data(symbol, interval), 'local'
+
+            if bars is None or bars.empty:
+                logger.warning(f"לא הצלחנו לקבל נתוני {interval} עבור {symbol}")
+                return None
+
+            result = self._compact(bars.head(bars_for(days, interval)))
+            self._set_cached_data(symbol, days, result, interval)
+            self.usage_tracker.log_data_request(symbol, days, source, time.time() - start_time)
+            return result
+
+        except Exception as e:
+            logger.error(f"שגיאה בשליפת נתוני {interval} עבור {symbol}: {e}")
+            self.usage_tracker.log_error('data_fetch_exception', str(e), symbol)
+            return None
+
+    def _resample_bars(self, symbol: str, interval: str, base: pd.DataFrame) -> pd.DataFrame:
+        """
+        נרות interval מנרות הבסיס (מהחדש לישן), עם memo לכל מניה ואינטרוול: כל עוד
+        נר הבסיס האחרון לא השתנה, בקשה על בסיס קצר יותר משתמשת בדגימה הקיימת.
+        """
+        key = (symbol.upper(), interval)
+        newest = base.index.max()
+        memo = self._resample_cache.get(key)
+        if memo is not None and memo[0] == newest and memo[1] >= len(base):
+            RESAMPLES.inc(interval=interval, result='hit')
+            return memo[2]
+
+        RESAMPLES.inc(interval=interval, result='miss')
+        _, timeframe = DERIVED_INTERVALS[interval]
+        if timeframe in INTRADAY_FREQ:
+            bars = resample_intraday(base, timeframe)
+        else:
+            bars = resample_ohlcv(base, timeframe)
+        bars = bars.set_index('date').sort_index(ascending=False)
+        self._resample_cache[key] = (newest, len(base), bars)
+        return bars
+
+    def _get_intraday_data(self, symbol: str, include_live: bool) -> Optional[pd.DataFrame]:
+        """נרות דקה מ-DataFetcher (אין קבצי תוך-יום בדיסק), מהחדש לישן"""
+        if not include_live or not (self._smart_data_available and self.data_fetcher):
+            return None
+        df = self._call_provider('data_fetcher', symbol,
+                                 lambda: self.data_fetcher.fetch_live_prices(symbol, '1min'))
+        if df is None or df.empty:
+            return None
+        df.index = pd.to_datetime(df.index)
+        return df.sort_index(ascending=False)
+
+    def _get_local_data(self, symbol: str, interval: str = '1day') -> Optional[pd.DataFrame]:
         """שליפת נתונים מקומיים"""
         try:
-            file_path = self._get_file_path(symbol)
+            file_path = self._get_file_path(symbol, interval=interval)
             if file_path.exists():
-                df = self._decompress_data(file_path.read_bytes())
+                raw = file_path.read_bytes()
+                DISK_BYTES_READ.inc(len(raw), kind='prices')
+                df = self._decompress_data(raw)
                 if not df.empty:
                     # טיפול בעמודת תאריך - בדיקה אם קיימת
                     if 'date' in df.columns:
@@ -409,6 +605,10 @@ class SmartDataManager:
                         df = df.drop('Date', axis=1)
                         df = df.set_index('date')
                         df = df.sort_index(ascending=False)
+                    elif isinstance(df.index, pd.DatetimeIndex):
+                        # התאריך הוא העמודה הראשונה בקובץ ונקרא כאינדקס
+                        df.index.name = 'date'
+                        df = df.sort_index(ascending=False)
                     else:
                         # אם אין עמודת תאריך, ניצור אחת מהיום הנוכחי אחורה
                         logger.warning(f"לא נמצאה עמודת תאריך בנתונים עבור {symbol} - יוצרת עמודת תאריך")
@@ -429,7 +629,7 @@ class SmartDataManager:
         try:
             # ניסיון ראשון: yfinance (חינמי)
             logger.info(f"ניסיון שליפה מ-yfinance עבור {symbol}")
-            df = self._get_yfinance_data(symbol, days)
+            df = self._call_provider('yfinance', symbol, lambda: self._get_yfinance_data(symbol, days))
             if df is not None and not df.empty:
                 logger.info(f"הצלחה עם yfinance עבור {symbol}")
                 return df
@@ -438,11 +638,11 @@ class SmartDataManager:
             if self._smart_data_available and self.fmp_client:
                 logger.info(f"ניסיון שליפה מ-FMP עבור {symbol}")
                 try:
-                    df = self.fmp_client.fmp_get_price_ohlcv_df(
+                    df = self._call_provider('fmp', symbol, lambda: self.fmp_client.fmp_get_price_ohlcv_df(
                         symbol, 
                         verify_ssl=False, 
                         limit_days=days
-                    )
+                    ))
                     if df is not None and not df.empty:
                         logger.info(f"הצלחה עם FMP עבור {symbol}")
                         return df
@@ -453,7 +653,8 @@ class SmartDataManager:
             if self._smart_data_available and self.data_fetcher:
                 logger.info(f"ניסיון שליפה מ-DataFetcher עבור {symbol}")
                 try:
-                    df = self.data_fetcher.get_price_history(symbol, f"{days}d")
+                    df = self._call_provider('data_fetcher', symbol,
+                                             lambda: self.data_fetcher.get_price_history(symbol, f"{days}d"))
                     if df is not None and not df.empty:
                         logger.info(f"הצלחה עם DataFetcher עבור {symbol}")
                         return df
@@ -467,6 +668,17 @@ class SmartDataManager:
             logger.error(f"שגיאה בשליפת נתונים מ-API עבור {symbol}: {e}")
             return None
     
+    def _call_provider(self, source: str, symbol: str, fetch):
+        """קריאה לספק נתונים עם תיעוד זמן והצלחה (UsageTracker ומדדי הספקים)"""
+        start_time = time.time()
+        df = None
+        try:
+            df = fetch()
+            return df
+        finally:
+            success = df is not None and not getattr(df, 'empty', True)
+            self.usage_tracker.log_api_call(source, symbol, success, time.time() - start_time)
+    
     def _get_yfinance_data(self, symbol: str, days: int) -> Optional[pd.DataFrame]:
         """שליפת נתונים מ-Yahoo Finance API ישירות (כמו הקוד שעבד)"""
         try:
@@ -571,6 +783,7 @@ class SmartDataManager:
             # שמירה לקובץ דחוס
             with open(file_path, 'wb') as f:
                 f.write(compressed_data)
+            DISK_BYTES_WRITTEN.inc(len(compressed_data), kind='prices')
             
             # עדכון מטא-דאטה
             self.metadata[symbol] = {
@@ -670,6 +883,13 @@ class SmartDataManager:
             'indexing_enabled': self.enable_indexing
         }
     
+    def collect_metrics(self):
+        """עדכון gauges של המטמון והאחסון (רץ לפני כל קריאת מדדים)"""
+        stats = self.get_performance_stats()
+        CACHE_ENTRIES.set(stats['cache_size'])
+        CACHE_HIT_RATIO.set(stats['cache_hit_rate'])
+        DATA_FILES.set(self.get_data_status().get('total_files', 0))
+    
     def optimize_storage(self):
         """אופטימיזציה של אחסון הנתונים"""
         logger.info("מתחיל אופטימיזציה של אחסון")
@@ -745,7 +965,7 @@ class SmartDataManager:
         return results
 
     def get_technical_indicators(self, symbol: str, indicator: str = 'all', 
-                                days: int = 90) -> Optional[pd.DataFrame]:
+                                days: int = 90, columns: List[str] = None) -> Optional[pd.DataFrame]:
         """
         שליפת אינדיקטורים טכניים
         
@@ -753,37 +973,48 @@ class SmartDataManager:
             symbol: סימבול המניה
             indicator: סוג האינדיקטור (rsi, macd, bollinger, all)
             days: מספר ימים נדרש
+            columns: עמודות ספציפיות (גובר על indicator)
             
         Returns:
             DataFrame עם אינדיקטורים טכניים
         """
         try:
-            # בדיקה בנתונים מקומיים
-            local_file = self.technical_dir / str(indicator) / "daily" / f"{symbol.upper()}.csv.gz"
-            if local_file.exists():
-                df = self._decompress_data(local_file.read_bytes())
-                if len(df) >= days:
-                    return df.head(days)
-            
-            # אם אין נתונים מקומיים, חישוב מהנתונים הבסיסיים
-            price_data = self.get_stock_data(symbol, days)
+            wanted = columns or INDICATOR_COLUMNS.get(indicator)
+
+            # בדיקה בטבלה הרחבה המקומית - נטענות רק העמודות המבוקשות
+            local = self.indicator_store.read(symbol, wanted)
+            if local is not None:
+                local = self._select_indicator_rows(local, wanted, days)
+                if len(local) >= days:
+                    return local
+            
+            # אם אין נתונים מקומיים, חישוב מהנתונים הבסיסיים - עם היסטוריית חימום
+            # לחלון הארוך ביותר (sma_200), כך שכל העמודות נשמרות מלאות פעם אחת
+            price_data = self.get_stock_data(symbol, days + INDICATOR_WARMUP_BARS)
             if price_data is None or price_data.empty:
                 return None
             
-            # חישוב אינדיקטורים
-            indicators = self._calculate_technical_indicators(price_data, indicator)
-            
-            # שמירה מקומית
+            # חישוב כל האינדיקטורים (מיושרים לאינדקס המחירים) ושמירה בקובץ יחיד
+            indicators = self._calculate_technical_indicators(price_data, 'all', dropna=False)
+            if indicators.empty:
+                return indicators
             self._save_technical_data(symbol, indicator, indicators)
-            
-            return indicators
+            return self._select_indicator_rows(indicators, wanted, days)
             
         except Exception as e:
             logger.error(f"שגיאה בחישוב אינדיקטורים עבור {symbol}: {e}")
             return None
     
+    @staticmethod
+    def _select_indicator_rows(indicators: pd.DataFrame, columns: Optional[List[str]],
+                               days: int) -> pd.DataFrame:
+        """העמודות המבוקשות, days השורות המלאות האחרונות - מהחדש לישן (כמו get_stock_data)"""
+        if columns is not None:
+            indicators = indicators[[col for col in columns if col in indicators.columns]]
+        return indicators.sort_index(ascending=False).dropna().head(days)
+    
     def _calculate_technical_indicators(self, price_data: pd.DataFrame, 
-                                      indicator: str) -> pd.DataFrame:
+                                      indicator: str, dropna: bool = True) -> pd.DataFrame:
         """חישוב אינדיקטורים טכניים"""
         try:
             if price_data.empty or len(price_data) < 20:
@@ -800,13 +1031,14 @@ class SmartDataManager:
             # ניסיון להשתמש ב-TA-Lib
             try:
                 import talib
-                return self._calculate_talib_indicators(price_data, indicator)
+                result = self._calculate_talib_indicators(price_data, indicator)
             except (ImportError, ModuleNotFoundError):
                 logger.info("TA-Lib לא מותקן, משתמש בספריית ta")
-                return self._calculate_ta_indicators(price_data, indicator)
+                result = self._calculate_ta_indicators(price_data, indicator)
             except Exception as e:
                 logger.warning(f"TA-Lib נכשל, משתמש בספריית ta: {e}")
-                return self._calculate_ta_indicators(price_data, indicator)
+                result = self._calculate_ta_indicators(price_data, indicator)
+            return result.dropna() if dropna else result
                 
         except Exception as e:
             logger.error(f"שגיאה בחישוב אינדיקטורים עבור {indicator}: {e}")
@@ -816,6 +1048,8 @@ class SmartDataManager:
         """חישוב אינדיקטורים באמצעות TA-Lib"""
         import talib
         
+        # TA-Lib מקבל רק מערכי double (המחירים בזיכרון יכולים להיות float32)
+        price_data = price_data.astype({col: np.float64 for col in ('high', 'low', 'close')})
         result = pd.DataFrame(index=price_data.index)
         
         if indicator == 'all' or indicator == 'rsi':
@@ -864,7 +1098,7 @@ class SmartDataManager:
             result['adx'] = talib.ADX(price_data['high'].values, price_data['low'].values, 
                                      price_data['close'].values, timeperiod=14)
         
-        return result.dropna()
+        return result
     
     def _calculate_ta_indicators(self, price_data: pd.DataFrame, indicator: str) -> pd.DataFrame:
         """חישוב אינדיקטורים באמצעות ספריית ta"""
@@ -913,60 +1147,17 @@ class SmartDataManager:
         if indicator == 'all' or indicator == 'adx':
             result['adx'] = ta.trend.ADXIndicator(price_data['high'], price_data['low'], price_data['close']).adx()
         
-        return result.dropna()
+        return result
     
 
     
     def _save_technical_data(self, symbol: str, indicator: str, data: pd.DataFrame):
-        """שמירת נתוני אינדיקטורים טכניים"""
+        """שמירת נתוני אינדיקטורים טכניים - כתיבה יחידה לטבלה הרחבה של המניה"""
         try:
-            # שמירה לכל אינדיקטור בנפרד
-            for col in data.columns:
-                if col != 'date' and not pd.isna(data[col]).all():
-                    # יצירת DataFrame נפרד לכל אינדיקטור
-                    indicator_data = pd.DataFrame({
-                        'date': data.index,
-                        'symbol': symbol,
-                        'value': data[col],
-                        'indicator': col
-                    })
-                    
-                    # הסרת שורות עם NaN
-                    indicator_data = indicator_data.dropna()
-                    
-                    if not indicator_data.empty:
-                        # שמירה בתיקייה הנכונה לפי סוג האינדיקטור
-                        if 'rsi' in col.lower():
-                            indicator_dir = self.technical_dir / "rsi" / "daily"
-                        elif 'macd' in col.lower():
-                            indicator_dir = self.technical_dir / "macd" / "daily"
-                        elif 'bollinger' in col.lower() or 'bb_' in col.lower():
-                            indicator_dir = self.technical_dir / "bollinger" / "daily"
-                        elif 'sma' in col.lower():
-                            indicator_dir = self.technical_dir / "sma" / "daily"
-                        elif 'ema' in col.lower():
-                            indicator_dir = self.technical_dir / "ema" / "daily"
-                        elif 'stoch' in col.lower():
-                            indicator_dir = self.technical_dir / "stochastic" / "daily"
-                        elif 'williams' in col.lower():
-                            indicator_dir = self.technical_dir / "williams_r" / "daily"
-                        elif 'cci' in col.lower():
-                            indicator_dir = self.technical_dir / "cci" / "daily"
-                        elif 'atr' in col.lower():
-                            indicator_dir = self.technical_dir / "atr" / "daily"
-                        elif 'adx' in col.lower():
-                            indicator_dir = self.technical_dir / "adx" / "daily"
-                        else:
-                            # ברירת מחדל - שמירה בתיקיית all
-                            indicator_dir = self.technical_dir / "all" / "daily"
-                        
-                        indicator_dir.mkdir(parents=True, exist_ok=True)
-                        file_path = indicator_dir / f"{symbol.upper()}.csv.gz"
-                        compressed_data = self._compress_data(indicator_data)
-                        
-                        with open(file_path, 'wb') as f:
-                            f.write(compressed_data)
-            
+            columns = [col for col in data.columns if col != 'date' and not pd.isna(data[col]).all()]
+            if not columns:
+                return
+            self.indicator_store.write(symbol, data[columns])
             logger.info(f"נשמרו אינדיקטורים טכניים עבור {symbol}")
             
         except Exception as e:
@@ -989,13 +1180,13 @@ class SmartDataManager:
             if local_file.exists():
                 df = self._decompress_data(local_file.read_bytes())
                 if len(df) >= days:
-                    return df.head(days)
+                    return self._compact_news(df.head(days))
             
             # שליפה מ-API
             news_data = self._fetch_news_data(symbol, days)
             if news_data is not None and not news_data.empty:
                 self._save_news_data(symbol, news_data)
-                return news_data
+                return self._compact_news(news_data)
             
             return None
             
@@ -1003,6 +1194,10 @@ class SmartDataManager:
             logger.error(f"שגיאה בשליפת חדשות עבור {symbol}: {e}")
             return None
     
+    def _compact_news(self, data: pd.DataFrame) -> pd.DataFrame:
+        """פריים חדשות עם מחרוזות interned ו-category (כשהייצוג החסכוני מופעל)"""
+        return compact_news(data) if self.compact_memory else data
+
     def _fetch_news_data(self, symbol: str, days: int) -> Optional[pd.DataFrame]:
         """שליפת נתוני חדשות מ-API"""
         try:
@@ -0,0 +1,297 @@
+"""
+Agent Tracing - מעקב spans אחר הערכת מניות
+==========================================
+
+כל קריאה ל-AlphaScoreEngine.evaluate נפתחת ב-span של הערכת המניה, ובתוכו span
+לכל סוכן עם שלושה שלבים: fetch (טעינת הסוכן והכנת הנתונים), compute (analyze)
+ו-post_process (חילוץ הציון ושקלול). לכל span נמדדים זמן ושינוי ה-RSS המקסימלי
+של התהליך; לכל סוכן ושלב נצברת היסטוגרמת השהיה עם p50/p95/p99.
+הסיכום מיוצא ל-JSON ומוצג בדשבורד הניטור.
+"""
+
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_PATH = os.path.join("log", "agent_traces.json")
+
+AGENT_PHASES = ("fetch", "compute", "post_process")
+
+# מדדי Prometheus של המנוע (utils.metrics)
+_METRICS = get_registry()
+AGENT_LATENCY = _METRICS.histogram("charles_agent_latency_seconds", "זמן ריצת סוכן בהערכת מניה", ["agent"])
+AGENT_ERRORS = _METRICS.counter("charles_agent_errors_total", "שגיאות סוכנים בהערכת מניה", ["agent"])
+EVALUATION_LATENCY = _METRICS.histogram("charles_evaluation_latency_seconds", "זמן הערכת מניה מלאה")
+
+
+class LatencyHistogram:
+    """היסטוגרמת השהיה עם דליים קבועים ואחוזונים מדגימה אחרונה"""
+
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self, max_samples: int = 10000):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        value_ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect_left(self.BUCKETS_MS, value_ms)] += 1
+            self.samples.append(value_ms)
+            self.count += 1
+            self.total_ms += value_ms
+            self.max_ms = max(self.max_ms, value_ms)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            samples = np.fromiter(self.samples, dtype=float)
+            counts = list(self.counts)
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+        if not count:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(list(self.BUCKETS_MS) + ["+Inf"], counts):
+            cumulative += bucket_count
+            buckets[str(bound)] = cumulative
+        return {
+            "count": count,
+            "mean_ms": round(total_ms / count, 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(max_ms, 3),
+            "buckets": buckets,
+        }
+
+
+def peak_rss_mb() -> float:
+    """ה-RSS המקסימלי של התהליך עד כה (MB)"""
+    try:
+        import resource
+    except ImportError:  # Windows - אין resource; psutil מחזיר את שיא ה-working set
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+        except Exception:
+            return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ב-macOS ru_maxrss בבתים, ב-Linux ב-KB
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    """קטע זמן בעץ ההערכה"""
+
+    __slots__ = ("name", "attrs", "children", "started_at", "duration_ms", "rss_delta_mb", "error", "_start")
+
+    def __init__(self, name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.children: List["Span"] = []
+        self.started_at = time.time()
+        self.duration_ms = 0.0
+        self.rss_delta_mb = 0.0
+        self.error = None
+        self._start = time.perf_counter()
+
+    def child(self, name: str) -> Optional["Span"]:
+        return next((span for span in self.children if span.name == name), None)
+
+    def to_dict(self) -> Dict:
+        data = {
+            "name": self.name,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "rss_delta_mb": round(self.rss_delta_mb, 3),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [span.to_dict() for span in self.children]
+        return data
+
+
+class _AgentStats:
+    """מצטברים לסוכן אחד: השהיה כוללת, השהיה לשלב, שינויי RSS ושגיאות"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.phases = {phase: LatencyHistogram() for phase in AGENT_PHASES}
+        self.rss_delta_total_mb = 0.0
+        self.rss_delta_max_mb = 0.0
+        self.errors = 0
+
+    def summary(self) -> Dict:
+        return {
+            **{key: value for key, value in self.latency.summary().items() if key != "buckets"},
+            "phases": {phase: {key: value for key, value in histogram.summary().items() if key != "buckets"}
+                       for phase, histogram in self.phases.items() if histogram.count},
+            "rss_delta_total_mb": round(self.rss_delta_total_mb, 3),
+            "rss_delta_max_mb": round(self.rss_delta_max_mb, 3),
+            "errors": self.errors,
+        }
+
+
+class AgentTracer:
+    """
+    אוסף spans של הערכות מניות וסטטיסטיקות לכל סוכן
+
+    הגדרות (config):
+        enabled: הפעלת המעקב (ברירת מחדל True)
+        max_traces: מספר עצי ההערכה האחרונים שנשמרים לייצוא (ברירת מחדל 50)
+        export_path: קובץ ה-JSON לייצוא
+        performance_log: כתיבת זמן וזיכרון של כל סוכן ל-PerformanceLogger
+    """
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {}
+        self.enabled = self.config.get("enabled", True)
+        self.export_path = self.config.get("export_path", DEFAULT_TRACE_PATH)
+        self.performance_log = self.config.get("performance_log", True)
+        self.traces = deque(maxlen=self.config.get("max_traces", 50))
+        self.evaluations = LatencyHistogram()
+        self.agents: Dict[str, _AgentStats] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._performance_logger = None
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """
+        span חדש בתוך ה-span הפתוח (אם יש). span של סוכן מסומן ב-agent=True;
+        span שורש (הערכת מניה) נשמר ב-traces בסיומו.
+        """
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        span = Span(name, attrs)
+        if stack:
+            stack[-1].children.append(span)
+        stack.append(span)
+        rss_before = peak_rss_mb()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration_ms = (time.perf_counter() - span._start) * 1000.0
+            span.rss_delta_mb = max(0.0, peak_rss_mb() - rss_before)
+            stack.pop()
+            if attrs.get("agent"):
+                self._record_agent(span)
+            if not stack:
+                self.evaluations.observe(span.duration_ms / 1000.0)
+                EVALUATION_LATENCY.observe(span.duration_ms / 1000.0)
+                with self._lock:
+                    self.traces.append(span)
+
+    def _record_agent(self, span: Span):
+        with self._lock:
+            stats = self.agents.setdefault(span.name, _AgentStats())
+        stats.latency.observe(span.duration_ms / 1000.0)
+        AGENT_LATENCY.observe(span.duration_ms / 1000.0, agent=span.name)
+        for phase in span.children:
+            if phase.name in stats.phases:
+                stats.phases[phase.name].observe(phase.duration_ms / 1000.0)
+        with self._lock:
+            stats.rss_delta_total_mb += span.rss_delta_mb
+            stats.rss_delta_max_mb = max(stats.rss_delta_max_mb, span.rss_delta_mb)
+            failed = bool(span.error or span.attrs.get("status") == "error")
+            stats.errors += failed
+        if failed:
+            AGENT_ERRORS.inc(agent=span.name)
+        if self.performance_log:
+            self._log_performance(span)
+
+    def _log_performance(self, span: Span):
+        """העברת זמן הביצוע ושינוי הזיכרון ל-PerformanceLogger (log/performance.log)"""
+        try:
+            if self._performance_logger is None:
+                from utils.logger import get_performance_logger
+                self._performance_logger = get_performance_logger()
+            self._performance_logger.log_execution_time(
+                span.name, span.attrs.get("symbol", ""), span.duration_ms / 1000.0, score=span.attrs.get("score"))
+            self._performance_logger.log_memory_usage(span.name, span.rss_delta_mb)
+        except Exception as e:
+            logger.debug(f"כתיבה ל-PerformanceLogger נכשלה: {e}")
+            self.performance_log = False
+
+    # ---------- סיכום וייצוא ----------
+
+    def agent_summary(self) -> Dict[str, Dict]:
+        """סטטיסטיקות לכל סוכן, מהאיטי ביותר (p95) למהיר"""
+        with self._lock:
+            agents = dict(self.agents)
+        summary = {name: stats.summary() for name, stats in agents.items()}
+        return dict(sorted(summary.items(), key=lambda item: item[1].get("p95_ms", 0), reverse=True))
+
+    def summary(self) -> Dict:
+        with self._lock:
+            traces = list(self.traces)
+        return {
+            "generated_at": datetime.now().isoformat(),
+            "evaluations": {key: value for key, value in self.evaluations.summary().items() if key != "buckets"},
+            "agents": self.agent_summary(),
+            "recent_traces": [span.to_dict() for span in traces],
+        }
+
+    def export(self, path: Optional[str] = None) -> Path:
+        """כתיבת הסיכום ל-JSON (החלפה אטומית)"""
+        path = Path(path or self.export_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.summary(), f, ensure_ascii=False, indent=2, default=str)
+            os.replace(tmp_name, path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return path
+
+    def reset(self):
+        with self._lock:
+            self.traces.clear()
+            self.agents.clear()
+            self.evaluations = LatencyHistogram()
+
+
+def load_trace_summary(path: str = DEFAULT_TRACE_PATH) -> Optional[Dict]:
+    """טעינת סיכום שיוצא (None אם הקובץ חסר)"""
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)